@@ -518,6 +518,7 @@ FROM silver.olist_orders o
 JOIN silver.olist_customers c ON o.customer_id = c.customer_id
 JOIN silver.api_weather_history w ON c.customer_state = w.state_code
     AND o.order_purchase_date = w.weather_date
+    AND w.location_type = 'state_capital'
 GROUP BY w.weather_category
 ORDER BY order_count DESC;
 
@@ -541,7 +542,7 @@ SELECT
     ROUND(SUM(i.item_total * COALESCE(cr.exchange_rate, 0.25)), 2) as revenue_usd_approx
 FROM silver.olist_orders o
 JOIN silver.olist_order_items i ON o.order_id = i.order_id
-LEFT JOIN silver.api_currency_rates cr ON o.order_purchase_date = cr.rate_date
+LEFT JOIN silver.api_currency_rates cr ON o.order_purchase_date = cr.rate_date AND cr.target_currency = 'USD'
 GROUP BY month
 ORDER BY month;
 
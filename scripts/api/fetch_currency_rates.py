@@ -1,12 +1,14 @@
 """
 ================================================================================
-Description: Fetch historical BRL to USD exchange rates from Frankfurter API
+Description: Fetch historical BRL exchange rates from Frankfurter API
 ================================================================================
 
 PURPOSE:
 --------
-Fetches historical daily exchange rates (BRL to USD) for the Olist dataset
-period (Sep 2016 - Oct 2018) and loads them into bronze.api_currency_rates.
+Fetches historical daily exchange rates (BRL to USD, EUR, ...) for the Olist
+dataset period (Sep 2016 - Oct 2018) and loads them into
+bronze.api_currency_rates (one row per date and target currency).
+scripts/pipeline/convert_currency.py converts the Gold order values with them.
 
 API DETAILS:
 ------------
@@ -19,11 +21,20 @@ API DETAILS:
 USAGE:
 ------
 python fetch_currency_rates.py
+python fetch_currency_rates.py --force     # reload even if the payload is unchanged
+python fetch_currency_rates.py --currencies USD,EUR,GBP
+python fetch_currency_rates.py --queue     # one job per currency and date range,
+                                           # run by work_queue.py workers
 
 PREREQUISITES:
 --------------
 pip install requests psycopg2-binary
 
+CHANGE DETECTION:
+-----------------
+The fetched payload is hashed (see load_manifest.py). If it matches the last
+load recorded in bronze.dwh_load_manifest, the table is left untouched.
+
 NOTE:
 -----
 The API returns rates in chunks, so we fetch in yearly batches to avoid
@@ -32,10 +43,13 @@ timeouts and manage data efficiently.
 ================================================================================
 """
 
+import argparse
 import requests
 import psycopg2
 import time
 from dotenv import load_dotenv
+from load_manifest import SpooledCsv, is_unchanged, payload_hash, record_load, record_unchanged
+from work_queue import enqueue, print_enqueued
 import os
 
 load_dotenv()
@@ -56,7 +70,7 @@ DB_CONFIG = {
 # API settings
 API_BASE_URL = "https://api.frankfurter.app"
 BASE_CURRENCY = "BRL"
-TARGET_CURRENCY = "USD"
+TARGET_CURRENCIES = ["USD", "EUR"]
 
 # Date range matching Olist dataset (Sep 2016 - Oct 2018)
 DATE_RANGES = [
@@ -65,33 +79,55 @@ DATE_RANGES = [
     ("2018-01-01", "2018-10-31"),
 ]
 
+# Queue mode (--queue): one job per target currency and DATE_RANGES entry
+CURRENCY_COLUMNS = [
+    "rate_date",
+    "base_currency",
+    "target_currency",
+    "exchange_rate",
+    "dwh_source_file",
+]
+QUEUE_TARGETS = {"currency": {"api_currency_rates": CURRENCY_COLUMNS}}
+QUEUE_SOURCE_REF = {"currency": "api_frankfurter"}
+
 # =============================================================================
 # API FUNCTIONS
 # =============================================================================
 
 
-def fetch_rates_for_range(start_date: str, end_date: str) -> dict:
+def rates_request(start_date: str, end_date: str, currencies: list) -> dict:
+    """
+    Call the Frankfurter API for a date range.
+
+    Returns:
+        The response's "rates" object ({date: {currency: rate}})
+
+    Raises:
+        requests.exceptions.RequestException: On HTTP or network errors
+    """
+    url = f"{API_BASE_URL}/{start_date}..{end_date}"
+    params = {"from": BASE_CURRENCY, "to": ",".join(currencies)}
+    response = requests.get(url, params=params, timeout=60)
+    response.raise_for_status()
+    return response.json().get("rates", {})
+
+
+def fetch_rates_for_range(start_date: str, end_date: str, currencies: list) -> dict:
     """
     Fetch exchange rates for a date range from Frankfurter API.
 
     Args:
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
+        currencies: Target currency codes
 
     Returns:
-        Dictionary with dates as keys and rates as values
+        Dictionary with dates as keys and {currency: rate} as values
     """
-    url = f"{API_BASE_URL}/{start_date}..{end_date}"
-    params = {"from": BASE_CURRENCY, "to": TARGET_CURRENCY}
-
     print(f"  Fetching {start_date} to {end_date}...")
 
     try:
-        response = requests.get(url, params=params, timeout=60)
-        response.raise_for_status()
-
-        data = response.json()
-        rates = data.get("rates", {})
+        rates = rates_request(start_date, end_date, currencies)
 
         print(f"  ✓ Found {len(rates)} daily rates")
 
@@ -102,32 +138,77 @@ def fetch_rates_for_range(start_date: str, end_date: str) -> dict:
         return {}
 
 
-def fetch_all_rates() -> list:
+def fetch_all_rates(currencies: list) -> list:
     """
     Fetch rates for all configured date ranges.
 
+    Args:
+        currencies: Target currency codes
+
     Returns:
-        List of (date, rate) tuples
+        List of (date, currency, rate) tuples
     """
     all_rates = []
 
     for start_date, end_date in DATE_RANGES:
-        rates_dict = fetch_rates_for_range(start_date, end_date)
+        rates_dict = fetch_rates_for_range(start_date, end_date, currencies)
 
-        for rate_date, currencies in rates_dict.items():
-            # Extract USD rate
-            usd_rate = currencies.get(TARGET_CURRENCY)
-            if usd_rate:
-                all_rates.append((rate_date, usd_rate))
+        for rate_date, day_rates in rates_dict.items():
+            for currency in currencies:
+                rate = day_rates.get(currency)
+                if rate:
+                    all_rates.append((rate_date, currency, rate))
 
         time.sleep(1)  # Be nice to the API
 
-    # Sort by date
-    all_rates.sort(key=lambda x: x[0])
+    # Sort by date, then currency
+    all_rates.sort(key=lambda x: (x[0], x[1]))
 
     return all_rates
 
 
+# =============================================================================
+# QUEUE MODE
+# =============================================================================
+
+
+def queue_jobs(currencies: list) -> list:
+    """
+    One job per target currency and date range.
+
+    Returns:
+        List of (job_key, payload) for work_queue.enqueue()
+    """
+    return [
+        (
+            f"{currency}|{start_date}",
+            {"currency": currency, "start_date": start_date, "end_date": end_date},
+        )
+        for currency in currencies
+        for start_date, end_date in DATE_RANGES
+    ]
+
+
+def run_job(source: str, payload: dict) -> dict:
+    """
+    Fetch one queued currency/date range (called by work_queue.py workers).
+
+    Returns:
+        {"api_currency_rates": SpooledCsv}
+    """
+    currency = payload["currency"]
+    rates = rates_request(payload["start_date"], payload["end_date"], [currency])
+    if not rates:
+        raise ValueError("Empty rates response")
+
+    out = SpooledCsv()
+    for rate_date in sorted(rates):
+        rate = rates[rate_date].get(currency)
+        if rate:
+            out.writerow([rate_date, BASE_CURRENCY, currency, str(rate), "api_frankfurter"])
+    return {"api_currency_rates": out}
+
+
 # =============================================================================
 # DATABASE FUNCTIONS
 # =============================================================================
@@ -150,7 +231,7 @@ def insert_rates(cursor, rates: list):
 
     Args:
         cursor: Database cursor
-        rates: List of (date, rate) tuples
+        rates: List of (date, currency, rate) tuples
     """
     insert_query = """
         INSERT INTO bronze.api_currency_rates (
@@ -167,25 +248,27 @@ def insert_rates(cursor, rates: list):
 
     source_file = "api_frankfurter"
 
-    for rate_date, rate_value in rates:
+    for rate_date, currency, rate_value in rates:
         cursor.execute(
             insert_query,
             (
                 rate_date,
                 BASE_CURRENCY,
-                TARGET_CURRENCY,
+                currency,
                 str(rate_value),
                 source_file,
             ),
         )
 
 
-def load_to_database(rates: list):
+def load_to_database(rates: list, content_hash: str = None, byte_size: int = None):
     """
     Load rates into the Bronze layer table.
 
     Args:
-        rates: List of (date, rate) tuples
+        rates: List of (date, currency, rate) tuples
+        content_hash: Payload hash recorded in bronze.dwh_load_manifest
+        byte_size: Canonical payload size in bytes
     """
     print("\nLoading to database...")
 
@@ -197,6 +280,15 @@ def load_to_database(rates: list):
         # Truncate and load
         truncate_table(cursor)
         insert_rates(cursor, rates)
+        if content_hash:
+            record_load(
+                cursor,
+                "api_currency_rates",
+                "api_frankfurter",
+                content_hash,
+                len(rates),
+                byte_size,
+            )
 
         conn.commit()
         print(f"  ✓ Inserted {len(rates)} exchange rate records")
@@ -212,6 +304,31 @@ def load_to_database(rates: list):
             conn.close()
 
 
+def source_unchanged(content_hash: str) -> bool:
+    """
+    Check the payload against bronze.dwh_load_manifest.
+
+    If it is identical to the last load, the check is recorded and True is
+    returned so the caller can skip the TRUNCATE + INSERT.
+
+    Args:
+        content_hash: Payload hash from payload_hash()
+
+    Returns:
+        True if the payload is unchanged since the last load
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        unchanged = is_unchanged(cursor, "api_currency_rates", content_hash)
+        if unchanged:
+            record_unchanged(cursor, "api_currency_rates")
+        conn.commit()
+        return unchanged
+    finally:
+        conn.close()
+
+
 # =============================================================================
 # VERIFICATION
 # =============================================================================
@@ -224,41 +341,50 @@ def verify_load():
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Count and date range
+    # Count and date range per currency
     cursor.execute("""
         SELECT 
+            target_currency,
             COUNT(*) as total_records,
             MIN(rate_date) as min_date,
             MAX(rate_date) as max_date,
             MIN(exchange_rate::numeric) as min_rate,
             MAX(exchange_rate::numeric) as max_rate,
             AVG(exchange_rate::numeric) as avg_rate
-        FROM bronze.api_currency_rates;
+        FROM bronze.api_currency_rates
+        GROUP BY target_currency
+        ORDER BY target_currency;
     """)
 
-    row = cursor.fetchone()
-    print("\n  Summary:")
-    print("  " + "-" * 40)
-    print(f"  Total records: {row[0]}")
-    print(f"  Date range: {row[1]} to {row[2]}")
-    print(f"  Rate range: {row[3]:.4f} to {row[4]:.4f}")
-    print(f"  Average rate: {row[5]:.4f}")
+    for row in cursor.fetchall():
+        print(f"\n  Summary BRL → {row[0]}:")
+        print("  " + "-" * 40)
+        print(f"  Total records: {row[1]}")
+        print(f"  Date range: {row[2]} to {row[3]}")
+        print(f"  Rate range: {row[4]:.4f} to {row[5]:.4f}")
+        print(f"  Average rate: {row[6]:.4f}")
 
     # Monthly averages
     cursor.execute("""
         SELECT 
             TO_CHAR(rate_date::date, 'YYYY-MM') as month,
+            target_currency,
             ROUND(AVG(exchange_rate::numeric), 4) as avg_rate
         FROM bronze.api_currency_rates
-        GROUP BY TO_CHAR(rate_date::date, 'YYYY-MM')
-        ORDER BY month
-        LIMIT 6;
+        WHERE TO_CHAR(rate_date::date, 'YYYY-MM') IN (
+            SELECT DISTINCT TO_CHAR(rate_date::date, 'YYYY-MM')
+            FROM bronze.api_currency_rates
+            ORDER BY 1
+            LIMIT 6
+        )
+        GROUP BY TO_CHAR(rate_date::date, 'YYYY-MM'), target_currency
+        ORDER BY month, target_currency;
     """)
 
     print("\n  Monthly average rates (first 6 months):")
     print("  " + "-" * 30)
     for row in cursor.fetchall():
-        print(f"  {row[0]}: 1 BRL = {row[1]} USD")
+        print(f"  {row[0]}: 1 BRL = {row[2]} {row[1]}")
 
     conn.close()
 
@@ -270,17 +396,39 @@ def verify_load():
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Fetch BRL exchange rates")
+    parser.add_argument(
+        "--force", action="store_true", help="Reload even if the payload is unchanged"
+    )
+    parser.add_argument(
+        "--currencies",
+        type=lambda text: [c.strip().upper() for c in text.split(",") if c.strip()],
+        default=TARGET_CURRENCIES,
+        help=f"Comma-separated target currencies (default: {','.join(TARGET_CURRENCIES)})",
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Enqueue currency/date-range jobs for work_queue.py workers instead of fetching",
+    )
+    args = parser.parse_args()
+
     print("=" * 60)
     print("FETCH CURRENCY EXCHANGE RATES")
     print("=" * 60)
     print("Source: Frankfurter API (European Central Bank data)")
-    print(f"Conversion: {BASE_CURRENCY} → {TARGET_CURRENCY}")
+    print(f"Conversion: {BASE_CURRENCY} → {', '.join(args.currencies)}")
     print(f"Period: {DATE_RANGES[0][0]} to {DATE_RANGES[-1][1]}")
     print("=" * 60)
 
+    if args.queue:
+        jobs = queue_jobs(args.currencies)
+        print_enqueued("currency", enqueue("currency", jobs), len(jobs))
+        return
+
     # Fetch from API
     print("\nFetching exchange rates from API...")
-    rates = fetch_all_rates()
+    rates = fetch_all_rates(args.currencies)
 
     if not rates:
         print("\n✗ No rates fetched. Exiting.")
@@ -288,8 +436,15 @@ def main():
 
     print(f"\nTotal daily rates fetched: {len(rates)}")
 
+    # Skip the reload if the payload is identical to the last load
+    content_hash, byte_size = payload_hash(rates)
+    if not args.force and source_unchanged(content_hash):
+        print("\n✓ Payload unchanged since last load - skipping reload")
+        print("  (use --force to reload anyway)")
+        return
+
     # Load to database
-    load_to_database(rates)
+    load_to_database(rates, content_hash, byte_size)
 
     # Verify
     verify_load()
@@ -18,19 +18,27 @@ API DETAILS:
 USAGE:
 ------
 python fetch_holidays.py
+python fetch_holidays.py --force     # reload even if the payload is unchanged
 
 PREREQUISITES:
 --------------
 pip install requests psycopg2-binary
 
+CHANGE DETECTION:
+-----------------
+The fetched payload is hashed (see load_manifest.py). If it matches the last
+load recorded in bronze.dwh_load_manifest, the table is left untouched.
+
 ================================================================================
 """
 
+import argparse
 import requests
 import psycopg2
 import time
 import os
 from dotenv import load_dotenv
+from load_manifest import is_unchanged, payload_hash, record_load, record_unchanged
 
 load_dotenv()
 
@@ -172,12 +180,14 @@ def insert_holidays(cursor, holidays: list):
         )
 
 
-def load_to_database(holidays: list):
+def load_to_database(holidays: list, content_hash: str = None, byte_size: int = None):
     """
     Load holidays into the Bronze layer table.
 
     Args:
         holidays: List of holiday dictionaries
+        content_hash: Payload hash recorded in bronze.dwh_load_manifest
+        byte_size: Canonical payload size in bytes
     """
     print("\nLoading to database...")
 
@@ -189,6 +199,15 @@ def load_to_database(holidays: list):
         # Truncate and load
         truncate_table(cursor)
         insert_holidays(cursor, holidays)
+        if content_hash:
+            record_load(
+                cursor,
+                "api_brazil_holidays",
+                "api_nager_date",
+                content_hash,
+                len(holidays),
+                byte_size,
+            )
 
         conn.commit()
         print(f"  ✓ Inserted {len(holidays)} holiday records")
@@ -204,6 +223,31 @@ def load_to_database(holidays: list):
             conn.close()
 
 
+def source_unchanged(content_hash: str) -> bool:
+    """
+    Check the payload against bronze.dwh_load_manifest.
+
+    If it is identical to the last load, the check is recorded and True is
+    returned so the caller can skip the TRUNCATE + INSERT.
+
+    Args:
+        content_hash: Payload hash from payload_hash()
+
+    Returns:
+        True if the payload is unchanged since the last load
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        unchanged = is_unchanged(cursor, "api_brazil_holidays", content_hash)
+        if unchanged:
+            record_unchanged(cursor, "api_brazil_holidays")
+        conn.commit()
+        return unchanged
+    finally:
+        conn.close()
+
+
 # =============================================================================
 # VERIFICATION
 # =============================================================================
@@ -254,6 +298,12 @@ def verify_load():
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Fetch Brazilian public holidays")
+    parser.add_argument(
+        "--force", action="store_true", help="Reload even if the payload is unchanged"
+    )
+    args = parser.parse_args()
+
     print("=" * 60)
     print("FETCH BRAZILIAN HOLIDAYS")
     print("=" * 60)
@@ -272,8 +322,15 @@ def main():
 
     print(f"\nTotal holidays fetched: {len(holidays)}")
 
+    # Skip the reload if the payload is identical to the last load
+    content_hash, byte_size = payload_hash(holidays)
+    if not args.force and source_unchanged(content_hash):
+        print("\n✓ Payload unchanged since last load - skipping reload")
+        print("  (use --force to reload anyway)")
+        return
+
     # Load to database
-    load_to_database(holidays)
+    load_to_database(holidays, content_hash, byte_size)
 
     # Verify
     verify_load()
@@ -9,6 +9,11 @@ Fetches historical daily weather data for all 27 Brazilian state capitals
 for the Olist dataset period (Sep 2016 - Oct 2018) and loads it into
 bronze.api_weather_history.
 
+Additional weather points (e.g. clustered zip-prefix centroids produced by
+scripts/pipeline/build_weather_point_map.py) can be supplied with --points.
+State capitals are always fetched as well: they are the fallback used by the
+Gold layer for zip codes without a nearest-point mapping.
+
 API DETAILS:
 ------------
 - Provider: Open-Meteo (https://open-meteo.com)
@@ -20,18 +25,60 @@ API DETAILS:
 USAGE:
 ------
 python fetch_weather.py
+python fetch_weather.py --force     # reload even if the payload is unchanged
+python fetch_weather.py --points weather_points.csv
+python fetch_weather.py --hourly    # hourly series + daily rollups
+python fetch_weather.py --queue     # enqueue jobs for work_queue.py workers
+
+HOURLY MODE:
+------------
+--hourly requests HOURLY_VARIABLES instead (24x the volume) and loads
+bronze.api_weather_hourly: one row per point per day, each variable stored
+as 24 comma-separated values (slot N = hour N, local time). While each
+location is streamed, the daily columns of bronze.api_weather_history are
+computed from the same hours, so Silver/Gold daily weather is unchanged:
+  temperature_2m_mean / max  mean / max of the hourly temperature
+  precipitation_sum          sum of the hourly precipitation
+  weather_code               dominant (most frequent) hourly code, ties go
+                             to the more severe (higher) code
+Memory stays bounded: only one location's response is held at a time, rows
+go to spooled temp files (on disk past SPOOL_MAX_BYTES) while their hashes
+are computed, and both tables are bulk-loaded with COPY.
+
+QUEUE MODE:
+-----------
+--queue (with or without --hourly) does not fetch anything: it enqueues one
+job per location and --chunk-days date chunk in bronze.dwh_api_job, and
+workers on any number of hosts (python work_queue.py work) fetch and load
+them. Same tables and rollups as above; see work_queue.py.
+
+POINTS FILE FORMAT:
+-------------------
+CSV with header: state,name,lat,lon
+  state - Brazilian state code the point lies in (e.g. 'SP')
+  name  - Label stored in location_name (e.g. 'cluster_0042')
 
 PREREQUISITES:
 --------------
 pip install requests psycopg2-binary
 
+CHANGE DETECTION:
+-----------------
+The fetched payload is hashed (see load_manifest.py). If it matches the last
+load recorded in bronze.dwh_load_manifest, the table is left untouched.
+
 ================================================================================
 """
 
+import argparse
+import csv
 import requests
 import psycopg2
 import time
+from collections import Counter
 from dotenv import load_dotenv
+from load_manifest import SpooledCsv, is_unchanged, payload_hash, record_load, record_unchanged
+from work_queue import date_chunks, enqueue, print_enqueued
 import os
 
 load_dotenv()
@@ -64,6 +111,53 @@ DAILY_VARIABLES = [
     "precipitation_sum",
 ]
 
+# Hourly mode (--hourly): hourly variables the daily columns are rolled up from
+HOURLY_VARIABLES = [
+    "weather_code",
+    "temperature_2m",
+    "precipitation",
+]
+
+HOURLY_COLUMNS = [
+    "latitude",
+    "longitude",
+    "state_code",
+    "location_name",
+    "location_type",
+    "weather_date",
+    "temperature_2m",
+    "precipitation",
+    "weather_code",
+    "dwh_source_file",
+]
+DAILY_COLUMNS = [
+    "latitude",
+    "longitude",
+    "state_code",
+    "location_name",
+    "location_type",
+    "weather_date",
+    "temperature_2m_mean",
+    "temperature_2m_max",
+    "precipitation_sum",
+    "weather_code",
+    "dwh_source_file",
+]
+
+# Queue mode (--queue): days per job, and what each queue source loads
+QUEUE_CHUNK_DAYS = 366
+QUEUE_TARGETS = {
+    "weather": {"api_weather_history": DAILY_COLUMNS},
+    "weather_hourly": {
+        "api_weather_hourly": HOURLY_COLUMNS,
+        "api_weather_history": DAILY_COLUMNS,
+    },
+}
+QUEUE_SOURCE_REF = {
+    "weather": "api_open_meteo",
+    "weather_hourly": "api_open_meteo_hourly",
+}
+
 # All 27 Brazilian state capitals with coordinates
 BRAZIL_STATE_CAPITALS = [
     # North Region
@@ -100,12 +194,141 @@ BRAZIL_STATE_CAPITALS = [
     {"state": "SC", "city": "Florianópolis", "lat": -27.5954, "lon": -48.5480},
 ]
 
+# Location types stored in bronze.api_weather_history.location_type
+LOCATION_TYPE_CAPITAL = "state_capital"
+LOCATION_TYPE_CUSTOM = "custom"
+
+# =============================================================================
+# LOCATION FUNCTIONS
+# =============================================================================
+
+
+def load_points_file(path: str) -> list:
+    """
+    Load additional weather points from a CSV file.
+
+    Args:
+        path: CSV file with columns state,name,lat,lon
+
+    Returns:
+        List of location dictionaries (same shape as BRAZIL_STATE_CAPITALS)
+    """
+    points = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            points.append(
+                {
+                    "state": row["state"].strip().upper(),
+                    "city": row["name"].strip(),
+                    "lat": round(float(row["lat"]), 4),
+                    "lon": round(float(row["lon"]), 4),
+                    "type": LOCATION_TYPE_CUSTOM,
+                }
+            )
+    return points
+
+
+def build_locations(points_file: str = None) -> list:
+    """
+    Build the list of locations to fetch: state capitals plus optional points.
+
+    Points that coincide with a state capital (same lat/lon) are skipped.
+
+    Args:
+        points_file: Optional CSV of additional points
+
+    Returns:
+        List of location dictionaries
+    """
+    locations = [
+        {**capital, "type": LOCATION_TYPE_CAPITAL} for capital in BRAZIL_STATE_CAPITALS
+    ]
+
+    if points_file:
+        seen = {(loc["lat"], loc["lon"]) for loc in locations}
+        for point in load_points_file(points_file):
+            if (point["lat"], point["lon"]) not in seen:
+                seen.add((point["lat"], point["lon"]))
+                locations.append(point)
+
+    return locations
+
+
 # =============================================================================
 # API FUNCTIONS
 # =============================================================================
 
 
-def fetch_weather_for_location(state: str, lat: float, lon: float) -> list:
+def archive_request(params: dict, timeout: int) -> dict:
+    """
+    Call the Open-Meteo Archive API.
+
+    Args:
+        params: Query parameters
+        timeout: Request timeout in seconds
+
+    Returns:
+        Parsed JSON response
+
+    Raises:
+        requests.exceptions.RequestException: On HTTP or network errors
+    """
+    response = requests.get(API_BASE_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def daily_records(state: str, lat: float, lon: float, location_name: str,
+                  location_type: str, daily: dict) -> list:
+    """
+    Turn a response's "daily" object into weather records.
+
+    Returns:
+        List of daily weather records
+    """
+    # Extract arrays
+    dates = daily.get("time", [])
+    weather_codes = daily.get("weather_code", [])
+    temp_means = daily.get("temperature_2m_mean", [])
+    temp_maxs = daily.get("temperature_2m_max", [])
+    precip_sums = daily.get("precipitation_sum", [])
+
+    # Combine into records
+    records = []
+    for i in range(len(dates)):
+        records.append(
+            {
+                "latitude": str(lat),
+                "longitude": str(lon),
+                "state_code": state,
+                "location_name": location_name,
+                "location_type": location_type,
+                "weather_date": dates[i],
+                "temperature_2m_mean": str(temp_means[i])
+                if temp_means[i] is not None
+                else None,
+                "temperature_2m_max": str(temp_maxs[i])
+                if temp_maxs[i] is not None
+                else None,
+                "precipitation_sum": str(precip_sums[i])
+                if precip_sums[i] is not None
+                else None,
+                "weather_code": str(weather_codes[i])
+                if weather_codes[i] is not None
+                else None,
+            }
+        )
+
+    return records
+
+
+def fetch_weather_for_location(
+    state: str,
+    lat: float,
+    lon: float,
+    location_name: str = None,
+    location_type: str = LOCATION_TYPE_CAPITAL,
+) -> list:
     """
     Fetch weather data for a specific location from Open-Meteo API.
 
@@ -113,6 +336,8 @@ def fetch_weather_for_location(state: str, lat: float, lon: float) -> list:
         state: Brazilian state code (e.g., 'SP')
         lat: Latitude
         lon: Longitude
+        location_name: City or point label (e.g., 'São Paulo', 'cluster_0042')
+        location_type: 'state_capital' or 'custom'
 
     Returns:
         List of daily weather records
@@ -127,61 +352,31 @@ def fetch_weather_for_location(state: str, lat: float, lon: float) -> list:
     }
 
     try:
-        response = requests.get(API_BASE_URL, params=params, timeout=60)
-        response.raise_for_status()
-
-        data = response.json()
-        daily = data.get("daily", {})
-
-        # Extract arrays
-        dates = daily.get("time", [])
-        weather_codes = daily.get("weather_code", [])
-        temp_means = daily.get("temperature_2m_mean", [])
-        temp_maxs = daily.get("temperature_2m_max", [])
-        precip_sums = daily.get("precipitation_sum", [])
-
-        # Combine into records
-        records = []
-        for i in range(len(dates)):
-            records.append(
-                {
-                    "latitude": str(lat),
-                    "longitude": str(lon),
-                    "state_code": state,
-                    "weather_date": dates[i],
-                    "temperature_2m_mean": str(temp_means[i])
-                    if temp_means[i] is not None
-                    else None,
-                    "temperature_2m_max": str(temp_maxs[i])
-                    if temp_maxs[i] is not None
-                    else None,
-                    "precipitation_sum": str(precip_sums[i])
-                    if precip_sums[i] is not None
-                    else None,
-                    "weather_code": str(weather_codes[i])
-                    if weather_codes[i] is not None
-                    else None,
-                }
-            )
-
-        return records
+        data = archive_request(params, timeout=60)
+        return daily_records(state, lat, lon, location_name, location_type, data.get("daily", {}))
 
     except requests.exceptions.RequestException as e:
         print(f"    ✗ Error: {e}")
         return []
 
 
-def fetch_all_weather() -> list:
+def fetch_all_weather(locations: list = None) -> list:
     """
-    Fetch weather for all Brazilian state capitals.
+    Fetch weather for a set of locations.
+
+    Args:
+        locations: Location dictionaries (defaults to the 27 state capitals)
 
     Returns:
         Combined list of all weather records
     """
+    if locations is None:
+        locations = build_locations()
+
     all_records = []
-    total_locations = len(BRAZIL_STATE_CAPITALS)
+    total_locations = len(locations)
 
-    for idx, location in enumerate(BRAZIL_STATE_CAPITALS, 1):
+    for idx, location in enumerate(locations, 1):
         state = location["state"]
         city = location["city"]
         lat = location["lat"]
@@ -189,7 +384,9 @@ def fetch_all_weather() -> list:
 
         print(f"  [{idx}/{total_locations}] {state} - {city}...", end=" ")
 
-        records = fetch_weather_for_location(state, lat, lon)
+        records = fetch_weather_for_location(
+            state, lat, lon, city, location.get("type", LOCATION_TYPE_CAPITAL)
+        )
 
         if records:
             print(f"✓ {len(records)} days")
@@ -203,6 +400,215 @@ def fetch_all_weather() -> list:
     return all_records
 
 
+def fetch_hourly_for_location(lat: float, lon: float) -> dict:
+    """
+    Fetch the hourly series for one location (hourly mode).
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+
+    Returns:
+        The response's "hourly" object (time + one list per variable),
+        empty on error
+    """
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": START_DATE,
+        "end_date": END_DATE,
+        "hourly": ",".join(HOURLY_VARIABLES),
+        "timezone": "America/Sao_Paulo",
+    }
+
+    try:
+        return archive_request(params, timeout=120).get("hourly", {})
+
+    except requests.exceptions.RequestException as e:
+        print(f"    ✗ Error: {e}")
+        return {}
+
+
+def format_value(value) -> str:
+    """Hourly slot value as text ('' for missing)."""
+    return "" if value is None else str(value)
+
+
+def dominant_code(codes: list):
+    """Most frequent weather code, ties go to the more severe (higher) code."""
+    counts = Counter(code for code in codes if code is not None)
+    if not counts:
+        return None
+    return max(counts.items(), key=lambda item: (item[1], item[0]))[0]
+
+
+def rollup_hourly(location: dict, hourly: dict):
+    """
+    Group one location's hourly series by local date.
+
+    Args:
+        location: Location dictionary
+        hourly: Response "hourly" object from fetch_hourly_for_location()
+
+    Yields:
+        (hourly_row, daily_row) per day, both in HOURLY_COLUMNS /
+        DAILY_COLUMNS order
+    """
+    times = hourly.get("time", [])
+    temps = hourly.get("temperature_2m", [])
+    precips = hourly.get("precipitation", [])
+    codes = hourly.get("weather_code", [])
+    prefix = [
+        str(location["lat"]),
+        str(location["lon"]),
+        location["state"],
+        location["city"],
+        location.get("type", LOCATION_TYPE_CAPITAL),
+    ]
+
+    i = 0
+    while i < len(times):
+        day = times[i][:10]
+        slots = {"t": [None] * 24, "p": [None] * 24, "c": [None] * 24}
+        while i < len(times) and times[i].startswith(day):
+            hour = int(times[i][11:13])
+            slots["t"][hour] = temps[i]
+            slots["p"][hour] = precips[i]
+            slots["c"][hour] = codes[i]
+            i += 1
+
+        present_t = [t for t in slots["t"] if t is not None]
+        present_p = [p for p in slots["p"] if p is not None]
+        code = dominant_code(slots["c"])
+
+        hourly_row = prefix + [
+            day,
+            ",".join(format_value(t) for t in slots["t"]),
+            ",".join(format_value(p) for p in slots["p"]),
+            ",".join(format_value(c) for c in slots["c"]),
+            "api_open_meteo_hourly",
+        ]
+        daily_row = prefix + [
+            day,
+            str(round(sum(present_t) / len(present_t), 1)) if present_t else None,
+            str(max(present_t)) if present_t else None,
+            str(round(sum(present_p), 2)) if present_p else None,
+            str(code) if code is not None else None,
+            "api_open_meteo_hourly",
+        ]
+        yield hourly_row, daily_row
+
+
+def fetch_all_hourly(locations: list) -> tuple:
+    """
+    Stream hourly series for all locations into spooled CSV buffers.
+
+    Args:
+        locations: Location dictionaries
+
+    Returns:
+        (hourly SpooledCsv, daily SpooledCsv)
+    """
+    hourly_out = SpooledCsv()
+    daily_out = SpooledCsv()
+    total_locations = len(locations)
+
+    for idx, location in enumerate(locations, 1):
+        print(f"  [{idx}/{total_locations}] {location['state']} - {location['city']}...", end=" ")
+
+        hourly = fetch_hourly_for_location(location["lat"], location["lon"])
+        days = 0
+        for hourly_row, daily_row in rollup_hourly(location, hourly):
+            hourly_out.writerow(hourly_row)
+            daily_out.writerow(daily_row)
+            days += 1
+
+        if days:
+            print(f"✓ {len(hourly.get('time', [])):,} hours -> {days} days")
+        else:
+            print("✗ Failed")
+
+        # Rate limiting - be nice to the free API
+        time.sleep(0.5)
+
+    return hourly_out, daily_out
+
+
+# =============================================================================
+# QUEUE MODE
+# =============================================================================
+
+
+def queue_jobs(locations: list, chunk_days: int = QUEUE_CHUNK_DAYS) -> list:
+    """
+    One job per location and date chunk.
+
+    Returns:
+        List of (job_key, payload) for work_queue.enqueue()
+    """
+    jobs = []
+    for location in locations:
+        for start_date, end_date in date_chunks(START_DATE, END_DATE, chunk_days):
+            jobs.append(
+                (
+                    f"{location['lat']},{location['lon']}|{start_date}",
+                    {"location": location, "start_date": start_date, "end_date": end_date},
+                )
+            )
+    return jobs
+
+
+def run_job(source: str, payload: dict) -> dict:
+    """
+    Fetch one queued location/date chunk (called by work_queue.py workers).
+
+    Errors are raised, so the queue can retry the job.
+
+    Args:
+        source: 'weather' or 'weather_hourly'
+        payload: Job payload from queue_jobs()
+
+    Returns:
+        {bronze table: SpooledCsv} for every table in QUEUE_TARGETS[source]
+    """
+    location = payload["location"]
+    params = {
+        "latitude": location["lat"],
+        "longitude": location["lon"],
+        "start_date": payload["start_date"],
+        "end_date": payload["end_date"],
+        "timezone": "America/Sao_Paulo",
+    }
+
+    if source == "weather_hourly":
+        params["hourly"] = ",".join(HOURLY_VARIABLES)
+        hourly = archive_request(params, timeout=120).get("hourly", {})
+        if not hourly.get("time"):
+            raise ValueError("Empty hourly response")
+        hourly_out = SpooledCsv()
+        daily_out = SpooledCsv()
+        for hourly_row, daily_row in rollup_hourly(location, hourly):
+            hourly_out.writerow(hourly_row)
+            daily_out.writerow(daily_row)
+        return {"api_weather_hourly": hourly_out, "api_weather_history": daily_out}
+
+    params["daily"] = ",".join(DAILY_VARIABLES)
+    records = daily_records(
+        location["state"],
+        location["lat"],
+        location["lon"],
+        location["city"],
+        location.get("type", LOCATION_TYPE_CAPITAL),
+        archive_request(params, timeout=60).get("daily", {}),
+    )
+    if not records:
+        raise ValueError("Empty daily response")
+    daily_out = SpooledCsv()
+    for record in records:
+        daily_out.writerow([record[column] for column in DAILY_COLUMNS[:-1]] + ["api_open_meteo"])
+    return {"api_weather_history": daily_out}
+
+
 # =============================================================================
 # DATABASE FUNCTIONS
 # =============================================================================
@@ -233,6 +639,8 @@ def insert_weather_batch(cursor, records: list, batch_size: int = 1000):
             latitude,
             longitude,
             state_code,
+            location_name,
+            location_type,
             weather_date,
             temperature_2m_mean,
             temperature_2m_max,
@@ -241,7 +649,7 @@ def insert_weather_batch(cursor, records: list, batch_size: int = 1000):
             dwh_load_date,
             dwh_source_file
         ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s
         );
     """
 
@@ -257,6 +665,8 @@ def insert_weather_batch(cursor, records: list, batch_size: int = 1000):
                 record["latitude"],
                 record["longitude"],
                 record["state_code"],
+                record["location_name"],
+                record["location_type"],
                 record["weather_date"],
                 record["temperature_2m_mean"],
                 record["temperature_2m_max"],
@@ -273,12 +683,14 @@ def insert_weather_batch(cursor, records: list, batch_size: int = 1000):
             print(f"    Inserted {inserted}/{total} records...")
 
 
-def load_to_database(records: list):
+def load_to_database(records: list, content_hash: str = None, byte_size: int = None):
     """
     Load weather records into the Bronze layer table.
 
     Args:
         records: List of weather record dictionaries
+        content_hash: Payload hash recorded in bronze.dwh_load_manifest
+        byte_size: Canonical payload size in bytes
     """
     print("\nLoading to database...")
 
@@ -290,6 +702,15 @@ def load_to_database(records: list):
         # Truncate and load
         truncate_table(cursor)
         insert_weather_batch(cursor, records)
+        if content_hash:
+            record_load(
+                cursor,
+                "api_weather_history",
+                "api_open_meteo",
+                content_hash,
+                len(records),
+                byte_size,
+            )
 
         conn.commit()
         print(f"  ✓ Inserted {len(records)} weather records")
@@ -305,6 +726,80 @@ def load_to_database(records: list):
             conn.close()
 
 
+def load_hourly_to_database(hourly_out: SpooledCsv, daily_out: SpooledCsv):
+    """
+    Bulk-load hourly rows and their daily rollups (hourly mode).
+
+    Both tables are replaced in one transaction and recorded in
+    bronze.dwh_load_manifest with the hash of their COPY data.
+
+    Args:
+        hourly_out: Spooled bronze.api_weather_hourly rows
+        daily_out: Spooled bronze.api_weather_history rows
+    """
+    print("\nLoading to database (COPY)...")
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("TRUNCATE TABLE bronze.api_weather_hourly, bronze.api_weather_history;")
+        print("  ✓ Tables truncated")
+
+        hourly_out.copy_into(cursor, "bronze.api_weather_hourly", HOURLY_COLUMNS)
+        daily_out.copy_into(cursor, "bronze.api_weather_history", DAILY_COLUMNS)
+        record_load(
+            cursor, "api_weather_hourly", "api_open_meteo_hourly",
+            hourly_out.digest.hexdigest(), hourly_out.rows, hourly_out.bytes,
+        )
+        record_load(
+            cursor, "api_weather_history", "api_open_meteo_hourly",
+            daily_out.digest.hexdigest(), daily_out.rows, daily_out.bytes,
+        )
+
+        conn.commit()
+        print(f"  ✓ Copied {hourly_out.rows:,} point-days of hourly data "
+              f"({hourly_out.bytes / 1024 / 1024:.1f} MB)")
+        print(f"  ✓ Copied {daily_out.rows:,} daily rollup records")
+
+    except psycopg2.Error as e:
+        print(f"  ✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+        raise
+
+    finally:
+        if conn:
+            conn.close()
+
+
+def source_unchanged(content_hash: str, table_name: str = "api_weather_history") -> bool:
+    """
+    Check the payload against bronze.dwh_load_manifest.
+
+    If it is identical to the last load, the check is recorded and True is
+    returned so the caller can skip the TRUNCATE + INSERT.
+
+    Args:
+        content_hash: Payload hash from payload_hash()
+        table_name: Bronze table the payload is loaded into
+
+    Returns:
+        True if the payload is unchanged since the last load
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        unchanged = is_unchanged(cursor, table_name, content_hash)
+        if unchanged:
+            record_unchanged(cursor, table_name)
+        conn.commit()
+        return unchanged
+    finally:
+        conn.close()
+
+
 # =============================================================================
 # VERIFICATION
 # =============================================================================
@@ -323,7 +818,8 @@ def verify_load():
             COUNT(*) as total_records,
             COUNT(DISTINCT state_code) as states,
             MIN(weather_date) as min_date,
-            MAX(weather_date) as max_date
+            MAX(weather_date) as max_date,
+            COUNT(DISTINCT (latitude, longitude)) as points
         FROM bronze.api_weather_history;
     """)
 
@@ -332,6 +828,7 @@ def verify_load():
     print("  " + "-" * 40)
     print(f"  Total records: {row[0]:,}")
     print(f"  States covered: {row[1]}")
+    print(f"  Weather points: {row[4]}")
     print(f"  Date range: {row[2]} to {row[3]}")
 
     # Records by state
@@ -402,18 +899,56 @@ def verify_load():
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Fetch historical weather data")
+    parser.add_argument(
+        "--points", help="CSV of additional points (state,name,lat,lon)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Reload even if the payload is unchanged"
+    )
+    parser.add_argument(
+        "--hourly",
+        action="store_true",
+        help="Fetch hourly series (bronze.api_weather_hourly) and roll them up to daily",
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Enqueue location/date-chunk jobs for work_queue.py workers instead of fetching",
+    )
+    parser.add_argument(
+        "--chunk-days", type=int, default=QUEUE_CHUNK_DAYS, help="Days per queued job"
+    )
+    args = parser.parse_args()
+
+    locations = build_locations(args.points)
+    extra_points = len(locations) - len(BRAZIL_STATE_CAPITALS)
+
     print("=" * 60)
     print("FETCH HISTORICAL WEATHER DATA")
     print("=" * 60)
     print("Source: Open-Meteo Archive API")
     print(f"Period: {START_DATE} to {END_DATE}")
     print(f"Locations: {len(BRAZIL_STATE_CAPITALS)} Brazilian state capitals")
-    print(f"Variables: {', '.join(DAILY_VARIABLES)}")
+    if extra_points:
+        print(f"           + {extra_points} additional points from {args.points}")
+    variables = HOURLY_VARIABLES if args.hourly else DAILY_VARIABLES
+    print(f"Variables: {', '.join(variables)}{' (hourly)' if args.hourly else ''}")
     print("=" * 60)
 
+    if args.queue:
+        source = "weather_hourly" if args.hourly else "weather"
+        jobs = queue_jobs(locations, args.chunk_days)
+        print_enqueued(source, enqueue(source, jobs), len(jobs))
+        return
+
+    if args.hourly:
+        run_hourly(locations, args.force)
+        return
+
     # Fetch from API
     print("\nFetching weather data from API...")
-    records = fetch_all_weather()
+    records = fetch_all_weather(locations)
 
     if not records:
         print("\n✗ No weather data fetched. Exiting.")
@@ -421,8 +956,15 @@ def main():
 
     print(f"\nTotal daily records fetched: {len(records):,}")
 
+    # Skip the reload if the payload is identical to the last load
+    content_hash, byte_size = payload_hash(records)
+    if not args.force and source_unchanged(content_hash):
+        print("\n✓ Payload unchanged since last load - skipping reload")
+        print("  (use --force to reload anyway)")
+        return
+
     # Load to database
-    load_to_database(records)
+    load_to_database(records, content_hash, byte_size)
 
     # Verify
     verify_load()
@@ -432,5 +974,35 @@ def main():
     print("=" * 60)
 
 
+def run_hourly(locations: list, force: bool):
+    """Hourly mode: stream, roll up, bulk-load, verify."""
+    print("\nFetching hourly weather data from API...")
+    hourly_out, daily_out = fetch_all_hourly(locations)
+    try:
+        if not hourly_out.rows:
+            print("\n✗ No weather data fetched. Exiting.")
+            return
+
+        print(f"\nTotal point-days fetched: {hourly_out.rows:,}")
+
+        # Skip the reload if both payloads are identical to the last load
+        if not force and source_unchanged(hourly_out.digest.hexdigest(), "api_weather_hourly") \
+                and source_unchanged(daily_out.digest.hexdigest()):
+            print("\n✓ Payload unchanged since last load - skipping reload")
+            print("  (use --force to reload anyway)")
+            return
+
+        load_hourly_to_database(hourly_out, daily_out)
+    finally:
+        hourly_out.close()
+        daily_out.close()
+
+    verify_load()
+
+    print("\n" + "=" * 60)
+    print("✓ Hourly weather data load complete!")
+    print("=" * 60)
+
+
 if __name__ == "__main__":
     main()
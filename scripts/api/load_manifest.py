@@ -0,0 +1,162 @@
+"""
+================================================================================
+Description: Content-hash change detection for API loads
+================================================================================
+
+PURPOSE:
+--------
+Shared helpers used by the fetch_*.py scripts to skip reloading a Bronze API
+table when the fetched payload is identical to the last load.
+
+The payload is serialized to canonical JSON (sorted keys, no whitespace) and
+hashed with SHA-256. The hash is compared with bronze.dwh_load_manifest
+(see create_bronze_tables.sql); a changed payload is loaded and recorded in
+the same transaction, so the manifest always describes what is in the table.
+
+Bulk loads (hourly weather, queue mode) hash their COPY data instead, as it
+is written to a SpooledCsv buffer.
+
+================================================================================
+"""
+
+import csv
+import hashlib
+import json
+import tempfile
+
+# Spooled COPY buffers move to disk past this size
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+
+def canonical_payload(records) -> bytes:
+    """
+    Serialize records to canonical JSON bytes.
+
+    Args:
+        records: JSON-serializable payload (list of records)
+
+    Returns:
+        UTF-8 encoded JSON with sorted keys and no insignificant whitespace
+    """
+    return json.dumps(
+        records, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def payload_hash(records) -> tuple:
+    """
+    Hash an API payload.
+
+    Args:
+        records: JSON-serializable payload (list of records)
+
+    Returns:
+        (hex SHA-256 digest, payload size in bytes)
+    """
+    payload = canonical_payload(records)
+    return hashlib.sha256(payload).hexdigest(), len(payload)
+
+
+# =============================================================================
+# MANIFEST FUNCTIONS
+# =============================================================================
+
+
+def is_unchanged(cursor, table_name: str, content_hash: str) -> bool:
+    """
+    Check whether the table was last loaded with exactly this payload.
+
+    Args:
+        cursor: Database cursor
+        table_name: Bronze table name without schema
+        content_hash: Hash from payload_hash()
+
+    Returns:
+        True if the payload is identical to the last load
+    """
+    cursor.execute(
+        "SELECT bronze.dwh_source_unchanged(%s, %s);", (table_name, content_hash)
+    )
+    return cursor.fetchone()[0]
+
+
+def record_load(
+    cursor,
+    table_name: str,
+    source_ref: str,
+    content_hash: str,
+    row_count: int,
+    byte_size: int,
+):
+    """
+    Record a completed load in bronze.dwh_load_manifest.
+
+    Call this inside the load transaction, before commit.
+
+    Args:
+        cursor: Database cursor
+        table_name: Bronze table name without schema
+        source_ref: Source identifier (e.g., 'api_frankfurter')
+        content_hash: Hash from payload_hash()
+        row_count: Number of records loaded
+        byte_size: Canonical payload size in bytes
+    """
+    cursor.execute(
+        "SELECT bronze.dwh_record_load(%s, 'api', %s, %s, %s, %s);",
+        (table_name, source_ref, content_hash, row_count, byte_size),
+    )
+
+
+def record_unchanged(cursor, table_name: str):
+    """
+    Record that the source was checked and found unchanged.
+
+    Args:
+        cursor: Database cursor
+        table_name: Bronze table name without schema
+    """
+    cursor.execute("SELECT bronze.dwh_record_unchanged(%s);", (table_name,))
+
+
+# =============================================================================
+# COPY BUFFERS
+# =============================================================================
+
+
+class SpooledCsv:
+    """CSV rows spooled for COPY, hashed as they are written."""
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_MAX_BYTES, mode="w+", newline="", encoding="utf-8"
+        )
+        self.digest = hashlib.sha256()
+        self.rows = 0
+        self.bytes = 0
+        self.writer = csv.writer(self)
+
+    def write(self, text: str):
+        """File-like sink for csv.writer."""
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self.bytes += len(data)
+        self.file.write(text)
+
+    def writerow(self, row: list):
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def copy_into(self, cursor, table: str, columns: list):
+        """COPY the spooled rows into a table."""
+        self.file.seek(0)
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            self.file,
+        )
+
+    def close(self):
+        self.file.close()
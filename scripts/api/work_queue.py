@@ -0,0 +1,686 @@
+"""
+================================================================================
+Description: Durable Postgres work queue for fanning API extraction out
+================================================================================
+
+PURPOSE:
+--------
+The fetch_*.py scripts extract in one loop in one process, so one host's
+request budget and CPU are the ceiling. In queue mode the extractor only
+enqueues jobs - one per (source, location/currency, date chunk) - and any
+number of worker processes, on any number of hosts, claim them, call the
+API and bulk-load the result.
+
+HOW IT WORKS:
+-------------
+- bronze.dwh_api_run: one row per enqueue (source, status open ->
+  finalized | cancelled); at most one open run per source
+- bronze.dwh_api_job: the jobs. A worker claims the next one with
+  SELECT ... FOR UPDATE SKIP LOCKED, so workers never wait on each other,
+  and takes a lease (lease_owner, lease_expires_at = now + --lease-seconds)
+- Leases: a job whose lease expired (worker crashed or hung) is claimable
+  again. Timestamps come from the database clock, so hosts need not agree
+- Retries: a failed attempt goes back to pending after an exponential
+  backoff (RETRY_BASE_SECONDS * 2^(attempt - 1)); after max_attempts it
+  is failed
+- Exactly-once: the worker COPYs its rows into the <table>__queue staging
+  table(s) and marks the job done in ONE transaction that first re-checks
+  (FOR UPDATE) that it still owns the lease. A worker that lost its lease
+  rolls back, so each job's rows are committed exactly once
+- Finalize: the worker that completes the last job of a run swaps the
+  staged rows into the Bronze table(s) in one transaction (TRUNCATE +
+  INSERT ... SELECT + bronze.dwh_load_manifest). The content hash is the
+  SHA-256 of the per-job COPY hashes in job_key order; an unchanged run
+  leaves the table untouched, like a normal fetch
+
+Claims are one short indexed UPDATE per job, so throughput grows with the
+number of workers until the API's rate limit is reached. Each worker
+pauses REQUEST_PAUSE seconds after every job, like the single-process
+loops do.
+
+SOURCES:
+--------
+weather          fetch_weather.py --queue              api_weather_history
+weather_hourly   fetch_weather.py --queue --hourly     api_weather_hourly
+                                                       + api_weather_history
+currency         fetch_currency_rates.py --queue       api_currency_rates
+
+USAGE:
+------
+python fetch_weather.py --queue --points weather_points.csv   # enqueue
+python work_queue.py work --workers 8      # on every host that should help
+python work_queue.py status
+python work_queue.py retry 12              # failed jobs of run 12 -> pending
+python work_queue.py cancel 12
+
+PREREQUISITES:
+--------------
+pip install requests psycopg2-binary
+Run create_bronze_tables.sql first (creates the queue tables)
+
+================================================================================
+"""
+
+import argparse
+import hashlib
+import importlib
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from datetime import date, timedelta
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import Json
+from load_manifest import is_unchanged, record_load, record_unchanged
+
+load_dotenv()
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Database connection settings - loaded from .env file
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", 5432)),
+    "database": os.getenv("DB_DATABASE", "olist_dwh"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD", ""),
+}
+
+# Source -> module that defines QUEUE_TARGETS and run_job()
+SOURCES = {
+    "weather": "fetch_weather",
+    "weather_hourly": "fetch_weather",
+    "currency": "fetch_currency_rates",
+}
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+
+# Idle workers re-check for retries / expired leases this often
+POLL_SECONDS = 5
+
+# Pause after every job - be nice to the free APIs
+REQUEST_PAUSE = 0.5
+
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 8)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def date_chunks(start_date: str, end_date: str, days: int) -> list:
+    """
+    Split an inclusive date range into chunks of at most `days` days.
+
+    Returns:
+        List of (start, end) ISO date strings
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def source_module(source: str):
+    """Module implementing a queue source."""
+    return importlib.import_module(SOURCES[source])
+
+
+def queue_table(table: str) -> str:
+    """Staging table of a Bronze table (bronze.<table>__queue)."""
+    return f"bronze.{table}__queue"
+
+
+# =============================================================================
+# PRODUCER
+# =============================================================================
+
+
+def enqueue(source: str, jobs: list, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Create a run and its jobs.
+
+    Args:
+        source: Key of SOURCES
+        jobs: List of (job_key, payload dict)
+        max_attempts: Attempts before a job is marked failed
+
+    Returns:
+        run_id
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT run_id FROM bronze.dwh_api_run WHERE source = %s AND status = 'open';",
+            (source,),
+        )
+        row = cursor.fetchone()
+        if row:
+            raise RuntimeError(
+                f"Run {row[0]} for '{source}' is still open - let the workers finish it "
+                f"or cancel it (python work_queue.py cancel {row[0]})"
+            )
+
+        cursor.execute(
+            "INSERT INTO bronze.dwh_api_run (source, job_count) VALUES (%s, %s) RETURNING run_id;",
+            (source, len(jobs)),
+        )
+        run_id = cursor.fetchone()[0]
+        cursor.executemany(
+            """
+            INSERT INTO bronze.dwh_api_job (run_id, job_key, payload, max_attempts)
+            VALUES (%s, %s, %s, %s);
+            """,
+            [(run_id, key, Json(payload), max_attempts) for key, payload in jobs],
+        )
+        conn.commit()
+        return run_id
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+
+def print_enqueued(source: str, run_id: int, job_count: int):
+    """Progress lines shared by the fetch scripts' --queue mode."""
+    print(f"\n  ✓ Run {run_id}: {job_count:,} '{source}' jobs enqueued")
+    print("\nStart workers on one or more hosts:")
+    print("  python work_queue.py work --workers 8")
+    print("The last job to finish loads the Bronze table(s).")
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+
+def claim_job(conn, worker_id: str, lease_seconds: int, run_id: int = None):
+    """
+    Claim the next pending (or lease-expired) job.
+
+    Returns:
+        (job_id, run_id, source, job_key, payload) or None
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE bronze.dwh_api_job j
+            SET status = 'running',
+                attempts = j.attempts + 1,
+                lease_owner = %(worker)s,
+                lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(lease)s),
+                started_at = CURRENT_TIMESTAMP
+            FROM bronze.dwh_api_run r
+            WHERE j.job_id = (
+                    SELECT c.job_id
+                    FROM bronze.dwh_api_job c
+                    JOIN bronze.dwh_api_run cr ON cr.run_id = c.run_id
+                    WHERE cr.status = 'open'
+                      AND (%(run)s::INTEGER IS NULL OR c.run_id = %(run)s)
+                      AND (
+                          (c.status = 'pending' AND c.available_at <= CURRENT_TIMESTAMP)
+                          OR (c.status = 'running'
+                              AND c.lease_expires_at < CURRENT_TIMESTAMP
+                              AND c.attempts < c.max_attempts)
+                      )
+                    ORDER BY c.run_id, c.job_id
+                    LIMIT 1
+                    FOR UPDATE OF c SKIP LOCKED
+                )
+              AND r.run_id = j.run_id
+            RETURNING j.job_id, j.run_id, r.source, j.job_key, j.payload;
+            """,
+            {"worker": worker_id, "lease": lease_seconds, "run": run_id},
+        )
+        job = cursor.fetchone()
+    conn.commit()
+    return job
+
+
+def complete_job(conn, job_id: int, worker_id: str, outputs: dict, targets: dict) -> bool:
+    """
+    Stage a job's rows and mark it done - exactly once.
+
+    Args:
+        conn: Database connection
+        job_id: Claimed job
+        worker_id: Lease owner
+        outputs: {bronze table: SpooledCsv}
+        targets: {bronze table: COPY column list}
+
+    Returns:
+        False if the lease was lost (nothing is written)
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1 FROM bronze.dwh_api_job
+                WHERE job_id = %s AND status = 'running' AND lease_owner = %s
+                FOR UPDATE;
+                """,
+                (job_id, worker_id),
+            )
+            if cursor.fetchone() is None:
+                conn.rollback()
+                return False
+
+            # dwh_job_id of the staged rows defaults to this setting
+            cursor.execute("SELECT set_config('dwh.job_id', %s, true);", (str(job_id),))
+            result = {}
+            for table, out in outputs.items():
+                out.copy_into(cursor, queue_table(table), targets[table])
+                result[table] = {
+                    "rows": out.rows,
+                    "bytes": out.bytes,
+                    "hash": out.digest.hexdigest(),
+                }
+
+            cursor.execute(
+                """
+                UPDATE bronze.dwh_api_job
+                SET status = 'done',
+                    finished_at = CURRENT_TIMESTAMP,
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    result = %s,
+                    last_error = NULL
+                WHERE job_id = %s;
+                """,
+                (Json(result), job_id),
+            )
+        conn.commit()
+        return True
+
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def fail_job(conn, job_id: int, worker_id: str, error: str):
+    """Release a failed attempt: back to pending after a backoff, or failed."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE bronze.dwh_api_job
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                available_at = CURRENT_TIMESTAMP
+                    + make_interval(secs => %s * POWER(2, attempts - 1)),
+                lease_owner = NULL,
+                lease_expires_at = NULL,
+                last_error = %s
+            WHERE job_id = %s AND status = 'running' AND lease_owner = %s;
+            """,
+            (RETRY_BASE_SECONDS, error[-2000:], job_id, worker_id),
+        )
+    conn.commit()
+
+
+def finalize_run(conn, run_id: int) -> bool:
+    """
+    Load a run's staged rows into Bronze once all of its jobs are done.
+
+    Only one caller wins (the run row is flipped from open under its row
+    lock); the Bronze swap, the manifest and the run status commit together.
+
+    Returns:
+        True if this call finalized the run
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE bronze.dwh_api_run r
+                SET status = 'finalized', finalized_at = CURRENT_TIMESTAMP
+                WHERE r.run_id = %s
+                  AND r.status = 'open'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM bronze.dwh_api_job j
+                      WHERE j.run_id = r.run_id AND j.status <> 'done'
+                  )
+                RETURNING r.source;
+                """,
+                (run_id,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                conn.rollback()
+                return False
+
+            module = source_module(row[0])
+            cursor.execute(
+                "SELECT result FROM bronze.dwh_api_job WHERE run_id = %s ORDER BY job_key;",
+                (run_id,),
+            )
+            results = [r[0] for r in cursor.fetchall()]
+
+            for table, columns in module.QUEUE_TARGETS[row[0]].items():
+                digest = hashlib.sha256()
+                rows = byte_size = 0
+                for result in results:
+                    digest.update(result[table]["hash"].encode("ascii"))
+                    rows += result[table]["rows"]
+                    byte_size += result[table]["bytes"]
+                content_hash = digest.hexdigest()
+
+                if is_unchanged(cursor, table, content_hash):
+                    record_unchanged(cursor, table)
+                    print(f"  ✓ bronze.{table} unchanged - left as is")
+                else:
+                    column_list = ", ".join(columns)
+                    cursor.execute(f"TRUNCATE TABLE bronze.{table};")
+                    cursor.execute(
+                        f"""
+                        INSERT INTO bronze.{table} ({column_list})
+                        SELECT {column_list}
+                        FROM {queue_table(table)}
+                        WHERE dwh_job_id IN (
+                            SELECT job_id FROM bronze.dwh_api_job WHERE run_id = %s
+                        );
+                        """,
+                        (run_id,),
+                    )
+                    record_load(cursor, table, module.QUEUE_SOURCE_REF[row[0]],
+                                content_hash, rows, byte_size)
+                    print(f"  ✓ bronze.{table} loaded: {rows:,} rows")
+
+                cursor.execute(
+                    f"""
+                    DELETE FROM {queue_table(table)}
+                    WHERE dwh_job_id IN (
+                        SELECT job_id FROM bronze.dwh_api_job WHERE run_id = %s
+                    );
+                    """,
+                    (run_id,),
+                )
+
+        conn.commit()
+        return True
+
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def run_open(conn, run_id: int = None) -> bool:
+    """
+    True while some open run still has pending or running jobs.
+
+    Also fails jobs whose last allowed attempt lost its lease, so they do
+    not keep the run open forever.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE bronze.dwh_api_job
+            SET status = 'failed',
+                lease_owner = NULL,
+                last_error = COALESCE(last_error, 'lease expired')
+            WHERE status = 'running'
+              AND lease_expires_at < CURRENT_TIMESTAMP
+              AND attempts >= max_attempts;
+            """
+        )
+        cursor.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1
+                FROM bronze.dwh_api_job j
+                JOIN bronze.dwh_api_run r ON r.run_id = j.run_id
+                WHERE r.status = 'open'
+                  AND (%(run)s::INTEGER IS NULL OR r.run_id = %(run)s)
+                  AND j.status IN ('pending', 'running')
+            );
+            """,
+            {"run": run_id},
+        )
+        active = cursor.fetchone()[0]
+    conn.commit()
+    return active
+
+
+def finished_runs(conn, run_id: int = None) -> list:
+    """Open runs whose jobs are all done (ready to finalize)."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT r.run_id
+            FROM bronze.dwh_api_run r
+            WHERE r.status = 'open'
+              AND (%(run)s::INTEGER IS NULL OR r.run_id = %(run)s)
+              AND NOT EXISTS (
+                  SELECT 1 FROM bronze.dwh_api_job j
+                  WHERE j.run_id = r.run_id AND j.status <> 'done'
+              );
+            """,
+            {"run": run_id},
+        )
+        runs = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return runs
+
+
+def worker_loop(worker_no: int, lease_seconds: int, run_id: int = None) -> int:
+    """
+    Claim and run jobs until no open run has work left.
+
+    Returns:
+        Number of jobs completed by this worker
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    conn = get_db_connection()
+    done = 0
+    try:
+        while True:
+            job = claim_job(conn, worker_id, lease_seconds, run_id)
+            if job is None:
+                if not run_open(conn, run_id):
+                    # Runs whose last job completed but whose finalize failed
+                    for ready in finished_runs(conn, run_id):
+                        if finalize_run(conn, ready):
+                            print(f"  [w{worker_no}] ✓ Run {ready} complete - Bronze loaded")
+                    return done
+                time.sleep(POLL_SECONDS)
+                continue
+
+            job_id, job_run, source, job_key, payload = job
+            module = source_module(source)
+            outputs = {}
+            try:
+                outputs = module.run_job(source, payload)
+                completed = complete_job(conn, job_id, worker_id, outputs,
+                                         module.QUEUE_TARGETS[source])
+            except Exception as e:
+                print(f"  [w{worker_no}] ✗ {source} {job_key}: {e}")
+                fail_job(conn, job_id, worker_id, traceback.format_exc())
+                completed = None
+            finally:
+                for out in outputs.values():
+                    out.close()
+
+            if completed:
+                done += 1
+                print(f"  [w{worker_no}] ✓ {source} {job_key}")
+                try:
+                    if finalize_run(conn, job_run):
+                        print(f"  [w{worker_no}] ✓ Run {job_run} complete - Bronze loaded")
+                except Exception as e:
+                    # Jobs stay done; the finalize is retried when workers go idle
+                    print(f"  [w{worker_no}] ✗ Finalizing run {job_run} failed: {e}")
+            elif completed is False:
+                print(f"  [w{worker_no}] - {source} {job_key}: lease lost, result discarded")
+
+            time.sleep(REQUEST_PAUSE)
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# STATUS
+# =============================================================================
+
+
+def print_status():
+    """Job counts per run and the latest errors."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT r.run_id, r.source, r.status, r.created_at,
+                   COUNT(*) FILTER (WHERE j.status = 'pending'),
+                   COUNT(*) FILTER (WHERE j.status = 'running'),
+                   COUNT(*) FILTER (WHERE j.status = 'done'),
+                   COUNT(*) FILTER (WHERE j.status = 'failed'),
+                   COALESCE(SUM(j.attempts), 0)
+            FROM bronze.dwh_api_run r
+            LEFT JOIN bronze.dwh_api_job j ON j.run_id = r.run_id
+            GROUP BY r.run_id
+            ORDER BY r.run_id DESC
+            LIMIT 10;
+        """)
+        print(f"\n  {'Run':>5}  {'Source':<16} {'Status':<10} {'Pending':>8} {'Running':>8} "
+              f"{'Done':>8} {'Failed':>7} {'Attempts':>9}")
+        print("  " + "-" * 82)
+        for run_id, source, status, _, pending, running, done, failed, attempts in cursor.fetchall():
+            print(f"  {run_id:>5}  {source:<16} {status:<10} {pending:>8,} {running:>8,} "
+                  f"{done:>8,} {failed:>7,} {attempts:>9,}")
+
+        cursor.execute("""
+            SELECT j.run_id, j.job_key, j.status, j.attempts, j.last_error
+            FROM bronze.dwh_api_job j
+            JOIN bronze.dwh_api_run r ON r.run_id = j.run_id
+            WHERE r.status = 'open' AND j.last_error IS NOT NULL
+            ORDER BY j.status = 'failed' DESC, j.job_id
+            LIMIT 5;
+        """)
+        errors = cursor.fetchall()
+        if errors:
+            print("\n  Latest errors:")
+            for run_id, job_key, status, attempts, error in errors:
+                last_line = error.strip().splitlines()[-1]
+                print(f"    run {run_id} {job_key} ({status}, {attempts} attempts): {last_line}")
+    finally:
+        conn.close()
+
+
+def retry_run(run_id: int):
+    """Put a run's failed jobs back to pending with fresh attempts."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE bronze.dwh_api_job
+            SET status = 'pending', attempts = 0, available_at = CURRENT_TIMESTAMP
+            WHERE run_id = %s AND status = 'failed';
+            """,
+            (run_id,),
+        )
+        conn.commit()
+        print(f"  ✓ {cursor.rowcount:,} failed jobs of run {run_id} requeued")
+    finally:
+        conn.close()
+
+
+def cancel_run(run_id: int):
+    """Cancel an open run and drop its staged rows (Bronze is untouched)."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE bronze.dwh_api_run SET status = 'cancelled' "
+            "WHERE run_id = %s AND status = 'open' RETURNING source;",
+            (run_id,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            print(f"  ✗ Run {run_id} is not open")
+            conn.rollback()
+            return
+        for table in source_module(row[0]).QUEUE_TARGETS[row[0]]:
+            cursor.execute(
+                f"DELETE FROM {queue_table(table)} WHERE dwh_job_id IN "
+                "(SELECT job_id FROM bronze.dwh_api_job WHERE run_id = %s);",
+                (run_id,),
+            )
+        conn.commit()
+        print(f"  ✓ Run {run_id} cancelled")
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Durable work queue for API extraction")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    work = commands.add_parser("work", help="Run worker processes on this host")
+    work.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    work.add_argument("--run", type=int, help="Only work on this run")
+    work.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+
+    commands.add_parser("status", help="Show runs and job counts")
+    for name, help_text in (("retry", "Requeue a run's failed jobs"), ("cancel", "Cancel an open run")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("run_id", type=int)
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_status()
+        return
+    if args.command == "retry":
+        retry_run(args.run_id)
+        return
+    if args.command == "cancel":
+        cancel_run(args.run_id)
+        return
+
+    print("=" * 60)
+    print("API WORK QUEUE - WORKERS")
+    print("=" * 60)
+    print(f"Host: {socket.gethostname()}  Workers: {args.workers}  "
+          f"Lease: {args.lease_seconds}s")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        counts = pool.starmap(
+            worker_loop,
+            [(i, args.lease_seconds, args.run) for i in range(1, args.workers + 1)],
+        )
+
+    print("\n" + "=" * 60)
+    print(f"✓ {sum(counts):,} jobs completed on this host in "
+          f"{time.perf_counter() - started:.1f}s")
+    print("=" * 60)
+    print_status()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,18 @@ Description: Create all Bronze layer tables for Olist Data Warehouse
 
 PURPOSE:
 --------
-Creates 14 Bronze layer tables to store raw data from:
+Creates 15 Bronze layer tables to store raw data from:
 - Olist E-Commerce Dataset (9 tables)
 - Olist Marketing Funnel Dataset (2 tables)
-- External APIs (3 tables)
+- External APIs (4 tables)
 
 BRONZE LAYER PRINCIPLES:
 ------------------------
 1. Store data EXACTLY as received from source (no transformations)
 2. All columns are VARCHAR to prevent load failures from data type issues
 3. Include technical metadata columns (dwh_load_date, dwh_source_file)
-4. Use TRUNCATE & INSERT for full loads (no incremental)
+4. Use TRUNCATE & INSERT for full loads; CSV tables can also be merged in
+   place (load_bronze_data.sql -v delta_load=true, bronze.dwh_merge_csv)
 
 NAMING CONVENTION:
 ------------------
@@ -29,6 +30,16 @@ EXECUTION ORDER:
 2. Run this script to create tables
 3. Run load_bronze_data.sql to load data
 
+UNLOGGED TABLES:
+----------------
+Bronze can always be rebuilt from the source files, so its 15 source tables
+can skip the write-ahead log entirely:
+    psql -d olist_dwh -v unlogged=true -f create_bronze_tables.sql
+Loads then write no WAL for Bronze, but the tables are not replicated and
+crash recovery empties them. bronze.dwh_source_unchanged treats an emptied
+table as changed, so the next load_bronze_data.sql / fetch_*.py run reloads
+it. Control tables and the API queue staging tables stay logged.
+
 ================================================================================
 */
 
@@ -39,6 +50,11 @@ EXECUTION ORDER:
 -- Ensure we're working in the correct schema
 SET search_path TO bronze, public;
 
+\if :{?unlogged}
+\else
+    \set unlogged false
+\endif
+
 -- ============================================================================
 -- SECTION 1: E-COMMERCE DATASET TABLES (9 tables)
 -- Source: Kaggle - Brazilian E-Commerce by Olist
@@ -306,7 +322,7 @@ COMMENT ON COLUMN bronze.olist_closed_deals.seller_id IS 'CRITICAL: Foreign key
 COMMENT ON COLUMN bronze.olist_closed_deals.declared_monthly_revenue IS 'Self-reported monthly revenue by seller';
 
 -- ============================================================================
--- SECTION 3: EXTERNAL API TABLES (3 tables)
+-- SECTION 3: EXTERNAL API TABLES (4 tables)
 -- Source: REST APIs for data enrichment
 -- ============================================================================
 
@@ -315,7 +331,7 @@ COMMENT ON COLUMN bronze.olist_closed_deals.declared_monthly_revenue IS 'Self-re
 -- Description: Daily BRL to USD exchange rates
 -- Source: Frankfurter API (api.frankfurter.app) - European Central Bank data
 -- API Docs: https://www.frankfurter.app/docs/
--- Record Count: ~550 (business days from Sep 2016 - Oct 2018)
+-- Record Count: ~550 per target currency (business days from Sep 2016 - Oct 2018)
 -- ----------------------------------------------------------------------------
 DROP TABLE IF EXISTS bronze.api_currency_rates;
 
@@ -329,7 +345,7 @@ CREATE TABLE bronze.api_currency_rates (
 );
 
 COMMENT ON TABLE bronze.api_currency_rates IS 'Raw currency exchange rates from Frankfurter API (European Central Bank data)';
-COMMENT ON COLUMN bronze.api_currency_rates.exchange_rate IS 'Exchange rate: 1 BRL = X USD';
+COMMENT ON COLUMN bronze.api_currency_rates.exchange_rate IS 'Exchange rate: 1 base_currency (BRL) = X target_currency';
 
 -- ----------------------------------------------------------------------------
 -- Table 13: api_brazil_holidays
@@ -360,7 +376,7 @@ COMMENT ON COLUMN bronze.api_brazil_holidays.holiday_name IS 'Holiday name in En
 -- Description: Historical weather data by location (Daily aggregates - Minimal)
 -- Source: Open-Meteo Historical Weather API (archive-api.open-meteo.com)
 -- API Docs: https://open-meteo.com/en/docs/historical-weather-api
--- Record Count: ~21K (27 state capitals × ~790 days)
+-- Record Count: ~21K (27 state capitals × ~790 days) + ~790 per extra point
 -- ----------------------------------------------------------------------------
 DROP TABLE IF EXISTS bronze.api_weather_history;
 
@@ -368,6 +384,8 @@ CREATE TABLE bronze.api_weather_history (
     latitude VARCHAR(20),
     longitude VARCHAR(20),
     state_code VARCHAR(5),
+    location_name VARCHAR(100),
+    location_type VARCHAR(20),
     weather_date VARCHAR(20),
     temperature_2m_mean VARCHAR(20),
     temperature_2m_max  VARCHAR(20),
@@ -378,12 +396,1016 @@ CREATE TABLE bronze.api_weather_history (
 );
 
 COMMENT ON TABLE bronze.api_weather_history IS 'Raw historical daily weather data from Open-Meteo Archive API (minimal columns for business analysis)';
+COMMENT ON COLUMN bronze.api_weather_history.location_type IS 'state_capital (always fetched) or custom (extra point, e.g. clustered zip centroid)';
 COMMENT ON COLUMN bronze.api_weather_history.weather_code IS 'WMO weather code: 0=Clear, 1-3=Cloudy, 45-48=Fog, 51-55=Drizzle, 61-65=Rain, 71-77=Snow, 80-82=Showers, 95-99=Thunderstorm';
 COMMENT ON COLUMN bronze.api_weather_history.precipitation_sum IS 'Total daily precipitation (rain + showers + snowfall) in millimeters';
 COMMENT ON COLUMN bronze.api_weather_history.temperature_2m_mean IS 'Mean daily air temperature at 2 meters above ground in Celsius';
 
+-- ----------------------------------------------------------------------------
+-- Table 15: api_weather_hourly
+-- Description: Hourly weather by location, one row per point per day
+-- Source: Open-Meteo Historical Weather API (fetch_weather.py --hourly)
+-- Record Count: same as api_weather_history (24 hourly values per row)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.api_weather_hourly;
+
+CREATE TABLE bronze.api_weather_hourly (
+    latitude VARCHAR(20),
+    longitude VARCHAR(20),
+    state_code VARCHAR(5),
+    location_name VARCHAR(100),
+    location_type VARCHAR(20),
+    weather_date VARCHAR(20),
+    temperature_2m VARCHAR(400),
+    precipitation VARCHAR(400),
+    weather_code VARCHAR(200),
+    dwh_load_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    dwh_source_file VARCHAR(255) DEFAULT NULL
+);
+
+COMMENT ON TABLE bronze.api_weather_hourly IS 'Raw hourly weather from Open-Meteo Archive API - 24 comma-separated values per variable per point-day';
+COMMENT ON COLUMN bronze.api_weather_hourly.temperature_2m IS 'Air temperature at 2 m (Celsius) for hours 0-23 local time, comma-separated, empty = missing';
+COMMENT ON COLUMN bronze.api_weather_hourly.precipitation IS 'Precipitation (mm) for hours 0-23 local time, comma-separated';
+COMMENT ON COLUMN bronze.api_weather_hourly.weather_code IS 'WMO weather code for hours 0-23 local time, comma-separated';
+
 -- ============================================================================
--- SECTION 4: VERIFICATION QUERIES
+-- SECTION 4: DWH CONTROL TABLES
+-- Technical tables used by the load process (not source data)
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- dwh_preflight_manifest
+-- Description: Result of the last CSV pre-flight validation run
+-- Written by: scripts/pipeline/validate_datasets.py
+-- Read by: load_bronze_data.sql (refuses to truncate unless all files are
+--          valid and unchanged since validation)
+-- Record Count: 11 (one row per CSV source)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_preflight_manifest;
+
+CREATE TABLE bronze.dwh_preflight_manifest (
+    table_name VARCHAR(100) PRIMARY KEY,
+    source_file VARCHAR(255) NOT NULL,
+    file_size_bytes BIGINT,
+    file_mtime TIMESTAMP,
+    expected_columns INTEGER,
+    row_count BIGINT,
+    bad_row_count BIGINT,
+    bad_row_offsets TEXT,
+    content_hash VARCHAR(64),
+    rows_added BIGINT,
+    rows_removed BIGINT,
+    header_ok BOOLEAN,
+    encoding_ok BOOLEAN,
+    is_valid BOOLEAN NOT NULL,
+    validation_errors TEXT,
+    validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE bronze.dwh_preflight_manifest IS 'CSV pre-flight validation results - checked by load_bronze_data.sql before truncating';
+COMMENT ON COLUMN bronze.dwh_preflight_manifest.row_count IS 'Data records in the file (excluding header)';
+COMMENT ON COLUMN bronze.dwh_preflight_manifest.bad_row_offsets IS 'Comma-separated byte offsets of the first bad records';
+COMMENT ON COLUMN bronze.dwh_preflight_manifest.content_hash IS 'BLAKE2b hash of the file contents, compared with dwh_load_manifest to skip unchanged files';
+COMMENT ON COLUMN bronze.dwh_preflight_manifest.rows_added IS 'Records not present in the previous validation run (only with --row-hashes)';
+COMMENT ON COLUMN bronze.dwh_preflight_manifest.file_mtime IS 'File modification time (UTC, whole seconds) when the validator scanned it';
+
+-- Pre-flight rows that no longer describe the file COPY would read: the file
+-- under p_data_path is missing, or its size / modification time differs from
+-- the validator's scan (the file was replaced after validation)
+CREATE OR REPLACE FUNCTION bronze.dwh_stale_preflight(p_data_path TEXT)
+RETURNS TABLE (table_name VARCHAR, file_path TEXT, problem TEXT) AS $$
+    SELECT
+        m.table_name,
+        f.file_path,
+        CASE
+            WHEN s.size IS NULL THEN 'file not found'
+            WHEN s.size IS DISTINCT FROM m.file_size_bytes
+                THEN format('size %s bytes, validated %s', s.size, m.file_size_bytes)
+            ELSE format('modified %s UTC, validated %s',
+                        date_trunc('second', s.modification AT TIME ZONE 'UTC'), m.file_mtime)
+        END
+    FROM bronze.dwh_preflight_manifest m
+    CROSS JOIN LATERAL (
+        SELECT rtrim(p_data_path, '/\') || '/' || m.source_file AS file_path
+    ) f
+    CROSS JOIN LATERAL pg_stat_file(f.file_path, true) s
+    WHERE s.size IS DISTINCT FROM m.file_size_bytes
+       OR date_trunc('second', s.modification AT TIME ZONE 'UTC') IS DISTINCT FROM m.file_mtime;
+$$ LANGUAGE sql VOLATILE;
+
+-- ----------------------------------------------------------------------------
+-- dwh_orphan_audit
+-- Description: Child keys with no parent key, found by the pre-flight scan
+-- Written by: scripts/pipeline/validate_datasets.py
+-- Read by: analysts (orphans do not block the load)
+-- Record Count: one row per relationship per validation run (history)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_orphan_audit;
+
+CREATE TABLE bronze.dwh_orphan_audit (
+    audit_id BIGSERIAL PRIMARY KEY,
+    child_table VARCHAR(100) NOT NULL,
+    child_column VARCHAR(100) NOT NULL,
+    parent_table VARCHAR(100) NOT NULL,
+    parent_column VARCHAR(100) NOT NULL,
+    check_method VARCHAR(10),
+    child_rows BIGINT,
+    parent_keys BIGINT,
+    orphan_rows BIGINT,
+    orphan_keys BIGINT,
+    sample_keys TEXT,
+    sample_offsets TEXT,
+    audited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_dwh_orphan_audit_child ON bronze.dwh_orphan_audit(child_table, child_column, audited_at);
+
+COMMENT ON TABLE bronze.dwh_orphan_audit IS 'Orphan foreign keys per CSV relationship and validation run - reported, not enforced';
+COMMENT ON COLUMN bronze.dwh_orphan_audit.check_method IS 'hash_set (exact) or bloom (parent keys in a Bloom filter, may undercount orphans)';
+COMMENT ON COLUMN bronze.dwh_orphan_audit.child_rows IS 'Child records with a non-empty key (NULL when a file could not be read)';
+COMMENT ON COLUMN bronze.dwh_orphan_audit.orphan_rows IS 'Child records whose key is missing from the parent file';
+COMMENT ON COLUMN bronze.dwh_orphan_audit.sample_keys IS 'Comma-separated sample of orphan key values';
+COMMENT ON COLUMN bronze.dwh_orphan_audit.sample_offsets IS 'Byte offsets of the first child record for each sample key';
+
+-- ----------------------------------------------------------------------------
+-- dwh_removed_rows
+-- Description: Tombstones of Bronze rows deleted by an in-place merge
+-- Written by: bronze.dwh_merge_csv (load_bronze_data.sql -v delta_load=true)
+-- Read by: load_silver_data.sql -v incremental=true (bronze.dwh_delta_rows),
+--          so a row that disappeared from its file also leaves Silver
+-- Pruned by: bronze.dwh_advance_watermark (once Silver merged them) and
+--            bronze.dwh_record_load (a full reload re-stamps every row)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_removed_rows;
+
+CREATE TABLE bronze.dwh_removed_rows (
+    table_name VARCHAR(100) NOT NULL,
+    row_data JSONB NOT NULL,
+    removed_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_dwh_removed_rows_table ON bronze.dwh_removed_rows (table_name, removed_at);
+
+COMMENT ON TABLE bronze.dwh_removed_rows IS 'Bronze rows deleted by bronze.dwh_merge_csv that Silver has not merged yet';
+COMMENT ON COLUMN bronze.dwh_removed_rows.row_data IS 'The deleted row (to_jsonb of the Bronze record)';
+COMMENT ON COLUMN bronze.dwh_removed_rows.removed_at IS 'Load timestamp of the merge that deleted it - compared with the Silver watermark like dwh_load_date';
+
+-- ----------------------------------------------------------------------------
+-- dwh_load_manifest
+-- Description: Content hash of the last loaded version of every Bronze source
+-- Written by: load_bronze_data.sql (CSV) and scripts/api/*.py (API payloads)
+-- Read by: load_bronze_data.sql / API scripts (skip unchanged sources),
+--          load_silver_data.sql (rebuild only changed tables)
+-- Record Count: 15 (one row per Bronze table)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_load_manifest CASCADE;
+
+CREATE TABLE bronze.dwh_load_manifest (
+    table_name VARCHAR(100) PRIMARY KEY,
+    source_type VARCHAR(10) NOT NULL,
+    source_ref VARCHAR(255),
+    content_hash VARCHAR(64),
+    row_count BIGINT,
+    byte_size BIGINT,
+    rows_added BIGINT,
+    rows_removed BIGINT,
+    last_changed_at TIMESTAMP NOT NULL,
+    last_checked_at TIMESTAMP NOT NULL,
+    last_rewrite_at TIMESTAMP,
+    silver_consumed_at TIMESTAMP
+);
+
+COMMENT ON TABLE bronze.dwh_load_manifest IS 'Fingerprint of the last loaded version of each Bronze source - unchanged sources are skipped';
+COMMENT ON COLUMN bronze.dwh_load_manifest.source_type IS 'csv or api';
+COMMENT ON COLUMN bronze.dwh_load_manifest.content_hash IS 'Hash of the loaded content (NULL = loaded without a trusted hash, e.g. skip_preflight - never matches, so the next run reloads)';
+COMMENT ON COLUMN bronze.dwh_load_manifest.last_changed_at IS 'When content_hash last changed (i.e. the table was really reloaded with new data)';
+COMMENT ON COLUMN bronze.dwh_load_manifest.last_checked_at IS 'When the source was last compared, changed or not';
+COMMENT ON COLUMN bronze.dwh_load_manifest.last_rewrite_at IS 'When the table was last TRUNCATEd and reloaded (every dwh_load_date re-stamped); NULL = only ever merged';
+COMMENT ON COLUMN bronze.dwh_load_manifest.silver_consumed_at IS 'When load_silver_data.sql last rebuilt the Silver table from this source';
+
+-- Sources changed since Silver last consumed them
+CREATE OR REPLACE VIEW bronze.dwh_pending_changes AS
+SELECT
+    table_name,
+    source_type,
+    row_count,
+    rows_added,
+    rows_removed,
+    last_changed_at,
+    silver_consumed_at
+FROM bronze.dwh_load_manifest
+WHERE silver_consumed_at IS NULL
+   OR silver_consumed_at < last_changed_at;
+
+COMMENT ON VIEW bronze.dwh_pending_changes IS 'Bronze tables with new data that Silver has not rebuilt yet';
+
+-- TRUE when the source was last loaded with exactly this content
+-- An empty table whose last load had rows counts as changed: an UNLOGGED
+-- table (create with -v unlogged=true) is emptied by crash recovery while its
+-- manifest row survives.
+CREATE OR REPLACE FUNCTION bronze.dwh_source_unchanged(p_table_name VARCHAR, p_content_hash VARCHAR)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_row_count BIGINT;
+    v_has_rows BOOLEAN;
+BEGIN
+    SELECT row_count INTO v_row_count
+    FROM bronze.dwh_load_manifest
+    WHERE table_name = p_table_name
+      AND content_hash = p_content_hash;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+    IF COALESCE(v_row_count, 0) = 0 THEN
+        RETURN TRUE;
+    END IF;
+
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM bronze.%I)', p_table_name) INTO v_has_rows;
+    RETURN v_has_rows;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Record a completed load (last_changed_at only moves when the hash differs
+-- or is unknown). p_rewrite = FALSE for an in-place merge (bronze.dwh_merge_csv):
+-- unchanged rows kept their dwh_load_date, so Silver can still merge the
+-- table incrementally. A rewrite discards the table's tombstones, since every
+-- row is re-stamped anyway.
+DROP FUNCTION IF EXISTS bronze.dwh_record_load(VARCHAR, VARCHAR, VARCHAR, VARCHAR, BIGINT, BIGINT, BIGINT, BIGINT);
+
+CREATE OR REPLACE FUNCTION bronze.dwh_record_load(
+    p_table_name VARCHAR,
+    p_source_type VARCHAR,
+    p_source_ref VARCHAR,
+    p_content_hash VARCHAR,
+    p_row_count BIGINT,
+    p_byte_size BIGINT,
+    p_rows_added BIGINT DEFAULT NULL,
+    p_rows_removed BIGINT DEFAULT NULL,
+    p_rewrite BOOLEAN DEFAULT TRUE
+)
+RETURNS VOID AS $$
+    DELETE FROM bronze.dwh_removed_rows
+    WHERE table_name = p_table_name
+      AND p_rewrite;
+
+    INSERT INTO bronze.dwh_load_manifest AS m (
+        table_name, source_type, source_ref, content_hash, row_count, byte_size,
+        rows_added, rows_removed, last_changed_at, last_checked_at, last_rewrite_at
+    ) VALUES (
+        p_table_name, p_source_type, p_source_ref, p_content_hash, p_row_count, p_byte_size,
+        p_rows_added, p_rows_removed, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP,
+        CASE WHEN p_rewrite THEN CURRENT_TIMESTAMP END
+    )
+    ON CONFLICT (table_name) DO UPDATE SET
+        source_type = EXCLUDED.source_type,
+        source_ref = EXCLUDED.source_ref,
+        content_hash = EXCLUDED.content_hash,
+        row_count = EXCLUDED.row_count,
+        byte_size = EXCLUDED.byte_size,
+        rows_added = EXCLUDED.rows_added,
+        rows_removed = EXCLUDED.rows_removed,
+        last_changed_at = CASE
+            WHEN EXCLUDED.content_hash IS NULL
+              OR m.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            THEN EXCLUDED.last_changed_at
+            ELSE m.last_changed_at
+        END,
+        last_checked_at = EXCLUDED.last_checked_at,
+        last_rewrite_at = COALESCE(EXCLUDED.last_rewrite_at, m.last_rewrite_at);
+$$ LANGUAGE sql;
+
+-- Record a CSV load using the hash computed by the pre-flight validator.
+-- Called in the load transaction right after the COPY. The pre-flight row is
+-- only trusted while it still matches the file under p_data_path (size and
+-- modification time); otherwise its hash and row count belong to another
+-- file and:
+--   p_require_fresh = TRUE  -> raise, rolling back the TRUNCATE and COPY
+--   p_require_fresh = FALSE -> (skip_preflight=true) record the loaded row
+--                              count with no hash, so the next run reloads
+-- p_rows_added / p_rows_removed are the counts returned by bronze.dwh_merge_csv
+-- when the table was merged in place (NULL = TRUNCATEd and reloaded).
+DROP FUNCTION IF EXISTS bronze.dwh_record_csv_load(VARCHAR, TEXT, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION bronze.dwh_record_csv_load(
+    p_table_name VARCHAR,
+    p_data_path TEXT,
+    p_require_fresh BOOLEAN DEFAULT TRUE,
+    p_rows_added BIGINT DEFAULT NULL,
+    p_rows_removed BIGINT DEFAULT NULL
+)
+RETURNS VOID AS $$
+DECLARE
+    v_preflight bronze.dwh_preflight_manifest%ROWTYPE;
+    v_problem TEXT;
+    v_row_count BIGINT;
+BEGIN
+    SELECT * INTO v_preflight
+    FROM bronze.dwh_preflight_manifest
+    WHERE table_name = p_table_name;
+
+    IF NOT FOUND THEN
+        v_problem := 'no pre-flight row';
+    ELSE
+        SELECT problem INTO v_problem
+        FROM bronze.dwh_stale_preflight(p_data_path)
+        WHERE table_name = p_table_name;
+    END IF;
+
+    IF v_problem IS NULL THEN
+        PERFORM bronze.dwh_record_load(
+            v_preflight.table_name, 'csv', v_preflight.source_file, v_preflight.content_hash,
+            v_preflight.row_count, v_preflight.file_size_bytes,
+            COALESCE(p_rows_added, v_preflight.rows_added),
+            COALESCE(p_rows_removed, v_preflight.rows_removed),
+            p_rows_added IS NULL
+        );
+    ELSIF p_require_fresh THEN
+        RAISE EXCEPTION '% changed after pre-flight validation (%) - re-run validate_datasets.py',
+            p_table_name, v_problem;
+    ELSE
+        EXECUTE format('SELECT COUNT(*) FROM bronze.%I', p_table_name) INTO v_row_count;
+        PERFORM bronze.dwh_record_load(
+            p_table_name, 'csv', v_preflight.source_file, NULL, v_row_count,
+            (SELECT size FROM pg_stat_file(rtrim(p_data_path, '/\') || '/' || v_preflight.source_file, true)),
+            p_rows_added, p_rows_removed, p_rows_added IS NULL
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Merge a CSV file into its Bronze table in place, instead of TRUNCATE + COPY.
+-- The file is COPYed into a temp table and compared with the live rows by a
+-- hash of all source columns (plus an occurrence number, so duplicate lines
+-- pair up one for one). Only the difference is written: live rows missing
+-- from the file are deleted (and kept in bronze.dwh_removed_rows), file rows
+-- missing from the table are inserted with a fresh dwh_load_date. Unchanged
+-- rows keep theirs, so Silver's incremental merge only sees the change.
+-- A changed line counts as one removed + one added row.
+CREATE OR REPLACE FUNCTION bronze.dwh_merge_csv(
+    p_table_name VARCHAR,
+    p_file TEXT,
+    p_source_file VARCHAR
+)
+RETURNS TABLE (rows_added BIGINT, rows_removed BIGINT) AS $$
+DECLARE
+    v_columns TEXT;
+    v_row_hash TEXT;
+BEGIN
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+    INTO v_columns
+    FROM pg_attribute
+    WHERE attrelid = format('bronze.%I', p_table_name)::REGCLASS
+      AND attnum > 0
+      AND NOT attisdropped
+      AND attname NOT LIKE 'dwh\_%';
+    v_row_hash := format('md5(ROW(%s)::TEXT)', v_columns);
+
+    EXECUTE format('CREATE TEMP TABLE dwh_merge_stage AS SELECT %s FROM bronze.%I WITH NO DATA',
+                   v_columns, p_table_name);
+    EXECUTE format($copy$COPY dwh_merge_stage FROM %L WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '')$copy$,
+                   p_file);
+
+    EXECUTE format(
+        'CREATE TEMP TABLE dwh_merge_diff AS
+         WITH live AS (
+             SELECT ctid AS row_ctid, row_hash,
+                    ROW_NUMBER() OVER (PARTITION BY row_hash) AS occurrence
+             FROM (SELECT ctid, %1$s AS row_hash FROM bronze.%2$I) t
+         ), file AS (
+             SELECT ctid AS row_ctid, row_hash,
+                    ROW_NUMBER() OVER (PARTITION BY row_hash) AS occurrence
+             FROM (SELECT ctid, %1$s AS row_hash FROM dwh_merge_stage) t
+         )
+         SELECT live.row_ctid AS live_ctid, file.row_ctid AS file_ctid
+         FROM live
+         FULL JOIN file USING (row_hash, occurrence)
+         WHERE live.row_ctid IS NULL OR file.row_ctid IS NULL',
+        v_row_hash, p_table_name);
+
+    EXECUTE format(
+        'WITH removed AS (
+             DELETE FROM bronze.%1$I b
+             USING dwh_merge_diff d
+             WHERE b.ctid = d.live_ctid
+             RETURNING b.*
+         )
+         INSERT INTO bronze.dwh_removed_rows (table_name, row_data, removed_at)
+         SELECT %2$L, to_jsonb(removed), CURRENT_TIMESTAMP FROM removed',
+        p_table_name, p_table_name);
+    GET DIAGNOSTICS rows_removed = ROW_COUNT;
+
+    EXECUTE format(
+        'INSERT INTO bronze.%1$I (%2$s, dwh_load_date, dwh_source_file)
+         SELECT %2$s, CURRENT_TIMESTAMP, %3$L
+         FROM dwh_merge_stage s
+         JOIN dwh_merge_diff d ON s.ctid = d.file_ctid',
+        p_table_name, v_columns, p_source_file);
+    GET DIAGNOSTICS rows_added = ROW_COUNT;
+
+    DROP TABLE pg_temp.dwh_merge_stage, pg_temp.dwh_merge_diff;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record that a source was checked and found unchanged
+CREATE OR REPLACE FUNCTION bronze.dwh_record_unchanged(p_table_name VARCHAR)
+RETURNS VOID AS $$
+    UPDATE bronze.dwh_load_manifest
+    SET last_checked_at = CURRENT_TIMESTAMP
+    WHERE table_name = p_table_name;
+$$ LANGUAGE sql;
+
+-- TRUE when Silver has not yet rebuilt from the latest Bronze data
+-- (sources never fingerprinted are always treated as pending)
+CREATE OR REPLACE FUNCTION bronze.dwh_source_pending(p_table_name VARCHAR)
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(
+        (SELECT silver_consumed_at IS NULL OR silver_consumed_at < last_changed_at
+         FROM bronze.dwh_load_manifest
+         WHERE table_name = p_table_name),
+        TRUE
+    );
+$$ LANGUAGE sql STABLE;
+
+-- TRUE when load_silver_data.sql -v incremental=true can merge the table:
+-- Silver consumed it before and it has only been merged in place since
+-- (a TRUNCATE + reload re-stamps every row, so a merge would cover the
+-- whole table and cost more than the plain rebuild)
+CREATE OR REPLACE FUNCTION bronze.dwh_source_mergeable(p_table_name VARCHAR)
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(
+        (SELECT silver_consumed_at IS NOT NULL
+            AND (last_rewrite_at IS NULL OR last_rewrite_at < silver_consumed_at)
+         FROM bronze.dwh_load_manifest
+         WHERE table_name = p_table_name),
+        FALSE
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Called by load_silver_data.sql after rebuilding a Silver table
+CREATE OR REPLACE FUNCTION bronze.dwh_mark_consumed(p_table_name VARCHAR)
+RETURNS VOID AS $$
+    UPDATE bronze.dwh_load_manifest
+    SET silver_consumed_at = CURRENT_TIMESTAMP
+    WHERE table_name = p_table_name;
+$$ LANGUAGE sql;
+
+-- ----------------------------------------------------------------------------
+-- dwh_silver_watermark
+-- Description: Incremental Silver high-water mark per Bronze table
+-- Written by: load_silver_data.sql (every load, full or incremental)
+-- Read by: load_silver_data.sql -v incremental=true (merges rows with
+--          dwh_load_date >= high_water_mark)
+-- Record Count: 15 (one row per Bronze table)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_silver_watermark;
+
+CREATE TABLE bronze.dwh_silver_watermark (
+    table_name VARCHAR(100) PRIMARY KEY,
+    high_water_mark TIMESTAMP,
+    advanced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE bronze.dwh_silver_watermark IS 'Latest Bronze dwh_load_date merged into Silver - incremental loads start here';
+COMMENT ON COLUMN bronze.dwh_silver_watermark.high_water_mark IS 'MAX(dwh_load_date) of the Bronze table when Silver last loaded it (NULL = table was empty)';
+
+-- Watermark scans read only the newly loaded rows
+CREATE INDEX idx_olist_orders_dwh_load_date ON bronze.olist_orders (dwh_load_date);
+CREATE INDEX idx_olist_order_items_dwh_load_date ON bronze.olist_order_items (dwh_load_date);
+CREATE INDEX idx_olist_order_payments_dwh_load_date ON bronze.olist_order_payments (dwh_load_date);
+CREATE INDEX idx_olist_order_reviews_dwh_load_date ON bronze.olist_order_reviews (dwh_load_date);
+CREATE INDEX idx_olist_customers_dwh_load_date ON bronze.olist_customers (dwh_load_date);
+CREATE INDEX idx_olist_geolocation_dwh_load_date ON bronze.olist_geolocation (dwh_load_date);
+CREATE INDEX idx_olist_products_dwh_load_date ON bronze.olist_products (dwh_load_date);
+CREATE INDEX idx_product_category_name_translation_dwh_load_date ON bronze.product_category_name_translation (dwh_load_date);
+CREATE INDEX idx_olist_sellers_dwh_load_date ON bronze.olist_sellers (dwh_load_date);
+CREATE INDEX idx_olist_marketing_qualified_leads_dwh_load_date ON bronze.olist_marketing_qualified_leads (dwh_load_date);
+CREATE INDEX idx_olist_closed_deals_dwh_load_date ON bronze.olist_closed_deals (dwh_load_date);
+CREATE INDEX idx_api_currency_rates_dwh_load_date ON bronze.api_currency_rates (dwh_load_date);
+CREATE INDEX idx_api_brazil_holidays_dwh_load_date ON bronze.api_brazil_holidays (dwh_load_date);
+CREATE INDEX idx_api_weather_history_dwh_load_date ON bronze.api_weather_history (dwh_load_date);
+CREATE INDEX idx_api_weather_hourly_dwh_load_date ON bronze.api_weather_hourly (dwh_load_date);
+
+-- High-water mark of a source (-infinity when Silver never loaded it)
+CREATE OR REPLACE FUNCTION bronze.dwh_watermark(p_table_name VARCHAR)
+RETURNS TIMESTAMP AS $$
+    SELECT COALESCE(
+        (SELECT high_water_mark
+         FROM bronze.dwh_silver_watermark
+         WHERE table_name = p_table_name),
+        '-infinity'::TIMESTAMP
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Bronze rows of a table loaded since p_since, plus the tombstones of rows
+-- deleted since then (bronze.dwh_removed_rows), as rows of the table itself.
+-- Call with a typed NULL: bronze.dwh_delta_rows(NULL::bronze.olist_orders, ...)
+CREATE OR REPLACE FUNCTION bronze.dwh_delta_rows(p_table ANYELEMENT, p_since TIMESTAMP)
+RETURNS SETOF ANYELEMENT AS $$
+DECLARE
+    v_schema NAME;
+    v_table NAME;
+BEGIN
+    SELECT n.nspname, c.relname
+    INTO v_schema, v_table
+    FROM pg_type t
+    JOIN pg_class c ON c.oid = t.typrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE t.oid = pg_typeof(p_table);
+
+    RETURN QUERY EXECUTE format(
+        'SELECT * FROM %1$I.%2$I WHERE dwh_load_date >= $1
+         UNION ALL
+         SELECT r.*
+         FROM bronze.dwh_removed_rows d
+         CROSS JOIN LATERAL jsonb_populate_record(NULL::%1$I.%2$I, d.row_data) r
+         WHERE d.table_name = $2
+           AND d.removed_at >= $1',
+        v_schema, v_table)
+    USING p_since, v_table;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Called by load_silver_data.sql in the same transaction as the Silver load,
+-- so the mark is the newest row (or tombstone) that load could see.
+-- Tombstones below the new mark have been merged and are pruned.
+CREATE OR REPLACE FUNCTION bronze.dwh_advance_watermark(p_table_name VARCHAR)
+RETURNS TIMESTAMP AS $$
+DECLARE
+    v_mark TIMESTAMP;
+BEGIN
+    EXECUTE format('SELECT MAX(dwh_load_date) FROM bronze.%I', p_table_name) INTO v_mark;
+    v_mark := GREATEST(v_mark, (SELECT MAX(removed_at)
+                                FROM bronze.dwh_removed_rows
+                                WHERE table_name = p_table_name));
+
+    DELETE FROM bronze.dwh_removed_rows
+    WHERE table_name = p_table_name
+      AND removed_at < v_mark;
+
+    INSERT INTO bronze.dwh_silver_watermark (table_name, high_water_mark, advanced_at)
+    VALUES (p_table_name, v_mark, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        high_water_mark = EXCLUDED.high_water_mark,
+        advanced_at = EXCLUDED.advanced_at;
+
+    RETURN v_mark;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------------------------------------------------------
+-- Shadow-table refresh
+-- Used by: load_silver_data.sql / load_gold_data.sql with -v shadow_swap=true
+-- A table is rebuilt as <table>__shadow while readers keep using the live
+-- table, indexed and analyzed there, then swapped in by rename in one short
+-- transaction. Readers see the old rows or the new ones, never an empty or
+-- half-loaded table.
+-- ----------------------------------------------------------------------------
+
+-- Name of the shadow copy of a table, index or constraint (63-byte limit)
+CREATE OR REPLACE FUNCTION bronze.dwh_shadow_name(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT LEFT(p_name, 55) || '__shadow';
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Schema-qualified shadow table of a live table
+CREATE OR REPLACE FUNCTION bronze.dwh_shadow_table(p_table REGCLASS)
+RETURNS TEXT AS $$
+    SELECT format('%I.%I', n.nspname, bronze.dwh_shadow_name(c.relname))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_table;
+$$ LANGUAGE sql STABLE;
+
+-- (Re)create an empty shadow table: same columns, defaults (sharing the live
+-- sequences) and CHECK constraints; keys and indexes come after the load
+CREATE OR REPLACE FUNCTION bronze.dwh_shadow_create(p_table REGCLASS)
+RETURNS TEXT AS $$
+DECLARE
+    v_shadow TEXT := bronze.dwh_shadow_table(p_table);
+    v_live TEXT;
+BEGIN
+    SELECT format('%I.%I', n.nspname, c.relname) INTO v_live
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_table;
+
+    -- Leftover of a failed run (CASCADE only drops FKs from other shadows)
+    EXECUTE format('DROP TABLE IF EXISTS %s CASCADE', v_shadow);
+    EXECUTE format(
+        'CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS INCLUDING GENERATED '
+        'INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS)',
+        v_shadow, v_live
+    );
+    RETURN v_shadow;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Build the live tables' keys, indexes and foreign keys on their loaded
+-- shadows, then ANALYZE them. FKs to a table of the same batch point at its
+-- shadow, so they stay consistent after the swap.
+CREATE OR REPLACE FUNCTION bronze.dwh_shadow_finalize(p_tables REGCLASS[])
+RETURNS VOID AS $$
+DECLARE
+    v_table REGCLASS;
+    v_obj RECORD;
+BEGIN
+    -- Pass 1: primary keys, unique constraints and plain indexes
+    FOREACH v_table IN ARRAY p_tables LOOP
+        FOR v_obj IN
+            SELECT con.conname, pg_get_constraintdef(con.oid) AS def
+            FROM pg_constraint con
+            WHERE con.conrelid = v_table
+              AND con.contype IN ('p', 'u', 'x')
+        LOOP
+            EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I %s',
+                           bronze.dwh_shadow_table(v_table),
+                           bronze.dwh_shadow_name(v_obj.conname), v_obj.def);
+        END LOOP;
+
+        FOR v_obj IN
+            SELECT ic.relname, i.indisunique,
+                   substring(pg_get_indexdef(i.indexrelid) FROM ' USING .*$') AS def
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid = v_table
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint con
+                  WHERE con.conindid = i.indexrelid
+                    AND con.conrelid = i.indrelid
+              )
+        LOOP
+            EXECUTE format('CREATE %sINDEX %I ON %s%s',
+                           CASE WHEN v_obj.indisunique THEN 'UNIQUE ' ELSE '' END,
+                           bronze.dwh_shadow_name(v_obj.relname),
+                           bronze.dwh_shadow_table(v_table), v_obj.def);
+        END LOOP;
+    END LOOP;
+
+    -- Pass 2: foreign keys (referenced keys now exist on every shadow)
+    FOREACH v_table IN ARRAY p_tables LOOP
+        FOR v_obj IN
+            SELECT con.conname, con.confrelid, pg_get_constraintdef(con.oid) AS def
+            FROM pg_constraint con
+            WHERE con.conrelid = v_table
+              AND con.contype = 'f'
+        LOOP
+            EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I %s',
+                           bronze.dwh_shadow_table(v_table),
+                           bronze.dwh_shadow_name(v_obj.conname),
+                           regexp_replace(
+                               v_obj.def, 'REFERENCES [^(]+\(',
+                               'REFERENCES ' || CASE
+                                   WHEN v_obj.confrelid = ANY (p_tables)
+                                   THEN bronze.dwh_shadow_table(v_obj.confrelid::REGCLASS)
+                                   ELSE v_obj.confrelid::REGCLASS::TEXT
+                               END || '('
+                           ));
+        END LOOP;
+    END LOOP;
+
+    FOREACH v_table IN ARRAY p_tables LOOP
+        EXECUTE format('ANALYZE %s', bronze.dwh_shadow_table(v_table));
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Swap finalized shadows in for their live tables in the current transaction:
+-- carry over grants, table comment and sequence ownership, drop the live
+-- tables and rename the shadows (and their indexes/constraints) into place.
+-- The ACCESS EXCLUSIVE lock wait is bounded by p_lock_timeout and retried,
+-- so a long BI query delays the swap instead of queueing every reader
+-- behind it. Fails (rather than CASCADE) if a view depends on a live table.
+CREATE OR REPLACE FUNCTION bronze.dwh_shadow_swap(
+    p_tables REGCLASS[],
+    p_lock_timeout TEXT DEFAULT '2s',
+    p_attempts INTEGER DEFAULT 10
+)
+RETURNS VOID AS $$
+DECLARE
+    v_table REGCLASS;
+    v_attempt INTEGER;
+    v_schema TEXT;
+    v_name TEXT;
+    v_shadow TEXT;
+    v_live TEXT[] := '{}';
+    v_before TEXT[] := '{}';
+    v_after TEXT[] := '{}';
+    v_obj RECORD;
+    v_stmt TEXT;
+BEGIN
+    PERFORM set_config('lock_timeout', p_lock_timeout, TRUE);
+    FOR v_attempt IN 1..p_attempts LOOP
+        BEGIN
+            FOREACH v_table IN ARRAY p_tables LOOP
+                EXECUTE format('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE', v_table);
+            END LOOP;
+            EXIT;
+        EXCEPTION WHEN lock_not_available THEN
+            IF v_attempt = p_attempts THEN
+                RAISE;
+            END IF;
+            RAISE NOTICE 'Shadow swap: tables busy, retrying (%/%)', v_attempt, p_attempts;
+            PERFORM pg_sleep(1);
+        END;
+    END LOOP;
+
+    FOREACH v_table IN ARRAY p_tables LOOP
+        SELECT n.nspname, c.relname INTO v_schema, v_name
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.oid = v_table;
+        v_shadow := bronze.dwh_shadow_table(v_table);
+        v_live := v_live || format('%I.%I', v_schema, v_name);
+
+        -- Grants and table comment (LIKE does not copy them)
+        FOR v_obj IN
+            SELECT a.privilege_type,
+                   CASE WHEN a.grantee = 0 THEN 'PUBLIC'
+                        ELSE quote_ident(pg_get_userbyid(a.grantee)) END AS grantee
+            FROM pg_class c, aclexplode(c.relacl) a
+            WHERE c.oid = v_table
+              AND a.grantee <> c.relowner
+        LOOP
+            v_before := v_before || format('GRANT %s ON %s TO %s',
+                                           v_obj.privilege_type, v_shadow, v_obj.grantee);
+        END LOOP;
+        IF obj_description(v_table, 'pg_class') IS NOT NULL THEN
+            v_before := v_before || format('COMMENT ON TABLE %s IS %L',
+                                           v_shadow, obj_description(v_table, 'pg_class'));
+        END IF;
+
+        -- SERIAL sequences would be dropped with the live table
+        FOR v_obj IN
+            SELECT d.objid::REGCLASS AS seq, a.attname
+            FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.classid = 'pg_class'::REGCLASS
+              AND d.refobjid = v_table
+              AND d.deptype = 'a'
+              AND s.relkind = 'S'
+        LOOP
+            v_before := v_before || format('ALTER SEQUENCE %s OWNED BY %s.%I',
+                                           v_obj.seq, v_shadow, v_obj.attname);
+        END LOOP;
+
+        -- Once the live table is gone: take its name and object names
+        v_after := v_after || format('ALTER TABLE %s RENAME TO %I', v_shadow, v_name);
+        FOR v_obj IN
+            SELECT con.conname
+            FROM pg_constraint con
+            WHERE con.conrelid = v_table
+              AND con.contype IN ('p', 'u', 'x', 'f')
+        LOOP
+            v_after := v_after || format('ALTER TABLE %I.%I RENAME CONSTRAINT %I TO %I',
+                                         v_schema, v_name,
+                                         bronze.dwh_shadow_name(v_obj.conname), v_obj.conname);
+        END LOOP;
+        FOR v_obj IN
+            SELECT ic.relname
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid = v_table
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint con
+                  WHERE con.conindid = i.indexrelid
+                    AND con.conrelid = i.indrelid
+              )
+        LOOP
+            v_after := v_after || format('ALTER INDEX %I.%I RENAME TO %I',
+                                         v_schema, bronze.dwh_shadow_name(v_obj.relname),
+                                         v_obj.relname);
+        END LOOP;
+    END LOOP;
+
+    FOREACH v_stmt IN ARRAY v_before LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+
+    EXECUTE 'DROP TABLE ' || array_to_string(v_live, ', ');
+
+    FOREACH v_stmt IN ARRAY v_after LOOP
+        EXECUTE v_stmt;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------------------------------------------------------
+-- dwh_deferred_ddl
+-- Description: Secondary indexes and foreign keys dropped for a bulk load
+-- Written by: bronze.dwh_defer_indexes (load scripts with -v bulk_load=true,
+--             scripts/pipeline/bulk_load.py)
+-- Read by: bronze.dwh_restore_indexes, scripts/pipeline/bulk_load.py
+-- Record Count: 0 outside a bulk load; rows left behind mean a load failed
+--               before its indexes were rebuilt (the next run rebuilds them)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_deferred_ddl;
+
+CREATE TABLE bronze.dwh_deferred_ddl (
+    table_name TEXT NOT NULL,
+    object_name TEXT NOT NULL,
+    object_type VARCHAR(10) NOT NULL,
+    referenced_table TEXT,
+    ddl TEXT NOT NULL,
+    deferred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, object_name)
+);
+
+COMMENT ON TABLE bronze.dwh_deferred_ddl IS 'Index / FK definitions dropped before a bulk load, recreated after it';
+COMMENT ON COLUMN bronze.dwh_deferred_ddl.table_name IS 'Table the object belongs to (schema-qualified)';
+COMMENT ON COLUMN bronze.dwh_deferred_ddl.object_type IS 'index or fk';
+COMMENT ON COLUMN bronze.dwh_deferred_ddl.referenced_table IS 'fk only: table the key points to';
+COMMENT ON COLUMN bronze.dwh_deferred_ddl.ddl IS 'CREATE INDEX / ALTER TABLE ... ADD CONSTRAINT statement that recreates the object';
+
+-- Save and drop the secondary indexes of the tables (primary keys and unique
+-- constraints stay: they keep SERIAL keys and ON CONFLICT loads correct) and
+-- every foreign key from or to them, so the load runs without index
+-- maintenance or per-row FK checks. The definitions are saved in the same
+-- transaction as the DROPs; a second call before the restore finds nothing
+-- left to drop and keeps the saved rows. The empty search_path makes every
+-- saved name and definition schema-qualified, whatever the caller's is.
+CREATE OR REPLACE FUNCTION bronze.dwh_defer_indexes(p_tables REGCLASS[])
+RETURNS INTEGER
+SET search_path = pg_catalog, pg_temp
+AS $$
+DECLARE
+    v_obj RECORD;
+    v_count INTEGER := 0;
+BEGIN
+    FOR v_obj IN
+        SELECT DISTINCT con.conrelid::REGCLASS::TEXT AS table_name, con.conname,
+               con.confrelid::REGCLASS::TEXT AS referenced_table,
+               pg_get_constraintdef(con.oid) AS def
+        FROM pg_constraint con
+        WHERE con.contype = 'f'
+          AND (con.conrelid = ANY (p_tables) OR con.confrelid = ANY (p_tables))
+    LOOP
+        INSERT INTO bronze.dwh_deferred_ddl (table_name, object_name, object_type,
+                                             referenced_table, ddl)
+        VALUES (v_obj.table_name, v_obj.conname, 'fk', v_obj.referenced_table,
+                format('ALTER TABLE %s ADD CONSTRAINT %I %s',
+                       v_obj.table_name, v_obj.conname, v_obj.def))
+        ON CONFLICT (table_name, object_name) DO NOTHING;
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_obj.table_name, v_obj.conname);
+        v_count := v_count + 1;
+    END LOOP;
+
+    FOR v_obj IN
+        SELECT i.indrelid::REGCLASS::TEXT AS table_name, ic.relname,
+               i.indexrelid::REGCLASS::TEXT AS index_name,
+               pg_get_indexdef(i.indexrelid) AS def
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        WHERE i.indrelid = ANY (p_tables)
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint con
+              WHERE con.conindid = i.indexrelid
+                AND con.conrelid = i.indrelid
+          )
+    LOOP
+        INSERT INTO bronze.dwh_deferred_ddl (table_name, object_name, object_type, ddl)
+        VALUES (v_obj.table_name, v_obj.relname, 'index', v_obj.def)
+        ON CONFLICT (table_name, object_name) DO NOTHING;
+        EXECUTE 'DROP INDEX ' || v_obj.index_name;
+        v_count := v_count + 1;
+    END LOOP;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recreate everything bronze.dwh_defer_indexes saved for the tables (indexes
+-- first, then foreign keys from or to them) and ANALYZE them. Runs the statements one after
+-- another in this backend; scripts/pipeline/bulk_load.py spreads the same
+-- rows over several connections instead.
+CREATE OR REPLACE FUNCTION bronze.dwh_restore_indexes(p_tables REGCLASS[])
+RETURNS INTEGER AS $$
+DECLARE
+    v_obj RECORD;
+    v_table REGCLASS;
+    v_count INTEGER := 0;
+BEGIN
+    FOR v_obj IN
+        SELECT table_name, object_name, ddl
+        FROM bronze.dwh_deferred_ddl
+        WHERE table_name::REGCLASS = ANY (p_tables)
+           OR referenced_table::REGCLASS = ANY (p_tables)
+        ORDER BY object_type = 'fk', table_name, object_name
+    LOOP
+        EXECUTE v_obj.ddl;
+        DELETE FROM bronze.dwh_deferred_ddl
+        WHERE table_name = v_obj.table_name AND object_name = v_obj.object_name;
+        v_count := v_count + 1;
+    END LOOP;
+
+    FOREACH v_table IN ARRAY p_tables LOOP
+        EXECUTE format('ANALYZE %s', v_table);
+    END LOOP;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------------------------------------------------------
+-- dwh_api_run / dwh_api_job
+-- Description: Durable work queue for API extraction (queue mode)
+-- Written by: scripts/api/fetch_*.py --queue (enqueue),
+--             scripts/api/work_queue.py (claim / complete / finalize)
+-- Record Count: one run per enqueue, one job per location or currency and
+--               date chunk
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS bronze.dwh_api_job;
+DROP TABLE IF EXISTS bronze.dwh_api_run;
+
+CREATE TABLE bronze.dwh_api_run (
+    run_id SERIAL PRIMARY KEY,
+    source VARCHAR(30) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',
+    job_count INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finalized_at TIMESTAMP
+);
+
+COMMENT ON TABLE bronze.dwh_api_run IS 'API extraction runs in queue mode (status: open, finalized, cancelled)';
+
+-- At most one open run per source
+CREATE UNIQUE INDEX ux_dwh_api_run_open ON bronze.dwh_api_run (source) WHERE status = 'open';
+
+CREATE TABLE bronze.dwh_api_job (
+    job_id BIGSERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES bronze.dwh_api_run (run_id) ON DELETE CASCADE,
+    job_key VARCHAR(200) NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    lease_owner VARCHAR(100),
+    lease_expires_at TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    result JSONB,
+    last_error TEXT,
+    UNIQUE (run_id, job_key)
+);
+
+COMMENT ON TABLE bronze.dwh_api_job IS 'Queued API extraction jobs (status: pending, running, done, failed) - claimed with FOR UPDATE SKIP LOCKED';
+COMMENT ON COLUMN bronze.dwh_api_job.job_key IS 'Location or currency | chunk start date - orders the run content hash';
+COMMENT ON COLUMN bronze.dwh_api_job.lease_expires_at IS 'A running job past its lease can be claimed by another worker';
+COMMENT ON COLUMN bronze.dwh_api_job.available_at IS 'Retry backoff: a pending job is not claimed before this time';
+COMMENT ON COLUMN bronze.dwh_api_job.result IS 'Per target table: rows, bytes and SHA-256 of the staged COPY data';
+
+CREATE INDEX idx_dwh_api_job_claim ON bronze.dwh_api_job (run_id, status, available_at);
+
+-- Staged job output: committed together with the job's 'done' status,
+-- moved into the Bronze table when the run is finalized
+DROP TABLE IF EXISTS bronze.api_currency_rates__queue;
+DROP TABLE IF EXISTS bronze.api_weather_history__queue;
+DROP TABLE IF EXISTS bronze.api_weather_hourly__queue;
+
+CREATE TABLE bronze.api_currency_rates__queue (
+    LIKE bronze.api_currency_rates INCLUDING DEFAULTS,
+    dwh_job_id BIGINT NOT NULL DEFAULT current_setting('dwh.job_id')::BIGINT
+);
+CREATE TABLE bronze.api_weather_history__queue (
+    LIKE bronze.api_weather_history INCLUDING DEFAULTS,
+    dwh_job_id BIGINT NOT NULL DEFAULT current_setting('dwh.job_id')::BIGINT
+);
+CREATE TABLE bronze.api_weather_hourly__queue (
+    LIKE bronze.api_weather_hourly INCLUDING DEFAULTS,
+    dwh_job_id BIGINT NOT NULL DEFAULT current_setting('dwh.job_id')::BIGINT
+);
+
+CREATE INDEX idx_api_currency_rates__queue_job ON bronze.api_currency_rates__queue (dwh_job_id);
+CREATE INDEX idx_api_weather_history__queue_job ON bronze.api_weather_history__queue (dwh_job_id);
+CREATE INDEX idx_api_weather_hourly__queue_job ON bronze.api_weather_hourly__queue (dwh_job_id);
+
+-- ----------------------------------------------------------------------------
+-- Optional: UNLOGGED source tables (-v unlogged=true, see header)
+-- ----------------------------------------------------------------------------
+\if :unlogged
+ALTER TABLE bronze.olist_orders SET UNLOGGED;
+ALTER TABLE bronze.olist_order_items SET UNLOGGED;
+ALTER TABLE bronze.olist_order_payments SET UNLOGGED;
+ALTER TABLE bronze.olist_order_reviews SET UNLOGGED;
+ALTER TABLE bronze.olist_customers SET UNLOGGED;
+ALTER TABLE bronze.olist_geolocation SET UNLOGGED;
+ALTER TABLE bronze.olist_products SET UNLOGGED;
+ALTER TABLE bronze.product_category_name_translation SET UNLOGGED;
+ALTER TABLE bronze.olist_sellers SET UNLOGGED;
+ALTER TABLE bronze.olist_marketing_qualified_leads SET UNLOGGED;
+ALTER TABLE bronze.olist_closed_deals SET UNLOGGED;
+ALTER TABLE bronze.api_currency_rates SET UNLOGGED;
+ALTER TABLE bronze.api_brazil_holidays SET UNLOGGED;
+ALTER TABLE bronze.api_weather_history SET UNLOGGED;
+ALTER TABLE bronze.api_weather_hourly SET UNLOGGED;
+\echo 'Bronze source tables are UNLOGGED (rebuilt from source after a crash)'
+\endif
+
+-- ============================================================================
+-- SECTION 5: VERIFICATION QUERIES
 -- ============================================================================
 
 -- List all Bronze tables created
@@ -418,11 +1440,20 @@ BEGIN
     RAISE NOTICE 'Marketing Funnel Tables (2):';
     RAISE NOTICE '  10. bronze.olist_marketing_qualified_leads';
     RAISE NOTICE '  11. bronze.olist_closed_deals';
-    RAISE NOTICE 'API Tables (3):';
+    RAISE NOTICE 'API Tables (4):';
     RAISE NOTICE '  12. bronze.api_currency_rates';
     RAISE NOTICE '  13. bronze.api_brazil_holidays';
     RAISE NOTICE '  14. bronze.api_weather_history';
+    RAISE NOTICE '  15. bronze.api_weather_hourly';
+    RAISE NOTICE '========================================';
+    RAISE NOTICE 'Control Tables (8):';
+    RAISE NOTICE '  bronze.dwh_preflight_manifest';
+    RAISE NOTICE '  bronze.dwh_orphan_audit';
+    RAISE NOTICE '  bronze.dwh_load_manifest / bronze.dwh_removed_rows';
+    RAISE NOTICE '  bronze.dwh_silver_watermark';
+    RAISE NOTICE '  bronze.dwh_deferred_ddl';
+    RAISE NOTICE '  bronze.dwh_api_run / bronze.dwh_api_job (+ <table>__queue staging)';
     RAISE NOTICE '========================================';
-    RAISE NOTICE 'Total: 14 tables created';
+    RAISE NOTICE 'Total: 15 tables created';
     RAISE NOTICE '========================================';
 END $$;
\ No newline at end of file
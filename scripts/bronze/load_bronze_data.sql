@@ -10,9 +10,70 @@ API data is loaded separately via Python scripts.
 
 LOAD STRATEGY:
 --------------
-- Full Load: TRUNCATE table, then INSERT all records
+- Full Load: TRUNCATE table, then INSERT all records (or merge only the
+  changed rows, see DELTA LOAD below)
 - No transformations: Data loaded exactly as-is from source files
 - All columns as VARCHAR to prevent data type errors during load
+- Each table is loaded in its own transaction: if COPY fails, the TRUNCATE
+  is rolled back and the table keeps its previous contents
+
+PRE-FLIGHT VALIDATION:
+----------------------
+Run scripts/pipeline/validate_datasets.py before this script. It scans every
+CSV (header, column counts, encoding, quoting) and writes the results to
+bronze.dwh_preflight_manifest. This script refuses to truncate anything
+unless all 11 files in the manifest are valid AND still match the files under
+:data_path (same size and modification time, via pg_stat_file - a file
+replaced after validation fails the check). A failed check raises an error,
+so psql exits non-zero (ON_ERROR_STOP).
+
+To bypass the check (not recommended):
+    psql -v skip_preflight=true -f load_bronze_data.sql
+
+CHANGE DETECTION:
+-----------------
+The validator also records a content hash per file. A table is reloaded
+only when that hash differs from bronze.dwh_load_manifest (the last loaded
+version); unchanged files are skipped. Reloaded tables show up in
+bronze.dwh_pending_changes until load_silver_data.sql rebuilds them.
+
+The hash is only trusted while the file still matches its pre-flight row
+(checked by the gate above, and again after each COPY by
+bronze.dwh_record_csv_load, which rolls the table back if the file changed
+in between). With skip_preflight=true every table is reloaded and recorded
+without a hash, so the next validated run reloads it again.
+
+To reload every table regardless:
+    psql -v force_reload=true -f load_bronze_data.sql
+
+DELTA LOAD:
+-----------
+With -v delta_load=true a changed file is merged into its table instead of
+TRUNCATE + COPY (bronze.dwh_merge_csv): the file is COPYed into a temp table,
+rows no longer in the file are deleted (their tombstones go to
+bronze.dwh_removed_rows) and new or changed lines are inserted. Unchanged
+rows keep their dwh_load_date, so load_silver_data.sql -v incremental=true
+merges only the rows that changed:
+    psql -v delta_load=true -f load_bronze_data.sql
+The comparison still reads the whole file and table; the writes, and the
+Silver merge after them, scale with the number of changed lines. A table
+that was TRUNCATEd and reloaded since Silver last read it is rebuilt in
+full by Silver (bronze.dwh_source_mergeable).
+
+BULK LOAD:
+----------
+With -v bulk_load=true the secondary indexes (the dwh_load_date indexes) of
+the CSV tables this run reloads are dropped before the first COPY and
+rebuilt once, after the last one, followed by ANALYZE (bronze.dwh_defer_indexes /
+bronze.dwh_restore_indexes). That is cheaper than maintaining the indexes
+row by row on a full reload:
+    psql -v bulk_load=true -f load_bronze_data.sql
+scripts/pipeline/bulk_load.py does the same but rebuilds the indexes over
+several connections in parallel.
+
+Each table is TRUNCATEd and COPYed in one transaction, so with
+wal_level = minimal the COPY writes no WAL; with Bronze created UNLOGGED
+(create_bronze_tables.sql -v unlogged=true) no setting is needed.
 
 PREREQUISITES:
 --------------
@@ -25,8 +86,9 @@ PREREQUISITES:
 
 FILE PATHS:
 -----------
-Update the file paths below to match your local setup.
-Default assumes: /path/to/project/datasets/
+The CSV files are read from :data_path (see CONFIGURATION below), which must
+hold the same e-commerce/ and marketing_funnel/ folders validate_datasets.py
+scanned. Set it with -v data_path=... or change the default below.
 
 IMPORTANT:
 ----------
@@ -44,10 +106,103 @@ For local development, use \copy in psql or import via DBeaver/pgAdmin GUI.
 -- CONFIGURATION: Update these paths to match your local setup
 -- ============================================================================
 
--- Option 1: Using psql variables (uncomment and set your path)
-\set data_path 'C:\sql-data-warehouse-project\datasets'
+-- Folder holding e-commerce/ and marketing_funnel/, as the database server
+-- sees it (COPY reads the files server-side). Override on the command line:
+--     psql -v data_path=/srv/olist/datasets -f load_bronze_data.sql
+\if :{?data_path}
+\else
+    \set data_path 'C:/sql-data-warehouse-project/datasets'
+\endif
 
--- Option 2: Direct paths in COPY commands (update paths below)
+-- Stop at the first error so a failed COPY rolls back its own TRUNCATE
+\set ON_ERROR_STOP on
+
+-- ============================================================================
+-- PRE-FLIGHT CHECK: Refuse to load unless every CSV passed validation
+-- ============================================================================
+
+\if :{?skip_preflight}
+\else
+    \set skip_preflight false
+\endif
+
+\if :{?force_reload}
+\else
+    \set force_reload false
+\endif
+
+\if :{?delta_load}
+\else
+    \set delta_load false
+\endif
+
+\if :{?bulk_load}
+\else
+    \set bulk_load false
+\endif
+
+-- bulk_restore=false leaves the rebuild to scripts/pipeline/bulk_load.py
+\if :{?bulk_restore}
+\else
+    \set bulk_restore :bulk_load
+\endif
+
+-- Without a fresh pre-flight run the stored hashes cannot be trusted
+\if :skip_preflight
+    \set force_reload true
+\endif
+
+SELECT
+    :'skip_preflight'::BOOLEAN
+    OR (
+        COALESCE(COUNT(*) = 11 AND BOOL_AND(is_valid), FALSE)
+        AND NOT EXISTS (SELECT 1 FROM bronze.dwh_stale_preflight(:'data_path'))
+    ) AS preflight_ok
+FROM bronze.dwh_preflight_manifest
+\gset
+
+\if :preflight_ok
+    \echo 'Pre-flight check passed - loading Bronze tables'
+\else
+    \echo 'Pre-flight check FAILED - no tables were truncated.'
+    \echo 'Run scripts/pipeline/validate_datasets.py and fix the reported files:'
+    SELECT table_name, row_count, bad_row_count, bad_row_offsets, validation_errors
+    FROM bronze.dwh_preflight_manifest
+    WHERE NOT is_valid
+    ORDER BY table_name;
+    \echo 'Files changed since they were validated (re-run validate_datasets.py):'
+    SELECT table_name, file_path, problem
+    FROM bronze.dwh_stale_preflight(:'data_path')
+    ORDER BY table_name;
+    DO $$
+    BEGIN
+        RAISE EXCEPTION 'Bronze pre-flight check failed - see the files listed above';
+    END $$;
+\endif
+
+-- Tables this run reloads (same test as each table section below), plus any
+-- whose indexes an interrupted bulk load left deferred
+SELECT '{' || COALESCE(STRING_AGG('bronze.' || t.table_name, ',' ORDER BY t.ord), '') || '}' AS bronze_tables
+FROM UNNEST(ARRAY[
+    'olist_orders', 'olist_order_items', 'olist_order_payments',
+    'olist_order_reviews', 'olist_customers', 'olist_geolocation',
+    'olist_products', 'product_category_name_translation',
+    'olist_sellers', 'olist_marketing_qualified_leads',
+    'olist_closed_deals'
+]) WITH ORDINALITY AS t (table_name, ord)
+WHERE :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    t.table_name,
+    (SELECT p.content_hash FROM bronze.dwh_preflight_manifest p WHERE p.table_name = t.table_name)
+) OR EXISTS (
+    SELECT 1 FROM bronze.dwh_deferred_ddl d WHERE d.table_name = 'bronze.' || t.table_name
+)
+\gset
+
+-- Bulk load: drop secondary indexes of those tables now, rebuild them after the last one
+\if :bulk_load
+\echo 'Bulk load: deferring secondary indexes of' :bronze_tables
+SELECT bronze.dwh_defer_indexes(:'bronze_tables'::REGCLASS[]) AS deferred_objects;
+\endif
 
 -- ============================================================================
 -- SECTION 1: LOAD E-COMMERCE DATASET (9 tables)
@@ -56,6 +211,21 @@ For local development, use \copy in psql or import via DBeaver/pgAdmin GUI.
 -- ----------------------------------------------------------------------------
 -- Table 1: olist_orders (~99,441 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_orders',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_orders')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_orders_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_orders', :'csv_file', 'olist_orders_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_orders;
 
 COPY bronze.olist_orders (
@@ -68,7 +238,7 @@ COPY bronze.olist_orders (
     order_delivered_customer_date,
     order_estimated_delivery_date
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_orders_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -77,12 +247,40 @@ UPDATE bronze.olist_orders SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_load_
 -- Update source file
 UPDATE bronze.olist_orders SET dwh_source_file = 'olist_orders_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_orders', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 -- Verify load
 SELECT 'olist_orders' as table_name, COUNT(*) as row_count FROM bronze.olist_orders;
+\else
+\echo '  - olist_orders unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_orders');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 2: olist_order_items (~112,650 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_order_items',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_order_items')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_order_items_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_order_items', :'csv_file', 'olist_order_items_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_order_items;
 
 COPY bronze.olist_order_items (
@@ -94,7 +292,7 @@ COPY bronze.olist_order_items (
     price,
     freight_value
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_order_items_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -103,11 +301,39 @@ UPDATE bronze.olist_order_items SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_
 -- Update source file
 UPDATE bronze.olist_order_items SET dwh_source_file = 'olist_order_items_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_order_items', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_order_items' as table_name, COUNT(*) as row_count FROM bronze.olist_order_items;
+\else
+\echo '  - olist_order_items unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_order_items');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 3: olist_order_payments (~103,886 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_order_payments',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_order_payments')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_order_payments_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_order_payments', :'csv_file', 'olist_order_payments_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_order_payments;
 
 COPY bronze.olist_order_payments (
@@ -117,7 +343,7 @@ COPY bronze.olist_order_payments (
     payment_installments,
     payment_value
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_order_payments_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -126,12 +352,40 @@ UPDATE bronze.olist_order_payments SET dwh_load_date = CURRENT_TIMESTAMP WHERE d
 -- Update source file
 UPDATE bronze.olist_order_payments SET dwh_source_file = 'olist_order_payments_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_order_payments', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_order_payments' as table_name, COUNT(*) as row_count FROM bronze.olist_order_payments;
+\else
+\echo '  - olist_order_payments unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_order_payments');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 4: olist_order_reviews (~100,000 rows)
 -- NOTE: This file may have embedded commas in review text - handle carefully
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_order_reviews',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_order_reviews')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_order_reviews_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_order_reviews', :'csv_file', 'olist_order_reviews_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_order_reviews;
 
 COPY bronze.olist_order_reviews (
@@ -143,7 +397,7 @@ COPY bronze.olist_order_reviews (
     review_creation_date,
     review_answer_timestamp
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_order_reviews_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '', QUOTE '"', ESCAPE '"');
 
 -- Update load timestamp
@@ -152,11 +406,39 @@ UPDATE bronze.olist_order_reviews SET dwh_load_date = CURRENT_TIMESTAMP WHERE dw
 -- Update source file
 UPDATE bronze.olist_order_reviews SET dwh_source_file = 'olist_order_reviews_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_order_reviews', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_order_reviews' as table_name, COUNT(*) as row_count FROM bronze.olist_order_reviews;
+\else
+\echo '  - olist_order_reviews unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_order_reviews');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 5: olist_customers (~99,441 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_customers',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_customers')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_customers_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_customers', :'csv_file', 'olist_customers_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_customers;
 
 COPY bronze.olist_customers (
@@ -166,7 +448,7 @@ COPY bronze.olist_customers (
     customer_city,
     customer_state
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_customers_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -175,12 +457,40 @@ UPDATE bronze.olist_customers SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_lo
 -- Update source file
 UPDATE bronze.olist_customers SET dwh_source_file = 'olist_customers_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_customers', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_customers' as table_name, COUNT(*) as row_count FROM bronze.olist_customers;
+\else
+\echo '  - olist_customers unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_customers');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 6: olist_geolocation (~1,000,163 rows) - LARGEST TABLE
 -- NOTE: This is the largest file, may take 30+ seconds to load
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_geolocation',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_geolocation')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_geolocation_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_geolocation', :'csv_file', 'olist_geolocation_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_geolocation;
 
 COPY bronze.olist_geolocation (
@@ -190,7 +500,7 @@ COPY bronze.olist_geolocation (
     geolocation_city,
     geolocation_state
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_geolocation_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -199,11 +509,39 @@ UPDATE bronze.olist_geolocation SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_
 -- Update source file
 UPDATE bronze.olist_geolocation SET dwh_source_file = 'olist_geolocation_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_geolocation', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_geolocation' as table_name, COUNT(*) as row_count FROM bronze.olist_geolocation;
+\else
+\echo '  - olist_geolocation unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_geolocation');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 7: olist_products (~32,951 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_products',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_products')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_products_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_products', :'csv_file', 'olist_products_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_products;
 
 COPY bronze.olist_products (
@@ -217,7 +555,7 @@ COPY bronze.olist_products (
     product_height_cm,
     product_width_cm
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_products_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -226,18 +564,46 @@ UPDATE bronze.olist_products SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_loa
 -- Update source file
 UPDATE bronze.olist_products SET dwh_source_file = 'olist_products_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_products', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_products' as table_name, COUNT(*) as row_count FROM bronze.olist_products;
+\else
+\echo '  - olist_products unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_products');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 8: product_category_name_translation (~71 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'product_category_name_translation',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'product_category_name_translation')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/product_category_name_translation.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('product_category_name_translation', :'csv_file', 'product_category_name_translation.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.product_category_name_translation;
 
 COPY bronze.product_category_name_translation (
     product_category_name,
     product_category_name_english
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\product_category_name_translation.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -246,11 +612,39 @@ UPDATE bronze.product_category_name_translation SET dwh_load_date = CURRENT_TIME
 -- Update source file
 UPDATE bronze.product_category_name_translation SET dwh_source_file = 'product_category_name_translation.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('product_category_name_translation', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'product_category_name_translation' as table_name, COUNT(*) as row_count FROM bronze.product_category_name_translation;
+\else
+\echo '  - product_category_name_translation unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('product_category_name_translation');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 9: olist_sellers (~3,095 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_sellers',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_sellers')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/e-commerce/olist_sellers_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_sellers', :'csv_file', 'olist_sellers_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_sellers;
 
 COPY bronze.olist_sellers (
@@ -259,7 +653,7 @@ COPY bronze.olist_sellers (
     seller_city,
     seller_state
 )
-FROM 'C:\sql-data-warehouse-project\datasets\e-commerce\olist_sellers_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -268,7 +662,20 @@ UPDATE bronze.olist_sellers SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh_load
 -- Update source file
 UPDATE bronze.olist_sellers SET dwh_source_file = 'olist_sellers_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_sellers', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_sellers' as table_name, COUNT(*) as row_count FROM bronze.olist_sellers;
+\else
+\echo '  - olist_sellers unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_sellers');
+\endif
 
 -- ============================================================================
 -- SECTION 2: LOAD MARKETING FUNNEL DATASET (2 tables)
@@ -277,6 +684,21 @@ SELECT 'olist_sellers' as table_name, COUNT(*) as row_count FROM bronze.olist_se
 -- ----------------------------------------------------------------------------
 -- Table 10: olist_marketing_qualified_leads (~8,000 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_marketing_qualified_leads',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_marketing_qualified_leads')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/marketing_funnel/olist_marketing_qualified_leads_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_marketing_qualified_leads', :'csv_file', 'olist_marketing_qualified_leads_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_marketing_qualified_leads;
 
 COPY bronze.olist_marketing_qualified_leads (
@@ -285,7 +707,7 @@ COPY bronze.olist_marketing_qualified_leads (
     landing_page_id,
     origin
 )
-FROM 'C:\sql-data-warehouse-project\datasets\marketing_funnel\olist_marketing_qualified_leads_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -294,11 +716,39 @@ UPDATE bronze.olist_marketing_qualified_leads SET dwh_load_date = CURRENT_TIMEST
 -- Update source file
 UPDATE bronze.olist_marketing_qualified_leads SET dwh_source_file = 'olist_marketing_qualified_leads_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_marketing_qualified_leads', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_marketing_qualified_leads' as table_name, COUNT(*) as row_count FROM bronze.olist_marketing_qualified_leads;
+\else
+\echo '  - olist_marketing_qualified_leads unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_marketing_qualified_leads');
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 11: olist_closed_deals (~841 rows)
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR NOT bronze.dwh_source_unchanged(
+    'olist_closed_deals',
+    (SELECT content_hash FROM bronze.dwh_preflight_manifest WHERE table_name = 'olist_closed_deals')
+) AS reload_table
+\gset
+
+\if :reload_table
+\set csv_file :data_path '/marketing_funnel/olist_closed_deals_dataset.csv'
+BEGIN;
+
+\if :delta_load
+-- Merge in place: only rows that differ from the file are deleted / inserted
+SELECT * FROM bronze.dwh_merge_csv('olist_closed_deals', :'csv_file', 'olist_closed_deals_dataset.csv')
+\gset merge_
+\else
 TRUNCATE TABLE bronze.olist_closed_deals;
 
 COPY bronze.olist_closed_deals (
@@ -317,7 +767,7 @@ COPY bronze.olist_closed_deals (
     declared_product_catalog_size,
     declared_monthly_revenue
 )
-FROM 'C:\sql-data-warehouse-project\datasets\marketing_funnel\olist_closed_deals_dataset.csv'
+FROM :'csv_file'
 WITH (FORMAT csv, HEADER true, DELIMITER ',', NULL '');
 
 -- Update load timestamp
@@ -326,7 +776,25 @@ UPDATE bronze.olist_closed_deals SET dwh_load_date = CURRENT_TIMESTAMP WHERE dwh
 -- Update source file
 UPDATE bronze.olist_closed_deals SET dwh_source_file = 'olist_closed_deals_dataset.csv' WHERE dwh_source_file IS NULL;
 
+\set merge_rows_added NULL
+\set merge_rows_removed NULL
+\endif
+
+-- Fingerprint the loaded file (fails if it changed since validation)
+SELECT bronze.dwh_record_csv_load('olist_closed_deals', :'data_path', NOT :'skip_preflight'::BOOLEAN, :merge_rows_added, :merge_rows_removed);
+
+COMMIT;
+
 SELECT 'olist_closed_deals' as table_name, COUNT(*) as row_count FROM bronze.olist_closed_deals;
+\else
+\echo '  - olist_closed_deals unchanged since last load, skipped'
+SELECT bronze.dwh_record_unchanged('olist_closed_deals');
+\endif
+
+\if :bulk_restore
+\echo 'Bulk load: rebuilding indexes and statistics...'
+SELECT bronze.dwh_restore_indexes(:'bronze_tables'::REGCLASS[]) AS restored_objects;
+\endif
 
 -- ============================================================================
 -- SECTION 3: API DATA TABLES (3 tables)
@@ -353,6 +821,21 @@ FROM (
 ) t
 ORDER BY table_name;
 
+-- Sources with new data for the Silver layer
+SELECT table_name, source_type, row_count, rows_added, rows_removed, last_changed_at
+FROM bronze.dwh_pending_changes
+ORDER BY table_name;
+
+-- Reconcile loaded row counts against the pre-flight manifest
+SELECT
+    m.table_name,
+    m.row_count AS manifest_rows,
+    (xpath('/row/cnt/text()',
+        query_to_xml(format('SELECT COUNT(*) as cnt FROM bronze.%I', m.table_name), false, true, '')
+    ))[1]::text::int AS loaded_rows
+FROM bronze.dwh_preflight_manifest m
+ORDER BY m.table_name;
+
 -- Alternative: Simple count queries for each table
 DO $$
 DECLARE
@@ -404,6 +887,9 @@ BEGIN
     SELECT COUNT(*) INTO v_count FROM bronze.api_weather_history;
     RAISE NOTICE 'api_weather_history: % rows', v_count;
 
+    SELECT COUNT(*) INTO v_count FROM bronze.api_weather_hourly;
+    RAISE NOTICE 'api_weather_hourly: % rows (point-days)', v_count;
+
     RAISE NOTICE '========================================';
     RAISE NOTICE 'Bronze layer load complete!';
     RAISE NOTICE 'Next step: Run Silver layer scripts';
@@ -0,0 +1,408 @@
+-- ============================================================================
+-- Description: Silver → Gold star schema (DuckDB port)
+-- ============================================================================
+--
+-- PURPOSE:
+-- --------
+-- The dimension, fact and bridge loads of scripts/gold/load_gold_data.sql
+-- and load_gold_facts.sql, plus the as-of currency conversion of
+-- scripts/pipeline/convert_currency.py, rewritten for the embedded DuckDB
+-- backend (scripts/pipeline/embedded_dwh.py). Every table is rebuilt with
+-- CREATE OR REPLACE TABLE ... AS SELECT.
+--
+-- KEEP IN SYNC:
+-- -------------
+-- Each SELECT mirrors the INSERT of the same table in the Postgres scripts
+-- and casts to the column types of create_gold_tables.sql.
+-- `python embedded_dwh.py parity` compares the result with Postgres.
+--
+-- Surrogate keys are ROW_NUMBER() over the business key instead of SERIAL,
+-- so they differ from the Postgres values; the parity check compares the
+-- business keys they point to.
+--
+-- VARIABLES:
+--   max_rate_age   Rates older than this many days are not used
+--                  (convert_currency.py --max-rate-age, default 7)
+--
+-- USAGE:
+-- ------
+-- Run by embedded_dwh.py through sql_script.py, after load_silver.sql and
+-- the zip → weather point map (gold.map_zip_weather_point)
+--
+-- ============================================================================
+
+\if :{?max_rate_age}
+\else
+    \set max_rate_age 7
+\endif
+
+\echo '============================================================'
+\echo 'GOLD LAYER DATA LOAD (DuckDB)'
+\echo '============================================================'
+
+CREATE SCHEMA IF NOT EXISTS gold;
+
+-- Postgres order: NULLs sort as the largest value (DISTINCT ON tie-breaks)
+SET default_null_order = 'nulls_last_on_asc_first_on_desc';
+
+-- ============================================================================
+-- SECTION 1: DIMENSIONS
+-- ============================================================================
+
+\echo 'Loading gold.dim_date...'
+CREATE OR REPLACE TABLE gold.dim_date AS
+SELECT
+    strftime(d, '%Y%m%d')::INTEGER AS date_key,
+    d AS full_date,
+    EXTRACT(YEAR FROM d)::INTEGER AS year,
+    EXTRACT(QUARTER FROM d)::INTEGER AS quarter,
+    'Q' || EXTRACT(QUARTER FROM d)::INTEGER AS quarter_name,
+    EXTRACT(MONTH FROM d)::INTEGER AS month,
+    strftime(d, '%B') AS month_name,
+    EXTRACT(WEEK FROM d)::INTEGER AS week_of_year,
+    EXTRACT(DAY FROM d)::INTEGER AS day_of_month,
+    EXTRACT(DOW FROM d)::INTEGER AS day_of_week,
+    strftime(d, '%A') AS day_name,
+    EXTRACT(DOW FROM d) IN (0, 6) AS is_weekend,
+    FALSE AS is_holiday,
+    NULL::VARCHAR AS holiday_name,
+    NULL::DECIMAL(10,4) AS usd_exchange_rate
+FROM (
+    SELECT range::DATE AS d
+    FROM range(DATE '2016-01-01', DATE '2018-12-31' + INTERVAL 1 DAY, INTERVAL 1 DAY)
+) dates;
+\echo '  ✓ dim_date loaded'
+
+\echo 'Loading gold.dim_geography...'
+CREATE OR REPLACE TABLE gold.dim_geography AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY zip_code_prefix)::INTEGER AS geography_key,
+    zip_code_prefix,
+    city,
+    state,
+    CASE state
+        WHEN 'AC' THEN 'Acre' WHEN 'AL' THEN 'Alagoas' WHEN 'AP' THEN 'Amapá'
+        WHEN 'AM' THEN 'Amazonas' WHEN 'BA' THEN 'Bahia' WHEN 'CE' THEN 'Ceará'
+        WHEN 'DF' THEN 'Distrito Federal' WHEN 'ES' THEN 'Espírito Santo'
+        WHEN 'GO' THEN 'Goiás' WHEN 'MA' THEN 'Maranhão' WHEN 'MT' THEN 'Mato Grosso'
+        WHEN 'MS' THEN 'Mato Grosso do Sul' WHEN 'MG' THEN 'Minas Gerais'
+        WHEN 'PA' THEN 'Pará' WHEN 'PB' THEN 'Paraíba' WHEN 'PR' THEN 'Paraná'
+        WHEN 'PE' THEN 'Pernambuco' WHEN 'PI' THEN 'Piauí' WHEN 'RJ' THEN 'Rio de Janeiro'
+        WHEN 'RN' THEN 'Rio Grande do Norte' WHEN 'RS' THEN 'Rio Grande do Sul'
+        WHEN 'RO' THEN 'Rondônia' WHEN 'RR' THEN 'Roraima' WHEN 'SC' THEN 'Santa Catarina'
+        WHEN 'SP' THEN 'São Paulo' WHEN 'SE' THEN 'Sergipe' WHEN 'TO' THEN 'Tocantins'
+        ELSE 'Unknown'
+    END AS state_name,
+    CASE state
+        WHEN 'AC' THEN 'North' WHEN 'AP' THEN 'North' WHEN 'AM' THEN 'North'
+        WHEN 'PA' THEN 'North' WHEN 'RO' THEN 'North' WHEN 'RR' THEN 'North' WHEN 'TO' THEN 'North'
+        WHEN 'AL' THEN 'Northeast' WHEN 'BA' THEN 'Northeast' WHEN 'CE' THEN 'Northeast'
+        WHEN 'MA' THEN 'Northeast' WHEN 'PB' THEN 'Northeast' WHEN 'PE' THEN 'Northeast'
+        WHEN 'PI' THEN 'Northeast' WHEN 'RN' THEN 'Northeast' WHEN 'SE' THEN 'Northeast'
+        WHEN 'DF' THEN 'Central-West' WHEN 'GO' THEN 'Central-West'
+        WHEN 'MT' THEN 'Central-West' WHEN 'MS' THEN 'Central-West'
+        WHEN 'ES' THEN 'Southeast' WHEN 'MG' THEN 'Southeast'
+        WHEN 'RJ' THEN 'Southeast' WHEN 'SP' THEN 'Southeast'
+        WHEN 'PR' THEN 'South' WHEN 'RS' THEN 'South' WHEN 'SC' THEN 'South'
+        ELSE 'Unknown'
+    END AS region,
+    latitude,
+    longitude
+FROM silver.olist_geolocation;
+\echo '  ✓ dim_geography loaded'
+
+\echo 'Loading gold.dim_customer...'
+CREATE OR REPLACE TABLE gold.dim_customer AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY c.customer_id)::INTEGER AS customer_key,
+    c.customer_id,
+    c.customer_unique_id,
+    c.customer_zip_code_prefix AS customer_zip_code,
+    c.customer_city,
+    c.customer_state,
+    CASE c.customer_state
+        WHEN 'AC' THEN 'North' WHEN 'AP' THEN 'North' WHEN 'AM' THEN 'North'
+        WHEN 'PA' THEN 'North' WHEN 'RO' THEN 'North' WHEN 'RR' THEN 'North' WHEN 'TO' THEN 'North'
+        WHEN 'AL' THEN 'Northeast' WHEN 'BA' THEN 'Northeast' WHEN 'CE' THEN 'Northeast'
+        WHEN 'MA' THEN 'Northeast' WHEN 'PB' THEN 'Northeast' WHEN 'PE' THEN 'Northeast'
+        WHEN 'PI' THEN 'Northeast' WHEN 'RN' THEN 'Northeast' WHEN 'SE' THEN 'Northeast'
+        WHEN 'DF' THEN 'Central-West' WHEN 'GO' THEN 'Central-West'
+        WHEN 'MT' THEN 'Central-West' WHEN 'MS' THEN 'Central-West'
+        WHEN 'ES' THEN 'Southeast' WHEN 'MG' THEN 'Southeast'
+        WHEN 'RJ' THEN 'Southeast' WHEN 'SP' THEN 'Southeast'
+        WHEN 'PR' THEN 'South' WHEN 'RS' THEN 'South' WHEN 'SC' THEN 'South'
+        ELSE 'Unknown'
+    END AS customer_region,
+    g.geography_key
+FROM silver.olist_customers c
+LEFT JOIN gold.dim_geography g ON c.customer_zip_code_prefix = g.zip_code_prefix;
+\echo '  ✓ dim_customer loaded'
+
+\echo 'Loading gold.dim_seller...'
+CREATE OR REPLACE TABLE gold.dim_seller AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY s.seller_id)::INTEGER AS seller_key,
+    s.seller_id,
+    s.seller_zip_code_prefix AS seller_zip_code,
+    s.seller_city,
+    s.seller_state,
+    CASE s.seller_state
+        WHEN 'AC' THEN 'North' WHEN 'AP' THEN 'North' WHEN 'AM' THEN 'North'
+        WHEN 'PA' THEN 'North' WHEN 'RO' THEN 'North' WHEN 'RR' THEN 'North' WHEN 'TO' THEN 'North'
+        WHEN 'AL' THEN 'Northeast' WHEN 'BA' THEN 'Northeast' WHEN 'CE' THEN 'Northeast'
+        WHEN 'MA' THEN 'Northeast' WHEN 'PB' THEN 'Northeast' WHEN 'PE' THEN 'Northeast'
+        WHEN 'PI' THEN 'Northeast' WHEN 'RN' THEN 'Northeast' WHEN 'SE' THEN 'Northeast'
+        WHEN 'DF' THEN 'Central-West' WHEN 'GO' THEN 'Central-West'
+        WHEN 'MT' THEN 'Central-West' WHEN 'MS' THEN 'Central-West'
+        WHEN 'ES' THEN 'Southeast' WHEN 'MG' THEN 'Southeast'
+        WHEN 'RJ' THEN 'Southeast' WHEN 'SP' THEN 'Southeast'
+        WHEN 'PR' THEN 'South' WHEN 'RS' THEN 'South' WHEN 'SC' THEN 'South'
+        ELSE 'Unknown'
+    END AS seller_region,
+    g.geography_key,
+    (cd.seller_id IS NOT NULL) AS is_from_marketing,
+    m.origin AS lead_origin,
+    cd.won_date AS lead_won_date
+FROM silver.olist_sellers s
+LEFT JOIN gold.dim_geography g ON s.seller_zip_code_prefix = g.zip_code_prefix
+LEFT JOIN silver.olist_closed_deals cd ON s.seller_id = cd.seller_id
+LEFT JOIN silver.olist_mql m ON cd.mql_id = m.mql_id;
+\echo '  ✓ dim_seller loaded'
+
+\echo 'Loading gold.dim_product...'
+CREATE OR REPLACE TABLE gold.dim_product AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY p.product_id)::INTEGER AS product_key,
+    p.product_id,
+    p.product_category_name AS category_name_pt,
+    COALESCE(t.product_category_name_english, 'unknown') AS category_name_en,
+    p.product_weight_g AS weight_g,
+    p.product_volume_cm3 AS volume_cm3,
+    CASE
+        WHEN p.product_weight_g IS NULL THEN 'Unknown'
+        WHEN p.product_weight_g < 500 THEN 'Light'
+        WHEN p.product_weight_g < 2000 THEN 'Medium'
+        ELSE 'Heavy'
+    END AS weight_category,
+    CASE
+        WHEN p.product_volume_cm3 IS NULL THEN 'Unknown'
+        WHEN p.product_volume_cm3 < 1000 THEN 'Small'
+        WHEN p.product_volume_cm3 < 10000 THEN 'Medium'
+        ELSE 'Large'
+    END AS size_category
+FROM silver.olist_products p
+LEFT JOIN silver.olist_category_translation t
+    ON LOWER(p.product_category_name) = LOWER(t.product_category_name);
+\echo '  ✓ dim_product loaded'
+
+-- ============================================================================
+-- SECTION 2: FACTS (load_gold_facts.sql, one slice)
+-- ============================================================================
+
+\echo 'Loading gold.fact_orders...'
+CREATE OR REPLACE TABLE gold.fact_orders AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY o.order_id)::INTEGER AS order_key,
+    o.order_id,
+    c.customer_key,
+    strftime(o.order_purchase_timestamp, '%Y%m%d')::INTEGER AS order_date_key,
+    o.order_status,
+    COALESCE(item_agg.total_items, 0)::INTEGER AS total_items,
+    COALESCE(item_agg.total_product_value, 0)::DECIMAL(12,2) AS total_product_value,
+    COALESCE(item_agg.total_freight_value, 0)::DECIMAL(12,2) AS total_freight_value,
+    (COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0))::DECIMAL(12,2)
+        AS total_order_value,
+    -- Filled by SECTION 4 (dim_date has no rates yet, as in Postgres)
+    CASE
+        WHEN d.usd_exchange_rate IS NOT NULL AND d.usd_exchange_rate > 0
+        THEN ROUND(
+            (COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0))
+            * d.usd_exchange_rate, 2
+        )
+    END::DECIMAL(12,2) AS total_order_value_usd,
+    pay.payment_type,
+    COALESCE(pay.payment_installments, 1) AS payment_installments,
+    o.delivery_days_actual AS delivery_days,
+    COALESCE(o.is_late_delivery, FALSE) AS is_late,
+    r.review_score,
+    -- Weather columns: nearest weather point, else the state capital
+    CASE WHEN wp.weather_date IS NOT NULL THEN wp.weather_category ELSE ws.weather_category END
+        AS weather_category,
+    CASE WHEN wp.weather_date IS NOT NULL THEN wp.temperature_max ELSE ws.temperature_max END
+        AS temperature_max,
+    COALESCE(CASE WHEN wp.weather_date IS NOT NULL THEN wp.is_rainy ELSE ws.is_rainy END, FALSE)
+        AS is_rainy,
+    -- Purchase-hour weather; REAL → NUMERIC goes through text, as in Postgres
+    (CASE WHEN hp.weather_date IS NOT NULL THEN hp.temperature_2m[ph.slot] ELSE hs.temperature_2m[ph.slot] END)
+        ::VARCHAR::DECIMAL(5,2) AS temperature_at_purchase,
+    (CASE WHEN hp.weather_date IS NOT NULL THEN hp.precipitation_mm[ph.slot] ELSE hs.precipitation_mm[ph.slot] END)
+        ::VARCHAR::DECIMAL(6,2) AS precipitation_at_purchase,
+    CASE WHEN hp.weather_date IS NOT NULL THEN hp.precipitation_mm[ph.slot] ELSE hs.precipitation_mm[ph.slot] END > 0
+        AS is_raining_at_purchase
+FROM silver.olist_orders o
+CROSS JOIN LATERAL (
+    SELECT EXTRACT(HOUR FROM o.order_purchase_timestamp)::INTEGER + 1 AS slot
+) ph
+LEFT JOIN gold.dim_customer c ON o.customer_id = c.customer_id
+LEFT JOIN gold.dim_date d ON strftime(o.order_purchase_timestamp, '%Y%m%d')::INTEGER = d.date_key
+LEFT JOIN gold.map_zip_weather_point zwp ON c.customer_zip_code = zwp.zip_code_prefix
+LEFT JOIN silver.api_weather_history wp
+    ON zwp.weather_latitude = wp.latitude
+    AND zwp.weather_longitude = wp.longitude
+    AND o.order_purchase_timestamp::DATE = wp.weather_date
+LEFT JOIN silver.api_weather_history ws
+    ON c.customer_state = ws.state_code
+    AND ws.location_type = 'state_capital'
+    AND o.order_purchase_timestamp::DATE = ws.weather_date
+LEFT JOIN silver.api_weather_hourly hp
+    ON zwp.weather_latitude = hp.latitude
+    AND zwp.weather_longitude = hp.longitude
+    AND o.order_purchase_timestamp::DATE = hp.weather_date
+LEFT JOIN silver.api_weather_hourly hs
+    ON c.customer_state = hs.state_code
+    AND hs.location_type = 'state_capital'
+    AND o.order_purchase_timestamp::DATE = hs.weather_date
+LEFT JOIN (
+    SELECT order_id, COUNT(*) AS total_items,
+           SUM(price) AS total_product_value, SUM(freight_value) AS total_freight_value
+    FROM silver.olist_order_items
+    GROUP BY order_id
+) item_agg ON o.order_id = item_agg.order_id
+LEFT JOIN (
+    SELECT DISTINCT ON (order_id) order_id, payment_type, payment_installments
+    FROM silver.olist_order_payments
+    ORDER BY order_id, payment_value DESC, payment_sequential
+) pay ON o.order_id = pay.order_id
+LEFT JOIN (
+    SELECT DISTINCT ON (order_id) order_id, review_score
+    FROM silver.olist_order_reviews
+    ORDER BY order_id, review_creation_date DESC, review_id
+) r ON o.order_id = r.order_id;
+\echo '  ✓ fact_orders loaded'
+
+\echo 'Loading gold.fact_order_items...'
+CREATE OR REPLACE TABLE gold.fact_order_items AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY i.order_id, i.order_item_id)::INTEGER AS item_key,
+    i.order_id,
+    i.order_item_id,
+    fo.order_key,
+    fo.customer_key,
+    s.seller_key,
+    p.product_key,
+    fo.order_date_key,
+    i.price,
+    i.freight_value,
+    (i.price + i.freight_value)::DECIMAL(10,2) AS item_total
+FROM silver.olist_order_items i
+LEFT JOIN gold.fact_orders fo ON i.order_id = fo.order_id
+LEFT JOIN gold.dim_seller s ON i.seller_id = s.seller_id
+LEFT JOIN gold.dim_product p ON i.product_id = p.product_id;
+\echo '  ✓ fact_order_items loaded'
+
+-- ============================================================================
+-- SECTION 3: BRIDGE
+-- ============================================================================
+
+\echo 'Loading gold.bridge_marketing_funnel...'
+CREATE OR REPLACE TABLE gold.bridge_marketing_funnel AS
+SELECT
+    ROW_NUMBER() OVER (ORDER BY m.mql_id)::INTEGER AS funnel_key,
+    m.mql_id,
+    m.first_contact_date,
+    m.origin,
+    (cd.mql_id IS NOT NULL) AS is_converted,
+    cd.won_date,
+    (cd.won_date - m.first_contact_date)::INTEGER AS days_to_conversion,
+    cd.business_segment,
+    cd.lead_type,
+    cd.declared_monthly_revenue,
+    s.seller_key,
+    cd.seller_id,
+    COALESCE(perf.total_orders, 0)::INTEGER AS total_orders,
+    COALESCE(perf.total_revenue, 0)::DECIMAL(14,2) AS total_revenue,
+    perf.first_order_date
+FROM silver.olist_mql m
+LEFT JOIN silver.olist_closed_deals cd ON m.mql_id = cd.mql_id
+LEFT JOIN gold.dim_seller s ON cd.seller_id = s.seller_id
+LEFT JOIN (
+    SELECT fi.seller_key, COUNT(DISTINCT fi.order_id) AS total_orders,
+           SUM(fi.item_total) AS total_revenue, MIN(d.full_date) AS first_order_date
+    FROM gold.fact_order_items fi
+    JOIN gold.dim_date d ON fi.order_date_key = d.date_key
+    WHERE fi.seller_key IS NOT NULL
+    GROUP BY fi.seller_key
+) perf ON s.seller_key = perf.seller_key;
+\echo '  ✓ bridge_marketing_funnel loaded'
+
+-- ============================================================================
+-- SECTION 4: AS-OF CURRENCY CONVERSION (convert_currency.py)
+-- ============================================================================
+-- Latest rate on or before the purchase date, per target currency; rates
+-- older than :max_rate_age days leave the value NULL. ASOF JOIN does the
+-- search convert_currency.py does with np.searchsorted.
+
+\echo 'Converting order values (as-of rates)...'
+CREATE OR REPLACE TEMP TABLE dwh_rates AS
+SELECT target_currency, rate_date, exchange_rate
+FROM silver.api_currency_rates
+WHERE base_currency = 'BRL'
+  AND dwh_is_valid
+  AND exchange_rate > 0;
+
+CREATE OR REPLACE TABLE gold.fact_order_currency AS
+WITH orders AS (
+    SELECT
+        f.order_id,
+        f.order_date_key,
+        strptime(f.order_date_key::VARCHAR, '%Y%m%d')::DATE AS order_date,
+        f.total_order_value,
+        cur.target_currency
+    FROM gold.fact_orders f
+    CROSS JOIN (SELECT DISTINCT target_currency FROM dwh_rates) cur
+),
+asof_rates AS (
+    SELECT
+        o.*,
+        CASE WHEN o.order_date - r.rate_date <= :max_rate_age THEN r.rate_date END AS rate_date,
+        CASE WHEN o.order_date - r.rate_date <= :max_rate_age THEN r.exchange_rate END AS exchange_rate
+    FROM orders o
+    ASOF LEFT JOIN dwh_rates r
+        ON o.target_currency = r.target_currency
+        AND o.order_date >= r.rate_date
+)
+SELECT
+    order_id,
+    target_currency AS currency_code,
+    order_date_key,
+    rate_date,
+    (order_date - rate_date)::INTEGER AS rate_age_days,
+    exchange_rate,
+    ROUND(total_order_value * exchange_rate, 2)::DECIMAL(12,2) AS total_order_value
+FROM asof_rates;
+
+UPDATE gold.fact_orders f
+SET total_order_value_usd = c.total_order_value
+FROM gold.fact_order_currency c
+WHERE c.order_id = f.order_id
+  AND c.currency_code = 'USD';
+
+UPDATE gold.dim_date d
+SET usd_exchange_rate = r.exchange_rate::DECIMAL(10,4)
+FROM dwh_rates r
+WHERE r.target_currency = 'USD'
+  AND r.rate_date = (
+      SELECT MAX(x.rate_date)
+      FROM dwh_rates x
+      WHERE x.target_currency = 'USD'
+        AND x.rate_date <= d.full_date
+  )
+  AND d.full_date - r.rate_date <= :max_rate_age;
+
+DROP TABLE dwh_rates;
+\echo '  ✓ fact_order_currency, fact_orders.total_order_value_usd, dim_date.usd_exchange_rate'
+
+\echo ''
+\echo '============================================================'
+\echo 'GOLD LAYER LOAD COMPLETE'
+\echo '============================================================'
@@ -0,0 +1,506 @@
+-- ============================================================================
+-- Description: Bronze → Silver transformation (DuckDB port)
+-- ============================================================================
+--
+-- PURPOSE:
+-- --------
+-- The transforms of scripts/silver/load_silver_data.sql, rewritten for the
+-- embedded DuckDB backend (scripts/pipeline/embedded_dwh.py). Every table is
+-- rebuilt with CREATE OR REPLACE TABLE ... AS SELECT - there is no change
+-- detection, shadow swap or incremental mode, a full rebuild takes seconds.
+--
+-- KEEP IN SYNC:
+-- -------------
+-- Each SELECT mirrors the INSERT of the same table in load_silver_data.sql
+-- and casts to the column types of create_silver_tables.sql.
+-- `python embedded_dwh.py parity` compares the result with Postgres.
+--
+-- Where the dialects differ, the port reproduces the Postgres result:
+--   - INITCAP does not exist: macro initcap() (words = runs of letters and
+--     digits), applied once per distinct city name
+--   - AVG / division of DECIMAL return DOUBLE: averages and the inverse
+--     rate are computed on integer millionths, rounded half away from zero
+--     (dwh_div_round), like ROUND() on NUMERIC
+--   - MODE() has no defined tie-break: the most frequent value, ties to
+--     the first in sort order (what Postgres' mode() returns)
+--   - string_to_array(text, ',', ''): string_split + NULLIF per element
+--
+-- USAGE:
+-- ------
+-- Run by embedded_dwh.py through sql_script.py, after it loaded Bronze
+--
+-- ============================================================================
+
+\echo '============================================================'
+\echo 'SILVER LAYER DATA TRANSFORMATION (DuckDB)'
+\echo '============================================================'
+
+CREATE SCHEMA IF NOT EXISTS silver;
+
+-- Postgres order: NULLs sort as the largest value (DISTINCT ON tie-breaks)
+SET default_null_order = 'nulls_last_on_asc_first_on_desc';
+
+-- round(num / den) half away from zero, in exact integer arithmetic
+CREATE OR REPLACE MACRO dwh_div_round(num, den) AS
+    sign(num) * sign(den) * ((2 * abs(num) + abs(den)) // (2 * abs(den)));
+
+-- Postgres INITCAP: first letter of every alphanumeric run upper, rest lower
+CREATE OR REPLACE MACRO initcap(s) AS
+    CASE WHEN s IS NOT NULL THEN array_to_string(list_transform(
+        range(1, length(s) + 1),
+        i -> CASE
+                 WHEN i = 1 OR NOT regexp_full_match(substr(s, i - 1, 1), '[\pL\pN]')
+                 THEN upper(substr(s, i, 1))
+                 ELSE lower(substr(s, i, 1))
+             END
+    ), '') END;
+
+-- string_to_array(s, ',', ''): empty string → empty array, empty slot → NULL
+CREATE OR REPLACE MACRO dwh_split_slots(s) AS
+    CASE
+        WHEN s = '' THEN []::VARCHAR[]
+        ELSE list_transform(string_split(s, ','), v -> NULLIF(v, ''))
+    END;
+
+-- INITCAP of every distinct city spelling, looked up by the transforms below
+CREATE OR REPLACE TEMP TABLE dwh_city_names AS
+SELECT raw_city, initcap(raw_city) AS city
+FROM (
+    SELECT TRIM(customer_city) AS raw_city FROM bronze.olist_customers
+    UNION
+    SELECT TRIM(seller_city) FROM bronze.olist_sellers
+    UNION
+    SELECT TRIM(geolocation_city) FROM bronze.olist_geolocation
+) cities
+WHERE raw_city IS NOT NULL;
+
+-- ============================================================================
+-- SECTION 1: E-COMMERCE TABLES (9 tables)
+-- ============================================================================
+
+\echo 'Loading silver.olist_orders...'
+CREATE OR REPLACE TABLE silver.olist_orders AS
+SELECT
+    order_id::VARCHAR AS order_id,
+    customer_id::VARCHAR AS customer_id,
+    LOWER(TRIM(order_status)) AS order_status,
+    order_purchase_timestamp::TIMESTAMP AS order_purchase_timestamp,
+    NULLIF(TRIM(order_approved_at), '')::TIMESTAMP AS order_approved_at,
+    NULLIF(TRIM(order_delivered_carrier_date), '')::TIMESTAMP AS order_delivered_carrier_date,
+    NULLIF(TRIM(order_delivered_customer_date), '')::TIMESTAMP AS order_delivered_customer_date,
+    NULLIF(TRIM(order_estimated_delivery_date), '')::TIMESTAMP AS order_estimated_delivery_date,
+    order_purchase_timestamp::TIMESTAMP::DATE AS order_purchase_date,
+    (LOWER(TRIM(order_status)) = 'delivered') AS is_delivered,
+    CASE
+        WHEN NULLIF(TRIM(order_delivered_customer_date), '') IS NOT NULL
+         AND NULLIF(TRIM(order_estimated_delivery_date), '') IS NOT NULL
+        THEN (NULLIF(TRIM(order_delivered_customer_date), '')::TIMESTAMP >
+              NULLIF(TRIM(order_estimated_delivery_date), '')::TIMESTAMP)
+    END AS is_late_delivery,
+    CASE
+        WHEN NULLIF(TRIM(order_delivered_customer_date), '') IS NOT NULL
+        THEN EXTRACT(DAY FROM (
+            NULLIF(TRIM(order_delivered_customer_date), '')::TIMESTAMP -
+            order_purchase_timestamp::TIMESTAMP
+        ))::INTEGER
+    END AS delivery_days_actual,
+    CASE
+        WHEN NULLIF(TRIM(order_estimated_delivery_date), '') IS NOT NULL
+        THEN EXTRACT(DAY FROM (
+            NULLIF(TRIM(order_estimated_delivery_date), '')::TIMESTAMP -
+            order_purchase_timestamp::TIMESTAMP
+        ))::INTEGER
+    END AS delivery_days_estimated,
+    'bronze.olist_orders' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_orders
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+\echo '  ✓ olist_orders loaded'
+
+\echo 'Loading silver.olist_order_items...'
+CREATE OR REPLACE TABLE silver.olist_order_items AS
+SELECT
+    order_id::VARCHAR AS order_id,
+    order_item_id::INTEGER AS order_item_id,
+    product_id::VARCHAR AS product_id,
+    seller_id::VARCHAR AS seller_id,
+    NULLIF(TRIM(shipping_limit_date), '')::TIMESTAMP AS shipping_limit_date,
+    COALESCE(NULLIF(TRIM(price), '')::DECIMAL(10,2), 0.00)::DECIMAL(10,2) AS price,
+    COALESCE(NULLIF(TRIM(freight_value), '')::DECIMAL(10,2), 0.00)::DECIMAL(10,2) AS freight_value,
+    (COALESCE(NULLIF(TRIM(price), '')::DECIMAL(10,2), 0.00) +
+     COALESCE(NULLIF(TRIM(freight_value), '')::DECIMAL(10,2), 0.00))::DECIMAL(10,2) AS item_total,
+    'bronze.olist_order_items' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_order_items
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+\echo '  ✓ olist_order_items loaded'
+
+\echo 'Loading silver.olist_order_payments...'
+CREATE OR REPLACE TABLE silver.olist_order_payments AS
+SELECT
+    order_id::VARCHAR AS order_id,
+    payment_sequential::INTEGER AS payment_sequential,
+    LOWER(TRIM(payment_type)) AS payment_type,
+    COALESCE(NULLIF(TRIM(payment_installments), '')::INTEGER, 1) AS payment_installments,
+    COALESCE(NULLIF(TRIM(payment_value), '')::DECIMAL(10,2), 0.00)::DECIMAL(10,2) AS payment_value,
+    COALESCE(NULLIF(TRIM(payment_installments), '')::INTEGER, 1) = 1 AS is_single_payment,
+    'bronze.olist_order_payments' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_order_payments
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+\echo '  ✓ olist_order_payments loaded'
+
+\echo 'Loading silver.olist_order_reviews...'
+CREATE OR REPLACE TABLE silver.olist_order_reviews AS
+SELECT DISTINCT ON (review_id)
+    review_id::VARCHAR AS review_id,
+    order_id::VARCHAR AS order_id,
+    CASE
+        WHEN NULLIF(TRIM(review_score), '')::INTEGER BETWEEN 1 AND 5
+        THEN NULLIF(TRIM(review_score), '')::INTEGER
+    END AS review_score,
+    NULLIF(TRIM(review_comment_title), '') AS review_comment_title,
+    NULLIF(TRIM(review_comment_message), '') AS review_comment_message,
+    NULLIF(TRIM(review_creation_date), '')::TIMESTAMP AS review_creation_date,
+    NULLIF(TRIM(review_answer_timestamp), '')::TIMESTAMP AS review_answer_timestamp,
+    (NULLIF(TRIM(review_comment_message), '') IS NOT NULL) AS has_comment,
+    CASE
+        WHEN NULLIF(TRIM(review_score), '')::INTEGER >= 4 THEN TRUE
+        WHEN NULLIF(TRIM(review_score), '')::INTEGER < 4 THEN FALSE
+    END AS is_positive,
+    CASE
+        WHEN NULLIF(TRIM(review_score), '')::INTEGER <= 2 THEN TRUE
+        WHEN NULLIF(TRIM(review_score), '')::INTEGER > 2 THEN FALSE
+    END AS is_negative,
+    'bronze.olist_order_reviews' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    (NULLIF(TRIM(review_score), '')::INTEGER BETWEEN 1 AND 5) AS dwh_is_valid,
+    CASE
+        WHEN NOT (NULLIF(TRIM(review_score), '')::INTEGER BETWEEN 1 AND 5)
+        THEN 'Invalid review_score: must be 1-5'
+    END AS dwh_validation_errors
+FROM bronze.olist_order_reviews
+WHERE review_id IS NOT NULL
+  AND TRIM(review_id) != ''
+ORDER BY review_id, NULLIF(TRIM(review_answer_timestamp), '')::TIMESTAMP DESC NULLS LAST, order_id;
+\echo '  ✓ olist_order_reviews loaded'
+
+\echo 'Loading silver.olist_customers...'
+CREATE OR REPLACE TABLE silver.olist_customers AS
+SELECT
+    c.customer_id::VARCHAR AS customer_id,
+    c.customer_unique_id::VARCHAR AS customer_unique_id,
+    LPAD(TRIM(c.customer_zip_code_prefix), 5, '0') AS customer_zip_code_prefix,
+    n.city AS customer_city,
+    UPPER(TRIM(c.customer_state)) AS customer_state,
+    'bronze.olist_customers' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_customers c
+LEFT JOIN dwh_city_names n ON TRIM(c.customer_city) = n.raw_city
+WHERE c.customer_id IS NOT NULL
+  AND TRIM(c.customer_id) != '';
+\echo '  ✓ olist_customers loaded'
+
+\echo 'Loading silver.olist_sellers...'
+CREATE OR REPLACE TABLE silver.olist_sellers AS
+SELECT
+    s.seller_id::VARCHAR AS seller_id,
+    LPAD(TRIM(s.seller_zip_code_prefix), 5, '0') AS seller_zip_code_prefix,
+    n.city AS seller_city,
+    UPPER(TRIM(s.seller_state)) AS seller_state,
+    'bronze.olist_sellers' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_sellers s
+LEFT JOIN dwh_city_names n ON TRIM(s.seller_city) = n.raw_city
+WHERE s.seller_id IS NOT NULL
+  AND TRIM(s.seller_id) != '';
+\echo '  ✓ olist_sellers loaded'
+
+\echo 'Loading silver.olist_products...'
+CREATE OR REPLACE TABLE silver.olist_products AS
+SELECT
+    product_id::VARCHAR AS product_id,
+    NULLIF(TRIM(product_category_name), '') AS product_category_name,
+    NULLIF(TRIM(product_name_lenght), '')::INTEGER AS product_name_length,
+    NULLIF(TRIM(product_description_lenght), '')::INTEGER AS product_description_length,
+    NULLIF(TRIM(product_photos_qty), '')::INTEGER AS product_photos_qty,
+    NULLIF(TRIM(product_weight_g), '')::DECIMAL(10,2) AS product_weight_g,
+    NULLIF(TRIM(product_length_cm), '')::DECIMAL(10,2) AS product_length_cm,
+    NULLIF(TRIM(product_height_cm), '')::DECIMAL(10,2) AS product_height_cm,
+    NULLIF(TRIM(product_width_cm), '')::DECIMAL(10,2) AS product_width_cm,
+    (NULLIF(TRIM(product_length_cm), '')::DECIMAL(10,2) *
+     NULLIF(TRIM(product_height_cm), '')::DECIMAL(10,2) *
+     NULLIF(TRIM(product_width_cm), '')::DECIMAL(10,2))::DECIMAL(12,2) AS product_volume_cm3,
+    (NULLIF(TRIM(product_length_cm), '') IS NOT NULL AND
+     NULLIF(TRIM(product_height_cm), '') IS NOT NULL AND
+     NULLIF(TRIM(product_width_cm), '') IS NOT NULL) AS has_dimensions,
+    'bronze.olist_products' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_products
+WHERE product_id IS NOT NULL
+  AND TRIM(product_id) != '';
+\echo '  ✓ olist_products loaded'
+
+\echo 'Loading silver.olist_category_translation...'
+CREATE OR REPLACE TABLE silver.olist_category_translation AS
+SELECT
+    LOWER(TRIM(product_category_name)) AS product_category_name,
+    LOWER(TRIM(product_category_name_english)) AS product_category_name_english,
+    'bronze.olist_category_translation' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.product_category_name_translation
+WHERE product_category_name IS NOT NULL
+  AND TRIM(product_category_name) != '';
+\echo '  ✓ olist_category_translation loaded'
+
+\echo 'Loading silver.olist_geolocation...'
+CREATE OR REPLACE TABLE silver.olist_geolocation AS
+WITH points AS (
+    SELECT
+        LPAD(TRIM(g.geolocation_zip_code_prefix), 5, '0') AS zip_code_prefix,
+        (g.geolocation_lat::DECIMAL(9,6) * 1000000)::BIGINT AS lat_micro,
+        (g.geolocation_lng::DECIMAL(9,6) * 1000000)::BIGINT AS lng_micro,
+        n.city,
+        UPPER(TRIM(g.geolocation_state)) AS state
+    FROM bronze.olist_geolocation g
+    LEFT JOIN dwh_city_names n ON TRIM(g.geolocation_city) = n.raw_city
+    WHERE g.geolocation_zip_code_prefix IS NOT NULL
+      AND TRIM(g.geolocation_zip_code_prefix) != ''
+),
+coordinates AS (
+    SELECT
+        zip_code_prefix,
+        dwh_div_round(SUM(lat_micro), COUNT(lat_micro))::DECIMAL(18,0) * 0.000001 AS latitude,
+        dwh_div_round(SUM(lng_micro), COUNT(lng_micro))::DECIMAL(18,0) * 0.000001 AS longitude
+    FROM points
+    GROUP BY zip_code_prefix
+),
+city_mode AS (
+    SELECT zip_code_prefix, first(city ORDER BY n DESC, city) AS city
+    FROM (
+        SELECT zip_code_prefix, city, COUNT(*) AS n
+        FROM points
+        WHERE city IS NOT NULL
+        GROUP BY zip_code_prefix, city
+    ) counts
+    GROUP BY zip_code_prefix
+),
+state_mode AS (
+    SELECT zip_code_prefix, first(state ORDER BY n DESC, state) AS state
+    FROM (
+        SELECT zip_code_prefix, state, COUNT(*) AS n
+        FROM points
+        WHERE state IS NOT NULL
+        GROUP BY zip_code_prefix, state
+    ) counts
+    GROUP BY zip_code_prefix
+)
+SELECT
+    c.zip_code_prefix,
+    c.latitude::DECIMAL(9,6) AS latitude,
+    c.longitude::DECIMAL(9,6) AS longitude,
+    cm.city,
+    sm.state,
+    'bronze.olist_geolocation' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM coordinates c
+LEFT JOIN city_mode cm ON c.zip_code_prefix = cm.zip_code_prefix
+LEFT JOIN state_mode sm ON c.zip_code_prefix = sm.zip_code_prefix;
+\echo '  ✓ olist_geolocation loaded'
+
+-- ============================================================================
+-- SECTION 2: MARKETING TABLES (2 tables)
+-- ============================================================================
+
+\echo 'Loading silver.olist_mql...'
+CREATE OR REPLACE TABLE silver.olist_mql AS
+SELECT
+    mql_id::VARCHAR AS mql_id,
+    first_contact_date::DATE AS first_contact_date,
+    NULLIF(TRIM(landing_page_id), '') AS landing_page_id,
+    LOWER(TRIM(origin)) AS origin,
+    'bronze.olist_mql' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_marketing_qualified_leads
+WHERE mql_id IS NOT NULL
+  AND TRIM(mql_id) != '';
+\echo '  ✓ olist_mql loaded'
+
+\echo 'Loading silver.olist_closed_deals...'
+CREATE OR REPLACE TABLE silver.olist_closed_deals AS
+SELECT
+    mql_id::VARCHAR AS mql_id,
+    NULLIF(TRIM(seller_id), '') AS seller_id,
+    NULLIF(TRIM(sdr_id), '') AS sdr_id,
+    NULLIF(TRIM(sr_id), '') AS sr_id,
+    won_date::TIMESTAMP::DATE AS won_date,
+    NULLIF(LOWER(TRIM(business_segment)), '') AS business_segment,
+    LOWER(TRIM(lead_type)) AS lead_type,
+    NULLIF(LOWER(TRIM(lead_behaviour_profile)), '') AS lead_behaviour_profile,
+    CASE
+        WHEN LOWER(TRIM(has_company)) IN ('true', '1', 'yes', 't') THEN TRUE
+        WHEN LOWER(TRIM(has_company)) IN ('false', '0', 'no', 'f') THEN FALSE
+    END AS has_company,
+    CASE
+        WHEN LOWER(TRIM(has_gtin)) IN ('true', '1', 'yes', 't') THEN TRUE
+        WHEN LOWER(TRIM(has_gtin)) IN ('false', '0', 'no', 'f') THEN FALSE
+    END AS has_gtin,
+    LOWER(TRIM(average_stock)) AS average_stock,
+    LOWER(TRIM(business_type)) AS business_type,
+    NULLIF(TRIM(declared_product_catalog_size), '')::DECIMAL(10,2) AS declared_product_catalog_size,
+    NULLIF(TRIM(declared_monthly_revenue), '')::DECIMAL(12,2) AS declared_monthly_revenue,
+    (NULLIF(TRIM(seller_id), '') IS NOT NULL) AS has_seller_id,
+    'bronze.olist_closed_deals' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.olist_closed_deals
+WHERE mql_id IS NOT NULL
+  AND TRIM(mql_id) != '';
+\echo '  ✓ olist_closed_deals loaded'
+
+-- ============================================================================
+-- SECTION 3: API TABLES (4 tables)
+-- ============================================================================
+
+\echo 'Loading silver.api_currency_rates...'
+CREATE OR REPLACE TABLE silver.api_currency_rates AS
+SELECT DISTINCT ON (rate_date::DATE, UPPER(TRIM(target_currency)))
+    rate_date::DATE AS rate_date,
+    UPPER(TRIM(base_currency)) AS base_currency,
+    UPPER(TRIM(target_currency)) AS target_currency,
+    exchange_rate::DECIMAL(10,6) AS exchange_rate,
+    (dwh_div_round(1000000000000, (exchange_rate::DECIMAL(10,6) * 1000000)::BIGINT)::DECIMAL(18,0)
+        * 0.000001)::DECIMAL(10,6) AS rate_inverse,
+    'bronze.api_currency_rates' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.api_currency_rates
+WHERE rate_date IS NOT NULL
+  AND TRIM(rate_date) != ''
+  AND target_currency IS NOT NULL
+  AND TRIM(target_currency) != ''
+ORDER BY rate_date::DATE, UPPER(TRIM(target_currency));
+\echo '  ✓ api_currency_rates loaded'
+
+\echo 'Loading silver.api_brazil_holidays...'
+CREATE OR REPLACE TABLE silver.api_brazil_holidays AS
+SELECT
+    holiday_date::DATE AS holiday_date,
+    TRIM(local_name) AS local_name,
+    TRIM(holiday_name) AS holiday_name,
+    UPPER(TRIM(country_code)) AS country_code,
+    CASE
+        WHEN LOWER(TRIM(is_fixed)) IN ('true', '1', 'yes', 't') THEN TRUE
+        ELSE FALSE
+    END AS is_fixed,
+    CASE
+        WHEN LOWER(TRIM(is_global)) IN ('true', '1', 'yes', 't') THEN TRUE
+        ELSE FALSE
+    END AS is_global,
+    TRIM(holiday_types) AS holiday_types,
+    EXTRACT(YEAR FROM holiday_date::DATE)::INTEGER AS holiday_year,
+    EXTRACT(MONTH FROM holiday_date::DATE)::INTEGER AS holiday_month,
+    EXTRACT(DOW FROM holiday_date::DATE)::INTEGER AS day_of_week,
+    (EXTRACT(DOW FROM holiday_date::DATE) IN (0, 6)) AS is_weekend,
+    'bronze.api_brazil_holidays' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.api_brazil_holidays
+WHERE holiday_date IS NOT NULL
+  AND TRIM(holiday_date) != '';
+\echo '  ✓ api_brazil_holidays loaded'
+
+\echo 'Loading silver.api_weather_history...'
+CREATE OR REPLACE TABLE silver.api_weather_history AS
+SELECT
+    latitude::DECIMAL(9,6) AS latitude,
+    longitude::DECIMAL(9,6) AS longitude,
+    weather_date::DATE AS weather_date,
+    UPPER(TRIM(state_code)) AS state_code,
+    NULLIF(TRIM(location_name), '') AS location_name,
+    COALESCE(NULLIF(LOWER(TRIM(location_type)), ''), 'state_capital') AS location_type,
+    NULLIF(TRIM(temperature_2m_mean), '')::DECIMAL(5,2) AS temperature_mean,
+    NULLIF(TRIM(temperature_2m_max), '')::DECIMAL(5,2) AS temperature_max,
+    COALESCE(NULLIF(TRIM(precipitation_sum), '')::DECIMAL(8,2), 0.00)::DECIMAL(8,2) AS precipitation_mm,
+    NULLIF(TRIM(weather_code), '')::INTEGER AS weather_code,
+    CASE
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER = 0 THEN 'clear'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 1 AND 3 THEN 'cloudy'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 45 AND 48 THEN 'fog'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 51 AND 55 THEN 'drizzle'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 61 AND 65 THEN 'rain'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 71 AND 77 THEN 'snow'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 80 AND 82 THEN 'showers'
+        WHEN NULLIF(TRIM(weather_code), '')::INTEGER BETWEEN 95 AND 99 THEN 'thunderstorm'
+        ELSE 'unknown'
+    END AS weather_category,
+    (COALESCE(NULLIF(TRIM(precipitation_sum), '')::DECIMAL(8,2), 0.00) > 0) AS is_rainy,
+    (NULLIF(TRIM(temperature_2m_max), '')::DECIMAL(5,2) > 35) AS is_extreme_heat,
+    'bronze.api_weather_history' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    TRUE AS dwh_is_valid,
+    NULL::VARCHAR AS dwh_validation_errors
+FROM bronze.api_weather_history
+WHERE state_code IS NOT NULL
+  AND TRIM(state_code) != ''
+  AND weather_date IS NOT NULL
+  AND TRIM(weather_date) != '';
+\echo '  ✓ api_weather_history loaded'
+
+\echo 'Loading silver.api_weather_hourly...'
+CREATE OR REPLACE TABLE silver.api_weather_hourly AS
+SELECT
+    latitude::DECIMAL(9,6) AS latitude,
+    longitude::DECIMAL(9,6) AS longitude,
+    weather_date::DATE AS weather_date,
+    UPPER(TRIM(state_code)) AS state_code,
+    COALESCE(NULLIF(LOWER(TRIM(location_type)), ''), 'state_capital') AS location_type,
+    dwh_split_slots(temperature_2m)::REAL[] AS temperature_2m,
+    dwh_split_slots(precipitation)::REAL[] AS precipitation_mm,
+    dwh_split_slots(weather_code)::SMALLINT[] AS weather_code,
+    'bronze.api_weather_hourly' AS dwh_record_source,
+    CURRENT_TIMESTAMP::TIMESTAMP AS dwh_transformed_at,
+    (len(dwh_split_slots(temperature_2m)) = 24
+     AND list_count(dwh_split_slots(temperature_2m)) = 24) AS dwh_is_valid,
+    CASE
+        WHEN len(dwh_split_slots(temperature_2m)) != 24
+          OR list_count(dwh_split_slots(temperature_2m)) != 24
+        THEN 'Missing hourly temperature values'
+    END AS dwh_validation_errors
+FROM bronze.api_weather_hourly
+WHERE state_code IS NOT NULL
+  AND TRIM(state_code) != ''
+  AND weather_date IS NOT NULL
+  AND TRIM(weather_date) != '';
+\echo '  ✓ api_weather_hourly loaded'
+
+DROP TABLE dwh_city_names;
+
+\echo ''
+\echo '============================================================'
+\echo 'SILVER LAYER LOAD COMPLETE'
+\echo '============================================================'
@@ -4,8 +4,11 @@
 --
 -- SCHEMA:
 --   • 5 Dimensions: date, customer, seller, product, geography
---   • 2 Facts: orders, order_items
+--   • 3 Facts: orders, order_items, order_currency
 --   • 1 Bridge: marketing_funnel
+--   • 1 Lookup: map_zip_weather_point
+--   • Staging: stg_fact_orders, stg_fact_order_items (parallel fact build)
+--   • Control: dwh_load_log, dwh_profile_run, dwh_profile_statement
 --
 -- ============================================================================
 
@@ -166,10 +169,16 @@ CREATE TABLE gold.fact_orders (
     review_score            INTEGER,
     weather_category        VARCHAR(20),
     temperature_max         DECIMAL(5,2),
-    is_rainy                BOOLEAN DEFAULT FALSE
+    is_rainy                BOOLEAN DEFAULT FALSE,
+    temperature_at_purchase DECIMAL(5,2),
+    precipitation_at_purchase DECIMAL(6,2),
+    is_raining_at_purchase  BOOLEAN
 );
 
 COMMENT ON TABLE gold.fact_orders IS 'Order-level fact table (1 row per order)';
+COMMENT ON COLUMN gold.fact_orders.total_order_value_usd IS 'total_order_value at the as-of BRL->USD rate (gold.dwh_asof_rates), set by every Gold load';
+COMMENT ON COLUMN gold.fact_orders.temperature_at_purchase IS 'Temperature in the purchase hour (silver.api_weather_hourly); NULL without hourly weather';
+COMMENT ON COLUMN gold.fact_orders.is_raining_at_purchase IS 'Precipitation > 0 in the purchase hour; NULL without hourly weather';
 
 CREATE INDEX idx_fact_orders_customer ON gold.fact_orders(customer_key);
 CREATE INDEX idx_fact_orders_date ON gold.fact_orders(order_date_key);
@@ -204,6 +213,89 @@ CREATE INDEX idx_fact_items_seller ON gold.fact_order_items(seller_key);
 CREATE INDEX idx_fact_items_product ON gold.fact_order_items(product_key);
 CREATE INDEX idx_fact_items_date ON gold.fact_order_items(order_date_key);
 
+-- ----------------------------------------------------------------------------
+-- fact_order_currency (Order value in every target currency)
+-- Written by: load_gold_data.sql with the facts (load_gold_currency.sql) -
+-- as-of rate (latest silver.api_currency_rates date <= purchase date);
+-- scripts/pipeline/convert_currency.py re-converts it without a reload.
+-- Keyed on order_id (no FK), so the load truncates it with the facts.
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.fact_order_currency...'
+
+DROP TABLE IF EXISTS gold.fact_order_currency CASCADE;
+
+CREATE TABLE gold.fact_order_currency (
+    order_id                VARCHAR(32) NOT NULL,
+    currency_code           VARCHAR(3) NOT NULL,
+    order_date_key          INTEGER,
+    rate_date               DATE,
+    rate_age_days           INTEGER,
+    exchange_rate           DECIMAL(10,6),
+    total_order_value       DECIMAL(12,2),
+    PRIMARY KEY (order_id, currency_code)
+);
+
+COMMENT ON TABLE gold.fact_order_currency IS 'Order value converted to each target currency at the as-of exchange rate (1 row per order and currency)';
+COMMENT ON COLUMN gold.fact_order_currency.rate_date IS 'Date of the rate used: latest rate on or before the purchase date; NULL if none within the max rate age';
+COMMENT ON COLUMN gold.fact_order_currency.rate_age_days IS 'Purchase date minus rate_date (weekends/holidays carry the last business-day rate)';
+COMMENT ON COLUMN gold.fact_order_currency.total_order_value IS 'fact_orders.total_order_value (BRL) * exchange_rate, rounded half away from zero to cents';
+
+CREATE INDEX idx_fact_order_currency_date ON gold.fact_order_currency(currency_code, order_date_key);
+
+-- ----------------------------------------------------------------------------
+-- dwh_asof_rates (As-of BRL exchange rate of every target currency and day)
+-- Read by: load_gold_facts.sql (total_order_value_usd) and
+-- load_gold_currency.sql (fact_order_currency, dim_date.usd_exchange_rate).
+-- Each rate is repeated for the days up to the next rate of its currency,
+-- at most p_max_age days, so orders find theirs with an equi-join on
+-- (currency_code, date_key) instead of a "latest rate <= date" subquery per
+-- order. Same rules as scripts/pipeline/convert_currency.py.
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION gold.dwh_asof_rates(p_max_age INTEGER DEFAULT 7)
+RETURNS TABLE (
+    currency_code VARCHAR(3),
+    date_key INTEGER,
+    rate_date DATE,
+    rate_age_days INTEGER,
+    exchange_rate DECIMAL(10,6)
+) AS $$
+    SELECT
+        r.target_currency,
+        TO_CHAR(d, 'YYYYMMDD')::INTEGER,
+        r.rate_date,
+        d::DATE - r.rate_date,
+        r.exchange_rate
+    FROM (
+        SELECT target_currency, rate_date, exchange_rate,
+               LEAD(rate_date) OVER (PARTITION BY target_currency ORDER BY rate_date) AS next_rate_date
+        FROM silver.api_currency_rates
+        WHERE base_currency = 'BRL'
+          AND dwh_is_valid
+          AND exchange_rate > 0
+    ) r
+    CROSS JOIN LATERAL generate_series(
+        r.rate_date,
+        LEAST(r.next_rate_date - 1, r.rate_date + p_max_age),
+        '1 day'::INTERVAL
+    ) AS d;
+$$ LANGUAGE sql STABLE;
+
+-- ----------------------------------------------------------------------------
+-- stg_fact_orders / stg_fact_order_items (Parallel fact build staging)
+-- Written by: scripts/pipeline/load_gold_parallel.py - each worker inserts
+-- its hash slice here, then one transaction copies them into the facts.
+-- UNLOGGED (no WAL); defaults draw surrogate keys from the fact sequences.
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.stg_fact_orders / gold.stg_fact_order_items...'
+
+DROP TABLE IF EXISTS gold.stg_fact_orders CASCADE;
+DROP TABLE IF EXISTS gold.stg_fact_order_items CASCADE;
+
+CREATE UNLOGGED TABLE gold.stg_fact_orders (LIKE gold.fact_orders INCLUDING DEFAULTS);
+CREATE UNLOGGED TABLE gold.stg_fact_order_items (LIKE gold.fact_order_items INCLUDING DEFAULTS);
+
+CREATE INDEX idx_stg_fact_orders_order_id ON gold.stg_fact_orders(order_id);
+
 -- ============================================================================
 -- SECTION 3: BRIDGE TABLE
 -- ============================================================================
@@ -236,7 +328,189 @@ CREATE INDEX idx_bridge_funnel_seller ON gold.bridge_marketing_funnel(seller_key
 CREATE INDEX idx_bridge_funnel_origin ON gold.bridge_marketing_funnel(origin);
 
 -- ============================================================================
--- SECTION 4: VERIFICATION
+-- SECTION 4: LOOKUP TABLES
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- map_zip_weather_point (Zip prefix → nearest weather point)
+-- Loaded by: scripts/pipeline/build_weather_point_map.py (KD-tree nearest neighbour)
+-- Used by: fact_orders weather join (falls back to the state capital if unmapped)
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.map_zip_weather_point...'
+
+DROP TABLE IF EXISTS gold.map_zip_weather_point CASCADE;
+
+CREATE TABLE gold.map_zip_weather_point (
+    zip_code_prefix         VARCHAR(5) PRIMARY KEY,
+    zip_state               VARCHAR(2),
+    weather_latitude        DECIMAL(9,6) NOT NULL,
+    weather_longitude       DECIMAL(9,6) NOT NULL,
+    weather_state_code      VARCHAR(2) NOT NULL,
+    weather_location_name   VARCHAR(100),
+    distance_km             DECIMAL(8,2) NOT NULL,
+    match_method            VARCHAR(20) NOT NULL
+);
+
+COMMENT ON TABLE gold.map_zip_weather_point IS 'Nearest weather point for every zip code prefix';
+COMMENT ON COLUMN gold.map_zip_weather_point.match_method IS 'nearest = zip centroid KD-tree match, state_centroid = zip without geolocation matched via its state centroid';
+
+CREATE INDEX idx_map_zip_weather_point ON gold.map_zip_weather_point(weather_latitude, weather_longitude);
+
+-- ============================================================================
+-- SECTION 5: DWH CONTROL TABLES
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- dwh_load_log (One row per Gold ETL run)
+-- Written by: load_gold_data.sql (skips the run if no Silver table changed
+-- since the last complete load, see bronze.dwh_load_manifest)
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.dwh_load_log...'
+
+DROP TABLE IF EXISTS gold.dwh_load_log CASCADE;
+
+CREATE TABLE gold.dwh_load_log (
+    load_id                 SERIAL PRIMARY KEY,
+    started_at              TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at             TIMESTAMP,
+    status                  VARCHAR(20) NOT NULL DEFAULT 'running',
+    changed_sources         TEXT,
+    load_pid                INTEGER DEFAULT pg_backend_pid()
+);
+
+COMMENT ON TABLE gold.dwh_load_log IS 'Gold ETL run history (status: running, complete, failed)';
+COMMENT ON COLUMN gold.dwh_load_log.changed_sources IS 'Bronze sources rebuilt in Silver since the previous complete load';
+COMMENT ON COLUMN gold.dwh_load_log.load_pid IS 'Backend running the load - a running row whose backend is gone died without finishing';
+
+CREATE INDEX idx_dwh_load_log_status ON gold.dwh_load_log(status, finished_at);
+
+-- Mark a load failed and announce it (payload '<load_id>:failed'). Called by
+-- the Python runners when the load script raises; loads run by psql that stop
+-- on an error are marked by the next load (load_gold_data.sql)
+CREATE OR REPLACE FUNCTION gold.dwh_fail_load(p_load_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE gold.dwh_load_log
+    SET status = 'failed',
+        finished_at = CURRENT_TIMESTAMP
+    WHERE load_id = p_load_id
+      AND status = 'running';
+    IF FOUND THEN
+        PERFORM pg_notify('dwh_gold_load', p_load_id || ':failed');
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------------------------------------------------------
+-- dwh_table_source (Bronze sources read by each Gold table)
+-- Read by: load_gold_data.sql change check - a Gold table is rebuilt only when
+-- Silver rebuilt one of its sources since the last complete load
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.dwh_table_source...'
+
+DROP TABLE IF EXISTS gold.dwh_table_source CASCADE;
+
+CREATE TABLE gold.dwh_table_source (
+    gold_table              VARCHAR(100) NOT NULL,
+    source_table            VARCHAR(100) NOT NULL,
+    is_required             BOOLEAN NOT NULL DEFAULT TRUE,
+    PRIMARY KEY (gold_table, source_table)
+);
+
+COMMENT ON TABLE gold.dwh_table_source IS 'Bronze sources (bronze.dwh_load_manifest.table_name) each Gold table is built from';
+COMMENT ON COLUMN gold.dwh_table_source.is_required IS 'FALSE for optional sources (hourly weather, exchange rates) - never loaded does not force a rebuild';
+
+INSERT INTO gold.dwh_table_source (gold_table, source_table, is_required) VALUES
+    ('dim_geography', 'olist_geolocation', TRUE),
+    ('dim_customer', 'olist_customers', TRUE),
+    ('dim_seller', 'olist_sellers', TRUE),
+    ('dim_seller', 'olist_closed_deals', TRUE),
+    ('dim_seller', 'olist_marketing_qualified_leads', TRUE),
+    ('dim_product', 'olist_products', TRUE),
+    ('dim_product', 'product_category_name_translation', TRUE),
+    ('fact_orders', 'olist_orders', TRUE),
+    ('fact_orders', 'olist_order_items', TRUE),
+    ('fact_orders', 'olist_order_payments', TRUE),
+    ('fact_orders', 'olist_order_reviews', TRUE),
+    ('fact_orders', 'api_weather_history', TRUE),
+    ('fact_orders', 'api_weather_hourly', FALSE),
+    ('fact_orders', 'api_currency_rates', FALSE),
+    ('fact_order_items', 'olist_order_items', TRUE),
+    ('bridge_marketing_funnel', 'olist_marketing_qualified_leads', TRUE),
+    ('bridge_marketing_funnel', 'olist_closed_deals', TRUE);
+
+-- ----------------------------------------------------------------------------
+-- dwh_profile_run / dwh_profile_statement (Query plan & timing history)
+-- Written by: scripts/pipeline/profile_sql.py (EXPLAIN (ANALYZE, BUFFERS) of
+-- every Silver/Gold load statement, compared with a baseline run)
+-- NOTE: Created IF NOT EXISTS so the history survives schema rebuilds
+-- ----------------------------------------------------------------------------
+\echo 'Creating gold.dwh_profile_run / gold.dwh_profile_statement...'
+
+CREATE TABLE IF NOT EXISTS gold.dwh_profile_run (
+    run_id                  SERIAL PRIMARY KEY,
+    started_at              TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at             TIMESTAMP,
+    status                  VARCHAR(20) NOT NULL DEFAULT 'running',
+    scripts                 TEXT NOT NULL,
+    is_baseline             BOOLEAN NOT NULL DEFAULT FALSE,
+    total_ms                DECIMAL(14,3),
+    regression_count        INTEGER,
+    error_message           TEXT
+);
+
+CREATE TABLE IF NOT EXISTS gold.dwh_profile_statement (
+    run_id                  INTEGER NOT NULL REFERENCES gold.dwh_profile_run(run_id) ON DELETE CASCADE,
+    statement_no            INTEGER NOT NULL,
+    script_name             VARCHAR(100) NOT NULL,
+    script_line             INTEGER,
+    statement_key           CHAR(32) NOT NULL,
+    statement_label         VARCHAR(200),
+    plan_hash               CHAR(16),
+    planning_ms             DECIMAL(14,3),
+    execution_ms            DECIMAL(14,3),
+    elapsed_ms              DECIMAL(14,3) NOT NULL,
+    actual_rows             BIGINT,
+    shared_hit_blocks       BIGINT,
+    shared_read_blocks      BIGINT,
+    shared_dirtied_blocks   BIGINT,
+    shared_written_blocks   BIGINT,
+    temp_read_blocks        BIGINT,
+    temp_written_blocks     BIGINT,
+    plan                    JSONB,
+    baseline_run_id         INTEGER,
+    baseline_ms             DECIMAL(14,3),
+    baseline_plan_hash      CHAR(16),
+    is_regression           BOOLEAN NOT NULL DEFAULT FALSE,
+    regression_reason       TEXT,
+    PRIMARY KEY (run_id, statement_no)
+);
+
+COMMENT ON TABLE gold.dwh_profile_run IS 'One row per profiling run (status: running, complete, failed)';
+COMMENT ON COLUMN gold.dwh_profile_statement.statement_key IS 'MD5 of script name + normalized SQL + occurrence, stable across runs';
+COMMENT ON COLUMN gold.dwh_profile_statement.plan_hash IS 'Hash of the plan shape (node types, join types, relations, indexes) - ignores costs and row counts';
+COMMENT ON COLUMN gold.dwh_profile_statement.elapsed_ms IS 'Execution time from EXPLAIN ANALYZE, or wall time for statements that cannot be explained';
+
+CREATE INDEX IF NOT EXISTS idx_dwh_profile_statement_key ON gold.dwh_profile_statement(statement_key, run_id);
+
+-- Regressions flagged in the latest complete profiling run
+CREATE OR REPLACE VIEW gold.dwh_profile_regressions AS
+SELECT
+    s.run_id,
+    s.script_name,
+    s.script_line,
+    s.statement_label,
+    s.elapsed_ms,
+    s.baseline_ms,
+    s.plan_hash,
+    s.baseline_plan_hash,
+    s.regression_reason
+FROM gold.dwh_profile_statement s
+WHERE s.is_regression
+  AND s.run_id = (SELECT MAX(run_id) FROM gold.dwh_profile_run WHERE status = 'complete');
+
+-- ============================================================================
+-- SECTION 6: VERIFICATION
 -- ============================================================================
 
 \echo '============================================================'
@@ -0,0 +1,65 @@
+-- ============================================================================
+-- GOLD LAYER: AS-OF CURRENCY CONVERSION
+-- ============================================================================
+--
+-- Included by load_gold_data.sql in the fact transaction, after the fact
+-- INSERTs (load_gold_facts.sql, or the parallel slices published by
+-- scripts/pipeline/load_gold_parallel.py).
+--
+-- Converts every order into every target currency of silver.api_currency_rates
+-- at the as-of rate (gold.dwh_asof_rates: latest rate on or before the
+-- purchase date, at most :max_rate_age days old) and refreshes
+-- dim_date.usd_exchange_rate. The values match
+-- scripts/pipeline/convert_currency.py, which re-converts without a Gold
+-- reload (e.g. other --currencies or --max-rate-age).
+--
+-- VARIABLES (set by the caller):
+--   fact_orders_table           Orders to convert (gold.fact_orders or its shadow)
+--   fact_order_currency_table   Target, already empty (TRUNCATE or new shadow)
+--   dim_date_table              Calendar whose USD rate is refreshed
+--   max_rate_age                Oldest usable rate in days
+--
+-- No BEGIN/COMMIT here: the caller owns the transaction.
+--
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- fact_order_currency (1 row per order and currency; NULL rate = none usable)
+-- ----------------------------------------------------------------------------
+
+WITH rates AS MATERIALIZED (
+    SELECT * FROM gold.dwh_asof_rates(:max_rate_age)
+)
+INSERT INTO :fact_order_currency_table (
+    order_id, currency_code, order_date_key, rate_date,
+    rate_age_days, exchange_rate, total_order_value
+)
+SELECT
+    f.order_id,
+    c.currency_code,
+    f.order_date_key,
+    r.rate_date,
+    r.rate_age_days,
+    r.exchange_rate,
+    ROUND(f.total_order_value * r.exchange_rate, 2)
+FROM :fact_orders_table f
+CROSS JOIN (SELECT DISTINCT currency_code FROM rates) c
+LEFT JOIN rates r
+    ON r.currency_code = c.currency_code
+    AND r.date_key = f.order_date_key;
+
+-- ----------------------------------------------------------------------------
+-- dim_date.usd_exchange_rate (only days whose rate changed are rewritten)
+-- ----------------------------------------------------------------------------
+
+UPDATE :dim_date_table d
+SET usd_exchange_rate = r.usd_exchange_rate
+FROM (
+    SELECT dd.date_key, ROUND(a.exchange_rate, 4) AS usd_exchange_rate
+    FROM :dim_date_table dd
+    LEFT JOIN gold.dwh_asof_rates(:max_rate_age) a
+        ON a.currency_code = 'USD'
+        AND a.date_key = dd.date_key
+) r
+WHERE r.date_key = d.date_key
+  AND d.usd_exchange_rate IS DISTINCT FROM r.usd_exchange_rate;
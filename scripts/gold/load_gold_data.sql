@@ -1,13 +1,193 @@
 -- ============================================================================
 -- GOLD LAYER: LOAD DATA (ETL from Silver to Gold)
 -- ============================================================================
+--
+-- PREREQUISITE: run scripts/pipeline/build_weather_point_map.py after the
+-- Silver load to refresh gold.map_zip_weather_point. Without it, fact_orders
+-- falls back to state-capital weather.
+--
+-- CURRENCY CONVERSION:
+-- --------------------
+-- Every load converts the orders at the as-of exchange rate (latest rate on
+-- or before the purchase date, gold.dwh_asof_rates): fact_orders.
+-- total_order_value_usd in the fact INSERT, gold.fact_order_currency (all
+-- target currencies, rebuilt with the facts) and dim_date.usd_exchange_rate
+-- in load_gold_currency.sql. Rates older than :max_rate_age days (default 7)
+-- are not used:
+--   psql -d olist_dwh -v max_rate_age=3 -f load_gold_data.sql
+--
+-- CHANGE DETECTION:
+-- -----------------
+-- The run is skipped when no Silver table was rebuilt since the last complete
+-- load in gold.dwh_load_log (Silver records what it consumed in
+-- bronze.dwh_load_manifest). Otherwise only the dimensions whose sources
+-- changed are rebuilt (gold.dwh_table_source lists the sources of each Gold
+-- table); the facts and the bridge are rebuilt on every run that reloads.
+-- Rebuilding the weather point map alone does not trigger a reload; force a
+-- full rebuild with:
+--   psql -d olist_dwh -v force_reload=true -f load_gold_data.sql
+--
+-- Each load is announced on the dwh_gold_load channel (pg_notify payload
+-- '<load_id>:running' / '<load_id>:complete', or '<load_id>:failed' from
+-- gold.dwh_fail_load); scripts/pipeline/query_cache.py uses it as the version
+-- stamp of its cached results. A load stopped by an error under psql stays
+-- 'running' until the next load marks it 'failed'.
+--
+-- ZERO-DOWNTIME REFRESH:
+-- ----------------------
+-- By default every table is TRUNCATEd (CASCADE reaches the facts) and
+-- reloaded in place, so BI readers block or see empty tables during the run.
+-- With -v shadow_swap=true each table is built as gold.<table>__shadow while
+-- the live star schema stays untouched; section 4 then builds keys, indexes
+-- and statistics on the shadows and swaps all of them in by rename in one
+-- short transaction (bronze.dwh_shadow_*):
+--   psql -d olist_dwh -v shadow_swap=true -f load_gold_data.sql
+--
+-- BULK LOAD:
+-- ----------
+-- For the in-place reload, -v bulk_load=true drops the secondary indexes and
+-- foreign keys of the star schema before the first TRUNCATE and rebuilds
+-- them (then ANALYZE) after the bridge table, so the INSERTs run without
+-- index maintenance or per-row FK checks (bronze.dwh_defer_indexes /
+-- bronze.dwh_restore_indexes). Queries against Gold are slow until the
+-- rebuild finishes:
+--   psql -d olist_dwh -v bulk_load=true -f load_gold_data.sql
+-- scripts/pipeline/bulk_load.py rebuilds them over several connections in
+-- parallel. Ignored with shadow_swap, which already indexes the shadows
+-- after they are filled.
+--
+-- ============================================================================
 
 SET search_path TO gold, silver, public;
 
+\set ON_ERROR_STOP on
+
+\if :{?force_reload}
+\else
+    \set force_reload false
+\endif
+
+\if :{?shadow_swap}
+\else
+    \set shadow_swap false
+\endif
+
+\if :{?max_rate_age}
+\else
+    \set max_rate_age 7
+\endif
+
+\if :{?bulk_load}
+\else
+    \set bulk_load false
+\endif
+
+-- bulk_restore=false leaves the rebuild to scripts/pipeline/bulk_load.py
+\if :{?bulk_restore}
+\else
+    \set bulk_restore :bulk_load
+\endif
+
+\if :shadow_swap
+    \set bulk_load false
+    \set bulk_restore false
+\endif
+
 \echo '============================================================'
 \echo 'GOLD LAYER ETL - Loading Data'
 \echo '============================================================'
 
+-- ----------------------------------------------------------------------------
+-- Change check: which Gold tables need a rebuild (gold.dwh_table_source maps
+-- each table to the Bronze sources it reads)
+--   - dimensions: only when Silver rebuilt one of their sources since the last
+--     complete Gold load; dim_geography also rebuilds dim_customer/dim_seller
+--     (they hold its surrogate key). dim_date has no source: built on the first
+--     load (or when empty) and kept afterwards
+--   - facts and bridge: whenever anything changed - they carry the surrogate
+--     keys of every dimension and the bridge aggregates the facts
+-- A required source Silver never consumed counts as changed; force_reload
+-- (or the first load) rebuilds everything.
+-- ----------------------------------------------------------------------------
+WITH last_load AS (
+    SELECT MAX(finished_at) AS finished_at
+    FROM gold.dwh_load_log
+    WHERE status = 'complete'
+),
+changed AS (
+    SELECT s.gold_table, s.source_table
+    FROM gold.dwh_table_source s
+    CROSS JOIN last_load l
+    LEFT JOIN bronze.dwh_load_manifest m ON m.table_name = s.source_table
+    WHERE l.finished_at IS NULL
+       OR m.silver_consumed_at > l.finished_at
+       OR (s.is_required AND m.silver_consumed_at IS NULL)
+),
+rebuild AS (
+    SELECT :'force_reload'::BOOLEAN OR l.finished_at IS NULL AS rebuild_all
+    FROM last_load l
+)
+SELECT
+    r.rebuild_all OR EXISTS (SELECT 1 FROM changed) AS reload_gold,
+    r.rebuild_all OR NOT EXISTS (SELECT 1 FROM gold.dim_date) AS rebuild_dim_date,
+    r.rebuild_all OR 'dim_geography' IN (SELECT gold_table FROM changed) AS rebuild_dim_geography,
+    r.rebuild_all OR EXISTS (
+        SELECT 1 FROM changed WHERE gold_table IN ('dim_geography', 'dim_customer')
+    ) AS rebuild_dim_customer,
+    r.rebuild_all OR EXISTS (
+        SELECT 1 FROM changed WHERE gold_table IN ('dim_geography', 'dim_seller')
+    ) AS rebuild_dim_seller,
+    r.rebuild_all OR 'dim_product' IN (SELECT gold_table FROM changed) AS rebuild_dim_product,
+    COALESCE(
+        (SELECT STRING_AGG(DISTINCT source_table, ', ' ORDER BY source_table) FROM changed),
+        ''
+    ) AS changed_sources
+FROM rebuild r
+\gset
+
+\if :reload_gold
+\else
+    \echo 'No Silver changes since the last complete Gold load - nothing to do.'
+    \echo '(use -v force_reload=true to reload anyway)'
+    \quit
+\endif
+
+-- Tables this run rebuilds (deferred indexes, shadow finalize / swap)
+SELECT '{' || CONCAT_WS(',',
+    CASE WHEN :'rebuild_dim_date'::BOOLEAN THEN 'gold.dim_date' END,
+    CASE WHEN :'rebuild_dim_geography'::BOOLEAN THEN 'gold.dim_geography' END,
+    CASE WHEN :'rebuild_dim_customer'::BOOLEAN THEN 'gold.dim_customer' END,
+    CASE WHEN :'rebuild_dim_seller'::BOOLEAN THEN 'gold.dim_seller' END,
+    CASE WHEN :'rebuild_dim_product'::BOOLEAN THEN 'gold.dim_product' END,
+    'gold.fact_orders', 'gold.fact_order_items', 'gold.fact_order_currency',
+    'gold.bridge_marketing_funnel'
+) || '}' AS gold_tables
+\gset
+
+\echo 'Rebuilding:' :gold_tables
+
+-- Earlier loads that died without finishing (psql stopped on an error,
+-- backend killed): their backend is gone
+UPDATE gold.dwh_load_log l
+SET status = 'failed',
+    finished_at = CURRENT_TIMESTAMP
+WHERE l.status = 'running'
+  AND NOT EXISTS (SELECT 1 FROM pg_stat_activity a WHERE a.pid = l.load_pid);
+
+INSERT INTO gold.dwh_load_log (changed_sources)
+VALUES (NULLIF(:'changed_sources', ''))
+RETURNING load_id AS gold_load_id
+\gset
+
+-- Tell listeners (scripts/pipeline/query_cache.py) a load is in progress
+SELECT pg_notify('dwh_gold_load', :'gold_load_id' || ':running');
+
+-- Bulk load: drop secondary indexes and FKs now, rebuild them in section 4
+\if :bulk_load
+\echo 'Bulk load: deferring secondary indexes and foreign keys...'
+SELECT bronze.dwh_defer_indexes(:'gold_tables'::REGCLASS[]) AS deferred_objects;
+\endif
+
 -- ============================================================================
 -- SECTION 1: LOAD DIMENSIONS
 -- ============================================================================
@@ -16,11 +196,18 @@ SET search_path TO gold, silver, public;
 -- 1.1 dim_date
 -- ----------------------------------------------------------------------------
 
+\if :rebuild_dim_date
 \echo 'Loading gold.dim_date...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.dim_date') AS dim_date_table
+\gset
+\else
 TRUNCATE TABLE gold.dim_date CASCADE;
+\set dim_date_table gold.dim_date
+\endif
 
-INSERT INTO gold.dim_date (
+INSERT INTO :dim_date_table (
     date_key, full_date, year, quarter, quarter_name,
     month, month_name, week_of_year, day_of_month,
     day_of_week, day_name, is_weekend, is_holiday, holiday_name
@@ -43,17 +230,28 @@ SELECT
 FROM generate_series('2016-01-01'::DATE, '2018-12-31'::DATE, '1 day'::INTERVAL) AS d;
 
 \echo '  ✓ dim_date loaded'
-SELECT COUNT(*) AS dim_date_rows FROM gold.dim_date;
+SELECT COUNT(*) AS dim_date_rows FROM :dim_date_table;
+\else
+\echo '  - gold.dim_date unchanged, kept'
+\set dim_date_table gold.dim_date
+\endif
 
 -- ----------------------------------------------------------------------------
 -- 1.2 dim_geography (LOAD FIRST - Referenced by customer & seller)
 -- ----------------------------------------------------------------------------
 
+\if :rebuild_dim_geography
 \echo 'Loading gold.dim_geography...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.dim_geography') AS dim_geography_table
+\gset
+\else
 TRUNCATE TABLE gold.dim_geography CASCADE;
+\set dim_geography_table gold.dim_geography
+\endif
 
-INSERT INTO gold.dim_geography (
+INSERT INTO :dim_geography_table (
     zip_code_prefix, city, state, state_name, region, latitude, longitude
 )
 SELECT
@@ -91,17 +289,28 @@ SELECT
 FROM silver.olist_geolocation;
 
 \echo '  ✓ dim_geography loaded'
-SELECT COUNT(*) AS dim_geography_rows FROM gold.dim_geography;
+SELECT COUNT(*) AS dim_geography_rows FROM :dim_geography_table;
+\else
+\echo '  - gold.dim_geography unchanged, kept'
+\set dim_geography_table gold.dim_geography
+\endif
 
 -- ----------------------------------------------------------------------------
 -- 1.3 dim_customer (With geography_key FK)
 -- ----------------------------------------------------------------------------
 
+\if :rebuild_dim_customer
 \echo 'Loading gold.dim_customer...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.dim_customer') AS dim_customer_table
+\gset
+\else
 TRUNCATE TABLE gold.dim_customer CASCADE;
+\set dim_customer_table gold.dim_customer
+\endif
 
-INSERT INTO gold.dim_customer (
+INSERT INTO :dim_customer_table (
     customer_id, customer_unique_id, customer_zip_code,
     customer_city, customer_state, customer_region, geography_key
 )
@@ -126,20 +335,31 @@ SELECT
     END,
     g.geography_key
 FROM silver.olist_customers c
-LEFT JOIN gold.dim_geography g ON c.customer_zip_code_prefix = g.zip_code_prefix;
+LEFT JOIN :dim_geography_table g ON c.customer_zip_code_prefix = g.zip_code_prefix;
 
 \echo '  ✓ dim_customer loaded'
-SELECT COUNT(*) AS dim_customer_rows FROM gold.dim_customer;
+SELECT COUNT(*) AS dim_customer_rows FROM :dim_customer_table;
+\else
+\echo '  - gold.dim_customer unchanged, kept'
+\set dim_customer_table gold.dim_customer
+\endif
 
 -- ----------------------------------------------------------------------------
 -- 1.4 dim_seller (With geography_key FK)
 -- ----------------------------------------------------------------------------
 
+\if :rebuild_dim_seller
 \echo 'Loading gold.dim_seller...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.dim_seller') AS dim_seller_table
+\gset
+\else
 TRUNCATE TABLE gold.dim_seller CASCADE;
+\set dim_seller_table gold.dim_seller
+\endif
 
-INSERT INTO gold.dim_seller (
+INSERT INTO :dim_seller_table (
     seller_id, seller_zip_code, seller_city, seller_state,
     seller_region, geography_key, is_from_marketing, lead_origin, lead_won_date
 )
@@ -166,22 +386,33 @@ SELECT
     m.origin,
     cd.won_date
 FROM silver.olist_sellers s
-LEFT JOIN gold.dim_geography g ON s.seller_zip_code_prefix = g.zip_code_prefix
+LEFT JOIN :dim_geography_table g ON s.seller_zip_code_prefix = g.zip_code_prefix
 LEFT JOIN silver.olist_closed_deals cd ON s.seller_id = cd.seller_id
 LEFT JOIN silver.olist_mql m ON cd.mql_id = m.mql_id;
 
 \echo '  ✓ dim_seller loaded'
-SELECT COUNT(*) AS dim_seller_rows FROM gold.dim_seller;
+SELECT COUNT(*) AS dim_seller_rows FROM :dim_seller_table;
+\else
+\echo '  - gold.dim_seller unchanged, kept'
+\set dim_seller_table gold.dim_seller
+\endif
 
 -- ----------------------------------------------------------------------------
 -- 1.5 dim_product
 -- ----------------------------------------------------------------------------
 
+\if :rebuild_dim_product
 \echo 'Loading gold.dim_product...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.dim_product') AS dim_product_table
+\gset
+\else
 TRUNCATE TABLE gold.dim_product CASCADE;
+\set dim_product_table gold.dim_product
+\endif
 
-INSERT INTO gold.dim_product (
+INSERT INTO :dim_product_table (
     product_id, category_name_pt, category_name_en,
     weight_g, volume_cm3, weight_category, size_category
 )
@@ -208,75 +439,66 @@ LEFT JOIN silver.olist_category_translation t
     ON LOWER(p.product_category_name) = LOWER(t.product_category_name);
 
 \echo '  ✓ dim_product loaded'
-SELECT COUNT(*) AS dim_product_rows FROM gold.dim_product;
+SELECT COUNT(*) AS dim_product_rows FROM :dim_product_table;
+\else
+\echo '  - gold.dim_product unchanged, kept'
+\set dim_product_table gold.dim_product
+\endif
 
 -- ============================================================================
 -- SECTION 2: LOAD FACT TABLES
 -- ============================================================================
 
 -- ----------------------------------------------------------------------------
--- 2.1 fact_orders
+-- 2.1 fact_orders + 2.2 fact_order_items + 2.3 fact_order_currency
+-- (one transaction)
+-- The INSERTs live in load_gold_facts.sql, shared with the parallel builder
+-- (scripts/pipeline/load_gold_parallel.py), which runs the same file in N
+-- hash slices of order_id. Here it runs as a single slice. The currency
+-- conversion (load_gold_currency.sql) then reads the finished fact_orders.
 -- ----------------------------------------------------------------------------
 
-\echo 'Loading gold.fact_orders...'
+\echo 'Loading gold.fact_orders, gold.fact_order_items and gold.fact_order_currency...'
+
+BEGIN;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.fact_orders') AS fact_orders_table
+\gset
+SELECT bronze.dwh_shadow_create('gold.fact_order_items') AS fact_order_items_table
+\gset
+SELECT bronze.dwh_shadow_create('gold.fact_order_currency') AS fact_order_currency_table
+\gset
+\else
+-- Named explicitly: with bulk_load the FK that CASCADE follows is dropped,
+-- and fact_order_currency has no FK to follow
+TRUNCATE TABLE gold.fact_orders, gold.fact_order_items, gold.fact_order_currency CASCADE;
+\set fact_orders_table gold.fact_orders
+\set fact_order_items_table gold.fact_order_items
+\set fact_order_currency_table gold.fact_order_currency
+\endif
+\set slice_count 1
+\set slice_id 0
+\ir load_gold_facts.sql
+\ir load_gold_currency.sql
+
+COMMIT;
 
-TRUNCATE TABLE gold.fact_orders CASCADE;
+\echo '  ✓ fact_orders loaded'
+SELECT COUNT(*) AS fact_orders_rows FROM :fact_orders_table;
 
-INSERT INTO gold.fact_orders (
-    order_id, customer_key, order_date_key, order_status,
-    total_items, total_product_value, total_freight_value, total_order_value,
-    total_order_value_usd, payment_type, payment_installments,
-    delivery_days, is_late, review_score,
-    weather_category, temperature_max, is_rainy
-)
-SELECT
-    o.order_id,
-    c.customer_key,
-    TO_CHAR(o.order_purchase_timestamp, 'YYYYMMDD')::INTEGER,
-    o.order_status,
-    COALESCE(item_agg.total_items, 0),
-    COALESCE(item_agg.total_product_value, 0),
-    COALESCE(item_agg.total_freight_value, 0),
-    COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0),
-    CASE
-        WHEN d.usd_exchange_rate IS NOT NULL AND d.usd_exchange_rate > 0
-        THEN ROUND(
-            (COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0))
-            * d.usd_exchange_rate, 2
-        )
-        ELSE NULL
-    END AS total_order_value_usd,
-    pay.payment_type,
-    COALESCE(pay.payment_installments, 1),
-    o.delivery_days_actual,
-    COALESCE(o.is_late_delivery, FALSE),
-    r.review_score,
-    -- Weather columns (NEW)
-    w.weather_category,
-    w.temperature_max,
-    COALESCE(w.is_rainy, FALSE)
-FROM silver.olist_orders o
-LEFT JOIN gold.dim_customer c ON o.customer_id = c.customer_id
-LEFT JOIN gold.dim_date d ON TO_CHAR(o.order_purchase_timestamp, 'YYYYMMDD')::INTEGER = d.date_key
-LEFT JOIN silver.api_weather_history w
-    ON c.customer_state = w.state_code
-    AND DATE(o.order_purchase_timestamp) = w.weather_date
-LEFT JOIN (
-    SELECT order_id, COUNT(*) AS total_items,
-           SUM(price) AS total_product_value, SUM(freight_value) AS total_freight_value
-    FROM silver.olist_order_items GROUP BY order_id
-) item_agg ON o.order_id = item_agg.order_id
-LEFT JOIN (
-    SELECT DISTINCT ON (order_id) order_id, payment_type, payment_installments
-    FROM silver.olist_order_payments ORDER BY order_id, payment_value DESC
-) pay ON o.order_id = pay.order_id
-LEFT JOIN (
-    SELECT DISTINCT ON (order_id) order_id, review_score
-    FROM silver.olist_order_reviews ORDER BY order_id, review_creation_date DESC
-) r ON o.order_id = r.order_id;
+\echo '  ✓ fact_order_items loaded'
+SELECT COUNT(*) AS fact_order_items_rows FROM :fact_order_items_table;
 
-\echo '  ✓ fact_orders loaded'
-SELECT COUNT(*) AS fact_orders_rows FROM gold.fact_orders;
+\echo '  ✓ fact_order_currency loaded'
+SELECT
+    currency_code,
+    COUNT(*) AS orders,
+    COUNT(exchange_rate) AS converted,
+    MAX(rate_age_days) AS max_rate_age_days
+FROM :fact_order_currency_table
+GROUP BY currency_code
+ORDER BY currency_code;
 
 -- Verify weather integration
 
@@ -286,42 +508,29 @@ SELECT
     COUNT(*) AS orders,
     ROUND(AVG(total_order_value), 2) AS avg_order_value,
     ROUND(AVG(review_score), 2) AS avg_review
-FROM gold.fact_orders
+FROM :fact_orders_table
 WHERE weather_category IS NOT NULL
 GROUP BY weather_category
 ORDER BY orders DESC;
 
--- ----------------------------------------------------------------------------
--- 2.2 fact_order_items
--- ----------------------------------------------------------------------------
-
-\echo 'Loading gold.fact_order_items...'
-
-TRUNCATE TABLE gold.fact_order_items CASCADE;
-
-INSERT INTO gold.fact_order_items (
-    order_id, order_item_id, order_key, customer_key,
-    seller_key, product_key, order_date_key,
-    price, freight_value, item_total
-)
+\echo 'Weather Point Mapping Check:'
 SELECT
-    i.order_id,
-    i.order_item_id,
-    fo.order_key,
-    fo.customer_key,
-    s.seller_key,
-    p.product_key,
-    fo.order_date_key,
-    i.price,
-    i.freight_value,
-    i.price + i.freight_value
-FROM silver.olist_order_items i
-LEFT JOIN gold.fact_orders fo ON i.order_id = fo.order_id
-LEFT JOIN gold.dim_seller s ON i.seller_id = s.seller_id
-LEFT JOIN gold.dim_product p ON i.product_id = p.product_id;
-
-\echo '  ✓ fact_order_items loaded'
-SELECT COUNT(*) AS fact_order_items_rows FROM gold.fact_order_items;
+    COALESCE(zwp.match_method, 'state_capital_fallback') AS weather_source,
+    COUNT(*) AS customers,
+    ROUND(AVG(zwp.distance_km), 1) AS avg_distance_km,
+    MAX(zwp.distance_km) AS max_distance_km
+FROM :dim_customer_table c
+LEFT JOIN gold.map_zip_weather_point zwp ON c.customer_zip_code = zwp.zip_code_prefix
+GROUP BY 1
+ORDER BY customers DESC;
+
+\echo 'Purchase-Hour Weather Check (needs fetch_weather.py --hourly):'
+SELECT
+    COUNT(temperature_at_purchase) AS orders_with_hourly_weather,
+    COUNT(*) FILTER (WHERE is_raining_at_purchase) AS raining_at_purchase,
+    ROUND(AVG(total_order_value) FILTER (WHERE is_raining_at_purchase), 2) AS avg_value_raining,
+    ROUND(AVG(total_order_value) FILTER (WHERE NOT is_raining_at_purchase), 2) AS avg_value_dry
+FROM :fact_orders_table;
 
 -- ============================================================================
 -- SECTION 3: LOAD BRIDGE TABLE
@@ -330,9 +539,15 @@ SELECT COUNT(*) AS fact_order_items_rows FROM gold.fact_order_items;
 
 \echo 'Loading gold.bridge_marketing_funnel...'
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_create('gold.bridge_marketing_funnel') AS bridge_marketing_funnel_table
+\gset
+\else
 TRUNCATE TABLE gold.bridge_marketing_funnel CASCADE;
+\set bridge_marketing_funnel_table gold.bridge_marketing_funnel
+\endif
 
-INSERT INTO gold.bridge_marketing_funnel (
+INSERT INTO :bridge_marketing_funnel_table (
     mql_id, first_contact_date, origin, is_converted, won_date,
     days_to_conversion, business_segment, lead_type, declared_monthly_revenue,
     seller_key, seller_id, total_orders, total_revenue, first_order_date
@@ -354,21 +569,42 @@ SELECT
     perf.first_order_date
 FROM silver.olist_mql m
 LEFT JOIN silver.olist_closed_deals cd ON m.mql_id = cd.mql_id
-LEFT JOIN gold.dim_seller s ON cd.seller_id = s.seller_id
+LEFT JOIN :dim_seller_table s ON cd.seller_id = s.seller_id
 LEFT JOIN (
     SELECT fi.seller_key, COUNT(DISTINCT fi.order_id) AS total_orders,
            SUM(fi.item_total) AS total_revenue, MIN(d.full_date) AS first_order_date
-    FROM gold.fact_order_items fi
-    JOIN gold.dim_date d ON fi.order_date_key = d.date_key
+    FROM :fact_order_items_table fi
+    JOIN :dim_date_table d ON fi.order_date_key = d.date_key
     WHERE fi.seller_key IS NOT NULL
     GROUP BY fi.seller_key
 ) perf ON s.seller_key = perf.seller_key;
 
 \echo '  ✓ bridge_marketing_funnel loaded'
-SELECT COUNT(*) AS bridge_funnel_rows FROM gold.bridge_marketing_funnel;
+SELECT COUNT(*) AS bridge_funnel_rows FROM :bridge_marketing_funnel_table;
+
+-- ============================================================================
+-- SECTION 4: PUBLISH SHADOW TABLES (shadow_swap) / REBUILD INDEXES (bulk_load)
+-- ============================================================================
+-- The star schema is linked by foreign keys, so all shadows are finalized
+-- (keys, indexes, FKs between shadows, ANALYZE) and swapped as one batch.
+
+\if :shadow_swap
+\echo 'Building indexes and statistics on shadow tables...'
+SELECT bronze.dwh_shadow_finalize(:'gold_tables'::REGCLASS[]);
+
+\echo 'Swapping shadow tables in...'
+SELECT bronze.dwh_shadow_swap(:'gold_tables'::REGCLASS[]);
+\echo '  ✓ Gold tables swapped'
+\endif
+
+\if :bulk_restore
+\echo 'Bulk load: rebuilding indexes, foreign keys and statistics...'
+SELECT bronze.dwh_restore_indexes(:'gold_tables'::REGCLASS[]) AS restored_objects;
+\echo '  ✓ Gold indexes rebuilt'
+\endif
 
 -- ============================================================================
--- SECTION 4: VERIFICATION
+-- SECTION 5: VERIFICATION
 -- ============================================================================
 
 
@@ -383,6 +619,7 @@ UNION ALL SELECT 'dim_seller', COUNT(*) FROM gold.dim_seller
 UNION ALL SELECT 'dim_product', COUNT(*) FROM gold.dim_product
 UNION ALL SELECT 'fact_orders', COUNT(*) FROM gold.fact_orders
 UNION ALL SELECT 'fact_order_items', COUNT(*) FROM gold.fact_order_items
+UNION ALL SELECT 'fact_order_currency', COUNT(*) FROM gold.fact_order_currency
 UNION ALL SELECT 'bridge_marketing_funnel', COUNT(*) FROM gold.bridge_marketing_funnel
 ORDER BY table_name;
 
@@ -411,6 +648,14 @@ SELECT
     ROUND(100.0 * SUM(CASE WHEN is_late THEN 1 ELSE 0 END) / COUNT(*), 1) AS late_pct
 FROM gold.fact_orders;
 
+UPDATE gold.dwh_load_log
+SET status = 'complete',
+    finished_at = CURRENT_TIMESTAMP
+WHERE load_id = :gold_load_id;
+
+-- New Gold version: cached query results are now stale
+SELECT pg_notify('dwh_gold_load', :'gold_load_id' || ':complete');
+
 \echo '============================================================'
 \echo 'GOLD LAYER ETL COMPLETE!'
 \echo '============================================================'
\ No newline at end of file
@@ -0,0 +1,135 @@
+-- ============================================================================
+-- GOLD LAYER: FACT TABLE INSERTS (one hash slice of order_id)
+-- ============================================================================
+--
+-- Included by load_gold_data.sql (single slice) and run once per worker by
+-- scripts/pipeline/load_gold_parallel.py (N slices on N connections).
+--
+-- VARIABLES (set by the caller):
+--   fact_orders_table       Target for order rows (gold.fact_orders, or
+--                           gold.stg_fact_orders for the parallel build)
+--   fact_order_items_table  Target for item rows
+--   dim_customer_table, dim_seller_table, dim_product_table
+--                           Dimensions to look keys up in (the live gold.dim_*,
+--                           or their __shadow copies with shadow_swap)
+--   slice_count, slice_id   Rows with hash(order_id) % slice_count = slice_id
+--   max_rate_age            Oldest usable USD rate in days (gold.dwh_asof_rates)
+--
+-- Items and orders are sliced on the same key, so every item finds its order
+-- (and order_key) in the same slice. With slice_count = 1 the filter folds to
+-- TRUE and the plan is the same as an unsliced load.
+--
+-- No BEGIN/COMMIT here: the caller owns the transaction.
+--
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- fact_orders
+-- ----------------------------------------------------------------------------
+
+INSERT INTO :fact_orders_table (
+    order_id, customer_key, order_date_key, order_status,
+    total_items, total_product_value, total_freight_value, total_order_value,
+    total_order_value_usd, payment_type, payment_installments,
+    delivery_days, is_late, review_score,
+    weather_category, temperature_max, is_rainy,
+    temperature_at_purchase, precipitation_at_purchase, is_raining_at_purchase
+)
+SELECT
+    o.order_id,
+    c.customer_key,
+    TO_CHAR(o.order_purchase_timestamp, 'YYYYMMDD')::INTEGER,
+    o.order_status,
+    COALESCE(item_agg.total_items, 0),
+    COALESCE(item_agg.total_product_value, 0),
+    COALESCE(item_agg.total_freight_value, 0),
+    COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0),
+    -- As-of rate: weekend / holiday orders use the last business-day rate
+    ROUND(
+        (COALESCE(item_agg.total_product_value, 0) + COALESCE(item_agg.total_freight_value, 0))
+        * usd.exchange_rate, 2
+    ) AS total_order_value_usd,
+    pay.payment_type,
+    COALESCE(pay.payment_installments, 1),
+    o.delivery_days_actual,
+    COALESCE(o.is_late_delivery, FALSE),
+    r.review_score,
+    -- Weather columns: nearest weather point, else the state capital
+    CASE WHEN wp.weather_date IS NOT NULL THEN wp.weather_category ELSE ws.weather_category END,
+    CASE WHEN wp.weather_date IS NOT NULL THEN wp.temperature_max ELSE ws.temperature_max END,
+    COALESCE(CASE WHEN wp.weather_date IS NOT NULL THEN wp.is_rainy ELSE ws.is_rainy END, FALSE),
+    -- Purchase-hour weather (same point / capital choice, hourly arrays)
+    CASE WHEN hp.weather_date IS NOT NULL THEN hp.temperature_2m[ph.slot] ELSE hs.temperature_2m[ph.slot] END,
+    CASE WHEN hp.weather_date IS NOT NULL THEN hp.precipitation_mm[ph.slot] ELSE hs.precipitation_mm[ph.slot] END,
+    CASE WHEN hp.weather_date IS NOT NULL THEN hp.precipitation_mm[ph.slot] ELSE hs.precipitation_mm[ph.slot] END > 0
+FROM silver.olist_orders o
+CROSS JOIN LATERAL (
+    SELECT EXTRACT(HOUR FROM o.order_purchase_timestamp)::INTEGER + 1 AS slot
+) ph
+LEFT JOIN :dim_customer_table c ON o.customer_id = c.customer_id
+LEFT JOIN gold.dwh_asof_rates(:max_rate_age) usd
+    ON usd.currency_code = 'USD'
+    AND TO_CHAR(o.order_purchase_timestamp, 'YYYYMMDD')::INTEGER = usd.date_key
+LEFT JOIN gold.map_zip_weather_point zwp ON c.customer_zip_code = zwp.zip_code_prefix
+LEFT JOIN silver.api_weather_history wp
+    ON zwp.weather_latitude = wp.latitude
+    AND zwp.weather_longitude = wp.longitude
+    AND DATE(o.order_purchase_timestamp) = wp.weather_date
+LEFT JOIN silver.api_weather_history ws
+    ON c.customer_state = ws.state_code
+    AND ws.location_type = 'state_capital'
+    AND DATE(o.order_purchase_timestamp) = ws.weather_date
+LEFT JOIN silver.api_weather_hourly hp
+    ON zwp.weather_latitude = hp.latitude
+    AND zwp.weather_longitude = hp.longitude
+    AND DATE(o.order_purchase_timestamp) = hp.weather_date
+LEFT JOIN silver.api_weather_hourly hs
+    ON c.customer_state = hs.state_code
+    AND hs.location_type = 'state_capital'
+    AND DATE(o.order_purchase_timestamp) = hs.weather_date
+LEFT JOIN (
+    SELECT order_id, COUNT(*) AS total_items,
+           SUM(price) AS total_product_value, SUM(freight_value) AS total_freight_value
+    FROM silver.olist_order_items
+    WHERE (:slice_count = 1 OR (hashtext(order_id) & 2147483647) % :slice_count = :slice_id)
+    GROUP BY order_id
+) item_agg ON o.order_id = item_agg.order_id
+LEFT JOIN (
+    SELECT DISTINCT ON (order_id) order_id, payment_type, payment_installments
+    FROM silver.olist_order_payments
+    WHERE (:slice_count = 1 OR (hashtext(order_id) & 2147483647) % :slice_count = :slice_id)
+    ORDER BY order_id, payment_value DESC, payment_sequential
+) pay ON o.order_id = pay.order_id
+LEFT JOIN (
+    SELECT DISTINCT ON (order_id) order_id, review_score
+    FROM silver.olist_order_reviews
+    WHERE (:slice_count = 1 OR (hashtext(order_id) & 2147483647) % :slice_count = :slice_id)
+    ORDER BY order_id, review_creation_date DESC, review_id
+) r ON o.order_id = r.order_id
+WHERE (:slice_count = 1 OR (hashtext(o.order_id) & 2147483647) % :slice_count = :slice_id);
+
+-- ----------------------------------------------------------------------------
+-- fact_order_items (order_key from the orders inserted above)
+-- ----------------------------------------------------------------------------
+
+INSERT INTO :fact_order_items_table (
+    order_id, order_item_id, order_key, customer_key,
+    seller_key, product_key, order_date_key,
+    price, freight_value, item_total
+)
+SELECT
+    i.order_id,
+    i.order_item_id,
+    fo.order_key,
+    fo.customer_key,
+    s.seller_key,
+    p.product_key,
+    fo.order_date_key,
+    i.price,
+    i.freight_value,
+    i.price + i.freight_value
+FROM silver.olist_order_items i
+LEFT JOIN :fact_orders_table fo ON i.order_id = fo.order_id
+LEFT JOIN :dim_seller_table s ON i.seller_id = s.seller_id
+LEFT JOIN :dim_product_table p ON i.product_id = p.product_id
+WHERE (:slice_count = 1 OR (hashtext(i.order_id) & 2147483647) % :slice_count = :slice_id);
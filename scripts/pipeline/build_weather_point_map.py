@@ -0,0 +1,485 @@
+"""
+================================================================================
+Description: Map every zip code prefix to its nearest weather point
+================================================================================
+
+PURPOSE:
+--------
+gold.fact_orders used to join weather on customer_state only, so every
+customer got the weather of their state capital - sometimes 1,000+ km away.
+This script builds gold.map_zip_weather_point: for each zip-prefix centroid
+in silver.olist_geolocation, the nearest point that has weather data in
+silver.api_weather_history.
+
+It can also propose a better point set: --export-clusters N runs a
+customer-weighted k-means over the zip centroids and writes N cluster
+centres as a points file for fetch_weather.py --points.
+
+HOW IT WORKS:
+-------------
+- Coordinates are converted to 3D unit vectors, so straight-line (chord)
+  distance orders points exactly like great-circle distance
+- A KD-tree (scipy cKDTree) is built over the weather points and all ~19K
+  zip centroids are queried in one vectorized call
+- Zips used by customers/sellers but missing from geolocation are matched
+  through the centroid of their state (match_method = 'state_centroid')
+- The result is bulk-loaded with COPY
+
+TYPICAL WORKFLOW:
+-----------------
+1. Load Bronze + Silver
+2. python build_weather_point_map.py --export-clusters 150 --output weather_points.csv
+3. python ../api/fetch_weather.py --points weather_points.csv
+4. Re-run load_silver_data.sql (weather section)
+5. python build_weather_point_map.py
+6. Run load_gold_data.sql
+
+USAGE:
+------
+python build_weather_point_map.py
+python build_weather_point_map.py --export-clusters 150 --output weather_points.csv
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Silver layer loaded; gold.map_zip_weather_point created (create_gold_tables.sql)
+
+================================================================================
+"""
+
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from common import get_db_connection
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+EARTH_RADIUS_KM = 6371.0088
+
+# k-means settings for --export-clusters
+KMEANS_ITERATIONS = 25
+KMEANS_SEED = 42
+
+# =============================================================================
+# GEOMETRY FUNCTIONS
+# =============================================================================
+
+
+def to_unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Convert latitude/longitude (degrees) to 3D unit vectors.
+
+    Args:
+        lat: Latitudes in degrees
+        lon: Longitudes in degrees
+
+    Returns:
+        Array of shape (n, 3)
+    """
+    lat_r = np.radians(np.asarray(lat, dtype=np.float64))
+    lon_r = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat_r)
+    return np.column_stack(
+        (cos_lat * np.cos(lon_r), cos_lat * np.sin(lon_r), np.sin(lat_r))
+    )
+
+
+def to_lat_lon(xyz: np.ndarray) -> tuple:
+    """
+    Convert 3D vectors back to latitude/longitude (degrees).
+
+    Args:
+        xyz: Array of shape (n, 3), need not be normalized
+
+    Returns:
+        (lat, lon) arrays in degrees
+    """
+    xyz = xyz / np.linalg.norm(xyz, axis=1, keepdims=True)
+    lat = np.degrees(np.arcsin(np.clip(xyz[:, 2], -1.0, 1.0)))
+    lon = np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0]))
+    return lat, lon
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Convert unit-sphere chord lengths to great-circle distance in km."""
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def nearest_points(point_xyz: np.ndarray, query_xyz: np.ndarray) -> tuple:
+    """
+    Find the nearest weather point for each query location.
+
+    Args:
+        point_xyz: Weather points as unit vectors, shape (m, 3)
+        query_xyz: Query locations as unit vectors, shape (n, 3)
+
+    Returns:
+        (index into point_xyz, distance in km) arrays of length n
+    """
+    tree = cKDTree(point_xyz)
+    chord, idx = tree.query(query_xyz, k=1, workers=-1)
+    return idx, chord_to_km(chord)
+
+
+def weighted_kmeans(xyz: np.ndarray, weights: np.ndarray, k: int) -> tuple:
+    """
+    Spherical k-means with per-point weights.
+
+    Assignment uses a KD-tree over the current centres, so each iteration is
+    a single vectorized query.
+
+    Args:
+        xyz: Locations as unit vectors, shape (n, 3)
+        weights: Weight per location (e.g. customers per zip)
+        k: Number of clusters
+
+    Returns:
+        (centres as unit vectors (k, 3), label per location)
+    """
+    rng = np.random.default_rng(KMEANS_SEED)
+    k = min(k, len(xyz))
+    probs = weights / weights.sum()
+    centres = xyz[rng.choice(len(xyz), size=k, replace=False, p=probs)]
+
+    labels = np.zeros(len(xyz), dtype=np.int64)
+    for _ in range(KMEANS_ITERATIONS):
+        _, labels = cKDTree(centres).query(xyz, k=1, workers=-1)
+        totals = np.zeros((k, 3))
+        for axis in range(3):
+            totals[:, axis] = np.bincount(
+                labels, weights=xyz[:, axis] * weights, minlength=k
+            )
+        occupied = np.linalg.norm(totals, axis=1) > 0
+        new_centres = centres.copy()
+        new_centres[occupied] = totals[occupied] / np.linalg.norm(
+            totals[occupied], axis=1, keepdims=True
+        )
+        if np.allclose(new_centres, centres):
+            break
+        centres = new_centres
+
+    return centres, labels
+
+
+# =============================================================================
+# DATABASE FUNCTIONS
+# =============================================================================
+
+
+def fetch_zip_centroids(cursor) -> dict:
+    """
+    Load zip-prefix centroids with customer counts as weights.
+
+    Returns:
+        Dictionary of numpy arrays: zip, state, lat, lon, weight
+    """
+    cursor.execute("""
+        SELECT
+            g.zip_code_prefix,
+            g.state,
+            g.latitude::FLOAT8,
+            g.longitude::FLOAT8,
+            COALESCE(c.customers, 0)
+        FROM silver.olist_geolocation g
+        LEFT JOIN (
+            SELECT customer_zip_code_prefix, COUNT(*) AS customers
+            FROM silver.olist_customers
+            GROUP BY customer_zip_code_prefix
+        ) c ON g.zip_code_prefix = c.customer_zip_code_prefix
+        WHERE g.latitude IS NOT NULL
+          AND g.longitude IS NOT NULL
+        ORDER BY g.zip_code_prefix;
+    """)
+    rows = cursor.fetchall()
+    return {
+        "zip": np.array([r[0] for r in rows], dtype=object),
+        "state": np.array([r[1] for r in rows], dtype=object),
+        "lat": np.array([r[2] for r in rows], dtype=np.float64),
+        "lon": np.array([r[3] for r in rows], dtype=np.float64),
+        "weight": np.array([r[4] for r in rows], dtype=np.float64),
+    }
+
+
+def fetch_weather_points(cursor) -> dict:
+    """
+    Load the distinct weather points available in Silver.
+
+    Returns:
+        Dictionary: lat/lon as exact decimals (for the join), state, name,
+        and float arrays for the index
+    """
+    cursor.execute("""
+        SELECT DISTINCT ON (latitude, longitude)
+            latitude,
+            longitude,
+            state_code,
+            location_name
+        FROM silver.api_weather_history
+        ORDER BY latitude, longitude;
+    """)
+    rows = cursor.fetchall()
+    return {
+        "lat_exact": [r[0] for r in rows],
+        "lon_exact": [r[1] for r in rows],
+        "state": [r[2] for r in rows],
+        "name": [r[3] for r in rows],
+        "lat": np.array([float(r[0]) for r in rows], dtype=np.float64),
+        "lon": np.array([float(r[1]) for r in rows], dtype=np.float64),
+    }
+
+
+def fetch_unlocated_zips(cursor) -> list:
+    """
+    Find customer/seller zips that have no geolocation centroid.
+
+    Returns:
+        List of (zip_code_prefix, state) tuples
+    """
+    cursor.execute("""
+        SELECT DISTINCT ON (zip_code_prefix) zip_code_prefix, state
+        FROM (
+            SELECT customer_zip_code_prefix AS zip_code_prefix, customer_state AS state
+            FROM silver.olist_customers
+            UNION ALL
+            SELECT seller_zip_code_prefix, seller_state
+            FROM silver.olist_sellers
+        ) z
+        WHERE NOT EXISTS (
+            SELECT 1 FROM silver.olist_geolocation g
+            WHERE g.zip_code_prefix = z.zip_code_prefix
+        )
+        ORDER BY zip_code_prefix;
+    """)
+    return cursor.fetchall()
+
+
+def write_map(conn, rows: list):
+    """
+    Replace gold.map_zip_weather_point with the new mapping using COPY.
+
+    Args:
+        conn: Database connection
+        rows: Mapping rows (tuples in table column order)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+
+    cursor = conn.cursor()
+    cursor.execute("TRUNCATE TABLE gold.map_zip_weather_point;")
+    cursor.copy_expert(
+        """
+        COPY gold.map_zip_weather_point (
+            zip_code_prefix,
+            zip_state,
+            weather_latitude,
+            weather_longitude,
+            weather_state_code,
+            weather_location_name,
+            distance_km,
+            match_method
+        ) FROM STDIN WITH (FORMAT csv)
+        """,
+        buffer,
+    )
+    conn.commit()
+
+
+# =============================================================================
+# MAPPING
+# =============================================================================
+
+
+def build_map_rows(centroids: dict, points: dict, unlocated: list) -> list:
+    """
+    Match every zip centroid (and unlocated zip) to its nearest weather point.
+
+    Args:
+        centroids: Output of fetch_zip_centroids
+        points: Output of fetch_weather_points
+        unlocated: Output of fetch_unlocated_zips
+
+    Returns:
+        Mapping rows for gold.map_zip_weather_point
+    """
+    point_xyz = to_unit_vectors(points["lat"], points["lon"])
+    zip_xyz = to_unit_vectors(centroids["lat"], centroids["lon"])
+
+    idx, dist_km = nearest_points(point_xyz, zip_xyz)
+
+    rows = []
+    for zip_code, state, i, km in zip(centroids["zip"], centroids["state"], idx, dist_km):
+        rows.append(
+            (
+                zip_code,
+                state,
+                points["lat_exact"][i],
+                points["lon_exact"][i],
+                points["state"][i],
+                points["name"][i],
+                round(float(km), 2),
+                "nearest",
+            )
+        )
+
+    # Zips without geolocation: use the centroid of their state's zips
+    if unlocated:
+        states = sorted({state for _, state in unlocated if state})
+        state_xyz = []
+        located_states = []
+        for state in states:
+            mask = centroids["state"] == state
+            if mask.any():
+                state_xyz.append(zip_xyz[mask].sum(axis=0))
+                located_states.append(state)
+
+        if located_states:
+            state_xyz = np.array(state_xyz)
+            state_xyz /= np.linalg.norm(state_xyz, axis=1, keepdims=True)
+            s_idx, s_km = nearest_points(point_xyz, state_xyz)
+            by_state = dict(zip(located_states, zip(s_idx, s_km)))
+
+            for zip_code, state in unlocated:
+                if state in by_state:
+                    i, km = by_state[state]
+                    rows.append(
+                        (
+                            zip_code,
+                            state,
+                            points["lat_exact"][i],
+                            points["lon_exact"][i],
+                            points["state"][i],
+                            points["name"][i],
+                            round(float(km), 2),
+                            "state_centroid",
+                        )
+                    )
+
+    return rows
+
+
+def export_clusters(centroids: dict, k: int, output: str):
+    """
+    Write k customer-weighted cluster centres as a fetch_weather.py points file.
+
+    Args:
+        centroids: Output of fetch_zip_centroids
+        k: Number of clusters
+        output: Destination CSV path
+    """
+    xyz = to_unit_vectors(centroids["lat"], centroids["lon"])
+    # +1 so zips without customers still pull the centres a little
+    weights = centroids["weight"] + 1.0
+
+    centres, labels = weighted_kmeans(xyz, weights, k)
+    lat, lon = to_lat_lon(centres)
+
+    with open(output, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["state", "name", "lat", "lon"])
+        for c in range(len(centres)):
+            members = labels == c
+            if not members.any():
+                continue
+            # Dominant state by customer weight
+            member_states = centroids["state"][members]
+            member_weights = weights[members]
+            totals = {}
+            for state, w in zip(member_states, member_weights):
+                totals[state] = totals.get(state, 0.0) + w
+            state = max(totals, key=totals.get)
+            writer.writerow([state, f"cluster_{c:04d}", f"{lat[c]:.4f}", f"{lon[c]:.4f}"])
+
+    _, dist_km = nearest_points(centres, xyz)
+    print(f"  ✓ Wrote {len(centres)} cluster centres to {output}")
+    print(
+        f"  Zip → centre distance: mean {dist_km.mean():.1f} km, "
+        f"p95 {np.percentile(dist_km, 95):.1f} km, max {dist_km.max():.1f} km"
+    )
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Build zip → weather point map")
+    parser.add_argument(
+        "--export-clusters",
+        type=int,
+        metavar="N",
+        help="Write N clustered centroids as a points file instead of building the map",
+    )
+    parser.add_argument("--output", default="weather_points.csv")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ZIP PREFIX → NEAREST WEATHER POINT")
+    print("=" * 60)
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        print("\nLoading zip centroids...")
+        centroids = fetch_zip_centroids(cursor)
+        print(f"  ✓ {len(centroids['zip']):,} zip prefixes")
+
+        if args.export_clusters:
+            print(f"\nClustering into {args.export_clusters} points...")
+            export_clusters(centroids, args.export_clusters, args.output)
+            return
+
+        print("\nLoading weather points...")
+        points = fetch_weather_points(cursor)
+        if not points["state"]:
+            print("  ✗ No weather points in silver.api_weather_history. Exiting.")
+            return
+        print(f"  ✓ {len(points['state'])} weather points")
+
+        unlocated = fetch_unlocated_zips(cursor)
+
+        print("\nMatching (KD-tree)...")
+        started = time.perf_counter()
+        rows = build_map_rows(centroids, points, unlocated)
+        elapsed = time.perf_counter() - started
+        print(f"  ✓ {len(rows):,} zips matched in {elapsed * 1000:.0f} ms")
+
+        distances = np.array([r[6] for r in rows], dtype=np.float64)
+        print(
+            f"  Distance: mean {distances.mean():.1f} km, "
+            f"p95 {np.percentile(distances, 95):.1f} km, max {distances.max():.1f} km"
+        )
+
+        print("\nLoading to database...")
+        write_map(conn, rows)
+        print("  ✓ gold.map_zip_weather_point loaded")
+
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        if conn:
+            conn.rollback()
+        raise
+
+    finally:
+        if conn:
+            conn.close()
+
+    print("\n" + "=" * 60)
+    print("✓ Weather point map complete!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+================================================================================
+Description: Bulk-load Bronze or Gold with indexes rebuilt in parallel
+================================================================================
+
+PURPOSE:
+--------
+A full reload that keeps every secondary index and foreign key in place pays
+for them row by row: each COPY / INSERT row updates every index, and every
+fact row is checked against its dimensions. Dropping them first and building
+them once at the end is much cheaper, and the build itself parallelizes well
+because each index is an independent sort.
+
+With -v bulk_load=true, load_bronze_data.sql and load_gold_data.sql already
+drop and rebuild the indexes themselves (bronze.dwh_defer_indexes /
+bronze.dwh_restore_indexes), but the rebuild runs one statement at a time.
+This script runs the same load and rebuilds the indexes over N connections.
+
+HOW IT WORKS:
+-------------
+1. The load script runs with bulk_load=true, bulk_restore=false (see
+   sql_script.py). It drops the indexes / FKs at its usual point - after the
+   pre-flight check (Bronze) or the change check (Gold) - and saves their
+   definitions in bronze.dwh_deferred_ddl
+2. The saved indexes are recreated in parallel, one connection per worker
+   (each build also uses max_parallel_maintenance_workers)
+3. Foreign keys are added NOT VALID (instant) on one connection, then
+   VALIDATEd in parallel, one constraint per job - VALIDATE only takes a
+   SHARE UPDATE EXCLUSIVE lock, so checks of different tables don't block
+   each other (those of one table queue). A
+   key's saved definition is deleted in its VALIDATE transaction; one that
+   fails to validate is dropped again
+4. Every table the load rebuilt (the script's bronze_tables / gold_tables
+   variable) is ANALYZEd in parallel; tables it skipped as unchanged keep
+   their indexes and statistics
+
+Step 2-3 also run when the load fails, so the tables are never left without
+their indexes. A definition that cannot be rebuilt stays in
+bronze.dwh_deferred_ddl and is retried by the next run.
+
+USAGE:
+------
+python bulk_load.py bronze                          # one worker per CPU (max 8)
+python bulk_load.py gold --workers 4
+python bulk_load.py gold --fact-workers 4           # + parallel fact build
+python bulk_load.py gold -v force_reload=true
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Bronze / Gold tables created (create_*_tables.sql)
+max_connections must allow --workers + 1 connections
+
+================================================================================
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from common import PROJECT_ROOT, get_db_connection
+from load_gold_parallel import ParallelFactRunner, fail_gold_load
+from sql_script import ScriptRunner, parse_bool, parse_variable
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# "tables": every table whose deferred definitions are restored (also those
+# left behind by an interrupted run); "variable": the script's list of the
+# tables it reloaded, which are ANALYZEd
+LAYERS = {
+    "bronze": {
+        "script": PROJECT_ROOT / "scripts" / "bronze" / "load_bronze_data.sql",
+        "tables": [
+            "bronze.olist_orders", "bronze.olist_order_items", "bronze.olist_order_payments",
+            "bronze.olist_order_reviews", "bronze.olist_customers", "bronze.olist_geolocation",
+            "bronze.olist_products", "bronze.product_category_name_translation",
+            "bronze.olist_sellers", "bronze.olist_marketing_qualified_leads",
+            "bronze.olist_closed_deals",
+        ],
+        "variable": "bronze_tables",
+    },
+    "gold": {
+        "script": PROJECT_ROOT / "scripts" / "gold" / "load_gold_data.sql",
+        "tables": [
+            "gold.dim_date", "gold.dim_geography", "gold.dim_customer", "gold.dim_seller",
+            "gold.dim_product", "gold.fact_orders", "gold.fact_order_items",
+            "gold.fact_order_currency", "gold.bridge_marketing_funnel",
+        ],
+        "variable": "gold_tables",
+    },
+}
+
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 8)
+MAINTENANCE_WORK_MEM = "256MB"  # per connection
+
+# Same selection as bronze.dwh_restore_indexes
+DEFERRED_SQL = """
+    SELECT table_name, object_name, object_type, ddl
+    FROM bronze.dwh_deferred_ddl
+    WHERE table_name::REGCLASS = ANY (%(tables)s::REGCLASS[])
+       OR referenced_table::REGCLASS = ANY (%(tables)s::REGCLASS[])
+    ORDER BY table_name, object_name;
+"""
+
+# =============================================================================
+# REBUILD FUNCTIONS
+# =============================================================================
+
+
+def run_statements(statements: list, forget: tuple = None) -> float:
+    """
+    Run statements in one transaction on a new connection.
+
+    Runs in a worker thread. Used for index builds, FK validation and
+    ANALYZE, each of which only locks its own table.
+
+    Args:
+        statements: SQL statements to execute in order
+        forget: (table_name, object_name) to delete from dwh_deferred_ddl in
+                the same transaction, or None
+
+    Returns:
+        Elapsed seconds
+    """
+    start = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET maintenance_work_mem = %s;", (MAINTENANCE_WORK_MEM,))
+            for statement in statements:
+                cursor.execute(statement)
+            if forget is not None:
+                cursor.execute(
+                    "DELETE FROM bronze.dwh_deferred_ddl WHERE table_name = %s AND object_name = %s;",
+                    forget,
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def run_parallel(jobs: list, workers: int) -> list:
+    """
+    Run (label, statements, forget) jobs on up to `workers` connections.
+
+    Returns:
+        List of (label, error) for the jobs that failed
+    """
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(label, pool.submit(run_statements, statements, forget))
+                   for label, statements, forget in jobs]
+        for label, future in futures:
+            if future.exception() is not None:
+                failures.append((label, future.exception()))
+    return failures
+
+
+def restore_indexes(conn, tables: list, workers: int) -> list:
+    """
+    Rebuild everything the load deferred for the tables.
+
+    Args:
+        conn: Autocommit connection (used for the NOT VALID FK adds)
+        tables: Schema-qualified table names
+        workers: Parallel connections
+
+    Returns:
+        List of (object, error) for the objects that could not be rebuilt
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(DEFERRED_SQL, {"tables": tables})
+        rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    indexes = [r for r in rows if r[2] == "index"]
+    fks = [r for r in rows if r[2] == "fk"]
+
+    start = time.perf_counter()
+    failures = run_parallel(
+        [(object_name, [ddl], (table_name, object_name))
+         for table_name, object_name, _, ddl in indexes],
+        workers,
+    )
+    print(f"  ✓ {len(indexes) - len(failures)}/{len(indexes)} indexes built "
+          f"in {time.perf_counter() - start:.1f} s")
+
+    # Add the FKs unchecked (brief lock on child and parent, one at a time),
+    # then validate them in parallel, one constraint per job. The saved
+    # definition is deleted in the VALIDATE's transaction, so it only goes
+    # once the constraint is fully back
+    start = time.perf_counter()
+    validations = {}
+    for table_name, object_name, _, ddl in fks:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"{ddl} NOT VALID;")
+        except psycopg2.Error as e:
+            failures.append((object_name, e))
+            continue
+        validations[f"{table_name}.{object_name}"] = (table_name, object_name)
+
+    fk_failures = run_parallel(
+        [(label, [f'ALTER TABLE {table_name} VALIDATE CONSTRAINT "{object_name}";'],
+          (table_name, object_name))
+         for label, (table_name, object_name) in validations.items()],
+        workers,
+    )
+    # A constraint that failed to validate (e.g. an orphan row) is dropped
+    # again; its saved definition re-adds it on the next run
+    for label, _ in fk_failures:
+        table_name, object_name = validations[label]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {table_name} DROP CONSTRAINT IF EXISTS "{object_name}";')
+        except psycopg2.Error as e:
+            failures.append((label, e))
+    failures.extend(fk_failures)
+    validated = len(validations) - len(fk_failures)
+    print(f"  ✓ {validated}/{len(fks)} foreign keys added and validated "
+          f"in {time.perf_counter() - start:.1f} s")
+    return failures
+
+
+def loaded_tables(variables: dict, name: str) -> list:
+    """Tables of a script's '{schema.table,...}' list variable (none if unset)."""
+    value = variables.get(name, "{}").strip("{}")
+    return value.split(",") if value else []
+
+
+def analyze_tables(tables: list, workers: int) -> list:
+    """ANALYZE the tables in parallel. Returns (table, error) failures."""
+    start = time.perf_counter()
+    failures = run_parallel([(t, [f"ANALYZE {t};"], None) for t in tables], workers)
+    print(f"  ✓ {len(tables) - len(failures)}/{len(tables)} tables analyzed "
+          f"in {time.perf_counter() - start:.1f} s")
+    return failures
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Bulk load with parallel index rebuild")
+    parser.add_argument("layer", choices=sorted(LAYERS), help="Layer to load")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Connections for the index rebuild (default {DEFAULT_WORKERS})")
+    parser.add_argument("--fact-workers", type=int, default=1,
+                        help="Gold only: build the facts in N slices (load_gold_parallel.py)")
+    parser.add_argument("-v", "--variable", type=parse_variable, action="append", default=[],
+                        help="psql variable as name=value")
+    args = parser.parse_args()
+
+    variables = dict(args.variable)
+    if parse_bool(variables.get("shadow_swap", "false")):
+        print("✗ shadow_swap already indexes the shadows after the load - "
+              "run load_gold_data.sql / load_gold_parallel.py instead")
+        sys.exit(1)
+    variables.update(bulk_load="true", bulk_restore="false")
+
+    layer = LAYERS[args.layer]
+
+    print("=" * 60)
+    print(f"{args.layer.upper()} BULK LOAD - PARALLEL INDEX REBUILD")
+    print("=" * 60)
+    print(f"Workers: {args.workers}")
+
+    conn = get_db_connection()
+    conn.autocommit = True  # the script issues its own BEGIN/COMMIT
+
+    start = time.perf_counter()
+    completed = False
+    load_error = None
+    if args.layer == "gold" and args.fact_workers > 1:
+        runner = ParallelFactRunner(conn, variables, args.fact_workers)
+    else:
+        runner = ScriptRunner(conn, variables)
+    try:
+        completed = runner.run(layer["script"])
+    except Exception as e:
+        load_error = e
+        print(f"  ✗ {args.layer} load failed: {e}")
+        with conn.cursor() as cursor:
+            cursor.execute("ROLLBACK;")
+        if args.layer == "gold":
+            fail_gold_load(conn, runner.variables)
+
+    try:
+        print("\nRebuilding deferred indexes and foreign keys...")
+        failures = restore_indexes(conn, layer["tables"], args.workers)
+        if completed:
+            failures.extend(analyze_tables(
+                loaded_tables(runner.variables, layer["variable"]), args.workers))
+    finally:
+        conn.close()
+
+    for label, error in failures:
+        print(f"  ✗ {label}: {error}")
+    if failures:
+        print("  Unbuilt definitions remain in bronze.dwh_deferred_ddl; "
+              "the next bulk load retries them.")
+
+    print("\n" + "=" * 60)
+    if load_error is not None or failures:
+        print(f"✗ {args.layer} bulk load finished with errors")
+        print("=" * 60)
+        sys.exit(1)
+    print(f"✓ {args.layer} bulk load complete in {time.perf_counter() - start:.1f} s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+================================================================================
+Description: Shared configuration for the Olist DWH pipeline tooling
+================================================================================
+
+PURPOSE:
+--------
+Holds the settings that every script under scripts/pipeline/ needs:
+database connection, dataset location and the catalog of CSV sources that
+load_bronze_data.sql copies into the Bronze layer.
+
+The CSV catalog mirrors the COPY column lists in load_bronze_data.sql.
+If a COPY statement changes, update CSV_SOURCES to match.
+
+================================================================================
+"""
+
+import os
+from pathlib import Path
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Database connection settings - loaded from .env file
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", 5432)),
+    "database": os.getenv("DB_DATABASE", "olist_dwh"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD", ""),
+}
+
+# Repository root and datasets folder (override with DATASETS_DIR in .env)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DATASETS_DIR = Path(os.getenv("DATASETS_DIR", PROJECT_ROOT / "datasets"))
+
+# CSV sources loaded by load_bronze_data.sql, in load order
+CSV_SOURCES = [
+    # E-Commerce Dataset
+    {
+        "table": "olist_orders",
+        "file": "e-commerce/olist_orders_dataset.csv",
+        "columns": [
+            "order_id",
+            "customer_id",
+            "order_status",
+            "order_purchase_timestamp",
+            "order_approved_at",
+            "order_delivered_carrier_date",
+            "order_delivered_customer_date",
+            "order_estimated_delivery_date",
+        ],
+    },
+    {
+        "table": "olist_order_items",
+        "file": "e-commerce/olist_order_items_dataset.csv",
+        "columns": [
+            "order_id",
+            "order_item_id",
+            "product_id",
+            "seller_id",
+            "shipping_limit_date",
+            "price",
+            "freight_value",
+        ],
+    },
+    {
+        "table": "olist_order_payments",
+        "file": "e-commerce/olist_order_payments_dataset.csv",
+        "columns": [
+            "order_id",
+            "payment_sequential",
+            "payment_type",
+            "payment_installments",
+            "payment_value",
+        ],
+    },
+    {
+        "table": "olist_order_reviews",
+        "file": "e-commerce/olist_order_reviews_dataset.csv",
+        "columns": [
+            "review_id",
+            "order_id",
+            "review_score",
+            "review_comment_title",
+            "review_comment_message",
+            "review_creation_date",
+            "review_answer_timestamp",
+        ],
+    },
+    {
+        "table": "olist_customers",
+        "file": "e-commerce/olist_customers_dataset.csv",
+        "columns": [
+            "customer_id",
+            "customer_unique_id",
+            "customer_zip_code_prefix",
+            "customer_city",
+            "customer_state",
+        ],
+    },
+    {
+        "table": "olist_geolocation",
+        "file": "e-commerce/olist_geolocation_dataset.csv",
+        "columns": [
+            "geolocation_zip_code_prefix",
+            "geolocation_lat",
+            "geolocation_lng",
+            "geolocation_city",
+            "geolocation_state",
+        ],
+    },
+    {
+        "table": "olist_products",
+        "file": "e-commerce/olist_products_dataset.csv",
+        "columns": [
+            "product_id",
+            "product_category_name",
+            "product_name_lenght",
+            "product_description_lenght",
+            "product_photos_qty",
+            "product_weight_g",
+            "product_length_cm",
+            "product_height_cm",
+            "product_width_cm",
+        ],
+    },
+    {
+        "table": "product_category_name_translation",
+        "file": "e-commerce/product_category_name_translation.csv",
+        "columns": [
+            "product_category_name",
+            "product_category_name_english",
+        ],
+    },
+    {
+        "table": "olist_sellers",
+        "file": "e-commerce/olist_sellers_dataset.csv",
+        "columns": [
+            "seller_id",
+            "seller_zip_code_prefix",
+            "seller_city",
+            "seller_state",
+        ],
+    },
+    # Marketing Funnel Dataset
+    {
+        "table": "olist_marketing_qualified_leads",
+        "file": "marketing_funnel/olist_marketing_qualified_leads_dataset.csv",
+        "columns": [
+            "mql_id",
+            "first_contact_date",
+            "landing_page_id",
+            "origin",
+        ],
+    },
+    {
+        "table": "olist_closed_deals",
+        "file": "marketing_funnel/olist_closed_deals_dataset.csv",
+        "columns": [
+            "mql_id",
+            "seller_id",
+            "sdr_id",
+            "sr_id",
+            "won_date",
+            "business_segment",
+            "lead_type",
+            "lead_behaviour_profile",
+            "has_company",
+            "has_gtin",
+            "average_stock",
+            "business_type",
+            "declared_product_catalog_size",
+            "declared_monthly_revenue",
+        ],
+    },
+]
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def source_path(source: dict, datasets_dir: Path = DATASETS_DIR) -> Path:
+    """
+    Resolve the on-disk path of a CSV source.
+
+    Args:
+        source: Entry from CSV_SOURCES
+        datasets_dir: Root folder holding the e-commerce/ and marketing_funnel/ folders
+
+    Returns:
+        Absolute path to the CSV file
+    """
+    return Path(datasets_dir) / source["file"]
+
+
+def get_source(table: str) -> dict:
+    """
+    Look up a CSV source by its Bronze table name.
+
+    Args:
+        table: Bronze table name without schema (e.g., 'olist_orders')
+
+    Returns:
+        Matching entry from CSV_SOURCES
+    """
+    for source in CSV_SOURCES:
+        if source["table"] == table:
+            return source
+    raise KeyError(f"Unknown Bronze CSV table: {table}")
@@ -0,0 +1,431 @@
+"""
+================================================================================
+Description: As-of currency conversion of the Gold order values
+================================================================================
+
+PURPOSE:
+--------
+Exchange rates exist only for ECB business days, so an exact-date join from
+an order to its rate leaves weekend and holiday orders without a converted
+value. This script converts every order in gold.fact_orders at the as-of
+rate (latest rate on or before the purchase date) for every target currency
+in silver.api_currency_rates, and writes the results back in bulk.
+
+HOW IT WORKS:
+-------------
+1. All rates are read once into three sorted numpy arrays: a combined key
+   (currency index * DAY_SPAN + day number), the rate date and the rate in
+   millionths. Every currency occupies its own key range.
+2. Orders are streamed in chunks of FETCH_ROWS (order_id, order_date_key,
+   value in cents). Each chunk is matched against all currencies with ONE
+   np.searchsorted(side="right") call - a binary search per order and
+   currency instead of a correlated subquery per order.
+3. Conversion is exact integer arithmetic (cents * rate millionths, rounded
+   half away from zero like Postgres ROUND on NUMERIC), so results match
+   ROUND(total_order_value * exchange_rate, 2).
+4. Results are COPYed into gold.fact_order_currency; set-based UPDATEs then
+   fill fact_orders.total_order_value_usd and dim_date.usd_exchange_rate.
+
+Rates older than --max-rate-age days (default 7) or orders dated before the
+first rate are left NULL rather than converted with a stale rate.
+
+load_gold_data.sql already converts every load with the same rules in SQL
+(gold.dwh_asof_rates, load_gold_currency.sql), so this script is only needed
+to re-convert without a Gold reload - other --currencies or --max-rate-age.
+The next Gold load converts again with its own -v max_rate_age.
+
+Everything runs in one transaction, which also records a 'complete' row
+(changed_sources = 'currency_conversion') in gold.dwh_load_log and notifies
+dwh_gold_load, so query_cache.py / olap_cube.py pick up the new values. The
+script refuses to run while Gold is behind Silver (run load_gold_data.sql
+first), so the log row never hides pending Silver changes.
+
+USAGE:
+------
+python convert_currency.py                   # all currencies in Silver
+python convert_currency.py --currencies USD,EUR
+python convert_currency.py --max-rate-age 3
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Gold layer loaded (load_gold_data.sql); rates in silver.api_currency_rates
+(scripts/api/fetch_currency_rates.py + load_silver_data.sql)
+
+================================================================================
+"""
+
+import argparse
+import io
+import sys
+import time
+
+import numpy as np
+
+from common import get_db_connection
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FETCH_ROWS = 200_000
+
+BASE_CURRENCY = "BRL"
+DEFAULT_MAX_RATE_AGE_DAYS = 7
+
+# Rates are handled as integer millionths (silver keeps DECIMAL(10,6))
+RATE_SCALE = 1_000_000
+
+# Width of one currency's key range; day numbers are shifted by DAY_OFFSET
+# so dates before 1970 stay inside it
+DAY_SPAN = 1 << 32
+DAY_OFFSET = 1 << 31
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+RATES_SQL = """
+    SELECT target_currency,
+           rate_date - DATE '1970-01-01',
+           ROUND(exchange_rate * 1000000)::BIGINT
+    FROM silver.api_currency_rates
+    WHERE base_currency = %s
+      AND dwh_is_valid
+      AND exchange_rate > 0
+    ORDER BY target_currency, rate_date;
+"""
+
+ORDERS_SQL = """
+    SELECT order_id, order_date_key, ROUND(total_order_value * 100)::BIGINT
+    FROM gold.fact_orders;
+"""
+
+# Gold is behind Silver if Silver consumed Bronze data after the last
+# complete Gold load (same rule as the change check in load_gold_data.sql)
+GOLD_STALE_SQL = """
+    WITH last_load AS (
+        SELECT MAX(finished_at) AS finished_at
+        FROM gold.dwh_load_log
+        WHERE status = 'complete'
+    )
+    SELECT l.finished_at IS NULL
+           OR EXISTS (
+               SELECT 1
+               FROM bronze.dwh_load_manifest m
+               WHERE m.silver_consumed_at > l.finished_at
+           )
+    FROM last_load l;
+"""
+
+# =============================================================================
+# RATE TABLE
+# =============================================================================
+
+
+def date_key_days(date_keys: np.ndarray) -> np.ndarray:
+    """YYYYMMDD integers -> days since 1970-01-01 (vectorized, no string parsing)."""
+    years = date_keys // 10000
+    months = date_keys // 100 % 100
+    days = date_keys % 100
+    month_start = ((years - 1970) * 12 + months - 1).astype("datetime64[M]").astype("datetime64[D]")
+    return (month_start - EPOCH).astype(np.int64) + days - 1
+
+
+def convert_cents(cents: np.ndarray, rates: np.ndarray) -> np.ndarray:
+    """
+    Convert amounts in cents at rates in millionths, rounded half away from zero.
+
+    cents * rate is split into (cents // RATE_SCALE) and (cents % RATE_SCALE)
+    so the products stay far inside int64.
+    """
+    sign = np.sign(cents)
+    high, low = np.divmod(np.abs(cents), RATE_SCALE)
+    return sign * (high * rates + (low * rates + RATE_SCALE // 2) // RATE_SCALE)
+
+
+class RateTable:
+    """Exchange rates of all target currencies in one sorted key array."""
+
+    def __init__(self, currencies: list, currency_index: np.ndarray, days: np.ndarray,
+                 rates: np.ndarray):
+        order = np.lexsort((days, currency_index))
+        self.currencies = currencies
+        self.keys = currency_index[order] * DAY_SPAN + days[order] + DAY_OFFSET
+        self.days = days[order]
+        self.rates = rates[order]
+        # First position of every currency's key range
+        self.starts = np.searchsorted(self.keys, np.arange(len(currencies)) * DAY_SPAN)
+
+    @classmethod
+    def load(cls, conn, currencies: list = None) -> "RateTable":
+        """Read the rates of the given (default: all) target currencies."""
+        with conn.cursor() as cursor:
+            cursor.execute(RATES_SQL, (BASE_CURRENCY,))
+            rows = cursor.fetchall()
+
+        if currencies:
+            rows = [row for row in rows if row[0] in currencies]
+        names = sorted({row[0] for row in rows})
+        index = {name: i for i, name in enumerate(names)}
+        return cls(
+            names,
+            np.array([index[row[0]] for row in rows], dtype=np.int64),
+            np.array([row[1] for row in rows], dtype=np.int64),
+            np.array([row[2] for row in rows], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def asof(self, days: np.ndarray, max_age: int) -> np.ndarray:
+        """
+        Position of the as-of rate for every (currency, day).
+
+        Args:
+            days: Day numbers (days since 1970-01-01)
+            max_age: Rates older than this many days do not count
+
+        Returns:
+            int64 array of shape (currencies, len(days)), -1 = no usable rate
+        """
+        currency = np.arange(len(self.currencies), dtype=np.int64)[:, None]
+        query = currency * DAY_SPAN + days[None, :] + DAY_OFFSET
+        pos = np.searchsorted(self.keys, query, side="right") - 1
+        # Landed in the previous currency's range, or the rate is too old
+        stale = (pos < self.starts[:, None]) | (days[None, :] - self.days[pos] > max_age)
+        pos[stale] = -1
+        return pos
+
+
+# =============================================================================
+# CONVERSION
+# =============================================================================
+
+
+def format_rate(micros: np.ndarray) -> list:
+    """Rates in millionths -> DECIMAL(10,6) text."""
+    whole, frac = np.divmod(micros, RATE_SCALE)
+    return [f"{w}.{f:06d}" for w, f in zip(whole.tolist(), frac.tolist())]
+
+
+def format_cents(cents: np.ndarray) -> list:
+    """Amounts in cents -> DECIMAL(12,2) text."""
+    whole, frac = np.divmod(np.abs(cents), 100)
+    return [
+        f"{'-' if c < 0 else ''}{w}.{f:02d}"
+        for c, w, f in zip(cents.tolist(), whole.tolist(), frac.tolist())
+    ]
+
+
+def convert_chunk(table: RateTable, order_ids: list, date_keys: np.ndarray,
+                  cents: np.ndarray, max_age: int, buffer: io.StringIO) -> np.ndarray:
+    """
+    Convert one chunk of orders into every currency.
+
+    Writes fact_order_currency rows (COPY text format) to buffer.
+
+    Returns:
+        Number of converted orders per currency
+    """
+    days = date_key_days(date_keys)
+    positions = table.asof(days, max_age)
+    date_text = date_keys.astype(str).tolist()
+    converted = np.zeros(len(table.currencies), dtype=np.int64)
+
+    for c, currency in enumerate(table.currencies):
+        pos = positions[c]
+        found = pos >= 0
+        converted[c] = found.sum()
+        rate = table.rates[pos]
+        rate_text = format_rate(rate)
+        value_text = format_cents(convert_cents(cents, rate))
+        rate_day = table.days[pos]
+        rate_date_text = np.datetime_as_string(EPOCH + rate_day).tolist()
+        age_text = (days - rate_day).tolist()
+
+        lines = []
+        for i, order_id in enumerate(order_ids):
+            if found[i]:
+                lines.append(
+                    f"{order_id}\t{currency}\t{date_text[i]}\t{rate_date_text[i]}\t"
+                    f"{age_text[i]}\t{rate_text[i]}\t{value_text[i]}\n"
+                )
+            else:
+                lines.append(f"{order_id}\t{currency}\t{date_text[i]}\t\\N\t\\N\t\\N\t\\N\n")
+        buffer.write("".join(lines))
+
+    return converted
+
+
+def convert_orders(conn, table: RateTable, max_age: int) -> tuple:
+    """
+    Stream gold.fact_orders, convert each chunk and COPY it into gold.fact_order_currency.
+
+    Runs inside the caller's transaction.
+
+    Returns:
+        (order count, converted orders per currency)
+    """
+    columns = (
+        "order_id", "currency_code", "order_date_key", "rate_date",
+        "rate_age_days", "exchange_rate", "total_order_value",
+    )
+    # copy_from() would quote "gold.fact_order_currency" as one identifier
+    copy_sql = f"COPY gold.fact_order_currency ({', '.join(columns)}) FROM STDIN;"
+    orders = 0
+    converted = np.zeros(len(table.currencies), dtype=np.int64)
+
+    with conn.cursor() as writer:
+        writer.execute("TRUNCATE TABLE gold.fact_order_currency;")
+
+        with conn.cursor(name="convert_orders") as cursor:
+            cursor.itersize = FETCH_ROWS
+            cursor.execute(ORDERS_SQL)
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                order_ids, date_keys, cents = zip(*rows)
+                buffer = io.StringIO()
+                converted += convert_chunk(
+                    table,
+                    order_ids,
+                    np.array([k or 0 for k in date_keys], dtype=np.int64),
+                    np.array(cents, dtype=np.int64),
+                    max_age,
+                    buffer,
+                )
+                buffer.seek(0)
+                writer.copy_expert(copy_sql, buffer)
+                orders += len(rows)
+
+    return orders, converted
+
+
+def update_gold(conn, table: RateTable, max_age: int):
+    """
+    Fill fact_orders.total_order_value_usd and dim_date.usd_exchange_rate.
+
+    Both are single set-based UPDATEs; rows whose value does not change are
+    not rewritten.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE gold.fact_orders f
+            SET total_order_value_usd = c.total_order_value
+            FROM gold.fact_order_currency c
+            WHERE c.order_id = f.order_id
+              AND c.currency_code = 'USD'
+              AND f.total_order_value_usd IS DISTINCT FROM c.total_order_value;
+        """)
+        print(f"  ✓ fact_orders.total_order_value_usd: {cursor.rowcount:,} rows updated")
+
+        if "USD" not in table.currencies:
+            return
+
+        cursor.execute("SELECT date_key FROM gold.dim_date;")
+        date_keys = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        usd = table.currencies.index("USD")
+        pos = table.asof(date_key_days(date_keys), max_age)[usd]
+        rate_text = [
+            text if p >= 0 else "\\N" for p, text in zip(pos.tolist(), format_rate(table.rates[pos]))
+        ]
+
+        buffer = io.StringIO()
+        buffer.writelines(f"{key}\t{rate}\n" for key, rate in zip(date_keys.tolist(), rate_text))
+        buffer.seek(0)
+        cursor.execute("""
+            CREATE TEMP TABLE dwh_usd_rates (
+                date_key INTEGER PRIMARY KEY,
+                usd_exchange_rate DECIMAL(10,4)
+            ) ON COMMIT DROP;
+        """)
+        cursor.copy_from(buffer, "dwh_usd_rates")
+        cursor.execute("""
+            UPDATE gold.dim_date d
+            SET usd_exchange_rate = r.usd_exchange_rate
+            FROM dwh_usd_rates r
+            WHERE r.date_key = d.date_key
+              AND d.usd_exchange_rate IS DISTINCT FROM r.usd_exchange_rate;
+        """)
+        print(f"  ✓ dim_date.usd_exchange_rate: {cursor.rowcount:,} rows updated")
+
+
+def record_run(conn):
+    """Log the conversion as a Gold version and notify cache listeners (on commit)."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO gold.dwh_load_log (finished_at, status, changed_sources)
+            VALUES (CURRENT_TIMESTAMP, 'complete', 'currency_conversion')
+            RETURNING load_id;
+        """)
+        load_id = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_notify('dwh_gold_load', %s);", (f"{load_id}:complete",))
+    return load_id
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Convert Gold order values at as-of exchange rates")
+    parser.add_argument(
+        "--currencies",
+        type=lambda text: [c.strip().upper() for c in text.split(",") if c.strip()],
+        help="Comma-separated target currencies (default: all in silver.api_currency_rates)",
+    )
+    parser.add_argument(
+        "--max-rate-age",
+        type=int,
+        default=DEFAULT_MAX_RATE_AGE_DAYS,
+        help="Ignore rates older than this many days",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("AS-OF CURRENCY CONVERSION")
+    print("=" * 60)
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(GOLD_STALE_SQL)
+            if cursor.fetchone()[0]:
+                print("✗ Gold is behind Silver - run load_gold_data.sql first")
+                sys.exit(1)
+
+        table = RateTable.load(conn, args.currencies)
+        if not len(table):
+            print("✗ No exchange rates in silver.api_currency_rates")
+            sys.exit(1)
+        print(f"Rates: {len(table):,} ({BASE_CURRENCY} → {', '.join(table.currencies)})")
+        print(f"Max rate age: {args.max_rate_age} days")
+
+        started = time.perf_counter()
+        orders, converted = convert_orders(conn, table, args.max_rate_age)
+        print(f"\n  ✓ {orders:,} orders converted in {time.perf_counter() - started:.2f}s")
+        for currency, count in zip(table.currencies, converted.tolist()):
+            print(f"    {currency}: {count:,} with a rate, {orders - count:,} without")
+
+        update_gold(conn, table, args.max_rate_age)
+        load_id = record_run(conn)
+        conn.commit()
+        print(f"  ✓ Gold version {load_id} recorded")
+
+    except Exception as e:
+        print(f"  ✗ Conversion failed: {e}")
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+    print("\n" + "=" * 60)
+    print("✓ Currency conversion complete!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,607 @@
+"""
+================================================================================
+Description: Build the warehouse in embedded DuckDB, check parity with Postgres
+================================================================================
+
+PURPOSE:
+--------
+A full Bronze → Silver → Gold rebuild in Postgres needs a running server and
+takes minutes, which is slow for trying out a transform change or for a quick
+benchmark / regression pass on a laptop. This script runs the same layers in
+DuckDB - an in-process, columnar SQL engine - straight from the CSVs under
+datasets/, into a single database file. A full rebuild takes seconds.
+
+The Silver and Gold transforms are DuckDB ports of the Postgres scripts
+(scripts/duckdb/load_silver.sql, load_gold.sql), run through the same
+sql_script.py runner. The parity command compares every Silver and Gold
+table with Postgres row by row, so a port that drifts from the Postgres
+scripts is caught.
+
+HOW IT WORKS:
+-------------
+build:
+1. Bronze: each CSV of CSV_SOURCES is read with read_csv (all VARCHAR, same
+   columns as the COPY of load_bronze_data.sql). The API tables come from
+   <datasets>/api/<table>.csv (generate_synthetic_data.py --api) or, with
+   --api-from-postgres, from the Postgres Bronze tables; otherwise they stay
+   empty and Gold falls back to no weather / no currency values
+2. Silver: scripts/duckdb/load_silver.sql
+3. gold.map_zip_weather_point: the KD-tree matching of
+   build_weather_point_map.py, on the DuckDB Silver tables
+4. Gold: scripts/duckdb/load_gold.sql (dimensions, facts, bridge and the
+   as-of currency conversion of convert_currency.py)
+
+parity:
+- For every table, one portable SELECT runs on both engines. Surrogate keys
+  (SERIAL in Postgres, ROW_NUMBER in DuckDB) are replaced by the business
+  key they point to, dwh_transformed_at is left out
+- Rows are matched on the business key; REAL values are compared to 6
+  significant digits, everything else exactly
+- Reports missing / extra keys and mismatching columns (with a sample);
+  exits 1 on any difference
+
+USAGE:
+------
+python embedded_dwh.py build                              # datasets/ → olist_dwh.duckdb
+python embedded_dwh.py build --datasets-dir ../../datasets_sf1 --threads 4
+python embedded_dwh.py build --api-from-postgres --profile
+python embedded_dwh.py parity                             # all Silver + Gold tables
+python embedded_dwh.py parity --tables gold.fact_orders,silver.olist_geolocation
+
+Run parity after loading the same datasets into Postgres (Bronze, Silver,
+build_weather_point_map.py, Gold - which also fills fact_order_currency and
+total_order_value_usd, so convert_currency.py is not needed).
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+parity: Postgres warehouse loaded (see above)
+
+================================================================================
+"""
+
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import psycopg2
+
+from build_weather_point_map import (
+    build_map_rows,
+    fetch_unlocated_zips,
+    fetch_weather_points,
+    fetch_zip_centroids,
+)
+from common import CSV_SOURCES, DATASETS_DIR, PROJECT_ROOT, get_db_connection, source_path
+from convert_currency import DEFAULT_MAX_RATE_AGE_DAYS
+from sql_script import ScriptRunner, normalize_sql
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_DATABASE = PROJECT_ROOT / "olist_dwh.duckdb"
+
+SILVER_SCRIPT = PROJECT_ROOT / "scripts" / "duckdb" / "load_silver.sql"
+GOLD_SCRIPT = PROJECT_ROOT / "scripts" / "duckdb" / "load_gold.sql"
+
+# Bronze API tables (create_bronze_tables.sql), in column order
+API_SOURCES = [
+    {
+        "table": "api_currency_rates",
+        "file": "api/api_currency_rates.csv",
+        "columns": ["rate_date", "base_currency", "target_currency", "exchange_rate"],
+    },
+    {
+        "table": "api_brazil_holidays",
+        "file": "api/api_brazil_holidays.csv",
+        "columns": [
+            "holiday_date", "local_name", "holiday_name", "country_code",
+            "is_fixed", "is_global", "holiday_types",
+        ],
+    },
+    {
+        "table": "api_weather_history",
+        "file": "api/api_weather_history.csv",
+        "columns": [
+            "latitude", "longitude", "state_code", "location_name", "location_type",
+            "weather_date", "temperature_2m_mean", "temperature_2m_max",
+            "precipitation_sum", "weather_code",
+        ],
+    },
+    {
+        "table": "api_weather_hourly",
+        "file": "api/api_weather_hourly.csv",
+        "columns": [
+            "latitude", "longitude", "state_code", "location_name", "location_type",
+            "weather_date", "temperature_2m", "precipitation", "weather_code",
+        ],
+    },
+]
+
+# gold.map_zip_weather_point (create_gold_tables.sql), filled before the Gold script
+MAP_COLUMNS = {
+    "zip_code_prefix": "VARCHAR",
+    "zip_state": "VARCHAR",
+    "weather_latitude": "DECIMAL(9,6)",
+    "weather_longitude": "DECIMAL(9,6)",
+    "weather_state_code": "VARCHAR",
+    "weather_location_name": "VARCHAR",
+    "distance_km": "DECIMAL(8,2)",
+    "match_method": "VARCHAR",
+}
+
+# Tables compared by the parity check.
+#   key:       business key the rows are matched on
+#   surrogate: own SERIAL key, left out (values differ between engines)
+#   refs:      key column → (table, business column) it is replaced with
+PARITY_TABLES = {
+    "silver.olist_orders": {"key": ["order_id"]},
+    "silver.olist_order_items": {"key": ["order_id", "order_item_id"]},
+    "silver.olist_order_payments": {"key": ["order_id", "payment_sequential"]},
+    "silver.olist_order_reviews": {"key": ["review_id"]},
+    "silver.olist_customers": {"key": ["customer_id"]},
+    "silver.olist_sellers": {"key": ["seller_id"]},
+    "silver.olist_products": {"key": ["product_id"]},
+    "silver.olist_category_translation": {"key": ["product_category_name"]},
+    "silver.olist_geolocation": {"key": ["zip_code_prefix"]},
+    "silver.olist_mql": {"key": ["mql_id"]},
+    "silver.olist_closed_deals": {"key": ["mql_id"]},
+    "silver.api_currency_rates": {"key": ["rate_date", "target_currency"]},
+    "silver.api_brazil_holidays": {"key": ["holiday_date"]},
+    "silver.api_weather_history": {"key": ["latitude", "longitude", "weather_date"]},
+    "silver.api_weather_hourly": {"key": ["latitude", "longitude", "weather_date"]},
+    "gold.map_zip_weather_point": {"key": ["zip_code_prefix"]},
+    "gold.dim_date": {"key": ["date_key"]},
+    "gold.dim_geography": {"key": ["zip_code_prefix"], "surrogate": "geography_key"},
+    "gold.dim_customer": {
+        "key": ["customer_id"],
+        "surrogate": "customer_key",
+        "refs": {"geography_key": ("gold.dim_geography", "zip_code_prefix")},
+    },
+    "gold.dim_seller": {
+        "key": ["seller_id"],
+        "surrogate": "seller_key",
+        "refs": {"geography_key": ("gold.dim_geography", "zip_code_prefix")},
+    },
+    "gold.dim_product": {"key": ["product_id"], "surrogate": "product_key"},
+    "gold.fact_orders": {
+        "key": ["order_id"],
+        "surrogate": "order_key",
+        "refs": {"customer_key": ("gold.dim_customer", "customer_id")},
+    },
+    "gold.fact_order_items": {
+        "key": ["order_id", "order_item_id"],
+        "surrogate": "item_key",
+        "refs": {
+            "order_key": ("gold.fact_orders", "order_id"),
+            "customer_key": ("gold.dim_customer", "customer_id"),
+            "seller_key": ("gold.dim_seller", "seller_id"),
+            "product_key": ("gold.dim_product", "product_id"),
+        },
+    },
+    "gold.fact_order_currency": {"key": ["order_id", "currency_code"]},
+    "gold.bridge_marketing_funnel": {
+        "key": ["mql_id"],
+        "surrogate": "funnel_key",
+        "refs": {"seller_key": ("gold.dim_seller", "seller_id")},
+    },
+}
+
+# Columns that differ by design
+PARITY_SKIP_COLUMNS = {"dwh_transformed_at"}
+
+# REAL (float4) values: DuckDB returns the binary value, psycopg2 the text form
+FLOAT_DIGITS = 6
+
+MAX_SAMPLES = 3
+
+# =============================================================================
+# BUILD FUNCTIONS
+# =============================================================================
+
+
+class TimedRunner(ScriptRunner):
+    """ScriptRunner that records the wall time of every statement."""
+
+    def __init__(self, conn, variables: dict = None):
+        super().__init__(conn, variables)
+        self.timings = []
+
+    def execute(self, cursor, sql: str, statement):
+        start = time.perf_counter()
+        cursor.execute(sql)
+        self.timings.append(
+            (time.perf_counter() - start, self.script_path.name, statement.line,
+             normalize_sql(sql)[:70])
+        )
+
+
+def read_csv_sql(path: Path, columns: list) -> str:
+    """
+    read_csv call matching the Bronze COPY: header skipped, columns taken by
+    position, every value VARCHAR, empty field → NULL.
+    """
+    spec = ", ".join(f"'{column}': 'VARCHAR'" for column in columns)
+    escaped = str(path).replace("'", "''")
+    return (
+        f"read_csv('{escaped}', header = true, columns = {{{spec}}}, delim = ',', "
+        f"quote = '\"', escape = '\"', allow_quoted_nulls = false, "
+        f"auto_detect = false)"
+    )
+
+
+def create_bronze_table(conn, table: str, columns: list, path: Path, source_file: str):
+    """Create bronze.<table> from a CSV file (or empty, when path is None)."""
+    if path is None:
+        definition = ", ".join(f"{column} VARCHAR" for column in columns)
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE bronze.{table} (
+                {definition},
+                dwh_load_date TIMESTAMP,
+                dwh_source_file VARCHAR
+            );
+        """)
+        return
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE bronze.{table} AS
+        SELECT *,
+               CURRENT_TIMESTAMP::TIMESTAMP AS dwh_load_date,
+               '{source_file}' AS dwh_source_file
+        FROM {read_csv_sql(path, columns)};
+    """)
+
+
+def export_postgres_table(pg_conn, table: str, columns: list, path: Path):
+    """COPY a Postgres Bronze table to a CSV file with a header row."""
+    with pg_conn.cursor() as cursor, open(path, "w", encoding="utf-8", newline="") as f:
+        cursor.copy_expert(
+            f"COPY bronze.{table} ({', '.join(columns)}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+            f,
+        )
+
+
+def load_bronze(conn, datasets_dir: Path, api_from_postgres: bool) -> int:
+    """
+    Load every Bronze table.
+
+    Args:
+        conn: DuckDB connection
+        datasets_dir: Root folder of the CSVs
+        api_from_postgres: Read the API tables from the Postgres Bronze layer
+
+    Returns:
+        Total Bronze rows
+    """
+    conn.execute("CREATE SCHEMA IF NOT EXISTS bronze;")
+
+    for source in CSV_SOURCES:
+        path = source_path(source, datasets_dir)
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found (bronze.{source['table']})")
+        create_bronze_table(conn, source["table"], source["columns"], path, path.name)
+
+    pg_conn = get_db_connection() if api_from_postgres else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for source in API_SOURCES:
+                path = source_path(source, datasets_dir)
+                source_file = path.name
+                if pg_conn is not None:
+                    path = Path(tmp) / f"{source['table']}.csv"
+                    export_postgres_table(pg_conn, source["table"], source["columns"], path)
+                    source_file = f"postgres:bronze.{source['table']}"
+                elif not path.exists():
+                    path = None
+                create_bronze_table(conn, source["table"], source["columns"], path, source_file)
+    finally:
+        if pg_conn is not None:
+            pg_conn.close()
+
+    total = 0
+    for source in CSV_SOURCES + API_SOURCES:
+        rows = conn.execute(f"SELECT COUNT(*) FROM bronze.{source['table']};").fetchone()[0]
+        print(f"  ✓ bronze.{source['table']}: {rows:,} rows")
+        total += rows
+    return total
+
+
+def build_weather_map(conn) -> int:
+    """
+    Build gold.map_zip_weather_point from the DuckDB Silver tables
+    (same matching as build_weather_point_map.py).
+
+    Returns:
+        Number of mapped zip prefixes
+    """
+    conn.execute("CREATE SCHEMA IF NOT EXISTS gold;")
+    definition = ", ".join(f"{name} {type_}" for name, type_ in MAP_COLUMNS.items())
+    conn.execute(f"CREATE OR REPLACE TABLE gold.map_zip_weather_point ({definition});")
+
+    cursor = conn.cursor()
+    points = fetch_weather_points(cursor)
+    if not points["state"]:
+        print("  - no weather points in silver.api_weather_history, map left empty")
+        return 0
+    rows = build_map_rows(fetch_zip_centroids(cursor), points, fetch_unlocated_zips(cursor))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "map_zip_weather_point.csv"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(MAP_COLUMNS)
+            writer.writerows(rows)
+        conn.execute(f"""
+            INSERT INTO gold.map_zip_weather_point
+            SELECT * FROM {read_csv_sql(path, list(MAP_COLUMNS))};
+        """)
+    print(f"  ✓ gold.map_zip_weather_point: {len(rows):,} zips")
+    return len(rows)
+
+
+def print_table_counts(conn, schema: str):
+    """Print the row count of every table in a schema."""
+    tables = conn.execute(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_schema = ? AND table_type = 'BASE TABLE' ORDER BY table_name;",
+        [schema],
+    ).fetchall()
+    for (table,) in tables:
+        rows = conn.execute(f"SELECT COUNT(*) FROM {schema}.{table};").fetchone()[0]
+        print(f"  {schema}.{table:<28} {rows:>12,}")
+
+
+def build(args) -> int:
+    """Rebuild Bronze, Silver and Gold in the DuckDB database."""
+    print("=" * 60)
+    print("EMBEDDED WAREHOUSE BUILD (DuckDB)")
+    print("=" * 60)
+    print(f"Datasets: {args.datasets_dir}")
+    print(f"Database: {args.database}")
+
+    conn = duckdb.connect(str(args.database))
+    if args.threads:
+        conn.execute(f"SET threads = {int(args.threads)};")
+
+    steps = []
+    runners = []
+    started = time.perf_counter()
+    try:
+        print("\nLoading Bronze...")
+        start = time.perf_counter()
+        load_bronze(conn, Path(args.datasets_dir), args.api_from_postgres)
+        steps.append(("Bronze", time.perf_counter() - start))
+
+        print()
+        start = time.perf_counter()
+        runner = TimedRunner(conn)
+        runner.run(SILVER_SCRIPT)
+        runners.append(runner)
+        steps.append(("Silver", time.perf_counter() - start))
+
+        print("\nMatching zips to weather points...")
+        start = time.perf_counter()
+        build_weather_map(conn)
+        steps.append(("Weather point map", time.perf_counter() - start))
+
+        print()
+        start = time.perf_counter()
+        runner = TimedRunner(conn, {"max_rate_age": str(args.max_rate_age)})
+        runner.run(GOLD_SCRIPT)
+        runners.append(runner)
+        steps.append(("Gold", time.perf_counter() - start))
+
+        conn.execute("CHECKPOINT;")
+    except (duckdb.Error, psycopg2.Error, FileNotFoundError) as e:
+        print(f"  ✗ Build failed: {e}")
+        conn.close()
+        return 1
+
+    print("\nRow counts:")
+    print_table_counts(conn, "silver")
+    print_table_counts(conn, "gold")
+    conn.close()
+
+    if args.profile:
+        timings = sorted((t for r in runners for t in r.timings), reverse=True)
+        print(f"\nSlowest statements (top {args.profile}):")
+        for seconds, script, line, sql in timings[: args.profile]:
+            print(f"  {seconds * 1000:8.0f} ms  {script}:{line}  {sql}")
+
+    print("\n" + "=" * 60)
+    for name, seconds in steps:
+        print(f"  {name:<20} {seconds:6.2f} s")
+    print(f"✓ Warehouse built in {time.perf_counter() - started:.1f} s")
+    print("=" * 60)
+    return 0
+
+
+# =============================================================================
+# PARITY FUNCTIONS
+# =============================================================================
+
+
+def parity_sql(table: str, spec: dict, columns: list) -> str:
+    """
+    Portable SELECT of a table with surrogate keys replaced by business keys.
+
+    Args:
+        table: Schema-qualified table name
+        spec: Entry of PARITY_TABLES
+        columns: Column names of the table, in table order
+
+    Returns:
+        SQL whose first len(spec['key']) columns are the business key
+    """
+    refs = spec.get("refs", {})
+    skip = PARITY_SKIP_COLUMNS | {spec.get("surrogate")}
+    select = [f"t.{column}" for column in spec["key"]]
+    joins = []
+    for column in columns:
+        if column in skip or column in spec["key"]:
+            continue
+        if column in refs:
+            ref_table, ref_column = refs[column]
+            alias = f"r{len(joins)}"
+            joins.append(f"LEFT JOIN {ref_table} {alias} ON t.{column} = {alias}.{column}")
+            select.append(f"{alias}.{ref_column} AS {column}")
+        else:
+            select.append(f"t.{column}")
+    return f"SELECT {', '.join(select)} FROM {table} t {' '.join(joins)}"
+
+
+def normalize(value):
+    """Make a value comparable across engines (REAL precision, arrays)."""
+    if isinstance(value, float):
+        return float(f"{value:.{FLOAT_DIGITS}g}")
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    return value
+
+
+def fetch_keyed(cursor, sql: str, key_len: int) -> dict:
+    """Run the parity query and index the normalized rows by business key."""
+    cursor.execute(sql)
+    rows = {}
+    for row in cursor.fetchall():
+        row = tuple(normalize(v) for v in row)
+        rows[row[:key_len]] = row[key_len:]
+    return rows
+
+
+def compare_table(duck, pg_conn, table: str, spec: dict) -> bool:
+    """
+    Compare one table between DuckDB and Postgres and print the result.
+
+    Returns:
+        True if both engines hold the same rows
+    """
+    schema, name = table.split(".")
+    columns = [
+        row[0] for row in duck.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = ? AND table_name = ? ORDER BY ordinal_position;",
+            [schema, name],
+        ).fetchall()
+    ]
+    if not columns:
+        print(f"  ✗ {table}: not in the DuckDB database (run build first)")
+        return False
+
+    sql = parity_sql(table, spec, columns)
+    key_len = len(spec["key"])
+    compared = [c for c in columns if c not in spec["key"]
+                and c not in PARITY_SKIP_COLUMNS and c != spec.get("surrogate")]
+
+    duck_rows = fetch_keyed(duck.cursor(), sql, key_len)
+    with pg_conn.cursor() as cursor:
+        pg_rows = fetch_keyed(cursor, sql, key_len)
+
+    missing = [k for k in pg_rows if k not in duck_rows]
+    extra = [k for k in duck_rows if k not in pg_rows]
+    mismatches = {}
+    for key, pg_values in pg_rows.items():
+        duck_values = duck_rows.get(key)
+        if duck_values is None:
+            continue
+        for column, pg_value, duck_value in zip(compared, pg_values, duck_values):
+            if pg_value != duck_value:
+                mismatches.setdefault(column, []).append((key, pg_value, duck_value))
+
+    if not (missing or extra or mismatches):
+        print(f"  ✓ {table}: {len(pg_rows):,} rows match")
+        return True
+
+    print(f"  ✗ {table}: Postgres {len(pg_rows):,} rows, DuckDB {len(duck_rows):,} rows")
+    if missing:
+        print(f"      {len(missing):,} keys only in Postgres, e.g. {missing[:MAX_SAMPLES]}")
+    if extra:
+        print(f"      {len(extra):,} keys only in DuckDB, e.g. {extra[:MAX_SAMPLES]}")
+    for column, samples in mismatches.items():
+        print(f"      {column}: {len(samples):,} rows differ")
+        for key, pg_value, duck_value in samples[:MAX_SAMPLES]:
+            print(f"        {key}: postgres={pg_value!r} duckdb={duck_value!r}")
+    return False
+
+
+def parity(args) -> int:
+    """Compare the DuckDB build with the Postgres warehouse."""
+    tables = list(PARITY_TABLES)
+    if args.tables:
+        tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+        unknown = [t for t in tables if t not in PARITY_TABLES]
+        if unknown:
+            print(f"✗ Unknown tables: {', '.join(unknown)}")
+            return 1
+
+    print("=" * 60)
+    print("PARITY CHECK: DuckDB vs Postgres")
+    print("=" * 60)
+    print(f"Database: {args.database}\n")
+
+    if not Path(args.database).exists():
+        print(f"✗ {args.database} not found (run build first)")
+        return 1
+
+    duck = duckdb.connect(str(args.database), read_only=True)
+    pg_conn = None
+    failed = []
+    try:
+        pg_conn = get_db_connection()
+        for table in tables:
+            if not compare_table(duck, pg_conn, table, PARITY_TABLES[table]):
+                failed.append(table)
+    except (duckdb.Error, psycopg2.Error) as e:
+        print(f"  ✗ Parity check failed: {e}")
+        return 1
+    finally:
+        duck.close()
+        if pg_conn is not None:
+            pg_conn.close()
+
+    print("\n" + "=" * 60)
+    if failed:
+        print(f"✗ {len(failed)}/{len(tables)} tables differ")
+        print("=" * 60)
+        return 1
+    print(f"✓ All {len(tables)} tables match")
+    print("=" * 60)
+    return 0
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Embedded DuckDB warehouse")
+    parser.add_argument("--database", type=Path, default=DEFAULT_DATABASE,
+                        help=f"DuckDB database file (default {DEFAULT_DATABASE.name})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Rebuild Bronze, Silver and Gold from the CSVs")
+    build_parser.add_argument("--datasets-dir", type=Path, default=DATASETS_DIR,
+                              help="Folder holding e-commerce/, marketing_funnel/ (and api/)")
+    build_parser.add_argument("--api-from-postgres", action="store_true",
+                              help="Read the API tables from the Postgres Bronze layer")
+    build_parser.add_argument("--threads", type=int, help="DuckDB worker threads (default: all cores)")
+    build_parser.add_argument("--max-rate-age", type=int, default=DEFAULT_MAX_RATE_AGE_DAYS,
+                              help="Oldest usable exchange rate in days (as convert_currency.py)")
+    build_parser.add_argument("--profile", type=int, nargs="?", const=10, default=0, metavar="N",
+                              help="Print the N slowest statements (default 10)")
+
+    parity_parser = commands.add_parser("parity", help="Compare Silver and Gold with Postgres")
+    parity_parser.add_argument("--tables", help="Comma-separated tables (default: all)")
+
+    args = parser.parse_args()
+    sys.exit(build(args) if args.command == "build" else parity(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1026 @@
+"""
+================================================================================
+Description: Generate a scale-factor synthetic Olist dataset for load testing
+================================================================================
+
+PURPOSE:
+--------
+The committed datasets hold ~100K orders, which says little about how the
+Bronze/Silver/Gold loads behave at production volumes. This script writes
+the full Olist table set at any scale factor (10x, 100x, 1000x) in the exact
+CSV layouts of CSV_SOURCES, so load_bronze_data.sql can load it unchanged.
+
+WHAT IS PRESERVED:
+------------------
+- Layouts: same folders, file names, headers and column order
+- Referential integrity: every order has its customer; every item points at
+  an existing order, product and seller; every payment and review points at
+  an existing order; customer/seller zips exist in geolocation; closed deals
+  point at existing MQLs and sellers
+- Distributions of the real dataset (scale factor 1 ~ the original volumes):
+  order statuses, purchase month mix, items per order, payment types,
+  installments, review scores, customer/seller state mix, lead origins, and
+  the geolocation duplication ratio (~52.6 rows per zip prefix)
+- Categories come from product_category_name_translation.csv (copied as is);
+  category popularity is taken from the real products file when present
+
+HOW IT WORKS:
+-------------
+- IDs are derived from (seed, entity, index) with a vectorized hash, so any
+  process can compute the ID of order #i or seller #j without lookups;
+  this is what keeps the references consistent across parallel workers
+- Every table is split into chunks; chunks run in a process pool and each
+  streams its rows to a part file (random streams are seeded per chunk, so
+  output does not depend on the worker count)
+- Parts are concatenated under a single header into the final CSV
+- Zip prefixes are capped by each state's real CEP range, so at high scale
+  factors geolocation grows until the ranges are full (ratio preserved)
+
+API PAYLOADS:
+-------------
+--api also writes synthetic Bronze-layout CSVs for the API tables covering
+the same period: daily BRL->USD rates (random walk), national holidays
+(fixed + Easter-based) and daily weather for the 27 state capitals
+(latitude/season-driven temperature, rain and weather codes).
+--load-api copies them into the Bronze API tables and records the load in
+bronze.dwh_load_manifest, so load_silver_data.sql picks them up.
+
+USAGE:
+------
+python generate_synthetic_data.py --scale 10
+python generate_synthetic_data.py --scale 100 --workers 16 --output-dir /data/olist_sf100
+python generate_synthetic_data.py --scale 10 --api --load-api
+
+Then validate and load the output like the real datasets:
+python validate_datasets.py --datasets-dir ../../datasets_sf10
+and run load_bronze_data.sql with -v data_path=.../datasets_sf10 (or swap
+it in as datasets/).
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+datasets/e-commerce/product_category_name_translation.csv (committed)
+
+================================================================================
+"""
+
+import argparse
+import binascii
+import csv
+import hashlib
+import io
+import math
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from common import CSV_SOURCES, DATASETS_DIR, PROJECT_ROOT, get_db_connection, get_source
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Row counts of the real dataset (scale factor 1)
+BASE_COUNTS = {
+    "orders": 99_441,
+    "sellers": 3_095,
+    "products": 32_951,
+    "zip_prefixes": 19_015,
+    "landing_pages": 495,
+    "mqls": 8_000,
+    "closed_deals": 842,
+}
+GEO_ROWS_PER_PREFIX = 1_000_163 / 19_015
+REPEAT_CUSTOMER_RATE = 0.034  # orders by a customer_unique_id seen before
+REVIEW_RATE = 0.992  # orders with a review
+
+# Entity codes for ID generation
+ENTITY_CODES = {
+    "order": 1,
+    "customer": 2,
+    "customer_unique": 3,
+    "product": 4,
+    "seller": 5,
+    "review": 6,
+    "mql": 7,
+    "landing_page": 8,
+    "sdr": 9,
+    "sr": 10,
+}
+
+# Real distributions (counts from the public Olist dataset)
+ORDER_STATUS = {
+    "delivered": 96_478, "shipped": 1_107, "canceled": 625, "unavailable": 609,
+    "invoiced": 314, "processing": 301, "created": 5, "approved": 2,
+}
+PURCHASE_MONTHS = {
+    "2016-09": 4, "2016-10": 324, "2016-12": 1,
+    "2017-01": 800, "2017-02": 1_780, "2017-03": 2_682, "2017-04": 2_404,
+    "2017-05": 3_700, "2017-06": 3_245, "2017-07": 4_026, "2017-08": 4_331,
+    "2017-09": 4_285, "2017-10": 4_631, "2017-11": 7_544, "2017-12": 5_673,
+    "2018-01": 7_269, "2018-02": 6_728, "2018-03": 7_211, "2018-04": 6_939,
+    "2018-05": 6_873, "2018-06": 6_167, "2018-07": 6_292, "2018-08": 6_512,
+    "2018-09": 16, "2018-10": 4,
+}
+ITEMS_PER_ORDER = {
+    1: 88_863, 2: 7_516, 3: 1_322, 4: 505, 5: 204, 6: 198, 7: 22, 8: 8,
+    9: 3, 10: 8, 11: 4, 12: 5, 13: 1, 14: 2, 15: 2, 20: 2, 21: 1,
+}
+PAYMENT_TYPES = {
+    "credit_card": 76_795, "boleto": 19_784, "voucher": 5_775,
+    "debit_card": 1_529, "not_defined": 3,
+}
+PAYMENTS_PER_ORDER = {1: 96_479, 2: 2_382, 3: 301, 4: 98, 5: 52, 6: 36, 7: 28}
+CREDIT_CARD_INSTALLMENTS = {
+    1: 25_455, 2: 12_413, 3: 10_461, 4: 7_098, 5: 5_239, 6: 3_920, 7: 1_626,
+    8: 4_268, 9: 644, 10: 5_328, 11: 23, 12: 133, 13: 16, 14: 15, 15: 74,
+    16: 5, 17: 8, 18: 27, 20: 17, 21: 3, 22: 1, 23: 1, 24: 18,
+}
+REVIEW_SCORES = {5: 57_420, 4: 19_200, 3: 8_287, 2: 3_235, 1: 11_858}
+CUSTOMER_STATES = {
+    "SP": 41_746, "RJ": 12_852, "MG": 11_635, "RS": 5_466, "PR": 5_045,
+    "SC": 3_637, "BA": 3_380, "DF": 2_140, "ES": 2_033, "GO": 2_020,
+    "PE": 1_652, "CE": 1_336, "PA": 975, "MT": 907, "MA": 747, "MS": 715,
+    "PB": 536, "PI": 495, "RN": 485, "AL": 413, "SE": 350, "TO": 280,
+    "RO": 253, "AM": 148, "AC": 81, "AP": 68, "RR": 46,
+}
+SELLER_STATES = {
+    "SP": 1_849, "PR": 349, "MG": 244, "SC": 190, "RJ": 171, "RS": 129,
+    "GO": 40, "DF": 30, "ES": 23, "BA": 19, "CE": 13, "PE": 9, "PB": 6,
+    "MS": 5, "RN": 5, "MT": 4, "RO": 2, "SE": 2, "PI": 1, "AC": 1, "MA": 1,
+    "AM": 1, "PA": 1,
+}
+LEAD_ORIGINS = {
+    "organic_search": 2_296, "paid_search": 1_586, "social": 1_350,
+    "unknown": 1_099, "direct_traffic": 499, "email": 493, "referral": 284,
+    "other": 150, "display": 118, "other_publicities": 65, "": 60,
+}
+BUSINESS_SEGMENTS = {
+    "home_decor": 105, "health_beauty": 93, "car_accessories": 77,
+    "household_utilities": 71, "construction_tools_house_garden": 69,
+    "audio_video_electronics": 64, "computers": 34, "pet": 30,
+    "food_supplement": 28, "food_drink": 26, "sports_leisure": 25,
+    "bags_backpacks": 22, "toys": 21, "stationery": 13, "phone_mobile": 12,
+    "watches": 10, "": 1,
+}
+LEAD_TYPES = {
+    "online_medium": 332, "online_big": 126, "industry": 123,
+    "offline": 104, "online_small": 77, "online_beginner": 57,
+    "online_top": 14, "other": 3, "": 6,
+}
+LEAD_PROFILES = {"cat": 407, "": 177, "eagle": 123, "wolf": 95, "shark": 24}
+BUSINESS_TYPES = {"reseller": 587, "manufacturer": 242, "other": 3, "": 10}
+
+# First / last purchase day and the matching API period
+PERIOD_START = date(2016, 9, 1)
+PERIOD_END = date(2018, 10, 31)
+MQL_START = date(2017, 6, 14)
+MQL_END = date(2018, 5, 31)
+
+# State capital and main CEP (zip) prefix range per state
+STATES = {
+    "AC": ("Rio Branco", -9.9754, -67.8249, 69900, 69999),
+    "AL": ("Maceió", -9.6498, -35.7089, 57000, 57999),
+    "AM": ("Manaus", -3.1190, -60.0217, 69000, 69299),
+    "AP": ("Macapá", 0.0356, -51.0705, 68900, 68999),
+    "BA": ("Salvador", -12.9714, -38.5014, 40000, 48999),
+    "CE": ("Fortaleza", -3.7172, -38.5433, 60000, 63999),
+    "DF": ("Brasília", -15.7975, -47.8919, 70000, 72799),
+    "ES": ("Vitória", -20.3155, -40.3128, 29000, 29999),
+    "GO": ("Goiânia", -16.6869, -49.2648, 73700, 76799),
+    "MA": ("São Luís", -2.5307, -44.3068, 65000, 65999),
+    "MG": ("Belo Horizonte", -19.9167, -43.9345, 30000, 39999),
+    "MS": ("Campo Grande", -20.4697, -54.6201, 79000, 79999),
+    "MT": ("Cuiabá", -15.6014, -56.0979, 78000, 78899),
+    "PA": ("Belém", -1.4558, -48.4902, 66000, 68899),
+    "PB": ("João Pessoa", -7.1195, -34.8450, 58000, 58999),
+    "PE": ("Recife", -8.0476, -34.8770, 50000, 56999),
+    "PI": ("Teresina", -5.0892, -42.8019, 64000, 64999),
+    "PR": ("Curitiba", -25.4284, -49.2733, 80000, 87999),
+    "RJ": ("Rio de Janeiro", -22.9068, -43.1729, 20000, 28999),
+    "RN": ("Natal", -5.7945, -35.2110, 59000, 59999),
+    "RO": ("Porto Velho", -8.7612, -63.9004, 76800, 76999),
+    "RR": ("Boa Vista", 2.8235, -60.6758, 69300, 69399),
+    "RS": ("Porto Alegre", -30.0346, -51.2177, 90000, 99999),
+    "SC": ("Florianópolis", -27.5954, -48.5480, 88000, 89999),
+    "SE": ("Aracaju", -10.9472, -37.0731, 49000, 49999),
+    "SP": ("São Paulo", -23.5505, -46.6333, 1000, 19999),
+    "TO": ("Palmas", -10.2491, -48.3243, 77000, 77999),
+}
+STATE_CODES = sorted(STATES)
+
+REVIEW_TITLES = ["recomendo", "otimo produto", "super recomendo", "bom", "nao recebi"]
+REVIEW_MESSAGES = [
+    "produto chegou antes do prazo",
+    "muito bom recomendo",
+    "entrega rapida e produto de qualidade",
+    "ainda nao recebi o produto",
+    "veio diferente do anunciado",
+    "tudo certo com a compra",
+]
+
+API_FILES = {
+    "api_currency_rates": ["rate_date", "base_currency", "target_currency", "exchange_rate"],
+    "api_brazil_holidays": [
+        "holiday_date", "local_name", "holiday_name", "country_code",
+        "is_fixed", "is_global", "holiday_types",
+    ],
+    "api_weather_history": [
+        "latitude", "longitude", "state_code", "location_name", "location_type",
+        "weather_date", "temperature_2m_mean", "temperature_2m_max",
+        "precipitation_sum", "weather_code",
+    ],
+}
+
+# =============================================================================
+# RANDOM / ID HELPERS
+# =============================================================================
+
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer, vectorized over a uint64 array."""
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def entity_hash(seed: int, entity: str, index: np.ndarray) -> np.ndarray:
+    """Deterministic 64-bit hash of (seed, entity, index)."""
+    salt = np.uint64((seed * 1_000_003 + ENTITY_CODES[entity]) & 0xFFFFFFFFFFFFFFFF)
+    return splitmix64(np.asarray(index, dtype=np.uint64) ^ splitmix64(salt))
+
+
+def make_ids(seed: int, entity: str, index: np.ndarray) -> list:
+    """
+    32-character hex IDs (the Olist ID format) for entity rows.
+
+    Args:
+        seed: Dataset seed
+        entity: Key of ENTITY_CODES
+        index: Row indexes
+
+    Returns:
+        List of ID strings, one per index
+    """
+    high = entity_hash(seed, entity, index)
+    low = splitmix64(high ^ np.uint64(0xD1B54A32D192ED03))
+    packed = np.empty((len(high), 2), dtype=">u8")
+    packed[:, 0] = high
+    packed[:, 1] = low
+    text = binascii.hexlify(packed.tobytes()).decode("ascii")
+    return [text[i : i + 32] for i in range(0, len(text), 32)]
+
+
+def unit_hash(seed: int, entity: str, index: np.ndarray) -> np.ndarray:
+    """Deterministic uniform [0, 1) value per index (no RNG state needed)."""
+    return (entity_hash(seed, entity, index) >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def choice(rng: np.random.Generator, distribution: dict, size: int) -> np.ndarray:
+    """Draw labels from a {label: weight} distribution."""
+    labels = np.array(list(distribution.keys()), dtype=object)
+    weights = np.array(list(distribution.values()), dtype=np.float64)
+    return labels[rng.choice(len(labels), size=size, p=weights / weights.sum())]
+
+
+def chunk_rng(seed: int, table: str, chunk_no: int) -> np.random.Generator:
+    """Independent random stream per (table, chunk)."""
+    table_code = int.from_bytes(hashlib.blake2b(table.encode(), digest_size=4).digest(), "big")
+    return np.random.default_rng([seed, table_code, chunk_no])
+
+
+def format_timestamps(values: np.ndarray) -> list:
+    """datetime64[s] array -> 'YYYY-MM-DD HH:MM:SS' strings ('' for NaT)."""
+    text = np.datetime_as_string(values, unit="s")
+    return ["" if t == "NaT" else t.replace("T", " ") for t in text.tolist()]
+
+
+def format_decimals(values: np.ndarray, digits: int = 2) -> list:
+    """Float array -> fixed-point strings."""
+    return [f"{v:.{digits}f}" for v in values.tolist()]
+
+
+def write_rows(path: Path, columns: list):
+    """Write columns (lists of strings) as CSV rows without a header."""
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write("\n".join(",".join(row) for row in zip(*columns)))
+        if columns and len(columns[0]):
+            fh.write("\n")
+
+
+# =============================================================================
+# ZIP SPACE
+# =============================================================================
+
+
+class ZipSpace:
+    """
+    Deterministic set of zip prefixes per state, shared by geolocation,
+    customers and sellers. Rebuilt identically in every worker.
+    """
+
+    def __init__(self, scale: float):
+        target = BASE_COUNTS["zip_prefixes"] * scale
+        weights = np.array([CUSTOMER_STATES[s] for s in STATE_CODES], dtype=np.float64)
+        weights /= weights.sum()
+
+        self.prefixes = {}
+        for state, weight in zip(STATE_CODES, weights):
+            low, high = STATES[state][3], STATES[state][4]
+            size = high - low + 1
+            count = int(min(size, max(1, round(target * weight))))
+            # Evenly spread over the state's CEP range
+            self.prefixes[state] = low + (np.arange(count) * size) // count
+
+        self.states = STATE_CODES
+        self.offsets = np.cumsum([0] + [len(self.prefixes[s]) for s in STATE_CODES])
+        self.total = int(self.offsets[-1])
+
+    def locate(self, global_index: np.ndarray) -> tuple:
+        """Global prefix index -> (state index array, prefix value array)."""
+        state_idx = np.searchsorted(self.offsets, global_index, side="right") - 1
+        prefix = np.empty(len(global_index), dtype=np.int64)
+        for s, state in enumerate(self.states):
+            mask = state_idx == s
+            if mask.any():
+                prefix[mask] = self.prefixes[state][global_index[mask] - self.offsets[s]]
+        return state_idx, prefix
+
+    def sample(self, rng: np.random.Generator, states: np.ndarray) -> np.ndarray:
+        """
+        Draw a prefix within each given state, skewed towards the start of
+        the range (the dense capital areas).
+        """
+        prefix = np.empty(len(states), dtype=np.int64)
+        for state in np.unique(states):
+            mask = states == state
+            values = self.prefixes[state]
+            picks = (len(values) * rng.random(mask.sum()) ** 2).astype(np.int64)
+            prefix[mask] = values[picks]
+        return prefix
+
+
+def city_names(state: str, prefix: np.ndarray) -> list:
+    """
+    Deterministic city name for each prefix: the capital for the first tenth
+    of the state's range, otherwise a municipality named after the 3-digit
+    CEP sector.
+    """
+    capital, _, _, low, high = STATES[state]
+    capital = _strip_accents(capital.lower())
+    boundary = low + (high - low + 1) // 10
+    return [
+        capital if p < boundary else f"municipio {state.lower()} {p // 100:03d}"
+        for p in prefix.tolist()
+    ]
+
+
+def zip_strings(prefix: np.ndarray) -> list:
+    """Prefix ints -> 5-digit strings."""
+    return [f"{p:05d}" for p in prefix.tolist()]
+
+
+# =============================================================================
+# TABLE GENERATORS
+# =============================================================================
+# Each generator writes rows [start, stop) of its table(s) to part files and
+# returns {table: row_count}. Orders drive customers, items, payments and
+# reviews, so they are generated together chunk by chunk.
+
+
+def purchase_timestamps(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Purchase timestamps following the real month mix."""
+    months = choice(rng, PURCHASE_MONTHS, size)
+    starts = months.astype("datetime64[M]")
+    seconds = ((starts + 1).astype("datetime64[s]") - starts.astype("datetime64[s]")).astype(np.int64)
+    offsets = (rng.random(size) * seconds).astype(np.int64)
+    return starts.astype("datetime64[s]") + offsets.astype("timedelta64[s]")
+
+
+def generate_orders(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Orders chunk plus its customers, items, payments and reviews."""
+    seed, zips = ctx["seed"], ctx["zips"]
+    rng = chunk_rng(seed, "orders", chunk_no)
+    n = stop - start
+    index = np.arange(start, stop)
+    day = np.timedelta64(86400, "s")
+    nat = np.datetime64("NaT", "s")
+
+    # --- orders -----------------------------------------------------------
+    status = choice(rng, ORDER_STATUS, n)
+    purchase = purchase_timestamps(rng, n)
+
+    approved = purchase + (rng.integers(600, 48 * 3600, n)).astype("timedelta64[s]")
+    approved = np.where((status == "created") | ((status == "canceled") & (rng.random(n) < 0.2)), nat, approved)
+
+    shipped = np.isin(status, ["shipped", "delivered"])
+    carrier = approved + (rng.integers(1, 7 * 24, n)).astype("timedelta64[h]")
+    carrier = np.where(shipped, carrier, nat)
+
+    transit_days = np.clip(rng.lognormal(math.log(8), 0.6, n), 1, 200)
+    delivered = carrier + (transit_days * 86400).astype("timedelta64[s]")
+    delivered = np.where(status == "delivered", delivered, nat)
+
+    estimated = purchase.astype("datetime64[D]") + rng.integers(10, 45, n).astype("timedelta64[D]")
+    estimated = estimated.astype("datetime64[s]")
+
+    order_ids = make_ids(seed, "order", index)
+    customer_ids = make_ids(seed, "customer", index)
+    write_rows(parts["olist_orders"], [
+        order_ids,
+        customer_ids,
+        status.tolist(),
+        format_timestamps(purchase),
+        format_timestamps(approved),
+        format_timestamps(carrier),
+        format_timestamps(delivered),
+        format_timestamps(estimated),
+    ])
+
+    # --- customers (one customer_id per order, as in Olist) ---------------
+    repeat = rng.random(n) < REPEAT_CUSTOMER_RATE
+    unique_index = np.where(repeat & (index > 0), (rng.random(n) * index).astype(np.int64), index)
+    states = choice(rng, CUSTOMER_STATES, n)
+    prefix = zips.sample(rng, states)
+    cities = [""] * n
+    for state in np.unique(states):
+        positions = np.flatnonzero(states == state)
+        for pos, name in zip(positions.tolist(), city_names(state, prefix[positions])):
+            cities[pos] = name
+    write_rows(parts["olist_customers"], [
+        customer_ids,
+        make_ids(seed, "customer_unique", unique_index),
+        zip_strings(prefix),
+        cities,
+        states.tolist(),
+    ])
+
+    # --- items ---------------------------------------------------------------
+    item_counts = choice(rng, ITEMS_PER_ORDER, n).astype(np.int64)
+    item_counts[status == "unavailable"] = 0
+    item_counts[(status == "canceled") & (rng.random(n) < 0.3)] = 0
+    item_order = np.repeat(np.arange(n), item_counts)
+    first_item = np.repeat(np.cumsum(item_counts) - item_counts, item_counts)
+    item_seq = np.arange(len(item_order)) - first_item + 1
+    n_items = len(item_order)
+
+    # Popular products sell more; multi-item orders often repeat the product
+    n_products, n_sellers = ctx["counts"]["products"], ctx["counts"]["sellers"]
+    order_product = (n_products * rng.random(n) ** 3).astype(np.int64)
+    product = np.where(rng.random(n_items) < 0.6, order_product[item_order],
+                       (n_products * rng.random(n_items) ** 3).astype(np.int64))
+    seller = (product * 2_654_435_761) % n_sellers
+
+    price = np.round(np.clip(rng.lognormal(math.log(75), 0.9, n_items), 0.85, 6_735), 2)
+    freight = np.round(np.clip(rng.lognormal(math.log(16.3), 0.55, n_items), 0, 409.68), 2)
+    shipping_limit = purchase[item_order] + 6 * day + (rng.integers(0, 24, n_items)).astype("timedelta64[h]")
+
+    order_ids_arr = np.array(order_ids, dtype=object)
+    write_rows(parts["olist_order_items"], [
+        order_ids_arr[item_order].tolist(),
+        [str(v) for v in item_seq.tolist()],
+        make_ids(seed, "product", product),
+        make_ids(seed, "seller", seller),
+        format_timestamps(shipping_limit),
+        format_decimals(price),
+        format_decimals(freight),
+    ])
+
+    # --- payments --------------------------------------------------------
+    order_total = np.bincount(item_order, weights=price + freight, minlength=n)
+    no_items = item_counts == 0
+    order_total[no_items] = np.round(rng.lognormal(math.log(100), 0.8, no_items.sum()), 2)
+
+    pay_counts = choice(rng, PAYMENTS_PER_ORDER, n).astype(np.int64)
+    pay_order = np.repeat(np.arange(n), pay_counts)
+    first_pay = np.repeat(np.cumsum(pay_counts) - pay_counts, pay_counts)
+    pay_seq = np.arange(len(pay_order)) - first_pay + 1
+    n_pay = len(pay_order)
+
+    # First payment follows the real type mix; extra payments are vouchers
+    pay_type = choice(rng, PAYMENT_TYPES, n)[pay_order]
+    pay_type = np.where(pay_seq > 1, "voucher", pay_type)
+    installments = np.where(pay_type == "credit_card", choice(rng, CREDIT_CARD_INSTALLMENTS, n_pay), 1)
+
+    # Split the order total: vouchers take random shares, the first payment the rest
+    shares = np.where(pay_seq > 1, rng.random(n_pay) * 0.3, 0.0)
+    voucher_share = np.bincount(pay_order, weights=shares, minlength=n)
+    value = np.where(pay_seq > 1, shares, 1.0 - voucher_share[pay_order]) * order_total[pay_order]
+    write_rows(parts["olist_order_payments"], [
+        order_ids_arr[pay_order].tolist(),
+        [str(v) for v in pay_seq.tolist()],
+        pay_type.tolist(),
+        [str(v) for v in installments.tolist()],
+        format_decimals(np.round(value, 2)),
+    ])
+
+    # --- reviews -------------------------------------------------------------
+    reviewed = np.flatnonzero(rng.random(n) < REVIEW_RATE)
+    n_rev = len(reviewed)
+    reference = np.where(np.isnat(delivered[reviewed]), estimated[reviewed], delivered[reviewed])
+    created = (reference.astype("datetime64[D]") + 1).astype("datetime64[s]")
+    answered = created + (rng.integers(4, 5 * 24, n_rev)).astype("timedelta64[h]")
+
+    has_title = rng.random(n_rev) < 0.12
+    has_message = rng.random(n_rev) < 0.41
+    titles = np.array(REVIEW_TITLES, dtype=object)[rng.integers(0, len(REVIEW_TITLES), n_rev)]
+    messages = np.array(REVIEW_MESSAGES, dtype=object)[rng.integers(0, len(REVIEW_MESSAGES), n_rev)]
+    write_rows(parts["olist_order_reviews"], [
+        make_ids(seed, "review", index[reviewed]),
+        order_ids_arr[reviewed].tolist(),
+        [str(v) for v in choice(rng, REVIEW_SCORES, n_rev).tolist()],
+        np.where(has_title, titles, "").tolist(),
+        np.where(has_message, messages, "").tolist(),
+        format_timestamps(created),
+        format_timestamps(answered),
+    ])
+
+    return {
+        "olist_orders": n,
+        "olist_customers": n,
+        "olist_order_items": n_items,
+        "olist_order_payments": n_pay,
+        "olist_order_reviews": n_rev,
+    }
+
+
+def generate_geolocation(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Geolocation rows for zip prefixes [start, stop), ~52.6 rows each."""
+    rng = chunk_rng(ctx["seed"], "olist_geolocation", chunk_no)
+    state_idx, prefix = ctx["zips"].locate(np.arange(start, stop))
+
+    # Heavy-tailed duplication with the real mean
+    counts = rng.geometric(1 / GEO_ROWS_PER_PREFIX, len(prefix))
+    rows_prefix = np.repeat(prefix, counts)
+    rows_state = np.repeat(state_idx, counts)
+    n = len(rows_prefix)
+
+    # Prefix centroid: around the capital, spread across the state
+    center_lat = np.array([STATES[s][1] for s in STATE_CODES])[rows_state]
+    center_lon = np.array([STATES[s][2] for s in STATE_CODES])[rows_state]
+    spread = unit_hash(ctx["seed"], "order", rows_prefix) - 0.5
+    lat = center_lat + 3.0 * spread + rng.normal(0, 0.02, n)
+    lon = center_lon + 3.0 * (unit_hash(ctx["seed"], "seller", rows_prefix) - 0.5) + rng.normal(0, 0.02, n)
+
+    states = np.array(STATE_CODES, dtype=object)[rows_state]
+    # The real data spells cities both with and without accents
+    accent_variant = rng.random(n) < 0.1
+    cities = [""] * n
+    for state in np.unique(states):
+        positions = np.flatnonzero(states == state)
+        accented = STATES[state][0].lower()
+        plain = _strip_accents(accented)
+        for pos, name in zip(positions.tolist(), city_names(state, rows_prefix[positions])):
+            cities[pos] = accented if name == plain and accent_variant[pos] else name
+    write_rows(parts["olist_geolocation"], [
+        zip_strings(rows_prefix),
+        format_decimals(lat, 14),
+        format_decimals(lon, 14),
+        cities,
+        states.tolist(),
+    ])
+    return {"olist_geolocation": n}
+
+
+def _strip_accents(text: str) -> str:
+    """Remove Portuguese accents (used for city spelling variants)."""
+    return text.translate(str.maketrans("áâãàéêíóôõúç", "aaaaeeiooouc"))
+
+
+def generate_sellers(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Sellers [start, stop)."""
+    rng = chunk_rng(ctx["seed"], "olist_sellers", chunk_no)
+    n = stop - start
+    states = choice(rng, SELLER_STATES, n)
+    prefix = ctx["zips"].sample(rng, states)
+    cities = [""] * n
+    for state in np.unique(states):
+        positions = np.flatnonzero(states == state)
+        for pos, name in zip(positions.tolist(), city_names(state, prefix[positions])):
+            cities[pos] = name
+    write_rows(parts["olist_sellers"], [
+        make_ids(ctx["seed"], "seller", np.arange(start, stop)),
+        zip_strings(prefix),
+        cities,
+        states.tolist(),
+    ])
+    return {"olist_sellers": n}
+
+
+def generate_products(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Products [start, stop); ~1.85% have no category or text attributes."""
+    rng = chunk_rng(ctx["seed"], "olist_products", chunk_no)
+    n = stop - start
+    category = choice(rng, ctx["categories"], n)
+    missing = rng.random(n) < 0.0185
+
+    def ints(values):
+        return np.where(missing, "", [str(v) for v in values.tolist()]).tolist()
+
+    weight = np.clip(rng.lognormal(math.log(700), 1.2, n), 0, 40_425).astype(np.int64)
+    length = np.clip(rng.lognormal(math.log(25), 0.5, n), 7, 105).astype(np.int64)
+    height = np.clip(rng.lognormal(math.log(13), 0.7, n), 2, 105).astype(np.int64)
+    width = np.clip(rng.lognormal(math.log(20), 0.5, n), 6, 118).astype(np.int64)
+    write_rows(parts["olist_products"], [
+        make_ids(ctx["seed"], "product", np.arange(start, stop)),
+        np.where(missing, "", category).tolist(),
+        ints(np.clip(rng.normal(48, 10, n), 5, 76).astype(np.int64)),
+        ints(np.clip(rng.lognormal(math.log(600), 0.7, n), 4, 3_992).astype(np.int64)),
+        ints(np.clip(rng.geometric(0.45, n), 1, 20)),
+        [str(v) for v in weight.tolist()],
+        [str(v) for v in length.tolist()],
+        [str(v) for v in height.tolist()],
+        [str(v) for v in width.tolist()],
+    ])
+    return {"olist_products": n}
+
+
+def mql_contact_dates(seed: int, index: np.ndarray) -> np.ndarray:
+    """First contact date of MQL #i (hash-derived, so closed deals can see it)."""
+    days = (MQL_END - MQL_START).days
+    offsets = (unit_hash(seed, "mql", index) ** 0.8 * days).astype(np.int64)
+    return np.datetime64(MQL_START.isoformat()) + offsets.astype("timedelta64[D]")
+
+
+def generate_mqls(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Marketing qualified leads [start, stop)."""
+    rng = chunk_rng(ctx["seed"], "olist_marketing_qualified_leads", chunk_no)
+    n = stop - start
+    index = np.arange(start, stop)
+    landing = rng.integers(0, ctx["counts"]["landing_pages"], n)
+    write_rows(parts["olist_marketing_qualified_leads"], [
+        make_ids(ctx["seed"], "mql", index),
+        np.datetime_as_string(mql_contact_dates(ctx["seed"], index)).tolist(),
+        make_ids(ctx["seed"], "landing_page", landing),
+        choice(rng, LEAD_ORIGINS, n).tolist(),
+    ])
+    return {"olist_marketing_qualified_leads": n}
+
+
+def generate_closed_deals(ctx: dict, chunk_no: int, start: int, stop: int, parts: dict) -> dict:
+    """Closed deals [start, stop): each maps to a distinct MQL and seller."""
+    seed, counts = ctx["seed"], ctx["counts"]
+    rng = chunk_rng(seed, "olist_closed_deals", chunk_no)
+    n = stop - start
+    index = np.arange(start, stop)
+    mql = index * counts["mqls"] // counts["closed_deals"]
+    seller = index * counts["sellers"] // counts["closed_deals"]
+
+    contact = mql_contact_dates(seed, mql).astype("datetime64[s]")
+    won = contact + (np.clip(rng.lognormal(math.log(14), 1.2, n), 0, 400) * 86400).astype("timedelta64[s]")
+
+    n_sdr = max(1, round(32 * ctx["scale"]))
+    n_sr = max(1, round(22 * ctx["scale"]))
+    revenue = np.where(rng.random(n) < 0.947, 0.0, np.round(rng.lognormal(math.log(100_000), 1.5, n), 1))
+    blank = [""] * n
+    write_rows(parts["olist_closed_deals"], [
+        make_ids(seed, "mql", mql),
+        make_ids(seed, "seller", seller),
+        make_ids(seed, "sdr", rng.integers(0, n_sdr, n)),
+        make_ids(seed, "sr", rng.integers(0, n_sr, n)),
+        format_timestamps(won),
+        choice(rng, BUSINESS_SEGMENTS, n).tolist(),
+        choice(rng, LEAD_TYPES, n).tolist(),
+        choice(rng, LEAD_PROFILES, n).tolist(),
+        blank,
+        blank,
+        blank,
+        choice(rng, BUSINESS_TYPES, n).tolist(),
+        blank,
+        [f"{v:.1f}" for v in revenue.tolist()],
+    ])
+    return {"olist_closed_deals": n}
+
+
+# Task kinds: (generator, tables written, count key)
+TASKS = {
+    "orders": (generate_orders, ["olist_orders", "olist_customers", "olist_order_items",
+                                 "olist_order_payments", "olist_order_reviews"], "orders"),
+    "geolocation": (generate_geolocation, ["olist_geolocation"], "zip_prefixes"),
+    "sellers": (generate_sellers, ["olist_sellers"], "sellers"),
+    "products": (generate_products, ["olist_products"], "products"),
+    "mqls": (generate_mqls, ["olist_marketing_qualified_leads"], "mqls"),
+    "closed_deals": (generate_closed_deals, ["olist_closed_deals"], "closed_deals"),
+}
+
+
+def run_task(ctx: dict, kind: str, chunk_no: int, start: int, stop: int) -> dict:
+    """Process pool entry point: generate one chunk into its part files."""
+    generator, tables, _ = TASKS[kind]
+    parts = {table: part_path(ctx["output_dir"], table, chunk_no) for table in tables}
+    return generator(ctx, chunk_no, start, stop, parts)
+
+
+def part_path(output_dir: Path, table: str, chunk_no: int) -> Path:
+    """Part file of one chunk (next to the final CSV)."""
+    final = output_dir / get_source(table)["file"]
+    return final.with_name(f"{final.name}.part{chunk_no:05d}")
+
+
+# =============================================================================
+# ORCHESTRATION
+# =============================================================================
+
+
+def load_categories(source_dir: Path) -> tuple:
+    """
+    Read the category list and popularity from the real datasets.
+
+    Returns:
+        (path of the translation CSV, {category: weight})
+    """
+    translation = source_dir / get_source("product_category_name_translation")["file"]
+    if not translation.exists():
+        raise FileNotFoundError(f"Category translation file not found: {translation}")
+
+    with open(translation, encoding="utf-8-sig", newline="") as fh:
+        categories = [row["product_category_name"] for row in csv.DictReader(fh)]
+    weights = {category: 1 for category in categories}
+
+    products = source_dir / get_source("olist_products")["file"]
+    if products.exists():
+        with open(products, encoding="utf-8-sig", newline="") as fh:
+            counts = Counter(row["product_category_name"] for row in csv.DictReader(fh))
+        weights = {category: counts.get(category, 0) + 1 for category in categories}
+    return translation, weights
+
+
+def plan_chunks(counts: dict, chunk_rows: int) -> list:
+    """Split every task kind into (kind, chunk_no, start, stop) ranges."""
+    chunks = []
+    for kind, (_, _, count_key) in TASKS.items():
+        total = counts[count_key]
+        # Orders chunks also produce items/payments/reviews/customers
+        size = chunk_rows if kind != "geolocation" else max(1, int(chunk_rows / GEO_ROWS_PER_PREFIX))
+        for chunk_no, start in enumerate(range(0, total, size)):
+            chunks.append((kind, chunk_no, start, min(start + size, total)))
+    # Biggest work first keeps the pool busy until the end
+    chunks.sort(key=lambda c: (c[0] != "orders", c[0] != "geolocation"))
+    return chunks
+
+
+def assemble(output_dir: Path, table: str, chunk_count: int):
+    """Concatenate a table's part files under its header."""
+    source = get_source(table)
+    final = output_dir / source["file"]
+    with open(final, "wb") as out:
+        out.write((",".join(source["columns"]) + "\n").encode("utf-8"))
+        for chunk_no in range(chunk_count):
+            part = part_path(output_dir, table, chunk_no)
+            with open(part, "rb") as fh:
+                shutil.copyfileobj(fh, out, 16 * 1024 * 1024)
+            part.unlink()
+
+
+def generate_dataset(scale: float, output_dir: Path, source_dir: Path, seed: int,
+                     workers: int, chunk_rows: int) -> dict:
+    """
+    Generate every CSV source table.
+
+    Returns:
+        {table: row_count}
+    """
+    counts = {key: max(1, round(value * scale)) for key, value in BASE_COUNTS.items()}
+    zips = ZipSpace(scale)
+    counts["zip_prefixes"] = zips.total
+    counts["closed_deals"] = min(counts["closed_deals"], counts["mqls"], counts["sellers"])
+
+    translation, categories = load_categories(source_dir)
+    for source in CSV_SOURCES:
+        (output_dir / source["file"]).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(translation, output_dir / get_source("product_category_name_translation")["file"])
+
+    ctx = {
+        "seed": seed,
+        "scale": scale,
+        "counts": counts,
+        "zips": zips,
+        "categories": categories,
+        "output_dir": output_dir,
+    }
+    chunks = plan_chunks(counts, chunk_rows)
+    print(f"  {len(chunks)} chunks on {workers} workers")
+
+    totals = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_task, ctx, *chunk) for chunk in chunks]
+        for done, future in enumerate(futures, start=1):
+            totals.update(future.result())
+            if done % max(1, len(futures) // 10) == 0:
+                print(f"  ... {done}/{len(futures)} chunks")
+
+    chunk_counts = Counter(kind for kind, *_ in chunks)
+    for kind, (_, tables, _) in TASKS.items():
+        for table in tables:
+            assemble(output_dir, table, chunk_counts[kind])
+
+    totals["product_category_name_translation"] = len(categories)
+    return dict(totals)
+
+
+# =============================================================================
+# API PAYLOADS
+# =============================================================================
+
+
+def easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    h = (19 * a + b - d - (b - (b + 8) // 25 + 1) // 3 + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def holiday_rows() -> list:
+    """National holidays for the dataset years (Nager.Date shape)."""
+    fixed = [
+        ((1, 1), "Confraternização Universal", "New Year's Day"),
+        ((4, 21), "Tiradentes", "Tiradentes"),
+        ((5, 1), "Dia do Trabalhador", "Labour Day"),
+        ((9, 7), "Independência do Brasil", "Independence Day"),
+        ((10, 12), "Nossa Senhora Aparecida", "Our Lady of Aparecida"),
+        ((11, 2), "Finados", "All Souls' Day"),
+        ((11, 15), "Proclamação da República", "Republic Proclamation Day"),
+        ((12, 25), "Natal", "Christmas Day"),
+    ]
+    moveable = [
+        (-48, "Carnaval", "Carnival"),
+        (-47, "Carnaval", "Carnival"),
+        (-2, "Sexta-feira Santa", "Good Friday"),
+        (60, "Corpus Christi", "Corpus Christi"),
+    ]
+    rows = []
+    for year in range(PERIOD_START.year, PERIOD_END.year + 1):
+        for (month, day_), local, name in fixed:
+            rows.append((date(year, month, day_), local, name, "true"))
+        for offset, local, name in moveable:
+            rows.append((easter(year) + timedelta(days=offset), local, name, "false"))
+    return [
+        [d.isoformat(), local, name, "BR", is_fixed, "true", "Public"]
+        for d, local, name, is_fixed in sorted(rows)
+    ]
+
+
+def currency_rows(rng: np.random.Generator) -> list:
+    """Business-day BRL->USD rates (random walk drifting from ~0.31 to ~0.25) and BRL->EUR."""
+    days = np.arange(np.datetime64(PERIOD_START.isoformat()), np.datetime64((PERIOD_END + timedelta(days=1)).isoformat()))
+    days = days[np.is_busday(days)]
+    drift = math.log(0.25 / 0.31) / len(days)
+    rates = 0.31 * np.exp(np.cumsum(drift + rng.normal(0, 0.007, len(days))))
+    eur_usd = 1.12 * np.exp(np.cumsum(rng.normal(0, 0.003, len(days))))
+    rows = []
+    for d, usd, eur in zip(np.datetime_as_string(days).tolist(), rates.tolist(), (rates / eur_usd).tolist()):
+        rows.append([d, "BRL", "USD", f"{usd:.5f}"])
+        rows.append([d, "BRL", "EUR", f"{eur:.5f}"])
+    return rows
+
+
+def weather_rows(rng: np.random.Generator) -> list:
+    """Daily weather per state capital, driven by latitude and season."""
+    days = np.arange(np.datetime64(PERIOD_START.isoformat()), np.datetime64((PERIOD_END + timedelta(days=1)).isoformat()))
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    # Southern hemisphere: warmest around mid January, wettest in summer
+    season = np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    date_text = np.datetime_as_string(days).tolist()
+
+    rows = []
+    for state in STATE_CODES:
+        city, lat, lon, _, _ = STATES[state]
+        amplitude = 0.2 * abs(lat)
+        mean = 27.5 - 0.3 * max(0.0, abs(lat) - 8) + amplitude * season + rng.normal(0, 1.5, len(days))
+        high = mean + rng.uniform(4, 8, len(days))
+        rain_chance = np.clip(0.35 + 0.25 * season, 0.05, 0.9)
+        rain = np.where(rng.random(len(days)) < rain_chance, rng.gamma(0.8, 8, len(days)), 0.0)
+        code = np.select(
+            [rain >= 20, rain >= 7.6, rain >= 2.5, rain > 0.2, rain > 0],
+            [65, 63, 61, 53, 51],
+            default=np.where(rng.random(len(days)) < 0.5, 3, 0),
+        )
+        for i, day_text in enumerate(date_text):
+            rows.append([
+                f"{lat:.4f}", f"{lon:.4f}", state, city, "state_capital", day_text,
+                f"{mean[i]:.1f}", f"{high[i]:.1f}", f"{rain[i]:.1f}", str(int(code[i])),
+            ])
+    return rows
+
+
+def generate_api_payloads(output_dir: Path, seed: int) -> dict:
+    """Write the synthetic API tables as Bronze-layout CSVs under api/."""
+    rng = np.random.default_rng([seed, 0xA91])
+    api_dir = output_dir / "api"
+    api_dir.mkdir(parents=True, exist_ok=True)
+
+    payloads = {
+        "api_currency_rates": currency_rows(rng),
+        "api_brazil_holidays": holiday_rows(),
+        "api_weather_history": weather_rows(rng),
+    }
+    for table, rows in payloads.items():
+        with open(api_dir / f"{table}.csv", "w", encoding="utf-8", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(API_FILES[table])
+            writer.writerows(rows)
+    return {table: len(rows) for table, rows in payloads.items()}
+
+
+def load_api_payloads(output_dir: Path):
+    """
+    COPY the synthetic API CSVs into the Bronze API tables and record each
+    load in bronze.dwh_load_manifest (source_ref 'synthetic').
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for table, columns in API_FILES.items():
+            path = output_dir / "api" / f"{table}.csv"
+            data = path.read_bytes()
+            cursor.execute(f"TRUNCATE TABLE bronze.{table};")
+            cursor.copy_expert(
+                f"COPY bronze.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, HEADER true)",
+                io.BytesIO(data),
+            )
+            cursor.execute(f"UPDATE bronze.{table} SET dwh_source_file = 'synthetic';")
+            rows = cursor.rowcount
+            cursor.execute(
+                "SELECT bronze.dwh_record_load(%s, 'api', 'synthetic', %s, %s, %s);",
+                (table, hashlib.sha256(data).hexdigest(), rows, len(data)),
+            )
+            print(f"  ✓ bronze.{table}: {rows:,} rows")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic Olist dataset")
+    parser.add_argument("--scale", type=float, default=10, help="Scale factor (1 = original volumes)")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help="Default: datasets_sf<scale>/ in the project root")
+    parser.add_argument("--source-dir", type=Path, default=DATASETS_DIR,
+                        help="Real datasets (category list and popularity)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--api", action="store_true", help="Also write synthetic API payloads")
+    parser.add_argument("--load-api", action="store_true", help="Load the API payloads into Bronze")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or PROJECT_ROOT / f"datasets_sf{args.scale:g}"
+
+    print("=" * 60)
+    print("GENERATE SYNTHETIC OLIST DATASET")
+    print("=" * 60)
+    print(f"Scale factor: {args.scale:g}   Seed: {args.seed}")
+    print(f"Output: {output_dir}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    totals = generate_dataset(args.scale, output_dir, args.source_dir, args.seed,
+                              args.workers, args.chunk_rows)
+    if args.api or args.load_api:
+        totals.update(generate_api_payloads(output_dir, args.seed))
+    elapsed = time.perf_counter() - start
+
+    print("\n  Rows written:")
+    print("  " + "-" * 50)
+    for table, rows in totals.items():
+        print(f"  {table:<40} {rows:>14,}")
+    print("  " + "-" * 50)
+    print(f"  {'TOTAL':<40} {sum(totals.values()):>14,}")
+    print(f"\n  Generated in {elapsed:.1f} s")
+
+    if args.load_api:
+        print("\nLoading API payloads into Bronze...")
+        load_api_payloads(output_dir)
+
+    print("\n" + "=" * 60)
+    print("✓ Synthetic dataset complete!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+================================================================================
+Description: Run the Gold load with the fact tables built in parallel
+================================================================================
+
+PURPOSE:
+--------
+In load_gold_data.sql the fact_orders and fact_order_items INSERTs run as
+single statements on one backend, so the fact build is limited to one core.
+
+This script runs load_gold_data.sql unchanged (see sql_script.py), except
+that the fact INSERTs (load_gold_facts.sql) are split into N hash slices of
+order_id and each slice runs on its own connection.
+
+HOW IT WORKS:
+-------------
+1. load_gold_data.sql opens the fact transaction and truncates the facts
+2. That transaction exports its snapshot (pg_export_snapshot); every worker
+   imports it, so all slices read exactly the same Silver/dimension data
+3. Worker i runs load_gold_facts.sql with slice_id = i into the UNLOGGED
+   staging tables gold.stg_fact_orders / gold.stg_fact_order_items and
+   commits. Orders and items are sliced on the same key, so each item finds
+   its order_key in its own slice; order_key / item_key come from the fact
+   sequences, so they are unique across slices.
+4. Back in the fact transaction, the secondary indexes and foreign keys of
+   the facts are dropped (bronze.dwh_defer_indexes), the staging rows are
+   copied in, and the indexes / FKs are rebuilt once (bronze.
+   dwh_restore_indexes, index builds use parallel maintenance workers) -
+   so the copy does no per-row index maintenance or FK checks. Then
+   load_gold_data.sql COMMITs - readers see the old facts or the new ones,
+   never a partial build. If any slice fails, the transaction is rolled
+   back and the facts are untouched. (With shadow_swap the shadows have no
+   indexes yet, and with bulk_load they were already deferred, so step 4
+   is a plain copy.)
+
+USAGE:
+------
+python load_gold_parallel.py                    # one worker per CPU (max 8)
+python load_gold_parallel.py --workers 4
+python load_gold_parallel.py -v force_reload=true
+python load_gold_parallel.py -v shadow_swap=true # build shadows, then swap
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Staging tables created (create_gold_tables.sql)
+max_connections must allow --workers + 1 connections
+
+================================================================================
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from psycopg2 import extensions
+
+from common import PROJECT_ROOT, get_db_connection
+from sql_script import ScriptRunner, parse_variable
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+GOLD_SCRIPT = PROJECT_ROOT / "scripts" / "gold" / "load_gold_data.sql"
+FACT_SCRIPT_NAME = "load_gold_facts.sql"
+
+STAGING_TABLES = {
+    "fact_orders_table": "gold.stg_fact_orders",
+    "fact_order_items_table": "gold.stg_fact_order_items",
+}
+
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 8)
+
+# =============================================================================
+# SLICE FUNCTIONS
+# =============================================================================
+
+
+def build_slice(script_path: Path, variables: dict, snapshot: str, slice_count: int,
+                slice_id: int) -> float:
+    """
+    Build one hash slice of the facts into the staging tables.
+
+    Runs in a worker thread on its own connection and commits on success.
+
+    Args:
+        script_path: Path to load_gold_facts.sql
+        variables: psql variables of the parent script
+        snapshot: Snapshot id exported by the fact transaction
+        slice_count: Total number of slices
+        slice_id: This worker's slice (0-based)
+
+    Returns:
+        Elapsed seconds
+    """
+    start = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            # Must be the first statements of the transaction
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+            cursor.execute("SET TRANSACTION SNAPSHOT %s;", (snapshot,))
+
+        runner = ScriptRunner(conn, {
+            **variables,
+            **STAGING_TABLES,
+            "slice_count": str(slice_count),
+            "slice_id": str(slice_id),
+        }, echo=lambda text: None)
+        runner.run(script_path)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def truncate_staging():
+    """Empty the staging tables on a separate connection before the build."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {', '.join(STAGING_TABLES.values())};")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+
+class ParallelFactRunner(ScriptRunner):
+    """Runs load_gold_data.sql, replacing the fact include with N parallel slices."""
+
+    def __init__(self, conn, variables: dict, workers: int):
+        super().__init__(conn, variables)
+        self.workers = workers
+
+    def include(self, cursor, script_path: Path) -> bool:
+        if script_path.name != FACT_SCRIPT_NAME or self.workers < 2:
+            return super().include(cursor, script_path)
+
+        if self.conn.get_transaction_status() != extensions.TRANSACTION_STATUS_INTRANS:
+            raise RuntimeError(f"{FACT_SCRIPT_NAME} must be included inside BEGIN/COMMIT")
+
+        truncate_staging()
+        cursor.execute("SELECT pg_export_snapshot();")
+        snapshot = cursor.fetchone()[0]
+
+        print(f"  Building facts in {self.workers} slices (snapshot {snapshot})...")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(build_slice, script_path, self.variables, snapshot,
+                            self.workers, slice_id)
+                for slice_id in range(self.workers)
+            ]
+            # Wait for every slice before raising, so no worker outlives the
+            # fact transaction
+            errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise errors[0]
+        slice_times = [f.result() for f in futures]
+        print(f"  ✓ Slices built in {time.perf_counter() - start:.1f} s "
+              f"(slowest slice {max(slice_times):.1f} s)")
+
+        # Publish inside the fact transaction (atomic with the TRUNCATE),
+        # with the fact indexes / FKs dropped for the copy and rebuilt once.
+        # Nothing to drop on shadows or after a bulk_load deferral (0).
+        orders_table = self.variables["fact_orders_table"]
+        items_table = self.variables["fact_order_items_table"]
+        fact_tables = [orders_table, items_table]
+        start = time.perf_counter()
+        cursor.execute("SELECT bronze.dwh_defer_indexes(%s::REGCLASS[]);", (fact_tables,))
+        deferred = cursor.fetchone()[0]
+        cursor.execute(f"INSERT INTO {orders_table} SELECT * FROM {STAGING_TABLES['fact_orders_table']};")
+        cursor.execute(f"INSERT INTO {items_table} SELECT * FROM {STAGING_TABLES['fact_order_items_table']};")
+        if deferred:
+            cursor.execute("SET LOCAL max_parallel_maintenance_workers = %s;", (self.workers,))
+            cursor.execute("SELECT bronze.dwh_restore_indexes(%s::REGCLASS[]);", (fact_tables,))
+        cursor.execute(f"TRUNCATE TABLE {', '.join(STAGING_TABLES.values())};")
+        print(f"  ✓ Facts published in {time.perf_counter() - start:.1f} s "
+              f"({deferred} indexes / FKs rebuilt after the copy)")
+        return True
+
+
+# =============================================================================
+# LOAD STATUS
+# =============================================================================
+
+
+def fail_gold_load(conn, variables: dict):
+    """
+    Mark the Gold load a failed script started as failed.
+
+    load_gold_data.sql commits its gold.dwh_load_log row ('running') before
+    the load; gold.dwh_fail_load flips it and notifies '<load_id>:failed' so
+    query_cache.py stops treating Gold as loading.
+
+    Args:
+        conn: Autocommit connection, outside any transaction
+        variables: psql variables of the failed script (gold_load_id unset:
+                   the script stopped before it logged the load)
+    """
+    load_id = variables.get("gold_load_id")
+    if load_id is not None:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT gold.dwh_fail_load(%s);", (int(load_id),))
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Gold load with parallel fact build")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Fact slices / connections (default {DEFAULT_WORKERS})")
+    parser.add_argument("-v", "--variable", type=parse_variable, action="append", default=[],
+                        help="psql variable as name=value")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("GOLD LOAD - PARALLEL FACT BUILD")
+    print("=" * 60)
+    print(f"Workers: {args.workers}")
+
+    conn = get_db_connection()
+    conn.autocommit = True  # the script issues its own BEGIN/COMMIT
+
+    start = time.perf_counter()
+    runner = ParallelFactRunner(conn, dict(args.variable), args.workers)
+    try:
+        runner.run(GOLD_SCRIPT)
+    except Exception as e:
+        print(f"  ✗ Gold load failed: {e}")
+        with conn.cursor() as cursor:
+            cursor.execute("ROLLBACK;")  # facts are left as they were
+        fail_gold_load(conn, runner.variables)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    print("\n" + "=" * 60)
+    print(f"✓ Gold load complete in {time.perf_counter() - start:.1f} s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
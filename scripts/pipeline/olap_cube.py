@@ -0,0 +1,727 @@
+"""
+================================================================================
+Description: In-memory columnar OLAP cube over the Gold star schema
+================================================================================
+
+PURPOSE:
+--------
+Interactive slicing of the Gold facts (by date, region/state, payment type,
+weather, product category...) costs a Postgres GROUP BY per click. This
+module loads the star schema once into compact numpy columns and answers
+filtered group-by / roll-up queries in memory with vectorized aggregation.
+
+DATA LAYOUT:
+------------
+Two fact tables, both flattened against their dimensions at load time:
+- orders: gold.fact_orders + dim_date + dim_customer/dim_geography
+- items:  gold.fact_order_items + the order attributes above + dim_product
+Every dimension attribute is dictionary-encoded (int32 code per row, one
+value list per attribute); measures are float64 columns (NULL = NaN).
+Year / quarter / month are derived from date_key, so the date hierarchy
+costs no extra transfer.
+
+QUERIES:
+--------
+- where: {attribute: [values]} (IN list, applied through a boolean lookup
+  table on the codes) or {numeric column: (low, high)} (inclusive range)
+- group_by: attributes are combined into one mixed-radix integer key
+  (cached per group_by, since slicing mostly changes filters), and
+  np.bincount aggregates every measure in a single pass; filtered-out rows
+  go to an overflow group rather than being copied out
+- measures: {name: (column, "sum" | "count" | "mean" | "min" | "max")};
+  ("*", "count") counts rows
+- rollup(): the same query plus subtotals for every group_by prefix
+A query is routed to the orders table unless it needs an item-only column.
+
+INCREMENTAL REFRESH:
+--------------------
+refresh() is a no-op while the Gold version (last complete load_id in
+gold.dwh_load_log) is unchanged. After a load, Postgres computes a
+fingerprint (row count + sum of row hashes over business columns, never
+surrogate keys) per purchase month; only months whose fingerprint changed
+are re-read and spliced in. Dictionaries only grow, so codes stay stable.
+
+USAGE:
+------
+from olap_cube import GoldCube
+
+cube = GoldCube.load()
+cube.query(
+    group_by=["customer_region", "month"],
+    measures={"revenue": ("total_order_value", "sum"), "orders": ("*", "count")},
+    where={"payment_type": ["credit_card"], "date_key": (20170101, 20171231)},
+)
+cube.refresh()      # after load_gold_data.sql
+
+python olap_cube.py                                  # load + timing demo
+python olap_cube.py --group-by product_category --measure item_total:sum --top 10
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Gold layer loaded (load_gold_data.sql)
+
+================================================================================
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from common import get_db_connection
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FETCH_ROWS = 200_000
+
+# Partition (YYYYMM) of a flattened row; rows without a date_key go to 0
+PARTITION_SQL = "COALESCE(t.date_key, 0) / 100"
+
+# Above this many possible key combinations, group with np.unique instead of
+# a dense bincount array
+DENSE_GROUP_LIMIT = 4_000_000
+
+# Per-row group keys kept for recent group_by lists (8 bytes per row each)
+GROUP_KEY_CACHE = 4
+
+# Columns of each fact table: (name, kind), kind is "dim", "num" or "date"
+ORDER_COLUMNS = [
+    ("date_key", "date"),
+    ("order_status", "dim"),
+    ("payment_type", "dim"),
+    ("weather_category", "dim"),
+    ("customer_state", "dim"),
+    ("customer_region", "dim"),
+    ("is_weekend", "dim"),
+    ("is_holiday", "dim"),
+    ("total_order_value", "num"),
+    ("total_order_value_usd", "num"),
+    ("total_product_value", "num"),
+    ("total_freight_value", "num"),
+    ("total_items", "num"),
+    ("review_score", "num"),
+    ("delivery_days", "num"),
+    ("is_late", "num"),
+    ("is_rainy", "num"),
+]
+ITEM_COLUMNS = [
+    ("date_key", "date"),
+    ("order_status", "dim"),
+    ("payment_type", "dim"),
+    ("weather_category", "dim"),
+    ("customer_state", "dim"),
+    ("customer_region", "dim"),
+    ("is_weekend", "dim"),
+    ("is_holiday", "dim"),
+    ("product_category", "dim"),
+    ("weight_category", "dim"),
+    ("size_category", "dim"),
+    ("price", "num"),
+    ("freight_value", "num"),
+    ("item_total", "num"),
+]
+
+# Flattened fact rows; business columns only (see INCREMENTAL REFRESH)
+ORDERS_SQL = """
+    SELECT
+        fo.order_date_key AS date_key,
+        fo.order_status,
+        COALESCE(fo.payment_type, 'unknown') AS payment_type,
+        COALESCE(fo.weather_category, 'unknown') AS weather_category,
+        COALESCE(g.state, c.customer_state, 'unknown') AS customer_state,
+        COALESCE(g.region, c.customer_region, 'unknown') AS customer_region,
+        COALESCE(d.is_weekend, FALSE) AS is_weekend,
+        COALESCE(d.is_holiday, FALSE) AS is_holiday,
+        fo.total_order_value,
+        fo.total_order_value_usd,
+        fo.total_product_value,
+        fo.total_freight_value,
+        fo.total_items,
+        fo.review_score,
+        fo.delivery_days,
+        fo.is_late::INTEGER AS is_late,
+        fo.is_rainy::INTEGER AS is_rainy,
+        fo.order_id AS row_id
+    FROM gold.fact_orders fo
+    LEFT JOIN gold.dim_date d ON fo.order_date_key = d.date_key
+    LEFT JOIN gold.dim_customer c ON fo.customer_key = c.customer_key
+    LEFT JOIN gold.dim_geography g ON c.geography_key = g.geography_key
+"""
+
+ITEMS_SQL = """
+    SELECT
+        fi.order_date_key AS date_key,
+        fo.order_status,
+        COALESCE(fo.payment_type, 'unknown') AS payment_type,
+        COALESCE(fo.weather_category, 'unknown') AS weather_category,
+        COALESCE(g.state, c.customer_state, 'unknown') AS customer_state,
+        COALESCE(g.region, c.customer_region, 'unknown') AS customer_region,
+        COALESCE(d.is_weekend, FALSE) AS is_weekend,
+        COALESCE(d.is_holiday, FALSE) AS is_holiday,
+        COALESCE(p.category_name_en, 'unknown') AS product_category,
+        COALESCE(p.weight_category, 'Unknown') AS weight_category,
+        COALESCE(p.size_category, 'Unknown') AS size_category,
+        fi.price,
+        fi.freight_value,
+        fi.item_total,
+        fi.order_id || ':' || fi.order_item_id AS row_id
+    FROM gold.fact_order_items fi
+    LEFT JOIN gold.fact_orders fo ON fi.order_key = fo.order_key
+    LEFT JOIN gold.dim_date d ON fi.order_date_key = d.date_key
+    LEFT JOIN gold.dim_customer c ON fi.customer_key = c.customer_key
+    LEFT JOIN gold.dim_geography g ON c.geography_key = g.geography_key
+    LEFT JOIN gold.dim_product p ON fi.product_key = p.product_key
+"""
+
+GOLD_VERSION_SQL = """
+    SELECT COALESCE(MAX(load_id), 0)
+    FROM gold.dwh_load_log
+    WHERE status = 'complete';
+"""
+
+# =============================================================================
+# DICTIONARY ENCODING
+# =============================================================================
+
+
+# Filter text accepted for boolean attributes (is_weekend, is_holiday, ...)
+BOOLEAN_TEXT = {"true": "true", "t": "true", "yes": "true",
+                "false": "false", "f": "false", "no": "false"}
+
+
+def dictionary_key(value) -> str:
+    """
+    Lookup key of an attribute value: its text, so filters given as strings
+    (--where year=2017) match ints, numpy scalars and booleans alike.
+    Booleans become 'true' / 'false'.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    return str(value)
+
+
+class Dictionary:
+    """Append-only value <-> code mapping for one dimension attribute."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Encode a batch of values, adding unseen ones.
+
+        The batch is reduced with np.unique first, so the Python-level
+        lookups run once per distinct value, not once per row.
+        """
+        array = np.asarray(values, dtype=object)
+        if not len(array):
+            return np.empty(0, dtype=np.int32)
+        distinct, inverse = np.unique(array.astype(str), return_inverse=True)
+        first = np.zeros(len(distinct), dtype=np.intp)
+        first[inverse[::-1]] = np.arange(len(array))[::-1]
+
+        mapping = np.empty(len(distinct), dtype=np.int32)
+        for i, position in enumerate(first):
+            value = array[position]
+            key = dictionary_key(value)
+            code = self.codes.get(key)
+            if code is None:
+                code = len(self.values)
+                self.codes[key] = code
+                self.values.append(value)
+            mapping[i] = code
+        return mapping[inverse]
+
+    def lookup(self, values) -> np.ndarray:
+        """
+        Boolean table over the codes: True for the given values.
+
+        Values may be the attribute's own type or its text ('2017', 'true').
+        """
+        table = np.zeros(len(self.values), dtype=bool)
+        for value in values:
+            key = dictionary_key(value)
+            code = self.codes.get(key)
+            if code is None:
+                code = self.codes.get(BOOLEAN_TEXT.get(key.strip().lower()))
+            if code is not None:
+                table[code] = True
+        return table
+
+
+# =============================================================================
+# FACT TABLE
+# =============================================================================
+
+
+def month_labels(date_keys: np.ndarray) -> tuple:
+    """date_key (YYYYMMDD) -> (year, 'YYYY-Qn', 'YYYY-MM') label arrays."""
+    year = date_keys // 10000
+    month = date_keys // 100 % 100
+    quarter = (month - 1) // 3 + 1
+    return (
+        year,
+        np.char.add(np.char.add(year.astype(str), "-Q"), quarter.astype(str)),
+        np.char.add(np.char.add(year.astype(str), "-"), np.char.zfill(month.astype(str), 2)),
+    )
+
+
+class FactTable:
+    """One flattened fact table held as numpy columns."""
+
+    def __init__(self, name: str, sql: str, columns: list):
+        self.name = name
+        self.sql = sql
+        self.columns = columns
+        self.dims = {}        # attribute -> int32 codes
+        self.nums = {}        # column -> float64 (date_key: int32)
+        self.dictionaries = {}
+        for column, kind in columns:
+            if kind == "dim":
+                self.dictionaries[column] = Dictionary()
+        for column in ("year", "quarter", "month"):
+            self.dictionaries[column] = Dictionary()
+        self.partition = np.empty(0, dtype=np.int32)   # YYYYMM per row
+        self.fingerprints = {}
+        self.rows = 0
+        self.prepare()
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def fetch_fingerprints(self, conn) -> dict:
+        """
+        {YYYYMM: (row count, hash sum)} computed in Postgres.
+
+        Rows without a date_key form partition 0, as in fetch().
+        """
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {PARTITION_SQL}, COUNT(*),
+                       SUM(hashtextextended(t::TEXT, 0)::NUMERIC)
+                FROM ({self.sql}) t
+                GROUP BY 1;
+            """)
+            return {int(month): (count, total) for month, count, total in cursor.fetchall()}
+
+    def fetch(self, conn, months=None) -> dict:
+        """
+        Read flattened rows (optionally only some purchase months) and encode them.
+
+        Returns:
+            Column arrays in the table's layout plus 'partition'
+        """
+        where = ""
+        if months is not None:
+            where = f"WHERE {PARTITION_SQL} IN ({', '.join(str(int(m)) for m in months) or 'NULL'})"
+
+        chunks = {column: [] for column, _ in self.columns}
+        with conn.cursor(name=f"olap_{self.name}") as cursor:
+            cursor.itersize = FETCH_ROWS
+            cursor.execute(f"SELECT * FROM ({self.sql}) t {where};")
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                batch = list(zip(*rows))
+                for i, (column, kind) in enumerate(self.columns):
+                    if kind == "dim":
+                        chunks[column].append(self.dictionaries[column].encode(batch[i]))
+                    elif kind == "date":
+                        chunks[column].append(np.array([v or 0 for v in batch[i]], dtype=np.int32))
+                    else:
+                        chunks[column].append(np.array(batch[i], dtype=np.float64))
+
+        data = {}
+        for column, kind in self.columns:
+            dtype = np.int32 if kind != "num" else np.float64
+            data[column] = np.concatenate(chunks[column]) if chunks[column] else np.empty(0, dtype)
+
+        year, quarter, month = month_labels(data["date_key"])
+        data["year"] = self.dictionaries["year"].encode(year)
+        data["quarter"] = self.dictionaries["quarter"].encode(quarter)
+        data["month"] = self.dictionaries["month"].encode(month)
+        data["partition"] = (data["date_key"] // 100).astype(np.int32)
+        return data
+
+    def replace_months(self, data: dict, drop_months):
+        """Drop rows of the given months and append the new rows."""
+        keep = ~np.isin(self.partition, list(drop_months)) if self.rows else None
+
+        def splice(old, new):
+            return new if keep is None else np.concatenate([old[keep], new])
+
+        for column in self.dims:
+            self.dims[column] = splice(self.dims[column], data[column])
+        for column in self.nums:
+            self.nums[column] = splice(self.nums[column], data[column])
+        self.partition = splice(self.partition, data["partition"])
+        self.rows = len(self.partition)
+
+    def load(self, conn):
+        """Full load."""
+        self.fingerprints = self.fetch_fingerprints(conn)
+        data = self.fetch(conn)
+        for column, kind in self.columns:
+            (self.dims if kind == "dim" else self.nums)[column] = data[column]
+        for column in ("year", "quarter", "month"):
+            self.dims[column] = data[column]
+        self.partition = data["partition"]
+        self.rows = len(self.partition)
+        self.prepare()
+
+    def refresh(self, conn) -> list:
+        """
+        Re-read only the purchase months whose fingerprint changed.
+
+        Returns:
+            Sorted list of refreshed (or removed) YYYYMM months
+        """
+        fingerprints = self.fetch_fingerprints(conn)
+        changed = sorted(
+            month for month in set(fingerprints) | set(self.fingerprints)
+            if fingerprints.get(month) != self.fingerprints.get(month)
+        )
+        if changed:
+            data = self.fetch(conn, [m for m in changed if m in fingerprints])
+            self.replace_months(data, changed)
+            self.prepare()
+        self.fingerprints = fingerprints
+        return changed
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def prepare(self):
+        """
+        Derive the query-side arrays after a load or refresh: NaN-free copies
+        of nullable measures plus their validity masks, so queries never pay
+        for NaN handling, and an empty group-key cache.
+        """
+        self.filled = {}
+        self.valid = {}
+        for column, array in self.nums.items():
+            valid = ~np.isnan(array) if array.dtype.kind == "f" else None
+            if valid is not None and not valid.all():
+                self.valid[column] = valid
+                self.filled[column] = np.where(valid, array, 0.0)
+            else:
+                self.filled[column] = array
+        self.group_keys = OrderedDict()
+
+    def has(self, column: str) -> bool:
+        return column == "*" or column in self.dims or column in self.nums
+
+    def mask(self, where: dict):
+        """Boolean row mask for the filters (None when unfiltered)."""
+        mask = None
+        for column, condition in (where or {}).items():
+            if column in self.dims:
+                values = condition if isinstance(condition, (list, tuple, set)) else [condition]
+                selected = self.dictionaries[column].lookup(values)[self.dims[column]]
+            elif column in self.nums:
+                low, high = condition
+                array = self.filled[column]
+                selected = (array >= low) & (array <= high)
+                if column in self.valid:
+                    selected &= self.valid[column]
+            else:
+                raise KeyError(f"Unknown column for {self.name}: {column}")
+            mask = selected if mask is None else mask & selected
+        return mask
+
+    def group_index(self, group_by: tuple) -> tuple:
+        """
+        Per-row group number for a group_by (cached, filters don't change it).
+
+        Returns:
+            (index, groups): index[row] in 0..len(groups)-1, groups[i] is the
+            mixed-radix key of group i
+        """
+        cached = self.group_keys.get(group_by)
+        if cached is not None:
+            self.group_keys.move_to_end(group_by)
+            return cached
+
+        key = np.zeros(self.rows, dtype=np.intp)
+        radix = 1
+        for column in group_by:
+            size = max(len(self.dictionaries[column]), 1)
+            key *= size
+            key += self.dims[column]
+            radix *= size
+
+        if radix <= DENSE_GROUP_LIMIT:
+            cached = (key, np.arange(radix))
+        else:
+            groups, index = np.unique(key, return_inverse=True)
+            cached = (index.astype(np.intp), groups)
+
+        self.group_keys[group_by] = cached
+        while len(self.group_keys) > GROUP_KEY_CACHE:
+            self.group_keys.popitem(last=False)
+        return cached
+
+    def query(self, group_by: list, measures: dict, where: dict = None) -> list:
+        """
+        Filtered group-by.
+
+        Filtered-out rows are sent to one extra overflow group instead of being
+        compacted out, so each measure costs one np.bincount pass over its
+        column and nothing else.
+
+        Args:
+            group_by: Dimension attributes
+            measures: {name: (column, aggregate)}
+            where: Filters (see module docstring)
+
+        Returns:
+            List of dicts (one per non-empty group, sorted by the group values)
+        """
+        index, groups = self.group_index(tuple(group_by))
+        n_groups = len(groups)
+        mask = self.mask(where)
+        if mask is not None:
+            index = np.where(mask, index, n_groups)
+        size = n_groups + 1
+
+        counts = np.bincount(index, minlength=size)[:n_groups]
+        results = {}
+        for name, (column, aggregate) in measures.items():
+            if column == "*":
+                results[name] = counts
+                continue
+            valid = self.valid.get(column)
+            values = self.filled[column]
+            if aggregate in ("sum", "mean", "count"):
+                n = counts if valid is None else np.bincount(index, weights=valid, minlength=size)[:n_groups]
+                if aggregate == "count":
+                    results[name] = n
+                    continue
+                total = np.bincount(index, weights=values, minlength=size)[:n_groups]
+                if aggregate == "sum":
+                    results[name] = total
+                else:
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        results[name] = total / n
+            elif aggregate in ("min", "max"):
+                fill = np.inf if aggregate == "min" else -np.inf
+                if valid is not None:
+                    values = np.where(valid, values, fill)
+                out = np.full(size, fill)
+                (np.minimum if aggregate == "min" else np.maximum).at(out, index, values)
+                out = out[:n_groups]
+                out[np.isinf(out)] = np.nan
+                results[name] = out
+            else:
+                raise ValueError(f"Unknown aggregate: {aggregate}")
+
+        # Decode the non-empty groups back to attribute values
+        positions = np.flatnonzero(counts)
+        remaining = groups[positions]
+        labels = {}
+        for column in reversed(group_by):
+            size = max(len(self.dictionaries[column]), 1)
+            values = self.dictionaries[column].values
+            labels[column] = [values[c] for c in (remaining % size).tolist()]
+            remaining = remaining // size
+
+        output = []
+        for i, position in enumerate(positions.tolist()):
+            row = {column: labels[column][i] for column in group_by}
+            for name in measures:
+                value = results[name][position]
+                row[name] = None if value != value else float(value)
+            output.append(row)
+        output.sort(key=lambda row: tuple(str(row[c]) for c in group_by))
+        return output
+
+
+# =============================================================================
+# CUBE
+# =============================================================================
+
+
+class GoldCube:
+    """Orders + items fact tables with query routing and refresh."""
+
+    def __init__(self):
+        self.orders = FactTable("orders", ORDERS_SQL, ORDER_COLUMNS)
+        self.items = FactTable("items", ITEMS_SQL, ITEM_COLUMNS)
+        self.version = None
+
+    @classmethod
+    def load(cls, conn=None) -> "GoldCube":
+        """Load both fact tables from Gold."""
+        cube = cls()
+        own = conn is None
+        conn = conn or get_db_connection()
+        try:
+            cube.version = gold_version(conn)
+            cube.orders.load(conn)
+            cube.items.load(conn)
+            conn.rollback()  # end the read transaction
+        finally:
+            if own:
+                conn.close()
+        return cube
+
+    def refresh(self, conn=None) -> dict:
+        """
+        Bring the cube up to date after a Gold load.
+
+        Returns:
+            {table: refreshed months}, empty when the Gold version is unchanged
+        """
+        own = conn is None
+        conn = conn or get_db_connection()
+        try:
+            version = gold_version(conn)
+            if version == self.version:
+                return {}
+            changed = {
+                "orders": self.orders.refresh(conn),
+                "items": self.items.refresh(conn),
+            }
+            conn.rollback()
+            self.version = version
+            return changed
+        finally:
+            if own:
+                conn.close()
+
+    def table_for(self, columns) -> FactTable:
+        """The orders table unless a column only exists at item grain."""
+        if all(self.orders.has(column) for column in columns):
+            return self.orders
+        if all(self.items.has(column) for column in columns):
+            return self.items
+        raise KeyError(f"No fact table has all of: {', '.join(sorted(columns))}")
+
+    def query(self, group_by=(), measures=None, where=None) -> list:
+        """Filtered group-by (see FactTable.query)."""
+        measures = measures or {"rows": ("*", "count")}
+        columns = set(group_by) | set(where or {}) | {c for c, _ in measures.values()}
+        return self.table_for(columns).query(list(group_by), measures, where)
+
+    def rollup(self, group_by, measures=None, where=None) -> list:
+        """
+        Group-by plus a subtotal level for every prefix of group_by
+        (SQL ROLLUP); rolled-up attributes are None.
+        """
+        output = []
+        for level in range(len(group_by), -1, -1):
+            for row in self.query(group_by[:level], measures, where):
+                output.append({**{c: None for c in group_by[level:]}, **row})
+        return output
+
+
+def gold_version(conn) -> int:
+    """
+    Load id of the last complete Gold load.
+
+    Starts a REPEATABLE READ transaction, so the version, fingerprints and
+    rows read after it all come from one snapshot.
+    """
+    conn.rollback()
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY;")
+        cursor.execute(GOLD_VERSION_SQL)
+        return cursor.fetchone()[0]
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def parse_measure(text: str) -> tuple:
+    """argparse type for column:aggregate."""
+    column, _, aggregate = text.partition(":")
+    return f"{column}_{aggregate or 'sum'}", (column, aggregate or "sum")
+
+
+def parse_filter(text: str) -> tuple:
+    """argparse type for column=v1,v2 (attributes) or column=low..high (numbers)."""
+    column, _, values = text.partition("=")
+    if ".." in values:
+        low, high = values.split("..", 1)
+        return column, (float(low), float(high))
+    return column, values.split(",")
+
+
+def print_rows(rows: list, top: int):
+    """Print query output as an aligned table."""
+    if not rows:
+        print("  (no rows)")
+        return
+    columns = list(rows[0])
+    print("  " + "  ".join(f"{c:>18}" for c in columns))
+    for row in rows[:top]:
+        print("  " + "  ".join(
+            f"{v:>18,.2f}" if isinstance(v, float) else f"{str(v):>18}" for v in row.values()
+        ))
+    if len(rows) > top:
+        print(f"  ... {len(rows) - top} more groups")
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="In-memory OLAP cube over the Gold facts")
+    parser.add_argument("--group-by", nargs="*", default=None)
+    parser.add_argument("--measure", type=parse_measure, action="append", default=[],
+                        help="column:aggregate (sum, count, mean, min, max)")
+    parser.add_argument("--where", type=parse_filter, action="append", default=[],
+                        help="column=v1,v2 or column=low..high")
+    parser.add_argument("--rollup", action="store_true", help="Add subtotal rows")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("GOLD OLAP CUBE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    cube = GoldCube.load()
+    print(f"  ✓ Loaded {cube.orders.rows:,} orders and {cube.items.rows:,} items "
+          f"in {time.perf_counter() - start:.1f} s (Gold version {cube.version})")
+
+    if args.group_by is not None:
+        queries = [(args.group_by, dict(args.measure) or None, dict(args.where))]
+    else:
+        queries = [
+            (["customer_region", "month"], {"revenue": ("total_order_value", "sum"),
+                                            "orders": ("*", "count")}, {}),
+            (["payment_type", "weather_category"], {"avg_value": ("total_order_value", "mean"),
+                                                    "avg_review": ("review_score", "mean")},
+             {"date_key": (20170101, 20171231)}),
+            (["product_category"], {"revenue": ("item_total", "sum")},
+             {"customer_state": ["SP", "RJ", "MG"]}),
+        ]
+
+    for group_by, measures, where in queries:
+        start = time.perf_counter()
+        method = cube.rollup if args.rollup else cube.query
+        rows = method(group_by, measures, where)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n  GROUP BY {', '.join(group_by) or '()'}"
+              f"{'  WHERE ' + str(where) if where else ''}  ->  {len(rows)} groups in {elapsed:.1f} ms")
+        print_rows(rows, args.top)
+
+    print("\n" + "=" * 60)
+    print("✓ Done")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
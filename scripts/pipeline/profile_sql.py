@@ -0,0 +1,466 @@
+"""
+================================================================================
+Description: Profile the Silver/Gold loads and track performance regressions
+================================================================================
+
+PURPOSE:
+--------
+The Silver and Gold loads run large INSERT ... SELECTs (e.g., the fact_orders
+build with its DISTINCT ON subqueries) with no visibility into plans or
+timings, so slow joins are only noticed when the nightly job overruns.
+
+This script replays the load scripts (see sql_script.py) and wraps every
+explainable statement in EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON). Because
+ANALYZE executes the statement, a profiling run IS a real load.
+
+For every statement it stores the plan, planning/execution time, row count
+and buffer counts in gold.dwh_profile_statement, then compares it with a
+baseline:
+- the latest run marked --baseline that executed the same statement, or
+- otherwise the median of the last --history complete runs
+
+A statement is flagged as a regression when
+- its time grew by more than --threshold (and by at least --min-ms), or
+- its plan shape changed (node types, join types, relations, indexes)
+
+USAGE:
+------
+python profile_sql.py                               # Silver + Gold loads
+python profile_sql.py ../gold/load_gold_data.sql    # one script
+python profile_sql.py --baseline                    # record a new baseline
+python profile_sql.py --fail-on-regression          # exit 1 on regressions
+
+Scripts run with force_reload=true so every statement executes; override
+psql variables with -v name=value.
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Profile tables created (create_gold_tables.sql)
+
+================================================================================
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+
+from psycopg2.extras import Json, execute_values
+
+from common import PROJECT_ROOT, get_db_connection
+from load_gold_parallel import fail_gold_load
+from sql_script import ScriptRunner, normalize_sql, parse_variable
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_SCRIPTS = [
+    PROJECT_ROOT / "scripts" / "silver" / "load_silver_data.sql",
+    PROJECT_ROOT / "scripts" / "gold" / "load_gold_data.sql",
+]
+
+# Statements EXPLAIN ANALYZE can wrap; everything else is timed by wall clock
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "MERGE")
+
+# Plan node attributes that define the plan shape (costs/rows excluded)
+PLAN_SHAPE_KEYS = (
+    "Node Type",
+    "Join Type",
+    "Strategy",
+    "Relation Name",
+    "Index Name",
+    "Parent Relationship",
+)
+
+BUFFER_KEYS = {
+    "shared_hit_blocks": "Shared Hit Blocks",
+    "shared_read_blocks": "Shared Read Blocks",
+    "shared_dirtied_blocks": "Shared Dirtied Blocks",
+    "shared_written_blocks": "Shared Written Blocks",
+    "temp_read_blocks": "Temp Read Blocks",
+    "temp_written_blocks": "Temp Written Blocks",
+}
+
+STATEMENT_COLUMNS = [
+    "run_id",
+    "statement_no",
+    "script_name",
+    "script_line",
+    "statement_key",
+    "statement_label",
+    "plan_hash",
+    "planning_ms",
+    "execution_ms",
+    "elapsed_ms",
+    "actual_rows",
+    *BUFFER_KEYS,
+    "plan",
+    "baseline_run_id",
+    "baseline_ms",
+    "baseline_plan_hash",
+    "is_regression",
+    "regression_reason",
+]
+
+# =============================================================================
+# PLAN FUNCTIONS
+# =============================================================================
+
+
+def plan_shape(node: dict) -> str:
+    """
+    Serialize the shape of a plan tree, ignoring costs, timings and rows.
+
+    Args:
+        node: Plan node from EXPLAIN (FORMAT JSON)
+
+    Returns:
+        Canonical string describing the tree
+    """
+    parts = [str(node.get(key, "")) for key in PLAN_SHAPE_KEYS]
+    children = ",".join(plan_shape(child) for child in node.get("Plans", []))
+    return "(" + "|".join(parts) + "[" + children + "])"
+
+
+def plan_hash(node: dict) -> str:
+    """Short hash of the plan shape."""
+    return hashlib.md5(plan_shape(node).encode("utf-8")).hexdigest()[:16]
+
+
+def statement_label(sql: str) -> str:
+    """First 200 characters of the normalized statement."""
+    return normalize_sql(sql)[:200]
+
+
+# =============================================================================
+# PROFILING RUNNER
+# =============================================================================
+
+
+class ProfilingRunner(ScriptRunner):
+    """Script runner that records a profile row for every statement."""
+
+    def __init__(self, conn, variables: dict = None):
+        super().__init__(conn, variables, echo=lambda text: None)
+        self.profiles = []
+        self.occurrences = {}
+
+    def execute(self, cursor, sql, statement):
+        normalized = normalize_sql(statement.sql)
+        script_name = self.script_path.name
+
+        # Identity: script + normalized SQL + occurrence (BEGIN/COMMIT repeat)
+        occurrence_key = (script_name, normalized)
+        occurrence = self.occurrences.get(occurrence_key, 0)
+        self.occurrences[occurrence_key] = occurrence + 1
+        key = hashlib.md5(f"{script_name}\n{normalized}\n{occurrence}".encode("utf-8")).hexdigest()
+
+        profile = {
+            "script_name": script_name,
+            "script_line": statement.line,
+            "statement_key": key,
+            "statement_label": statement_label(statement.sql),
+            "plan_hash": None,
+            "planning_ms": None,
+            "execution_ms": None,
+            "actual_rows": None,
+            "plan": None,
+            **{column: None for column in BUFFER_KEYS},
+            "baseline_run_id": None,
+            "baseline_ms": None,
+            "baseline_plan_hash": None,
+            "is_regression": False,
+            "regression_reason": None,
+        }
+
+        explain = (
+            statement.gset_prefix is None
+            and normalized.split(" ", 1)[0].upper() in EXPLAINABLE
+        )
+
+        start = time.perf_counter()
+        if explain:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql)
+            result = cursor.fetchone()[0][0]
+            top = result["Plan"]
+            profile.update(
+                plan_hash=plan_hash(top),
+                planning_ms=result.get("Planning Time"),
+                execution_ms=result.get("Execution Time"),
+                actual_rows=top.get("Actual Rows"),
+                plan=result,
+                **{column: top.get(key) for column, key in BUFFER_KEYS.items()},
+            )
+        else:
+            cursor.execute(sql)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        profile["elapsed_ms"] = (
+            profile["execution_ms"] if profile["execution_ms"] is not None else wall_ms
+        )
+        self.profiles.append(profile)
+
+    def run(self, script_path) -> bool:
+        completed = super().run(script_path)
+        # Each psql invocation is a fresh session - don't leak settings
+        with self.conn.cursor() as cursor:
+            cursor.execute("RESET ALL;")
+        return completed
+
+
+# =============================================================================
+# DATABASE FUNCTIONS
+# =============================================================================
+
+
+def start_run(conn, scripts: list, is_baseline: bool) -> int:
+    """Create the gold.dwh_profile_run row and return its run_id."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO gold.dwh_profile_run (scripts, is_baseline)
+            VALUES (%s, %s)
+            RETURNING run_id;
+            """,
+            (", ".join(str(s) for s in scripts), is_baseline),
+        )
+        return cursor.fetchone()[0]
+
+
+def fetch_baselines(conn, run_id: int, keys: list, history: int) -> dict:
+    """
+    Look up the baseline of every statement key.
+
+    Args:
+        conn: Database connection
+        run_id: Current run (excluded)
+        keys: Statement keys executed in this run
+        history: Number of recent runs to use when no baseline run exists
+
+    Returns:
+        Dictionary statement_key -> (baseline run_id, baseline ms, plan hash)
+    """
+    with conn.cursor() as cursor:
+        # Median of the most recent complete runs
+        cursor.execute(
+            """
+            SELECT
+                statement_key,
+                MAX(run_id),
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY elapsed_ms),
+                (ARRAY_AGG(plan_hash ORDER BY run_id DESC))[1]
+            FROM (
+                SELECT
+                    s.statement_key,
+                    s.run_id,
+                    s.elapsed_ms,
+                    s.plan_hash,
+                    ROW_NUMBER() OVER (PARTITION BY s.statement_key ORDER BY s.run_id DESC) AS rn
+                FROM gold.dwh_profile_statement s
+                JOIN gold.dwh_profile_run r ON r.run_id = s.run_id
+                WHERE r.status = 'complete'
+                  AND r.run_id <> %s
+                  AND s.statement_key = ANY(%s)
+            ) recent
+            WHERE rn <= %s
+            GROUP BY statement_key;
+            """,
+            (run_id, keys, history),
+        )
+        baselines = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        # Pinned baseline runs take precedence
+        cursor.execute(
+            """
+            SELECT DISTINCT ON (s.statement_key)
+                s.statement_key, s.run_id, s.elapsed_ms, s.plan_hash
+            FROM gold.dwh_profile_statement s
+            JOIN gold.dwh_profile_run r ON r.run_id = s.run_id
+            WHERE r.status = 'complete'
+              AND r.is_baseline
+              AND r.run_id <> %s
+              AND s.statement_key = ANY(%s)
+            ORDER BY s.statement_key, s.run_id DESC;
+            """,
+            (run_id, keys),
+        )
+        baselines.update({row[0]: row[1:] for row in cursor.fetchall()})
+    return baselines
+
+
+def flag_regressions(profiles: list, baselines: dict, threshold: float, min_ms: float) -> int:
+    """
+    Compare every profile with its baseline and set the regression columns.
+
+    Args:
+        profiles: Profile dicts from ProfilingRunner
+        baselines: Output of fetch_baselines()
+        threshold: Allowed relative slowdown (0.25 = +25%)
+        min_ms: Ignore slowdowns smaller than this (noise on fast statements)
+
+    Returns:
+        Number of regressed statements
+    """
+    count = 0
+    for profile in profiles:
+        baseline_run_id, baseline_ms, baseline_plan = baselines.get(
+            profile["statement_key"], (None, None, None)
+        )
+        profile["baseline_run_id"] = baseline_run_id
+        profile["baseline_ms"] = baseline_ms
+        profile["baseline_plan_hash"] = baseline_plan
+
+        reasons = []
+        if baseline_ms is not None:
+            elapsed = profile["elapsed_ms"]
+            baseline_ms = float(baseline_ms)
+            if elapsed > baseline_ms * (1 + threshold) and elapsed - baseline_ms >= min_ms:
+                pct = 100.0 * (elapsed - baseline_ms) / baseline_ms if baseline_ms else float("inf")
+                reasons.append(f"runtime {baseline_ms:.1f} ms -> {elapsed:.1f} ms (+{pct:.0f}%)")
+        if baseline_plan and profile["plan_hash"] and baseline_plan != profile["plan_hash"]:
+            reasons.append(f"plan changed {baseline_plan} -> {profile['plan_hash']}")
+
+        profile["is_regression"] = bool(reasons)
+        profile["regression_reason"] = "; ".join(reasons) or None
+        count += bool(reasons)
+    return count
+
+
+def save_profiles(conn, run_id: int, profiles: list):
+    """Bulk insert the statement profiles of a run."""
+    rows = []
+    for number, profile in enumerate(profiles, start=1):
+        values = {**profile, "run_id": run_id, "statement_no": number}
+        values["plan"] = Json(profile["plan"]) if profile["plan"] is not None else None
+        rows.append(tuple(values[column] for column in STATEMENT_COLUMNS))
+
+    with conn.cursor() as cursor:
+        execute_values(
+            cursor,
+            f"INSERT INTO gold.dwh_profile_statement ({', '.join(STATEMENT_COLUMNS)}) VALUES %s",
+            rows,
+        )
+
+
+def finish_run(conn, run_id: int, status: str, profiles: list, regressions: int, error: str = None):
+    """Close the gold.dwh_profile_run row."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE gold.dwh_profile_run
+            SET finished_at = CURRENT_TIMESTAMP,
+                status = %s,
+                total_ms = %s,
+                regression_count = %s,
+                error_message = %s
+            WHERE run_id = %s;
+            """,
+            (status, sum(p["elapsed_ms"] for p in profiles), regressions, error, run_id),
+        )
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+
+def print_report(profiles: list, regressions: int, top: int):
+    """Print the slowest statements and all regressions."""
+    total_ms = sum(p["elapsed_ms"] for p in profiles)
+    print(f"\n  Statements profiled: {len(profiles)}   Total: {total_ms / 1000:.1f} s")
+
+    print(f"\n  Slowest {top} statements:")
+    print("  " + "-" * 76)
+    for p in sorted(profiles, key=lambda p: p["elapsed_ms"], reverse=True)[:top]:
+        reads = p["shared_read_blocks"]
+        reads = f"{reads:>8} reads" if reads is not None else " " * 14
+        print(f"  {p['elapsed_ms']:>10.1f} ms {reads}  {p['script_name']}:{p['script_line']}  "
+              f"{p['statement_label'][:40]}")
+
+    print(f"\n  Regressions: {regressions}")
+    for p in profiles:
+        if p["is_regression"]:
+            print(f"  ✗ {p['script_name']}:{p['script_line']}  {p['statement_label'][:60]}")
+            print(f"      {p['regression_reason']}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Profile Silver/Gold load statements")
+    parser.add_argument("scripts", nargs="*", default=DEFAULT_SCRIPTS)
+    parser.add_argument("-v", "--variable", type=parse_variable, action="append", default=[],
+                        help="psql variable as name=value")
+    parser.add_argument("--baseline", action="store_true", help="Mark this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown flagged as a regression (default 0.25)")
+    parser.add_argument("--min-ms", type=float, default=100.0,
+                        help="Ignore slowdowns smaller than this (default 100 ms)")
+    parser.add_argument("--history", type=int, default=5,
+                        help="Recent runs used when there is no baseline run (default 5)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PROFILE SILVER/GOLD LOAD STATEMENTS")
+    print("=" * 60)
+
+    conn = get_db_connection()
+    conn.autocommit = True  # the scripts issue their own BEGIN/COMMIT
+
+    variables = {"force_reload": "true", **dict(args.variable)}
+    run_id = start_run(conn, args.scripts, args.baseline)
+    print(f"Run ID: {run_id}{' (baseline)' if args.baseline else ''}")
+
+    profiles = []
+    runner = None
+    try:
+        for script in args.scripts:
+            print(f"\nProfiling {script}...")
+            # Fresh variables per script, like one psql -f per script
+            runner = ProfilingRunner(conn, variables)
+            try:
+                if not runner.run(script):
+                    print("  (script stopped at \\quit)")
+            finally:
+                profiles.extend(runner.profiles)
+    except (Exception, KeyboardInterrupt) as e:
+        # Any failure (SQL error, bad meta-command, missing file, Ctrl-C)
+        # closes the run as failed, so it never counts as history
+        error = str(e) or type(e).__name__
+        print(f"  ✗ Profiling failed: {error}")
+        with conn.cursor() as cursor:
+            cursor.execute("ROLLBACK;")  # close the script's open transaction, if any
+        if runner is not None:
+            fail_gold_load(conn, runner.variables)
+        save_profiles(conn, run_id, profiles)
+        finish_run(conn, run_id, "failed", profiles, 0, error)
+        conn.close()
+        sys.exit(1)
+
+    keys = [p["statement_key"] for p in profiles]
+    baselines = fetch_baselines(conn, run_id, keys, args.history)
+    regressions = flag_regressions(profiles, baselines, args.threshold, args.min_ms)
+    save_profiles(conn, run_id, profiles)
+    finish_run(conn, run_id, "complete", profiles, regressions)
+    conn.close()
+
+    print_report(profiles, regressions, args.top)
+
+    print("\n" + "=" * 60)
+    print("✓ Profiling complete! History: gold.dwh_profile_statement")
+    print("=" * 60)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
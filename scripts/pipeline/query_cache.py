@@ -0,0 +1,624 @@
+"""
+================================================================================
+Description: Versioned result cache service in front of the Gold marts
+================================================================================
+
+PURPOSE:
+--------
+Dashboards and analysts send the same aggregate queries over gold.fact_orders,
+gold.fact_order_items and gold.bridge_marketing_funnel again and again
+between loads. This service answers repeated queries from memory without a
+round trip to Postgres.
+
+HOW IT WORKS:
+-------------
+- Cache key = normalized SQL (comments removed, whitespace collapsed and
+  keywords/identifiers lowercased outside quotes) + Gold load version
+- Version = load_id of the last complete load in gold.dwh_load_log.
+  load_gold_data.sql announces every load with pg_notify('dwh_gold_load',
+  '<load_id>:running|complete', or ':failed' from gold.dwh_fail_load); the
+  service LISTENs on its own connection and drains notifications with a
+  non-blocking poll, so a hit never waits on the database
+- A load that died without a notification (psql stopped on an error) is
+  noticed by re-reading the log every LOADING_RECHECK_SECONDS while loading:
+  a 'running' row whose backend is gone, or older than
+  RUNNING_TIMEOUT_HOURS, does not count
+- A completed load bumps the version and drops every cached result. While a
+  load is running, hits keep serving the last complete version and misses
+  are answered but not stored (their data may be half-loaded)
+- Results are cached as the ready-to-send JSON body; memory is bounded by
+  --max-mb with least-recently-used eviction, and results larger than
+  --max-entry-mb are never cached
+- Only single read-only statements are accepted (SELECT / WITH / VALUES /
+  TABLE) and they run in READ ONLY sessions
+- Only results that can change with a Gold load alone are cached: on the
+  first miss, EXPLAIN (VERBOSE) lists the tables the statement reads (views
+  expanded), and the statement bypasses the cache if any of them is outside
+  the gold schema (Silver / Bronze / catalogs change between Gold loads) or
+  if it calls a volatile or time-dependent function (random(), now(),
+  CURRENT_DATE, ...) or a non-immutable function outside pg_catalog. The
+  verdict is remembered until the next Gold version
+
+HTTP API:
+---------
+POST /query   {"sql": "..."}  ->  {"columns", "rows", "row_count", "cached",
+                                   "version", "elapsed_ms"}
+GET  /stats   hit/miss/eviction counters, memory use, current version
+POST /flush   drop all cached results
+
+USAGE:
+------
+python query_cache.py                         # http://127.0.0.1:8765
+python query_cache.py --port 9000 --max-mb 512
+
+curl -s localhost:8765/query -d '{"sql": "SELECT order_status, COUNT(*) FROM gold.fact_orders GROUP BY 1"}'
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Gold layer created (create_gold_tables.sql) and loaded at least once
+
+================================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import select
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from psycopg2 import extensions, pool
+
+from common import DB_CONFIG, get_db_connection
+from sql_script import skip_quoted
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+NOTIFY_CHANNEL = "dwh_gold_load"
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_ENTRY_MB = 16
+DEFAULT_POOL_SIZE = 8
+
+READ_KEYWORDS = {"select", "with", "values", "table"}
+
+# Results are only cached when every table read lives here
+CACHEABLE_SCHEMAS = {"gold"}
+
+# Value changes from one call to the next although the function is STABLE
+TIME_FUNCTIONS = {"now", "statement_timestamp", "transaction_timestamp", "age"}
+# ... and the SQL keywords that call them without parentheses
+TIME_KEYWORDS = {"current_date", "current_time", "current_timestamp",
+                 "localtime", "localtimestamp"}
+
+# Remembered "do not cache" verdicts per version (cleared past this size)
+MAX_BYPASS_KEYS = 10_000
+
+NON_CACHEABLE_FUNCTIONS_SQL = """
+    SELECT DISTINCT p.proname
+    FROM pg_proc p
+    JOIN pg_namespace n ON n.oid = p.pronamespace
+    WHERE p.proname = ANY (%s)
+      AND (p.provolatile = 'v'
+           OR (p.provolatile = 's' AND n.nspname <> 'pg_catalog'));
+"""
+
+# Last complete load, and whether a load is in progress: a 'running' row
+# counts only while its backend is alive and it is younger than
+# RUNNING_TIMEOUT_HOURS (a load that died leaves its row 'running')
+VERSION_SQL = """
+    SELECT
+        COALESCE(MAX(load_id) FILTER (WHERE status = 'complete'), 0),
+        COALESCE(BOOL_OR(
+            status = 'running'
+            AND started_at > LOCALTIMESTAMP - make_interval(hours => %(timeout)s)
+            AND EXISTS (SELECT 1 FROM pg_stat_activity a WHERE a.pid = l.load_pid)
+        ), FALSE)
+    FROM gold.dwh_load_log l;
+"""
+
+# A load older than this is treated as dead
+RUNNING_TIMEOUT_HOURS = 6
+
+# While a load is running, the log is re-read this often in case it died
+# without notifying
+LOADING_RECHECK_SECONDS = 30
+
+FUNCTION_CALL = re.compile(r"([a-z_][a-z0-9_$]*)\s*\(")
+WORD = re.compile(r"[a-z_][a-z0-9_$]*")
+
+# =============================================================================
+# SQL NORMALIZATION
+# =============================================================================
+
+
+def cache_key_sql(sql: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+
+    Outside quoted text: comments removed, whitespace collapsed, letters
+    lowercased (Postgres folds unquoted identifiers and keywords anyway).
+    String literals and quoted identifiers are kept exactly, so queries that
+    differ only in a literal never share an entry.
+
+    Args:
+        sql: Query text
+
+    Returns:
+        Normalized query without a trailing semicolon
+    """
+    out = []
+    i = 0
+    pending_space = False
+    while i < len(sql):
+        end = skip_quoted(sql, i)
+        if end == i:
+            ch = sql[i]
+            i += 1
+            if ch.isspace():
+                pending_space = True
+                continue
+            text = ch.lower()
+        elif sql.startswith(("--", "/*"), i):
+            pending_space = True
+            i = end
+            continue
+        else:
+            text = sql[i:end]
+            i = end
+        if pending_space and out:
+            out.append(" ")
+        pending_space = False
+        out.append(text)
+    return "".join(out).rstrip("; ")
+
+
+def check_read_only(key_sql: str):
+    """
+    Reject anything but a single read-only statement.
+
+    Args:
+        key_sql: Output of cache_key_sql()
+
+    Raises:
+        ValueError: Empty, multi-statement or non-query SQL
+    """
+    if not key_sql:
+        raise ValueError("Empty query")
+    first_word = key_sql.split(None, 1)[0].split("(", 1)[0]
+    if first_word not in READ_KEYWORDS:
+        raise ValueError(f"Only read queries are accepted, got: {first_word.upper()}")
+
+    i = 0
+    while i < len(key_sql):
+        end = skip_quoted(key_sql, i)
+        if end == i:
+            if key_sql[i] == ";":
+                raise ValueError("Only one statement per query")
+            i += 1
+        else:
+            i = end
+
+
+def called_names(key_sql: str) -> set:
+    """
+    Words used as function names (followed by '(') or time keywords.
+
+    Args:
+        key_sql: Output of cache_key_sql() (lowercased outside quotes)
+
+    Returns:
+        Set of candidate function names - keywords such as IN or OVER are
+        included too and simply match nothing in pg_proc
+    """
+    unquoted = []
+    i = 0
+    while i < len(key_sql):
+        end = skip_quoted(key_sql, i)
+        if end == i:
+            unquoted.append(key_sql[i])
+            i += 1
+        else:
+            unquoted.append(" ")
+            i = end
+    text = "".join(unquoted)
+    names = set(FUNCTION_CALL.findall(text))
+    names.update(word for word in WORD.findall(text) if word in TIME_KEYWORDS)
+    return names
+
+
+def plan_schemas(plan: dict) -> set:
+    """
+    Schemas of every table scanned in an EXPLAIN (VERBOSE, FORMAT JSON) plan.
+
+    Function scans count as schema None (their rows come from outside any
+    table).
+
+    Args:
+        plan: A plan node (the "Plan" entry of the EXPLAIN output)
+
+    Returns:
+        Set of schema names
+    """
+    schemas = set()
+    if "Relation Name" in plan:
+        schemas.add(plan.get("Schema"))
+    elif "Function Name" in plan:
+        schemas.add(None)
+    for child in plan.get("Plans", []):
+        schemas |= plan_schemas(child)
+    return schemas
+
+
+def is_cacheable(cursor, sql: str, key_sql: str) -> bool:
+    """
+    Decide whether a statement's result only changes with a Gold load.
+
+    Args:
+        cursor: Cursor of the (read-only) session that will run the query
+        sql: Query text
+        key_sql: Output of cache_key_sql()
+
+    Returns:
+        True if every table read is in CACHEABLE_SCHEMAS and no volatile or
+        time-dependent function is called
+    """
+    names = called_names(key_sql)
+    if names & (TIME_FUNCTIONS | TIME_KEYWORDS):
+        return False
+    if names:
+        cursor.execute(NON_CACHEABLE_FUNCTIONS_SQL, (sorted(names),))
+        if cursor.fetchone() is not None:
+            return False
+
+    cursor.execute("EXPLAIN (VERBOSE, FORMAT JSON) " + sql)
+    explain = cursor.fetchone()[0]
+    if isinstance(explain, str):
+        explain = json.loads(explain)
+    schemas = plan_schemas(explain[0]["Plan"])
+    return bool(schemas) and schemas <= CACHEABLE_SCHEMAS
+
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+
+class ResultCache:
+    """
+    Size-bounded LRU map of (version, query hash) -> encoded result, plus
+    the keys found not cacheable (is_cacheable) for the current version.
+
+    Thread-safe; sizes are the byte lengths of the cached bodies.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.bypass = set()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0,
+                      "too_large": 0, "bypassed": 0, "invalidations": 0}
+
+    def is_bypassed(self, key: tuple) -> bool:
+        """True if the query was found not cacheable in this version."""
+        with self.lock:
+            if key in self.bypass:
+                self.stats["bypassed"] += 1
+                return True
+            return False
+
+    def mark_bypass(self, key: tuple):
+        """Remember that a query must always go to Postgres (this version)."""
+        with self.lock:
+            if len(self.bypass) >= MAX_BYPASS_KEYS:
+                self.bypass.clear()
+            self.bypass.add(key)
+            self.stats["bypassed"] += 1
+
+    def get(self, key: tuple):
+        """Return the cached body for key (and mark it recently used), or None."""
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        """Store a body, evicting least recently used entries to make room."""
+        if len(body) > self.max_entry_bytes:
+            self.stats["too_large"] += 1
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self.entries[key] = body
+            self.bytes += len(body)
+            self.stats["stored"] += 1
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry (a new Gold version was published)."""
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+            self.bypass.clear()
+            self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        """Counters and memory use."""
+        with self.lock:
+            return {**self.stats, "entries": len(self.entries), "bytes": self.bytes,
+                    "max_bytes": self.max_bytes}
+
+
+# =============================================================================
+# GOLD VERSION TRACKING
+# =============================================================================
+
+
+class GoldVersion:
+    """
+    Current Gold load version, kept up to date from pg_notify messages.
+
+    refresh() is cheap enough to call on every request: it only reads
+    notifications already sitting in the listener socket.
+    """
+
+    def __init__(self, on_change):
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.version = 0
+        self.loading = False
+        self.checked_at = 0.0
+        self.conn = None
+        self.connect()
+
+    def connect(self):
+        """(Re)open the listener connection and read the version from the log."""
+        self.conn = get_db_connection()
+        self.conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL};")
+        self.read_log()
+
+    def read_log(self):
+        """Read the version and loading flag from gold.dwh_load_log."""
+        with self.conn.cursor() as cursor:
+            cursor.execute(VERSION_SQL, {"timeout": RUNNING_TIMEOUT_HOURS})
+            version, loading = cursor.fetchone()
+        self.checked_at = time.monotonic()
+        self.set(version, loading)
+
+    def set(self, version: int, loading: bool):
+        """Apply a version; a new complete version invalidates the cache."""
+        changed = version != self.version
+        self.version, self.loading = version, loading
+        if changed:
+            self.on_change(version)
+
+    def refresh(self) -> tuple:
+        """
+        Apply pending notifications.
+
+        Returns:
+            (version, loading)
+        """
+        with self.lock:
+            try:
+                if select.select([self.conn], [], [], 0)[0]:
+                    self.conn.poll()
+            except Exception:
+                # Lost the listener: reconnect, re-reading the version
+                self.conn.close()
+                self.connect()
+            while self.conn.notifies:
+                payload = self.conn.notifies.pop(0).payload
+                load_id, _, status = payload.partition(":")
+                if status == "complete":
+                    self.set(max(self.version, int(load_id)), False)
+                elif status == "running":
+                    self.loading = True
+                    self.checked_at = time.monotonic()
+                elif status == "failed":
+                    self.loading = False
+            # A load killed without a 'failed' notification
+            if self.loading and time.monotonic() - self.checked_at > LOADING_RECHECK_SECONDS:
+                self.read_log()
+            return self.version, self.loading
+
+
+# =============================================================================
+# QUERY SERVICE
+# =============================================================================
+
+
+class QueryService:
+    """Answers read queries from the cache, falling back to Postgres."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int, pool_size: int,
+                 statement_timeout_ms: int):
+        self.cache = ResultCache(max_bytes, max_entry_bytes)
+        self.pool = pool.ThreadedConnectionPool(
+            1, pool_size, options=f"-c statement_timeout={statement_timeout_ms}", **DB_CONFIG
+        )
+        self.version = GoldVersion(on_change=self.on_version_change)
+
+    def on_version_change(self, version: int):
+        self.cache.clear()
+        print(f"  Gold version {version} - cache cleared")
+
+    def query(self, sql: str) -> tuple:
+        """
+        Run (or look up) a read query.
+
+        Args:
+            sql: Query text
+
+        Returns:
+            (JSON body bytes, cached flag)
+        """
+        key_sql = cache_key_sql(sql)
+        check_read_only(key_sql)
+        version, loading = self.version.refresh()
+        key = (version, hashlib.sha256(key_sql.encode("utf-8")).digest())
+
+        start = time.perf_counter()
+        bypass = self.cache.is_bypassed(key)
+        if not bypass:
+            body = self.cache.get(key)
+            if body is not None:
+                return body, True
+
+        conn = self.pool.getconn()
+        try:
+            conn.set_session(readonly=True, autocommit=True)
+            with conn.cursor() as cursor:
+                cacheable = not bypass and is_cacheable(cursor, sql, key_sql)
+                cursor.execute(sql)
+                columns = [column.name for column in cursor.description]
+                rows = cursor.fetchall()
+        finally:
+            self.pool.putconn(conn)
+
+        body = json.dumps({
+            "columns": columns,
+            "rows": rows,
+            "row_count": len(rows),
+            "version": version,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        }, default=str).encode("utf-8")
+        if not cacheable:
+            if not bypass:
+                self.cache.mark_bypass(key)
+        # A result read during a load may mix old and new rows
+        elif not loading and self.version.refresh() == (version, False):
+            self.cache.put(key, body)
+        return body, False
+
+    def stats(self) -> dict:
+        version, loading = self.version.refresh()
+        return {**self.cache.snapshot(), "version": version, "loading": loading}
+
+
+# =============================================================================
+# HTTP SERVER
+# =============================================================================
+
+
+def make_handler(service: QueryService):
+    """Build the request handler class bound to a service."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_error_json(self, status: int, message: str):
+            self.send_json(status, json.dumps({"error": message}).encode("utf-8"))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self.send_json(200, json.dumps(service.stats()).encode("utf-8"))
+            else:
+                self.send_error_json(404, "Unknown path")
+
+        def do_POST(self):
+            if self.path == "/flush":
+                service.cache.clear()
+                self.send_json(200, b'{"flushed": true}')
+                return
+            if self.path != "/query":
+                self.send_error_json(404, "Unknown path")
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                sql = json.loads(self.rfile.read(length))["sql"]
+                body, cached = service.query(sql)
+            except (ValueError, KeyError, TypeError) as e:
+                self.send_error_json(400, str(e))
+                return
+            except Exception as e:  # database errors go back to the client
+                self.send_error_json(500, str(e).strip())
+                return
+
+            # Splice the request metadata into the cached body without re-encoding
+            elapsed = round((time.perf_counter() - start) * 1000, 3)
+            if cached:
+                body = body[:-1] + f', "cached": true, "served_ms": {elapsed}}}'.encode("utf-8")
+            else:
+                body = body[:-1] + b', "cached": false}'
+            self.send_json(200, body)
+
+        def log_message(self, format, *args):
+            pass  # one line per query would drown the console
+
+    return Handler
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Versioned result cache for the Gold marts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help=f"Cache memory bound (default {DEFAULT_MAX_MB} MB)")
+    parser.add_argument("--max-entry-mb", type=float, default=DEFAULT_MAX_ENTRY_MB,
+                        help="Larger results are served but not cached")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Postgres connections for cache misses")
+    parser.add_argument("--statement-timeout-ms", type=int, default=60_000)
+    args = parser.parse_args()
+
+    service = QueryService(
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        max_entry_bytes=int(args.max_entry_mb * 1024 * 1024),
+        pool_size=args.pool_size,
+        statement_timeout_ms=args.statement_timeout_ms,
+    )
+
+    print("=" * 60)
+    print("GOLD QUERY CACHE")
+    print("=" * 60)
+    print(f"Listening on http://{args.host}:{args.port}")
+    print(f"Cache: {args.max_mb:g} MB   Gold version: {service.version.version}")
+    print("=" * 60)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Stopped")
+    finally:
+        server.server_close()
+        service.pool.closeall()
+
+
+if __name__ == "__main__":
+    main()
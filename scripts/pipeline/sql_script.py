@@ -0,0 +1,465 @@
+"""
+================================================================================
+Description: Run the layer SQL scripts from Python
+================================================================================
+
+PURPOSE:
+--------
+The Bronze/Silver/Gold loads are psql scripts: besides SQL they use a small
+set of psql meta-commands (\\echo, \\set, \\gset, \\if/\\elif/\\else/\\endif,
+\\ir, \\quit) and variable interpolation (:name, :'name', :{?name}).
+
+This module splits such a script into statements and replays it over a
+psycopg2 connection, so pipeline tools can hook into every statement
+(e.g., profile_sql.py wraps each one in EXPLAIN ANALYZE).
+
+Only the meta-commands used by this repository are supported; any other
+meta-command is reported and skipped.
+
+USAGE:
+------
+from sql_script import ScriptRunner
+
+conn = get_db_connection()
+conn.autocommit = True          # the scripts manage their own transactions
+ScriptRunner(conn, {"force_reload": "true"}).run("../silver/load_silver_data.sql")
+
+================================================================================
+"""
+
+import argparse
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DOLLAR_QUOTE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+VARIABLE_NAME = re.compile(r"[A-Za-z0-9_]+")
+
+# Values psql accepts for a boolean variable (\if, ON_ERROR_STOP, ...)
+TRUE_VALUES = {"true", "on", "yes", "1", "t", "y"}
+FALSE_VALUES = {"false", "off", "no", "0", "f", "n"}
+
+
+@dataclass
+class Statement:
+    """One SQL statement, as written in the script (before interpolation)."""
+
+    sql: str
+    line: int
+    gset_prefix: str = None  # set when the statement is terminated by \gset
+
+
+@dataclass
+class MetaCommand:
+    """One psql meta-command line (e.g., \\if :reload_table)."""
+
+    command: str
+    args: str
+    line: int
+    tokens: list = field(default_factory=list)
+
+
+# =============================================================================
+# PARSING FUNCTIONS
+# =============================================================================
+
+
+def skip_quoted(text: str, i: int) -> int:
+    """
+    Return the index just past the quoted section, comment or dollar-quoted
+    body that starts at text[i], or i if nothing quoted starts there.
+
+    Args:
+        text: Script text
+        i: Current position
+
+    Returns:
+        Index of the first character after the quoted section
+    """
+    ch = text[i]
+    if ch in ("'", '"'):
+        end = i + 1
+        while True:
+            end = text.find(ch, end)
+            if end == -1:
+                return len(text)
+            if text.startswith(ch * 2, end):
+                end += 2  # doubled quote is an escaped quote
+                continue
+            return end + 1
+    if text.startswith("--", i):
+        end = text.find("\n", i)
+        return len(text) if end == -1 else end
+    if text.startswith("/*", i):
+        end = text.find("*/", i + 2)
+        return len(text) if end == -1 else end + 2
+    if ch == "$":
+        match = DOLLAR_QUOTE.match(text, i)
+        if match:
+            end = text.find(match.group(0), match.end())
+            return len(text) if end == -1 else end + len(match.group(0))
+    return i
+
+
+def strip_comments(sql: str) -> str:
+    """Remove -- and /* */ comments from a statement."""
+    out = []
+    i = 0
+    while i < len(sql):
+        end = skip_quoted(sql, i)
+        if end == i:
+            out.append(sql[i])
+            i += 1
+        elif sql.startswith(("--", "/*"), i):
+            out.append(" ")
+            i = end
+        else:
+            out.append(sql[i:end])
+            i = end
+    return "".join(out)
+
+
+def normalize_sql(sql: str) -> str:
+    """Comments removed and whitespace collapsed - used as a statement identity."""
+    return " ".join(strip_comments(sql).split())
+
+
+def tokenize_meta_args(args: str) -> list:
+    """
+    Split meta-command arguments the way psql does.
+
+    'quoted text' becomes one token (quotes removed, '' unescaped); variable
+    references (:name, :'name', :{?name}) are kept verbatim for interpolation.
+
+    Args:
+        args: Text after the meta-command name
+
+    Returns:
+        List of (kind, value) tuples, kind is 'literal' or 'word'
+    """
+    tokens = []
+    i = 0
+    while i < len(args):
+        if args[i].isspace():
+            i += 1
+        elif args[i] == "'":
+            end = skip_quoted(args, i)
+            tokens.append(("literal", args[i + 1 : end - 1].replace("''", "'")))
+            i = end
+        else:
+            end = i
+            while end < len(args) and not args[end].isspace():
+                end += 1
+            tokens.append(("word", args[i:end]))
+            i = end
+    return tokens
+
+
+def parse_script(text: str) -> list:
+    """
+    Split a psql script into statements and meta-commands.
+
+    Args:
+        text: Script text
+
+    Returns:
+        List of Statement / MetaCommand items in script order
+    """
+    items = []
+    buf = []
+    buf_line = None
+    i = 0
+    line = 1
+
+    def flush(gset_prefix=None):
+        nonlocal buf, buf_line
+        sql = "".join(buf).strip()
+        if normalize_sql(sql):
+            items.append(Statement(sql, buf_line, gset_prefix))
+        buf = []
+        buf_line = None
+
+    while i < len(text):
+        ch = text[i]
+        end = skip_quoted(text, i)
+        if end > i:
+            if buf_line is None and not text.startswith(("--", "/*"), i):
+                buf_line = line
+            buf.append(text[i:end])
+            line += text.count("\n", i, end)
+            i = end
+            continue
+
+        if ch == ";":
+            buf.append(ch)
+            flush()
+        elif ch == "\\":
+            end = text.find("\n", i)
+            end = len(text) if end == -1 else end
+            command, _, args = text[i + 1 : end].partition(" ")
+            command = command.strip()
+            if command in ("gset", "g"):
+                flush(args.strip() if command == "gset" else None)
+            else:
+                items.append(MetaCommand(command, args.strip(), line, tokenize_meta_args(args)))
+            i = end
+            continue
+        else:
+            if buf_line is None and not ch.isspace():
+                buf_line = line
+            buf.append(ch)
+            if ch == "\n":
+                line += 1
+        i += 1
+
+    flush()
+    return items
+
+
+# =============================================================================
+# VARIABLE INTERPOLATION
+# =============================================================================
+
+
+def quote_literal(value: str) -> str:
+    """Quote a value as an SQL string literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def quote_ident(value: str) -> str:
+    """Quote a value as an SQL identifier."""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def expand_reference(text: str, i: int, variables: dict) -> tuple:
+    """
+    Expand a psql variable reference starting at text[i] (a ':').
+
+    Args:
+        text: Text being interpolated
+        i: Position of the ':'
+        variables: Current psql variables
+
+    Returns:
+        (replacement, end index), or (None, i) if text[i] is not a reference
+    """
+    nxt = text[i + 1 : i + 2]
+    if nxt in ("'", '"'):
+        end = text.find(nxt, i + 2)
+        name = text[i + 2 : end] if end != -1 else None
+        if name in variables:
+            quote = quote_literal if nxt == "'" else quote_ident
+            return quote(variables[name]), end + 1
+    elif nxt == "{" and text.startswith("?", i + 2):
+        end = text.find("}", i + 3)
+        if end != -1:
+            return ("TRUE" if text[i + 3 : end] in variables else "FALSE"), end + 1
+    else:
+        match = VARIABLE_NAME.match(text, i + 1)
+        if match and match.group(0) in variables:
+            return variables[match.group(0)], match.end()
+    return None, i
+
+
+def interpolate(sql: str, variables: dict) -> str:
+    """
+    Substitute psql variables in a statement, outside quotes and comments.
+
+    Unknown variables are left untouched, as psql does.
+
+    Args:
+        sql: Statement text
+        variables: Current psql variables
+
+    Returns:
+        Statement text ready to execute
+    """
+    out = []
+    i = 0
+    while i < len(sql):
+        end = skip_quoted(sql, i)
+        if end > i:
+            out.append(sql[i:end])
+            i = end
+        elif sql.startswith("::", i):
+            out.append("::")
+            i += 2
+        elif sql[i] == ":":
+            replacement, end = expand_reference(sql, i, variables)
+            if replacement is None:
+                out.append(":")
+                i += 1
+            else:
+                out.append(replacement)
+                i = end
+        else:
+            out.append(sql[i])
+            i += 1
+    return "".join(out)
+
+
+def meta_values(tokens: list, variables: dict) -> list:
+    """Resolve meta-command tokens to their values."""
+    values = []
+    for kind, value in tokens:
+        if kind == "word" and value.startswith(":"):
+            replacement, end = expand_reference(value, 0, variables)
+            if replacement is not None and end == len(value):
+                if value.startswith(":'"):
+                    replacement = variables[value[2:-1]]
+                values.append(replacement)
+                continue
+        values.append(value)
+    return values
+
+
+def parse_variable(text: str) -> tuple:
+    """Parse a -v name=value command-line argument (as psql -v does)."""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected name=value, got {text!r}")
+    return name, value
+
+
+def parse_bool(value: str) -> bool:
+    """Interpret a psql boolean value."""
+    lowered = value.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"Unrecognized boolean value: {value!r}")
+
+
+# =============================================================================
+# SCRIPT RUNNER
+# =============================================================================
+
+
+class ScriptRunner:
+    """
+    Replay a psql script over a psycopg2 connection.
+
+    Subclasses override execute() to observe or wrap individual statements.
+    The connection should be in autocommit mode, because the scripts issue
+    their own BEGIN/COMMIT.
+    """
+
+    def __init__(self, conn, variables: dict = None, echo=print):
+        self.conn = conn
+        self.variables = dict(variables or {})
+        self.echo = echo
+        self.script_path = None
+
+    def execute(self, cursor, sql: str, statement: Statement):
+        """Execute one statement. Override to profile or instrument."""
+        cursor.execute(sql)
+
+    def run(self, script_path) -> bool:
+        """
+        Run a script to the end (or until \\quit).
+
+        Args:
+            script_path: Path to the .sql file
+
+        Returns:
+            False if the script stopped at \\quit, True otherwise
+        """
+        with self.conn.cursor() as cursor:
+            return self.include(cursor, Path(script_path))
+
+    def include(self, cursor, script_path: Path) -> bool:
+        """
+        Run one script file (the top-level script or an \\i / \\ir include).
+
+        Override to replace an included file with something else (e.g., the
+        parallel fact build in load_gold_parallel.py).
+
+        Returns:
+            False if the script stopped at \\quit, True otherwise
+        """
+        parent = self.script_path
+        self.script_path = script_path
+        try:
+            return self.run_items(cursor, parse_script(script_path.read_text(encoding="utf-8")))
+        finally:
+            self.script_path = parent
+
+    def run_items(self, cursor, items: list) -> bool:
+        """Execute parsed items of the current script."""
+        # Stack of [branch active, some branch already taken, parent active]
+        branches = []
+        active = True
+
+        for item in items:
+            if isinstance(item, MetaCommand) and item.command in ("if", "elif", "else", "endif"):
+                active = self.branch(item, branches, active)
+                continue
+            if not active:
+                continue
+
+            if isinstance(item, Statement):
+                sql = interpolate(item.sql, self.variables)
+                self.execute(cursor, sql, item)
+                if item.gset_prefix is not None:
+                    self.gset(cursor, item)
+                continue
+
+            values = meta_values(item.tokens, self.variables)
+            if item.command == "echo":
+                self.echo(" ".join(values))
+            elif item.command == "set":
+                if values:
+                    self.variables[values[0]] = "".join(values[1:])
+            elif item.command == "unset":
+                self.variables.pop(values[0], None)
+            elif item.command in ("i", "include", "ir", "include_relative"):
+                path = Path(values[0])
+                if item.command in ("ir", "include_relative") and not path.is_absolute():
+                    path = self.script_path.parent / path
+                if not self.include(cursor, path):
+                    return False
+            elif item.command in ("quit", "q"):
+                return False
+            else:
+                self.echo(f"  (skipped unsupported meta-command \\{item.command} "
+                          f"at {self.script_path.name}:{item.line})")
+        return True
+
+    def branch(self, item: MetaCommand, branches: list, active: bool) -> bool:
+        """Track \\if/\\elif/\\else/\\endif and return whether the next lines run."""
+        if item.command == "if":
+            condition = active and parse_bool(" ".join(meta_values(item.tokens, self.variables)))
+            branches.append([condition, condition, active])
+            return condition
+        if not branches:
+            raise ValueError(f"\\{item.command} without \\if at {self.script_path.name}:{item.line}")
+        branch = branches[-1]
+        if item.command == "endif":
+            branches.pop()
+            return branch[2]
+        if item.command == "elif":
+            condition = (branch[2] and not branch[1]
+                         and parse_bool(" ".join(meta_values(item.tokens, self.variables))))
+        else:
+            condition = branch[2] and not branch[1]
+        branch[0] = condition
+        branch[1] = branch[1] or condition
+        return condition
+
+    def gset(self, cursor, statement: Statement):
+        """Store the single result row of a \\gset statement as variables."""
+        row = cursor.fetchone() if cursor.description else None
+        if row is None or cursor.fetchone() is not None:
+            raise ValueError(f"\\gset needs exactly one row ({self.script_path.name}:{statement.line})")
+        for column, value in zip(cursor.description, row):
+            if value is None:
+                self.variables.pop(statement.gset_prefix + column.name, None)
+            elif isinstance(value, bool):
+                self.variables[statement.gset_prefix + column.name] = "t" if value else "f"
+            else:
+                self.variables[statement.gset_prefix + column.name] = str(value)
@@ -0,0 +1,930 @@
+"""
+================================================================================
+Description: Pre-flight validation of the Bronze CSV datasets before COPY
+================================================================================
+
+PURPOSE:
+--------
+Scans every CSV file loaded by load_bronze_data.sql BEFORE any table is
+truncated, so a bad quote, a wrong delimiter count or a non-UTF-8 byte is
+caught up front instead of halfway through a COPY.
+
+For each file it checks:
+- Header matches the COPY column list (a UTF-8 BOM is tolerated)
+- Every record has the expected number of columns
+- Every record is valid UTF-8
+- Quoted fields are properly terminated
+- Row count (data records, excluding header)
+
+Bad records are reported with their line number and byte offset.
+
+CHANGE DETECTION:
+-----------------
+A BLAKE2b content hash of every file is computed during the same scan.
+load_bronze_data.sql compares it with bronze.dwh_load_manifest and skips
+files that are byte-for-byte identical to the last load.
+
+With --row-hashes, a 64-bit hash of every record is also kept (in
+row_hashes/<table>.npy next to the JSON manifest) and compared with the
+previous run to report rows added / removed.
+
+HOW IT WORKS:
+-------------
+- Each file is memory-mapped and scanned in a single pass
+- Quote-free ASCII records (the vast majority) take a fast path that only
+  counts delimiters; only records containing quotes go through the csv module
+- Files are scanned in parallel, one worker process per file
+
+OUTPUT:
+-------
+- JSON manifest (default: datasets/preflight_manifest.json)
+- bronze.dwh_preflight_manifest table, checked by load_bronze_data.sql
+  before it truncates anything
+
+USAGE:
+------
+python validate_datasets.py                 # validate + write manifest to DB
+python validate_datasets.py --no-db         # validate, JSON manifest only
+python validate_datasets.py --workers 4
+python validate_datasets.py --row-hashes    # also report per-row changes
+python validate_datasets.py --no-orphans    # skip the orphan-key checks
+
+Exit code is 0 when every file is valid, 1 otherwise.
+
+PREREQUISITES:
+--------------
+pip install -r requirements.txt
+Run create_bronze_tables.sql first (creates bronze.dwh_preflight_manifest
+and bronze.dwh_orphan_audit)
+
+================================================================================
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from common import CSV_SOURCES, DATASETS_DIR, get_db_connection, get_source, source_path
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_MANIFEST = DATASETS_DIR / "preflight_manifest.json"
+
+UTF8_BOM = b"\xef\xbb\xbf"
+DELIMITER = b","
+QUOTE = b'"'
+
+# Maximum bad records recorded per file (all are still counted)
+MAX_BAD_SAMPLES = 25
+
+# A quoted field longer than this is treated as an unterminated quote
+MAX_RECORD_BYTES = 1024 * 1024
+
+# Referential checks: (child table, child column, parent table, parent column,
+# key normalization matching the Silver transform: "id" = TRIM,
+# "zip" = LPAD(TRIM(x), 5, '0'), "lower" = LOWER(TRIM(x)))
+ORPHAN_CHECKS = [
+    ("olist_orders", "customer_id", "olist_customers", "customer_id", "id"),
+    ("olist_order_items", "order_id", "olist_orders", "order_id", "id"),
+    ("olist_order_items", "product_id", "olist_products", "product_id", "id"),
+    ("olist_order_items", "seller_id", "olist_sellers", "seller_id", "id"),
+    ("olist_order_payments", "order_id", "olist_orders", "order_id", "id"),
+    ("olist_order_reviews", "order_id", "olist_orders", "order_id", "id"),
+    ("olist_customers", "customer_zip_code_prefix",
+     "olist_geolocation", "geolocation_zip_code_prefix", "zip"),
+    ("olist_sellers", "seller_zip_code_prefix",
+     "olist_geolocation", "geolocation_zip_code_prefix", "zip"),
+    ("olist_products", "product_category_name",
+     "product_category_name_translation", "product_category_name", "lower"),
+    ("olist_closed_deals", "mql_id", "olist_marketing_qualified_leads", "mql_id", "id"),
+]
+
+# Orphan keys sampled per check
+MAX_ORPHAN_SAMPLES = 10
+
+# Parent key sets with more unique keys than this become Bloom filters
+DEFAULT_BLOOM_THRESHOLD = 20_000_000
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 7
+
+# Parent key hashes are buffered and reduced in chunks of this many keys
+KEY_CHUNK = 1 << 20
+
+# Bloom filter bit positions are computed for this many keys at a time
+BLOOM_BATCH = 1 << 16
+
+# Set bits per byte value, for the Bloom filter's key count estimate
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# =============================================================================
+# KEY SETS
+# =============================================================================
+
+
+def normalize_key(value: bytes, mode: str) -> bytes:
+    """Normalize a key field the way the Silver transform does."""
+    value = value.strip()
+    if mode == "zip":
+        return value.rjust(5, b"0")
+    if mode == "lower":
+        return value.lower()
+    return value
+
+
+def key_columns_for(table: str) -> dict:
+    """
+    Key columns a table contributes to ORPHAN_CHECKS.
+
+    Returns:
+        {(column, mode): "parent" | "child"}
+    """
+    roles = {}
+    for child, child_col, parent, parent_col, mode in ORPHAN_CHECKS:
+        if child == table:
+            roles[(child_col, mode)] = "child"
+        if parent == table:
+            roles[(parent_col, mode)] = "parent"
+    return roles
+
+
+class BloomFilter:
+    """
+    Bit-packed Bloom filter over 64-bit key hashes (numpy, double hashing).
+
+    Keys are added and tested BLOOM_BATCH at a time, so the bit positions
+    never take more than BLOOM_BATCH x hashes x 8 bytes.
+    """
+
+    def __init__(self, capacity: int, bits_per_key: int = BLOOM_BITS_PER_KEY,
+                 hashes: int = BLOOM_HASHES):
+        self.size = max(64, -(-capacity * bits_per_key // 64) * 64)
+        self.hashes = hashes
+        self.bits = np.zeros(self.size // 8, dtype=np.uint8)
+
+    def positions(self, keys: np.ndarray) -> np.ndarray:
+        """Bit positions, one row per key and one column per hash function."""
+        h1 = keys & np.uint64(0xFFFFFFFF)
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, keys: np.ndarray):
+        for start in range(0, keys.size, BLOOM_BATCH):
+            pos = self.positions(keys[start : start + BLOOM_BATCH]).ravel()
+            np.bitwise_or.at(
+                self.bits,
+                pos >> np.uint64(3),
+                np.left_shift(1, pos & np.uint64(7)).astype(np.uint8),
+            )
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        found = np.empty(keys.size, dtype=bool)
+        for start in range(0, keys.size, BLOOM_BATCH):
+            pos = self.positions(keys[start : start + BLOOM_BATCH])
+            hit = self.bits[pos >> np.uint64(3)] & np.left_shift(1, pos & np.uint64(7)).astype(
+                np.uint8
+            )
+            found[start : start + BLOOM_BATCH] = (hit != 0).all(axis=1)
+        return found
+
+    def approximate_count(self) -> int:
+        """Number of distinct keys added, estimated from the share of bits set."""
+        bits_set = int(POPCOUNT[self.bits].sum(dtype=np.int64))
+        if bits_set >= self.size:
+            return self.size
+        return int(round(-self.size / self.hashes * np.log1p(-bits_set / self.size)))
+
+
+class KeyCollector:
+    """
+    Per-column key hashes (and first record offsets) gathered during a scan.
+
+    Child keys are kept until finish(), which needs every occurrence. Parent
+    keys only need membership: every KEY_CHUNK hashes the buffer is folded
+    into a sorted unique set, and once that set grows past the Bloom
+    threshold into a Bloom filter sized for the whole file. From then on the
+    raw hashes of each chunk go straight into the filter and are dropped.
+    """
+
+    def __init__(self, columns: list, roles: dict, bloom_threshold: int, file_size: int):
+        self.roles = roles
+        self.bloom_threshold = bloom_threshold
+        self.file_size = file_size
+        self.index = {key: columns.index(key[0]) for key in roles}
+        self.hashes = {key: bytearray() for key in roles}
+        self.offsets = {key: array("Q") for key, role in roles.items() if role == "child"}
+        self.unique = {
+            key: np.empty(0, dtype=np.uint64) for key, role in roles.items() if role == "parent"
+        }
+        self.blooms = {}
+
+    def add(self, fields: list, offset: int):
+        """Record the key fields of one record (fields as bytes)."""
+        for key, i in self.index.items():
+            value = normalize_key(fields[i], key[1])
+            if not value:
+                continue
+            self.hashes[key] += hashlib.blake2b(value, digest_size=8).digest()
+            if key in self.offsets:
+                self.offsets[key].append(offset)
+            elif len(self.hashes[key]) >= KEY_CHUNK * 8:
+                self.reduce_parent(key, offset)
+
+    def reduce_parent(self, key: tuple, offset: int):
+        """
+        Fold the buffered hashes of a parent column into its key set.
+
+        Args:
+            key: (column, mode)
+            offset: Byte offset reached in the file (sizes the Bloom filter)
+        """
+        chunk = np.frombuffer(bytes(self.hashes[key]), dtype=np.uint64)
+        self.hashes[key] = bytearray()
+        if key in self.blooms:
+            self.blooms[key].add(chunk)
+            return
+
+        unique = np.union1d(self.unique[key], chunk)
+        if unique.size > self.bloom_threshold:
+            # Capacity: the keys so far, extrapolated to the whole file
+            capacity = unique.size * self.file_size // max(offset, 1)
+            bloom = BloomFilter(max(capacity, unique.size))
+            bloom.add(unique)
+            self.blooms[key] = bloom
+            unique = None
+        self.unique[key] = unique
+
+    def finish(self) -> dict:
+        """
+        Reduce the gathered hashes.
+
+        Returns:
+            {(column, mode): {"role", "keys" (unique hashes) or "bloom",
+                              parent only: "unique_keys" (estimated with a Bloom filter),
+                              child only: "first_offsets", "counts"}}
+        """
+        sets = {}
+        for key, role in self.roles.items():
+            if role == "parent":
+                self.reduce_parent(key, self.file_size)
+                if key in self.blooms:
+                    bloom = self.blooms.pop(key)
+                    entry = {
+                        "role": role,
+                        "unique_keys": bloom.approximate_count(),
+                        "bloom": bloom,
+                    }
+                else:
+                    unique = self.unique.pop(key)
+                    entry = {"role": role, "unique_keys": int(unique.size), "keys": unique}
+            else:
+                hashes = np.frombuffer(bytes(self.hashes[key]), dtype=np.uint64)
+                self.hashes[key] = None
+                unique, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+                offsets = np.frombuffer(self.offsets[key], dtype=np.uint64)
+                entry = {
+                    "role": role,
+                    "keys": unique,
+                    "first_offsets": offsets[first],
+                    "counts": counts,
+                    "rows": int(hashes.size),
+                }
+            sets[key] = entry
+        return sets
+
+
+# =============================================================================
+# SCAN FUNCTIONS
+# =============================================================================
+
+
+def parse_quoted_record(raw: bytes) -> list:
+    """
+    Parse a record that contains quotes, using PostgreSQL COPY CSV rules.
+
+    Args:
+        raw: Record bytes without the trailing newline
+
+    Returns:
+        List of field values
+
+    Raises:
+        UnicodeDecodeError: Record is not valid UTF-8
+        csv.Error: Quoting is malformed
+    """
+    text = raw.decode("utf-8")
+    return next(csv.reader([text], strict=True))
+
+
+def find_record_end(mm: mmap.mmap, start: int, size: int) -> tuple:
+    """
+    Find the end of the CSV record starting at `start`.
+
+    A record normally ends at the next newline, but a quoted field may span
+    several physical lines. Quotes are counted per line: while the running
+    count is odd the record continues onto the next line.
+
+    Args:
+        mm: Memory-mapped file
+        start: Byte offset of the record
+        size: File size
+
+    Returns:
+        (end offset excluding newline, next record offset, physical lines, terminated)
+    """
+    end = mm.find(b"\n", start)
+    if end == -1:
+        end = size
+    quotes = mm[start:end].count(QUOTE)
+    lines = 1
+
+    while quotes % 2 == 1:
+        if end >= size or end - start > MAX_RECORD_BYTES:
+            # Unterminated quote - resync on the line after the record start
+            first_end = mm.find(b"\n", start)
+            first_end = size if first_end == -1 else first_end
+            return first_end, min(first_end + 1, size), 1, False
+        next_end = mm.find(b"\n", end + 1)
+        if next_end == -1:
+            next_end = size
+        quotes += mm[end + 1 : next_end].count(QUOTE)
+        end = next_end
+        lines += 1
+
+    return end, end + 1, lines, True
+
+
+def diff_row_hashes(row_hashes: bytearray, hash_file: Path) -> tuple:
+    """
+    Compare this run's record hashes with the previous run and save them.
+
+    Args:
+        row_hashes: Concatenated 8-byte record hashes
+        hash_file: .npy file holding the previous run's sorted hashes
+
+    Returns:
+        (rows_added, rows_removed), or (None, None) on the first run
+    """
+    current = np.unique(np.frombuffer(bytes(row_hashes), dtype=np.uint64))
+    added = removed = None
+    if hash_file.is_file():
+        previous = np.load(hash_file)
+        added = int(np.setdiff1d(current, previous, assume_unique=True).size)
+        removed = int(np.setdiff1d(previous, current, assume_unique=True).size)
+    hash_file.parent.mkdir(parents=True, exist_ok=True)
+    np.save(hash_file, current)
+    return added, removed
+
+
+def scan_csv_file(
+    source: dict,
+    datasets_dir: str,
+    row_hash_dir: str = None,
+    orphan_checks: bool = False,
+    bloom_threshold: int = DEFAULT_BLOOM_THRESHOLD,
+) -> dict:
+    """
+    Validate one CSV file in a single memory-mapped pass.
+
+    Args:
+        source: Entry from CSV_SOURCES
+        datasets_dir: Root datasets folder
+        row_hash_dir: If set, hash every record and diff against the previous run
+        orphan_checks: Also collect the key sets used by ORPHAN_CHECKS
+        bloom_threshold: Parent key sets larger than this become Bloom filters
+
+    Returns:
+        Manifest entry for the file ("key_sets" holds the collected keys and
+        is removed before the manifest is written)
+    """
+    path = source_path(source, Path(datasets_dir))
+    expected_columns = source["columns"]
+    expected_count = len(expected_columns)
+    started = time.perf_counter()
+
+    result = {
+        "table_name": source["table"],
+        "source_file": source["file"],
+        "file_size_bytes": 0,
+        "file_mtime": None,
+        "expected_columns": expected_count,
+        "row_count": 0,
+        "bad_row_count": 0,
+        "bad_rows": [],
+        "content_hash": None,
+        "rows_added": None,
+        "rows_removed": None,
+        "header_ok": False,
+        "encoding_ok": True,
+        "has_bom": False,
+        "is_valid": False,
+        "errors": [],
+        "scan_seconds": 0.0,
+    }
+
+    def record_bad(line_no: int, offset: int, reason: str):
+        result["bad_row_count"] += 1
+        if len(result["bad_rows"]) < MAX_BAD_SAMPLES:
+            result["bad_rows"].append(
+                {"line": line_no, "byte_offset": offset, "reason": reason}
+            )
+
+    if not path.is_file():
+        result["errors"].append(f"File not found: {path}")
+        return result
+
+    stat = path.stat()
+    result["file_size_bytes"] = stat.st_size
+    # UTC, so load_bronze_data.sql can compare it with pg_stat_file()
+    result["file_mtime"] = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).replace(
+        tzinfo=None
+    ).isoformat(timespec="seconds")
+
+    if stat.st_size == 0:
+        result["errors"].append("File is empty")
+        return result
+
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        result["content_hash"] = hashlib.blake2b(mm, digest_size=32).hexdigest()
+        row_hashes = bytearray() if row_hash_dir else None
+        roles = key_columns_for(source["table"]) if orphan_checks else {}
+        keys = KeyCollector(expected_columns, roles, bloom_threshold, size) if roles else None
+
+        # ---- Header -------------------------------------------------------
+        pos = 0
+        if mm[:3] == UTF8_BOM:
+            result["has_bom"] = True
+            pos = 3
+
+        header_start = pos
+        header_end, pos, _, terminated = find_record_end(mm, header_start, size)
+        header_raw = mm[header_start:header_end].rstrip(b"\r")
+        try:
+            header = [h.strip() for h in parse_quoted_record(header_raw)]
+            result["header_ok"] = terminated and header == expected_columns
+            if not result["header_ok"]:
+                result["errors"].append(
+                    f"Header mismatch: expected {expected_columns}, found {header}"
+                )
+        except (UnicodeDecodeError, csv.Error) as e:
+            result["errors"].append(f"Unreadable header: {e}")
+
+        # ---- Records ------------------------------------------------------
+        line_no = 2
+        rows = 0
+        while pos < size:
+            start = pos
+            end, pos, lines, terminated = find_record_end(mm, start, size)
+            raw = mm[start:end]
+            if raw.endswith(b"\r"):
+                raw = raw[:-1]
+            rows += 1
+            if row_hashes is not None:
+                row_hashes += hashlib.blake2b(raw, digest_size=8).digest()
+
+            if not terminated:
+                record_bad(line_no, start, "Unterminated quoted field")
+            elif QUOTE not in raw and raw.isascii():
+                # Fast path: plain ASCII record without quotes
+                field_count = raw.count(DELIMITER) + 1
+                if field_count != expected_count:
+                    record_bad(
+                        line_no,
+                        start,
+                        f"Expected {expected_count} columns, found {field_count}",
+                    )
+                elif keys is not None:
+                    keys.add(raw.split(DELIMITER), start)
+            else:
+                try:
+                    if QUOTE in raw:
+                        fields = parse_quoted_record(raw)
+                    else:
+                        fields = raw.decode("utf-8").split(",")
+                    field_count = len(fields)
+                    if field_count != expected_count:
+                        record_bad(
+                            line_no,
+                            start,
+                            f"Expected {expected_count} columns, found {field_count}",
+                        )
+                    elif keys is not None:
+                        keys.add([f.encode("utf-8") for f in fields], start)
+                except UnicodeDecodeError as e:
+                    result["encoding_ok"] = False
+                    record_bad(
+                        line_no,
+                        start + e.start,
+                        f"Invalid UTF-8 byte 0x{raw[e.start]:02x}",
+                    )
+                except csv.Error as e:
+                    record_bad(line_no, start, f"Malformed quoting: {e}")
+
+            line_no += lines
+
+        result["row_count"] = rows
+
+    if keys is not None:
+        result["key_sets"] = keys.finish()
+
+    if row_hashes is not None:
+        result["rows_added"], result["rows_removed"] = diff_row_hashes(
+            row_hashes, Path(row_hash_dir) / f"{source['table']}.npy"
+        )
+
+    if result["bad_row_count"]:
+        result["errors"].append(f"{result['bad_row_count']:,} bad records")
+    if not result["encoding_ok"]:
+        result["errors"].append("File is not valid UTF-8")
+
+    result["is_valid"] = result["header_ok"] and result["bad_row_count"] == 0
+    result["scan_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def validate_all(
+    datasets_dir: Path,
+    workers: int,
+    row_hash_dir: Path = None,
+    orphan_checks: bool = False,
+    bloom_threshold: int = DEFAULT_BLOOM_THRESHOLD,
+) -> list:
+    """
+    Validate all CSV sources in parallel.
+
+    Args:
+        datasets_dir: Root datasets folder
+        workers: Number of worker processes
+        row_hash_dir: If set, keep per-record hashes here and diff against them
+        orphan_checks: Also collect the key sets used by ORPHAN_CHECKS
+        bloom_threshold: Parent key sets larger than this become Bloom filters
+
+    Returns:
+        List of manifest entries in CSV_SOURCES order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                scan_csv_file,
+                source,
+                str(datasets_dir),
+                str(row_hash_dir) if row_hash_dir else None,
+                orphan_checks,
+                bloom_threshold,
+            )
+            for source in CSV_SOURCES
+        ]
+        return [future.result() for future in futures]
+
+
+# =============================================================================
+# ORPHAN CHECKS
+# =============================================================================
+
+
+def read_key_at(path: Path, offset: int, column: int) -> str:
+    """Key value of the record starting at a byte offset."""
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        line = fh.readline().rstrip(b"\r\n").decode("utf-8", errors="replace")
+    fields = next(csv.reader([line]), [])
+    return fields[column].strip() if column < len(fields) else ""
+
+
+def check_orphans(results: list, datasets_dir: Path) -> list:
+    """
+    Match every child key set against its parent key set.
+
+    Consumes the "key_sets" entries of the scan results.
+
+    Args:
+        results: Scan results from validate_all()
+        datasets_dir: Root datasets folder (to read sample records)
+
+    Returns:
+        One audit entry per ORPHAN_CHECKS relationship
+    """
+    by_table = {r["table_name"]: r for r in results}
+    audits = []
+
+    for child, child_col, parent, parent_col, mode in ORPHAN_CHECKS:
+        child_set = by_table[child].get("key_sets", {}).get((child_col, mode))
+        parent_set = by_table[parent].get("key_sets", {}).get((parent_col, mode))
+        audit = {
+            "child_table": child,
+            "child_column": child_col,
+            "parent_table": parent,
+            "parent_column": parent_col,
+            "method": None,
+            "child_rows": None,
+            "parent_keys": None,
+            "orphan_rows": None,
+            "orphan_keys": None,
+            "samples": [],
+        }
+        audits.append(audit)
+        if child_set is None or parent_set is None:
+            continue  # file missing or unreadable, already reported
+
+        if "bloom" in parent_set:
+            found = parent_set["bloom"].contains(child_set["keys"])
+            audit["method"] = "bloom"
+        else:
+            found = np.isin(child_set["keys"], parent_set["keys"], assume_unique=True)
+            audit["method"] = "hash_set"
+        missing = ~found
+
+        audit["child_rows"] = child_set["rows"]
+        audit["parent_keys"] = parent_set["unique_keys"]
+        audit["orphan_keys"] = int(missing.sum())
+        audit["orphan_rows"] = int(child_set["counts"][missing].sum())
+
+        source = get_source(child)
+        column = source["columns"].index(child_col)
+        path = source_path(source, datasets_dir)
+        for offset in np.sort(child_set["first_offsets"][missing])[:MAX_ORPHAN_SAMPLES]:
+            audit["samples"].append(
+                {"key": read_key_at(path, int(offset), column), "byte_offset": int(offset)}
+            )
+
+    for r in results:
+        r.pop("key_sets", None)
+    return audits
+
+
+def write_orphan_audit(audits: list):
+    """
+    Append this run's orphan counts and samples to bronze.dwh_orphan_audit.
+
+    Args:
+        audits: Entries from check_orphans()
+    """
+    insert_query = """
+        INSERT INTO bronze.dwh_orphan_audit (
+            child_table,
+            child_column,
+            parent_table,
+            parent_column,
+            check_method,
+            child_rows,
+            parent_keys,
+            orphan_rows,
+            orphan_keys,
+            sample_keys,
+            sample_offsets,
+            audited_at
+        ) VALUES (
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP
+        );
+    """
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        for a in audits:
+            cursor.execute(
+                insert_query,
+                (
+                    a["child_table"],
+                    a["child_column"],
+                    a["parent_table"],
+                    a["parent_column"],
+                    a["method"],
+                    a["child_rows"],
+                    a["parent_keys"],
+                    a["orphan_rows"],
+                    a["orphan_keys"],
+                    ",".join(s["key"] for s in a["samples"]) or None,
+                    ",".join(str(s["byte_offset"]) for s in a["samples"]) or None,
+                ),
+            )
+        conn.commit()
+        print("  ✓ bronze.dwh_orphan_audit updated")
+
+    except Exception as e:
+        print(f"  ✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+        raise
+
+    finally:
+        if conn:
+            conn.close()
+
+
+def print_orphan_report(audits: list):
+    """Print orphan counts per relationship."""
+    print(f"\n  {'Child -> Parent':<76} {'Orphans':>9}  Method")
+    print("  " + "-" * 94)
+    for a in audits:
+        label = f"{a['child_table']}.{a['child_column']} -> {a['parent_table']}"
+        if a["orphan_rows"] is None:
+            print(f"  {label:<76} {'n/a':>9}")
+            continue
+        mark = "✓" if a["orphan_rows"] == 0 else "!"
+        print(f"  {label:<76} {a['orphan_rows']:>9,}  {a['method']} {mark}")
+        if a["samples"]:
+            keys = ", ".join(s["key"] for s in a["samples"][:3])
+            print(f"      {a['orphan_keys']:,} distinct keys, e.g. {keys}")
+
+
+# =============================================================================
+# MANIFEST OUTPUT
+# =============================================================================
+
+
+def write_manifest_file(results: list, manifest_path: Path):
+    """
+    Write the manifest as JSON.
+
+    Args:
+        results: Manifest entries
+        manifest_path: Destination file
+    """
+    manifest = {
+        "validated_at": datetime.now().isoformat(timespec="seconds"),
+        "is_valid": all(r["is_valid"] for r in results),
+        "files": results,
+    }
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    print(f"  ✓ Manifest written to {manifest_path}")
+
+
+def write_manifest_table(results: list):
+    """
+    Replace the contents of bronze.dwh_preflight_manifest with this run.
+
+    Args:
+        results: Manifest entries
+    """
+    insert_query = """
+        INSERT INTO bronze.dwh_preflight_manifest (
+            table_name,
+            source_file,
+            file_size_bytes,
+            file_mtime,
+            expected_columns,
+            row_count,
+            bad_row_count,
+            bad_row_offsets,
+            content_hash,
+            rows_added,
+            rows_removed,
+            header_ok,
+            encoding_ok,
+            is_valid,
+            validation_errors,
+            validated_at
+        ) VALUES (
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+            %s, %s, %s, %s, CURRENT_TIMESTAMP
+        );
+    """
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM bronze.dwh_preflight_manifest;")
+        for r in results:
+            cursor.execute(
+                insert_query,
+                (
+                    r["table_name"],
+                    r["source_file"],
+                    r["file_size_bytes"],
+                    r["file_mtime"],
+                    r["expected_columns"],
+                    r["row_count"],
+                    r["bad_row_count"],
+                    ",".join(str(b["byte_offset"]) for b in r["bad_rows"]) or None,
+                    r["content_hash"],
+                    r["rows_added"],
+                    r["rows_removed"],
+                    r["header_ok"],
+                    r["encoding_ok"],
+                    r["is_valid"],
+                    "; ".join(r["errors"]) or None,
+                ),
+            )
+
+        conn.commit()
+        print("  ✓ bronze.dwh_preflight_manifest updated")
+
+    except Exception as e:
+        print(f"  ✗ Database error: {e}")
+        if conn:
+            conn.rollback()
+        raise
+
+    finally:
+        if conn:
+            conn.close()
+
+
+def print_report(results: list):
+    """Print a per-file validation summary."""
+    print(f"\n  {'Table':<36} {'Rows':>10} {'Bad':>6} {'Secs':>7}  Status")
+    print("  " + "-" * 72)
+    for r in results:
+        status = "✓ OK" if r["is_valid"] else "✗ FAIL"
+        print(
+            f"  {r['table_name']:<36} {r['row_count']:>10,} "
+            f"{r['bad_row_count']:>6,} {r['scan_seconds']:>7.2f}  {status}"
+        )
+        if r["rows_added"] is not None:
+            print(f"      +{r['rows_added']:,} / -{r['rows_removed']:,} rows since last run")
+        for error in r["errors"]:
+            print(f"      - {error}")
+        for bad in r["bad_rows"][:5]:
+            print(
+                f"      line {bad['line']:,} @ byte {bad['byte_offset']:,}: "
+                f"{bad['reason']}"
+            )
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Validate Bronze CSV datasets")
+    parser.add_argument("--datasets-dir", type=Path, default=DATASETS_DIR)
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+    parser.add_argument("--workers", type=int, default=min(len(CSV_SOURCES), os.cpu_count() or 1))
+    parser.add_argument("--no-db", action="store_true", help="Skip writing the manifest table")
+    parser.add_argument(
+        "--row-hashes", action="store_true", help="Report rows added/removed since last run"
+    )
+    parser.add_argument(
+        "--no-orphans", action="store_true", help="Skip the orphan-key checks"
+    )
+    parser.add_argument(
+        "--bloom-threshold",
+        type=int,
+        default=DEFAULT_BLOOM_THRESHOLD,
+        help="Use a Bloom filter for parent key sets with more unique keys than this",
+    )
+    args = parser.parse_args()
+    row_hash_dir = args.manifest.parent / "row_hashes" if args.row_hashes else None
+
+    print("=" * 60)
+    print("PRE-FLIGHT VALIDATION: BRONZE CSV DATASETS")
+    print("=" * 60)
+    print(f"Datasets: {args.datasets_dir}")
+    print(f"Files: {len(CSV_SOURCES)} | Workers: {args.workers}")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    results = validate_all(
+        args.datasets_dir, args.workers, row_hash_dir, not args.no_orphans, args.bloom_threshold
+    )
+    audits = [] if args.no_orphans else check_orphans(results, args.datasets_dir)
+    elapsed = time.perf_counter() - started
+
+    print_report(results)
+    if audits:
+        print_orphan_report(audits)
+    total_bytes = sum(r["file_size_bytes"] for r in results)
+    print(f"\n  Scanned {total_bytes / 1e6:,.1f} MB in {elapsed:.2f}s")
+
+    print("\nWriting manifest...")
+    write_manifest_file(results, args.manifest)
+    if not args.no_db:
+        write_manifest_table(results)
+        if audits:
+            write_orphan_audit(audits)
+
+    all_valid = all(r["is_valid"] for r in results)
+    print("\n" + "=" * 60)
+    if all_valid:
+        print("✓ All datasets valid - safe to run load_bronze_data.sql")
+    else:
+        print("✗ Validation failed - load_bronze_data.sql will refuse to run")
+    print("=" * 60)
+
+    sys.exit(0 if all_valid else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -411,20 +411,20 @@ COMMENT ON COLUMN silver.olist_closed_deals.seller_id IS 'CRITICAL: Links Market
 COMMENT ON COLUMN silver.olist_closed_deals.has_seller_id IS 'TRUE if seller_id exists (can link to E-Commerce)';
 
 -- ============================================================================
--- SECTION 3: API TABLES (3 tables)
+-- SECTION 3: API TABLES (4 tables)
 -- ============================================================================
 
 -- ----------------------------------------------------------------------------
 -- Table 12: api_currency_rates
 -- Description: Cleaned currency rates with inverse rate
 -- Source: bronze.api_currency_rates
--- Records: ~550
+-- Records: ~550 per target currency
 -- ----------------------------------------------------------------------------
 DROP TABLE IF EXISTS silver.api_currency_rates CASCADE;
 
 CREATE TABLE silver.api_currency_rates (
-    -- Primary Key
-    rate_date                       DATE PRIMARY KEY,
+    -- Primary Key (rate_date, target_currency)
+    rate_date                       DATE NOT NULL,
 
     -- Currency pair
     base_currency                   VARCHAR(3) NOT NULL DEFAULT 'BRL',
@@ -440,12 +440,14 @@ CREATE TABLE silver.api_currency_rates (
     dwh_record_source               VARCHAR(100) DEFAULT 'bronze.api_currency_rates',
     dwh_transformed_at              TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     dwh_is_valid                    BOOLEAN DEFAULT TRUE,
-    dwh_validation_errors           TEXT
+    dwh_validation_errors           TEXT,
+
+    PRIMARY KEY (rate_date, target_currency)
 );
 
-COMMENT ON TABLE silver.api_currency_rates IS 'Cleaned currency rates with inverse calculation';
-COMMENT ON COLUMN silver.api_currency_rates.exchange_rate IS '1 BRL = X USD';
-COMMENT ON COLUMN silver.api_currency_rates.rate_inverse IS '1 USD = X BRL (calculated)';
+COMMENT ON TABLE silver.api_currency_rates IS 'Cleaned currency rates with inverse calculation (one row per date and target currency)';
+COMMENT ON COLUMN silver.api_currency_rates.exchange_rate IS '1 BRL = X target_currency';
+COMMENT ON COLUMN silver.api_currency_rates.rate_inverse IS '1 target_currency = X BRL (calculated)';
 
 -- ----------------------------------------------------------------------------
 -- Table 13: api_brazil_holidays
@@ -488,18 +490,20 @@ COMMENT ON COLUMN silver.api_brazil_holidays.is_weekend IS 'TRUE if holiday fall
 -- Table 14: api_weather_history
 -- Description: Cleaned weather data with categorization
 -- Source: bronze.api_weather_history
--- Records: ~21,330
+-- Records: ~21,330 (state capitals) + ~790 per extra weather point
 -- ----------------------------------------------------------------------------
 DROP TABLE IF EXISTS silver.api_weather_history CASCADE;
 
 CREATE TABLE silver.api_weather_history (
-    -- Location
+    -- Composite Primary Key (weather point + date)
     latitude                        DECIMAL(9,6) NOT NULL,
     longitude                       DECIMAL(9,6) NOT NULL,
+    weather_date                    DATE NOT NULL,
 
-    -- Composite Primary Key
+    -- Location attributes
     state_code                      VARCHAR(2) NOT NULL,
-    weather_date                    DATE NOT NULL,
+    location_name                   VARCHAR(100),
+    location_type                   VARCHAR(20) NOT NULL DEFAULT 'state_capital',
 
     -- Weather metrics (RENAMED for clarity)
     temperature_mean                DECIMAL(5,2),           -- Was: temperature_2m_mean
@@ -518,14 +522,50 @@ CREATE TABLE silver.api_weather_history (
     dwh_is_valid                    BOOLEAN DEFAULT TRUE,
     dwh_validation_errors           TEXT,
 
-    -- Composite PK constraint
-    PRIMARY KEY (state_code, weather_date)
+    -- Composite PK constraint (several points per state are allowed)
+    PRIMARY KEY (latitude, longitude, weather_date)
 );
 
 COMMENT ON TABLE silver.api_weather_history IS 'Cleaned weather data with category classification';
 COMMENT ON COLUMN silver.api_weather_history.weather_category IS 'Derived from WMO code: clear, cloudy, rain, etc.';
+COMMENT ON COLUMN silver.api_weather_history.location_type IS 'state_capital (one per state, Gold fallback) or custom (extra point)';
 COMMENT ON COLUMN silver.api_weather_history.is_extreme_heat IS 'TRUE if temperature_max > 35°C';
 
+-- ----------------------------------------------------------------------------
+-- Table 15: api_weather_hourly
+-- Description: Hourly weather per point-day as 24-slot arrays
+-- Source: bronze.api_weather_hourly
+-- Records: one per weather point per day (empty unless fetched with --hourly)
+-- ----------------------------------------------------------------------------
+DROP TABLE IF EXISTS silver.api_weather_hourly CASCADE;
+
+CREATE TABLE silver.api_weather_hourly (
+    -- Composite Primary Key (weather point + date)
+    latitude                        DECIMAL(9,6) NOT NULL,
+    longitude                       DECIMAL(9,6) NOT NULL,
+    weather_date                    DATE NOT NULL,
+
+    -- Location attributes
+    state_code                      VARCHAR(2) NOT NULL,
+    location_type                   VARCHAR(20) NOT NULL DEFAULT 'state_capital',
+
+    -- Hourly series: element N = hour N-1 local time (arrays are 1-based)
+    temperature_2m                  REAL[],
+    precipitation_mm                REAL[],
+    weather_code                    SMALLINT[],
+
+    -- Silver metadata
+    dwh_record_source               VARCHAR(100) DEFAULT 'bronze.api_weather_hourly',
+    dwh_transformed_at              TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    dwh_is_valid                    BOOLEAN DEFAULT TRUE,
+    dwh_validation_errors           TEXT,
+
+    PRIMARY KEY (latitude, longitude, weather_date)
+);
+
+COMMENT ON TABLE silver.api_weather_hourly IS 'Hourly weather, one row per point-day with 24-element arrays (index = hour + 1)';
+COMMENT ON COLUMN silver.api_weather_hourly.temperature_2m IS 'Air temperature at 2 m (Celsius) per hour, NULL element = missing hour';
+
 -- ============================================================================
 -- SECTION 4: CREATE INDEXES FOR PERFORMANCE
 -- ============================================================================
@@ -561,6 +601,8 @@ CREATE INDEX idx_silver_deals_seller ON silver.olist_closed_deals(seller_id);
 
 -- Weather indexes
 CREATE INDEX idx_silver_weather_date ON silver.api_weather_history(weather_date);
+CREATE INDEX idx_silver_weather_state_date ON silver.api_weather_history(state_code, weather_date);
+CREATE INDEX idx_silver_weather_hourly_state_date ON silver.api_weather_hourly(state_code, weather_date);
 
 -- ============================================================================
 -- SECTION 5: VERIFICATION
@@ -585,7 +627,7 @@ BEGIN
     RAISE NOTICE '============================================================';
     RAISE NOTICE 'SILVER LAYER TABLES CREATED SUCCESSFULLY!';
     RAISE NOTICE '============================================================';
-    RAISE NOTICE 'Tables created (14 total):';
+    RAISE NOTICE 'Tables created (15 total):';
     RAISE NOTICE 'E-Commerce (9):';
     RAISE NOTICE '  1.  silver.olist_orders                         - with delivery metrics';
     RAISE NOTICE '  2.  silver.olist_order_items                    - with item_total';
@@ -599,10 +641,11 @@ BEGIN
     RAISE NOTICE 'Marketing Funnel (2):';
     RAISE NOTICE '  10. silver.olist_mql';
     RAISE NOTICE '  11. silver.olist_closed_deals                   - with has_seller_id flag';
-    RAISE NOTICE 'External APIs (3):';
+    RAISE NOTICE 'External APIs (4):';
     RAISE NOTICE '  12. silver.api_currency_rates                   - with inverse rate';
     RAISE NOTICE '  13. silver.api_brazil_holidays                  - with date components';
     RAISE NOTICE '  14. silver.api_weather_history                  - with weather category';
+    RAISE NOTICE '  15. silver.api_weather_hourly                   - 24-hour arrays per day';
     RAISE NOTICE 'Key differences from Bronze:';
     RAISE NOTICE '  ✓ Proper data types (not all VARCHAR)';
     RAISE NOTICE '  ✓ Primary Key constraints';
@@ -24,7 +24,51 @@
 --
 -- LOAD STRATEGY:
 -- --------------
--- TRUNCATE then INSERT (full reload each time)
+-- TRUNCATE then INSERT (full reload of each table), one transaction per table
+-- (or a keyed merge of new Bronze rows, see INCREMENTAL MODE below).
+--
+-- Zero-downtime refresh (-v shadow_swap=true): each table is instead loaded
+-- into silver.<table>__shadow, its keys/indexes are built there and it is
+-- ANALYZEd, then it replaces the live table by rename (bronze.dwh_shadow_*).
+-- Readers keep querying the previous version until the swap; the swap itself
+-- only holds an exclusive lock for the renames.
+--   psql -d olist_dwh -v shadow_swap=true -f load_silver_data.sql
+--
+-- CHANGE DETECTION:
+-- -----------------
+-- A table is only rebuilt when its Bronze source changed since Silver last
+-- consumed it (bronze.dwh_source_pending, fed by bronze.dwh_load_manifest).
+-- Tables whose source was never fingerprinted are always rebuilt.
+--
+-- Force a full rebuild:
+--   psql -d olist_dwh -v force_reload=true -f load_silver_data.sql
+--
+-- INCREMENTAL MODE:
+-- -----------------
+-- With -v incremental=true a changed table is merged instead of rebuilt:
+--   1. Business keys of Bronze rows with dwh_load_date >= the table's
+--      high-water mark (bronze.dwh_silver_watermark), and of rows deleted
+--      from Bronze since then (bronze.dwh_removed_rows), go to
+--      dwh_delta_keys (bronze.dwh_delta_rows)
+--   2. Silver rows with those keys are deleted
+--   3. The same transform as the full load runs, restricted to ALL Bronze
+--      rows of those keys (:delta_filter), so dedup (reviews, currency
+--      rates) and aggregation (geolocation) give the full-load result, and
+--      a key whose rows all left Bronze leaves Silver too
+--   4. The watermark moves to MAX(dwh_load_date) of the Bronze table (or
+--      its newest tombstone) and merged tombstones are pruned
+-- Merge grain: the Silver primary key, except items and payments (order_id)
+-- and weather (weather_date). Each table runs in one REPEATABLE READ
+-- transaction, so the watermark matches the rows merged; rows stamped with
+-- the watermark itself are merged again next run (idempotent).
+--   psql -d olist_dwh -v incremental=true -f load_silver_data.sql
+--
+-- The merge only pays off when Bronze kept the dwh_load_date of unchanged
+-- rows, i.e. the CSVs were loaded with load_bronze_data.sql
+-- -v delta_load=true. A table that was TRUNCATEd and reloaded since Silver
+-- last read it (every row re-stamped - the default Bronze load and the
+-- scripts/api loaders) is rebuilt in full instead (bronze.dwh_source_mergeable).
+-- shadow_swap is ignored and force_reload disables incremental mode.
 --
 -- ============================================================================
 
@@ -33,6 +77,32 @@
 \echo '============================================================'
 \echo ''
 
+\set ON_ERROR_STOP on
+
+\if :{?force_reload}
+\else
+    \set force_reload false
+\endif
+
+\if :{?shadow_swap}
+\else
+    \set shadow_swap false
+\endif
+
+\if :{?incremental}
+\else
+    \set incremental false
+\endif
+
+\if :force_reload
+    \set incremental false
+\endif
+
+\if :incremental
+    \set shadow_swap false
+    \echo 'Incremental mode: merging Bronze rows loaded since each high-water mark'
+\endif
+
 -- Set search path
 SET search_path TO silver, bronze, public;
 
@@ -44,11 +114,36 @@ SET search_path TO silver, bronze, public;
 -- Table 1: olist_orders
 -- Transformations: Type casts, derived delivery metrics
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_orders') AS reload_table,
+       bronze.dwh_watermark('olist_orders') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_orders') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_orders...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT order_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_orders, :'since')
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_orders WHERE order_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_orders
+\set delta_filter 'AND order_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_orders') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_orders;
+\set target_table silver.olist_orders
+\endif
 
-INSERT INTO silver.olist_orders (
+INSERT INTO :target_table (
     order_id,
     customer_id,
     order_status,
@@ -123,21 +218,59 @@ SELECT
     NULL
 FROM bronze.olist_orders
 WHERE order_id IS NOT NULL
-  AND TRIM(order_id) != '';
+  AND TRIM(order_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_orders']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_orders']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_orders');
+SELECT bronze.dwh_advance_watermark('olist_orders');
+COMMIT;
 
 \echo '  ✓ olist_orders loaded'
 
 -- Verify load
 SELECT 'olist_orders' AS table_name, COUNT(*) AS row_count FROM silver.olist_orders;
+\else
+\echo '  - silver.olist_orders up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 2: olist_order_items
 -- Transformations: Type casts, calculated item_total
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_order_items') AS reload_table,
+       bronze.dwh_watermark('olist_order_items') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_order_items') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_order_items...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT order_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_order_items, :'since')
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_order_items WHERE order_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_order_items
+\set delta_filter 'AND order_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_order_items') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_order_items;
-INSERT INTO silver.olist_order_items (
+\set target_table silver.olist_order_items
+\endif
+
+INSERT INTO :target_table (
     order_id,
     order_item_id,
     product_id,
@@ -179,22 +312,59 @@ SELECT
 
 FROM bronze.olist_order_items
 WHERE order_id IS NOT NULL
-  AND TRIM(order_id) != '';
+  AND TRIM(order_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_order_items']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_order_items']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_order_items');
+SELECT bronze.dwh_advance_watermark('olist_order_items');
+COMMIT;
 
 \echo '  ✓ olist_order_items loaded'
 
 -- Verify load
 SELECT 'olist_order_items' AS table_name, COUNT(*) AS row_count FROM silver.olist_order_items;
+\else
+\echo '  - silver.olist_order_items up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 3: olist_order_payments
 -- Transformations: Type casts, single payment flag
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_order_payments') AS reload_table,
+       bronze.dwh_watermark('olist_order_payments') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_order_payments') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_order_payments...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT order_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_order_payments, :'since')
+WHERE order_id IS NOT NULL
+  AND TRIM(order_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_order_payments WHERE order_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_order_payments
+\set delta_filter 'AND order_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_order_payments') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_order_payments;
+\set target_table silver.olist_order_payments
+\endif
 
-INSERT INTO silver.olist_order_payments (
+INSERT INTO :target_table (
     order_id,
     payment_sequential,
     payment_type,
@@ -227,22 +397,59 @@ SELECT
 
 FROM bronze.olist_order_payments
 WHERE order_id IS NOT NULL
-  AND TRIM(order_id) != '';
+  AND TRIM(order_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_order_payments']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_order_payments']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_order_payments');
+SELECT bronze.dwh_advance_watermark('olist_order_payments');
+COMMIT;
 
 \echo '  ✓ olist_order_payments loaded'
 
 -- Verify load
 SELECT 'olist_order_payments' AS table_name, COUNT(*) AS row_count FROM silver.olist_order_payments;
+\else
+\echo '  - silver.olist_order_payments up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 4: olist_order_reviews
 -- Transformations: Type casts, sentiment flags, validation
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_order_reviews') AS reload_table,
+       bronze.dwh_watermark('olist_order_reviews') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_order_reviews') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_order_reviews...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT review_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_order_reviews, :'since')
+WHERE review_id IS NOT NULL
+  AND TRIM(review_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_order_reviews WHERE review_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_order_reviews
+\set delta_filter 'AND review_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_order_reviews') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_order_reviews;
+\set target_table silver.olist_order_reviews
+\endif
 
-INSERT INTO silver.olist_order_reviews (
+INSERT INTO :target_table (
     review_id,
     order_id,
     review_score,
@@ -307,19 +514,56 @@ SELECT DISTINCT ON (review_id)
 FROM bronze.olist_order_reviews
 WHERE review_id IS NOT NULL
   AND TRIM(review_id) != ''
-ORDER BY review_id, NULLIF(TRIM(review_answer_timestamp), '')::TIMESTAMP DESC NULLS LAST;
+  :delta_filter
+ORDER BY review_id, NULLIF(TRIM(review_answer_timestamp), '')::TIMESTAMP DESC NULLS LAST, order_id;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_order_reviews']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_order_reviews']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_order_reviews');
+SELECT bronze.dwh_advance_watermark('olist_order_reviews');
+COMMIT;
 
 \echo '  ✓ olist_order_reviews loaded'
+\else
+\echo '  - silver.olist_order_reviews up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 5: olist_customers
 -- Transformations: Type casts, location standardization
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_customers') AS reload_table,
+       bronze.dwh_watermark('olist_customers') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_customers') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_customers...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT customer_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_customers, :'since')
+WHERE customer_id IS NOT NULL
+  AND TRIM(customer_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_customers WHERE customer_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_customers
+\set delta_filter 'AND customer_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_customers') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_customers;
+\set target_table silver.olist_customers
+\endif
 
-INSERT INTO silver.olist_customers (
+INSERT INTO :target_table (
     customer_id,
     customer_unique_id,
     customer_zip_code_prefix,
@@ -350,19 +594,56 @@ SELECT
 
 FROM bronze.olist_customers
 WHERE customer_id IS NOT NULL
-  AND TRIM(customer_id) != '';
+  AND TRIM(customer_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_customers']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_customers']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_customers');
+SELECT bronze.dwh_advance_watermark('olist_customers');
+COMMIT;
 
 \echo '  ✓ olist_customers loaded'
+\else
+\echo '  - silver.olist_customers up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 6: olist_sellers
 -- Transformations: Type casts, location standardization
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_sellers') AS reload_table,
+       bronze.dwh_watermark('olist_sellers') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_sellers') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_sellers...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT seller_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_sellers, :'since')
+WHERE seller_id IS NOT NULL
+  AND TRIM(seller_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_sellers WHERE seller_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_sellers
+\set delta_filter 'AND seller_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_sellers') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_sellers;
+\set target_table silver.olist_sellers
+\endif
 
-INSERT INTO silver.olist_sellers (
+INSERT INTO :target_table (
     seller_id,
     seller_zip_code_prefix,
     seller_city,
@@ -389,19 +670,56 @@ SELECT
 
 FROM bronze.olist_sellers
 WHERE seller_id IS NOT NULL
-  AND TRIM(seller_id) != '';
+  AND TRIM(seller_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_sellers']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_sellers']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_sellers');
+SELECT bronze.dwh_advance_watermark('olist_sellers');
+COMMIT;
 
 \echo '  ✓ olist_sellers loaded'
+\else
+\echo '  - silver.olist_sellers up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 7: olist_products
 -- Transformations: Type casts, TYPO FIXES, calculated volume
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_products') AS reload_table,
+       bronze.dwh_watermark('olist_products') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_products') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_products...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT product_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_products, :'since')
+WHERE product_id IS NOT NULL
+  AND TRIM(product_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_products WHERE product_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_products
+\set delta_filter 'AND product_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_products') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_products;
+\set target_table silver.olist_products
+\endif
 
-INSERT INTO silver.olist_products (
+INSERT INTO :target_table (
     product_id,
     product_category_name,
     product_name_length,           -- RENAMED from product_name_lenght
@@ -454,19 +772,56 @@ SELECT
 
 FROM bronze.olist_products
 WHERE product_id IS NOT NULL
-  AND TRIM(product_id) != '';
+  AND TRIM(product_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_products']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_products']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_products');
+SELECT bronze.dwh_advance_watermark('olist_products');
+COMMIT;
 
 \echo '  ✓ olist_products loaded (typos fixed!)'
+\else
+\echo '  - silver.olist_products up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 8: olist_category_translation
 -- Transformations: Type casts, lowercase standardization
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('product_category_name_translation') AS reload_table,
+       bronze.dwh_watermark('product_category_name_translation') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('product_category_name_translation') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_category_translation...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT LOWER(TRIM(product_category_name)) AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.product_category_name_translation, :'since')
+WHERE product_category_name IS NOT NULL
+  AND TRIM(product_category_name) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_category_translation WHERE product_category_name IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_category_translation
+\set delta_filter 'AND LOWER(TRIM(product_category_name)) IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_category_translation') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_category_translation;
+\set target_table silver.olist_category_translation
+\endif
 
-INSERT INTO silver.olist_category_translation (
+INSERT INTO :target_table (
     product_category_name,
     product_category_name_english,
     dwh_record_source,
@@ -489,19 +844,56 @@ SELECT
 
 FROM bronze.product_category_name_translation
 WHERE product_category_name IS NOT NULL
-  AND TRIM(product_category_name) != '';
+  AND TRIM(product_category_name) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_category_translation']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_category_translation']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('product_category_name_translation');
+SELECT bronze.dwh_advance_watermark('product_category_name_translation');
+COMMIT;
 
 \echo '  ✓ olist_category_translation loaded'
+\else
+\echo '  - silver.olist_category_translation up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 9: olist_geolocation
 -- Transformations: DEDUPLICATION, averaged coordinates, renamed columns
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_geolocation') AS reload_table,
+       bronze.dwh_watermark('olist_geolocation') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_geolocation') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_geolocation (deduplicating ~1M to ~19K)...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT LPAD(TRIM(geolocation_zip_code_prefix), 5, '0') AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_geolocation, :'since')
+WHERE geolocation_zip_code_prefix IS NOT NULL
+  AND TRIM(geolocation_zip_code_prefix) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_geolocation WHERE zip_code_prefix IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_geolocation
+\set delta_filter 'AND LPAD(TRIM(geolocation_zip_code_prefix), 5, ''0'') IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_geolocation') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_geolocation;
+\set target_table silver.olist_geolocation
+\endif
 
-INSERT INTO silver.olist_geolocation (
+INSERT INTO :target_table (
     zip_code_prefix,
     latitude,
     longitude,
@@ -535,9 +927,21 @@ SELECT
 FROM bronze.olist_geolocation
 WHERE geolocation_zip_code_prefix IS NOT NULL
   AND TRIM(geolocation_zip_code_prefix) != ''
+  :delta_filter
 GROUP BY LPAD(TRIM(geolocation_zip_code_prefix), 5, '0');
 
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_geolocation']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_geolocation']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_geolocation');
+SELECT bronze.dwh_advance_watermark('olist_geolocation');
+COMMIT;
+
 \echo '  ✓ olist_geolocation loaded (deduplicated!)'
+\else
+\echo '  - silver.olist_geolocation up to date, skipped'
+\endif
 
 -- ============================================================================
 -- SECTION 2: MARKETING FUNNEL TABLES (2 tables)
@@ -547,11 +951,36 @@ GROUP BY LPAD(TRIM(geolocation_zip_code_prefix), 5, '0');
 -- Table 10: olist_mql
 -- Transformations: Type casts, cleaned origin
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_marketing_qualified_leads') AS reload_table,
+       bronze.dwh_watermark('olist_marketing_qualified_leads') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_marketing_qualified_leads') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_mql...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT mql_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_marketing_qualified_leads, :'since')
+WHERE mql_id IS NOT NULL
+  AND TRIM(mql_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_mql WHERE mql_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_mql
+\set delta_filter 'AND mql_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_mql') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_mql;
+\set target_table silver.olist_mql
+\endif
 
-INSERT INTO silver.olist_mql (
+INSERT INTO :target_table (
     mql_id,
     first_contact_date,
     landing_page_id,
@@ -582,19 +1011,56 @@ SELECT
 
 FROM bronze.olist_marketing_qualified_leads
 WHERE mql_id IS NOT NULL
-  AND TRIM(mql_id) != '';
+  AND TRIM(mql_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_mql']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_mql']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_marketing_qualified_leads');
+SELECT bronze.dwh_advance_watermark('olist_marketing_qualified_leads');
+COMMIT;
 
 \echo '  ✓ olist_mql loaded'
+\else
+\echo '  - silver.olist_mql up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 11: olist_closed_deals
 -- Transformations: Type casts, boolean handling, cross-system flag
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('olist_closed_deals') AS reload_table,
+       bronze.dwh_watermark('olist_closed_deals') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('olist_closed_deals') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.olist_closed_deals...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT mql_id AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.olist_closed_deals, :'since')
+WHERE mql_id IS NOT NULL
+  AND TRIM(mql_id) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.olist_closed_deals WHERE mql_id IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.olist_closed_deals
+\set delta_filter 'AND mql_id IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.olist_closed_deals') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.olist_closed_deals;
+\set target_table silver.olist_closed_deals
+\endif
 
-INSERT INTO silver.olist_closed_deals (
+INSERT INTO :target_table (
     mql_id,
     seller_id,
     sdr_id,
@@ -663,23 +1129,60 @@ SELECT
 
 FROM bronze.olist_closed_deals
 WHERE mql_id IS NOT NULL
-  AND TRIM(mql_id) != '';
+  AND TRIM(mql_id) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.olist_closed_deals']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.olist_closed_deals']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('olist_closed_deals');
+SELECT bronze.dwh_advance_watermark('olist_closed_deals');
+COMMIT;
 
 \echo '  ✓ olist_closed_deals loaded'
+\else
+\echo '  - silver.olist_closed_deals up to date, skipped'
+\endif
 
 -- ============================================================================
--- SECTION 3: API TABLES (3 tables)
+-- SECTION 3: API TABLES (4 tables)
 -- ============================================================================
 
 -- ----------------------------------------------------------------------------
 -- Table 12: api_currency_rates
 -- Transformations: Type casts, inverse rate calculation
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('api_currency_rates') AS reload_table,
+       bronze.dwh_watermark('api_currency_rates') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('api_currency_rates') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.api_currency_rates...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT rate_date::DATE AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.api_currency_rates, :'since')
+WHERE rate_date IS NOT NULL
+  AND TRIM(rate_date) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.api_currency_rates WHERE rate_date IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.api_currency_rates
+\set delta_filter 'AND rate_date::DATE IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.api_currency_rates') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.api_currency_rates;
+\set target_table silver.api_currency_rates
+\endif
 
-INSERT INTO silver.api_currency_rates (
+INSERT INTO :target_table (
     rate_date,
     base_currency,
     target_currency,
@@ -690,7 +1193,7 @@ INSERT INTO silver.api_currency_rates (
     dwh_is_valid,
     dwh_validation_errors
 )
-SELECT DISTINCT ON (rate_date::DATE)
+SELECT DISTINCT ON (rate_date::DATE, UPPER(TRIM(target_currency)))
     -- Primary Key
     rate_date::DATE,
 
@@ -713,19 +1216,58 @@ SELECT DISTINCT ON (rate_date::DATE)
 FROM bronze.api_currency_rates
 WHERE rate_date IS NOT NULL
   AND TRIM(rate_date) != ''
-ORDER BY rate_date::DATE;
+  AND target_currency IS NOT NULL
+  AND TRIM(target_currency) != ''
+  :delta_filter
+ORDER BY rate_date::DATE, UPPER(TRIM(target_currency));
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.api_currency_rates']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.api_currency_rates']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('api_currency_rates');
+SELECT bronze.dwh_advance_watermark('api_currency_rates');
+COMMIT;
 
 \echo '  ✓ api_currency_rates loaded'
+\else
+\echo '  - silver.api_currency_rates up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 13: api_brazil_holidays
 -- Transformations: Type casts, boolean handling, date components
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('api_brazil_holidays') AS reload_table,
+       bronze.dwh_watermark('api_brazil_holidays') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('api_brazil_holidays') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.api_brazil_holidays...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT holiday_date::DATE AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.api_brazil_holidays, :'since')
+WHERE holiday_date IS NOT NULL
+  AND TRIM(holiday_date) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.api_brazil_holidays WHERE holiday_date IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.api_brazil_holidays
+\set delta_filter 'AND holiday_date::DATE IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.api_brazil_holidays') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.api_brazil_holidays;
+\set target_table silver.api_brazil_holidays
+\endif
 
-INSERT INTO silver.api_brazil_holidays (
+INSERT INTO :target_table (
     holiday_date,
     local_name,
     holiday_name,
@@ -780,22 +1322,65 @@ SELECT
 
 FROM bronze.api_brazil_holidays
 WHERE holiday_date IS NOT NULL
-  AND TRIM(holiday_date) != '';
+  AND TRIM(holiday_date) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.api_brazil_holidays']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.api_brazil_holidays']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('api_brazil_holidays');
+SELECT bronze.dwh_advance_watermark('api_brazil_holidays');
+COMMIT;
 
 \echo '  ✓ api_brazil_holidays loaded'
+\else
+\echo '  - silver.api_brazil_holidays up to date, skipped'
+\endif
 
 -- ----------------------------------------------------------------------------
 -- Table 14: api_weather_history
 -- Transformations: Type casts, renamed columns, weather category
+-- NOTE: One row per weather point per day (state capitals + optional extra
+--       points); rows loaded before location_type existed are state capitals
 -- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('api_weather_history') AS reload_table,
+       bronze.dwh_watermark('api_weather_history') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('api_weather_history') AS merge_table
+\gset
+\if :reload_table
 \echo 'Loading silver.api_weather_history...'
 
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT weather_date::DATE AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.api_weather_history, :'since')
+WHERE state_code IS NOT NULL
+  AND TRIM(state_code) != ''
+  AND weather_date IS NOT NULL
+  AND TRIM(weather_date) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.api_weather_history WHERE weather_date IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.api_weather_history
+\set delta_filter 'AND weather_date::DATE IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.api_weather_history') AS target_table
+\gset
+\else
 TRUNCATE TABLE silver.api_weather_history;
+\set target_table silver.api_weather_history
+\endif
 
-INSERT INTO silver.api_weather_history (
+INSERT INTO :target_table (
     latitude,
     longitude,
     state_code,
+    location_name,
+    location_type,
     weather_date,
     temperature_mean,
     temperature_max,
@@ -814,8 +1399,12 @@ SELECT
     latitude::DECIMAL(9,6),
     longitude::DECIMAL(9,6),
 
-    -- Composite Primary Key
+    -- State and point attributes
     UPPER(TRIM(state_code)),
+    NULLIF(TRIM(location_name), ''),
+    COALESCE(NULLIF(LOWER(TRIM(location_type)), ''), 'state_capital'),
+
+    -- Composite Primary Key (with latitude, longitude)
     weather_date::DATE,
 
     -- Weather metrics (RENAMED)
@@ -853,9 +1442,118 @@ FROM bronze.api_weather_history
 WHERE state_code IS NOT NULL
   AND TRIM(state_code) != ''
   AND weather_date IS NOT NULL
-  AND TRIM(weather_date) != '';
+  AND TRIM(weather_date) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.api_weather_history']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.api_weather_history']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('api_weather_history');
+SELECT bronze.dwh_advance_watermark('api_weather_history');
+COMMIT;
 
 \echo '  ✓ api_weather_history loaded'
+\else
+\echo '  - silver.api_weather_history up to date, skipped'
+\endif
+
+-- ----------------------------------------------------------------------------
+-- Table 15: api_weather_hourly
+-- Transformations: Comma-separated hour slots → typed 24-element arrays
+-- NOTE: Only populated by fetch_weather.py --hourly; empty otherwise
+-- ----------------------------------------------------------------------------
+SELECT :'force_reload'::BOOLEAN OR bronze.dwh_source_pending('api_weather_hourly') AS reload_table,
+       bronze.dwh_watermark('api_weather_hourly') AS since,
+       :'incremental'::BOOLEAN AND bronze.dwh_source_mergeable('api_weather_hourly') AS merge_table
+\gset
+\if :reload_table
+\echo 'Loading silver.api_weather_hourly...'
+
+BEGIN;
+
+\set delta_filter ''
+\if :merge_table
+SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;
+CREATE TEMP TABLE dwh_delta_keys ON COMMIT DROP AS
+SELECT DISTINCT weather_date::DATE AS delta_key
+FROM bronze.dwh_delta_rows(NULL::bronze.api_weather_hourly, :'since')
+WHERE state_code IS NOT NULL
+  AND TRIM(state_code) != ''
+  AND weather_date IS NOT NULL
+  AND TRIM(weather_date) != '';
+ANALYZE dwh_delta_keys;
+DELETE FROM silver.api_weather_hourly WHERE weather_date IN (SELECT delta_key FROM dwh_delta_keys);
+\set target_table silver.api_weather_hourly
+\set delta_filter 'AND weather_date::DATE IN (SELECT delta_key FROM dwh_delta_keys)'
+\elif :shadow_swap
+SELECT bronze.dwh_shadow_create('silver.api_weather_hourly') AS target_table
+\gset
+\else
+TRUNCATE TABLE silver.api_weather_hourly;
+\set target_table silver.api_weather_hourly
+\endif
+
+INSERT INTO :target_table (
+    latitude,
+    longitude,
+    weather_date,
+    state_code,
+    location_type,
+    temperature_2m,
+    precipitation_mm,
+    weather_code,
+    dwh_record_source,
+    dwh_transformed_at,
+    dwh_is_valid,
+    dwh_validation_errors
+)
+SELECT
+    -- Composite Primary Key
+    latitude::DECIMAL(9,6),
+    longitude::DECIMAL(9,6),
+    weather_date::DATE,
+
+    -- Location attributes
+    UPPER(TRIM(state_code)),
+    COALESCE(NULLIF(LOWER(TRIM(location_type)), ''), 'state_capital'),
+
+    -- Hour slots (empty slot → NULL element)
+    string_to_array(temperature_2m, ',', '')::REAL[],
+    string_to_array(precipitation, ',', '')::REAL[],
+    string_to_array(weather_code, ',', '')::SMALLINT[],
+
+    -- Metadata
+    'bronze.api_weather_hourly',
+    CURRENT_TIMESTAMP,
+    -- Validation: a full day has 24 temperature values
+    (cardinality(string_to_array(temperature_2m, ',', '')) = 24
+     AND array_position(string_to_array(temperature_2m, ',', ''), NULL) IS NULL),
+    CASE
+        WHEN cardinality(string_to_array(temperature_2m, ',', '')) != 24
+          OR array_position(string_to_array(temperature_2m, ',', ''), NULL) IS NOT NULL
+        THEN 'Missing hourly temperature values'
+    END
+
+FROM bronze.api_weather_hourly
+WHERE state_code IS NOT NULL
+  AND TRIM(state_code) != ''
+  AND weather_date IS NOT NULL
+  AND TRIM(weather_date) != ''
+  :delta_filter;
+
+\if :shadow_swap
+SELECT bronze.dwh_shadow_finalize(ARRAY['silver.api_weather_hourly']::REGCLASS[]);
+SELECT bronze.dwh_shadow_swap(ARRAY['silver.api_weather_hourly']::REGCLASS[]);
+\endif
+SELECT bronze.dwh_mark_consumed('api_weather_hourly');
+SELECT bronze.dwh_advance_watermark('api_weather_hourly');
+COMMIT;
+
+\echo '  ✓ api_weather_hourly loaded'
+\else
+\echo '  - silver.api_weather_hourly up to date, skipped'
+\endif
 
 -- ============================================================================
 -- SECTION 4: VERIFICATION QUERIES
@@ -923,6 +1621,10 @@ UNION ALL
 SELECT 'api_weather_history',
     (SELECT COUNT(*) FROM bronze.api_weather_history),
     (SELECT COUNT(*) FROM silver.api_weather_history)
+UNION ALL
+SELECT 'api_weather_hourly',
+    (SELECT COUNT(*) FROM bronze.api_weather_hourly),
+    (SELECT COUNT(*) FROM silver.api_weather_hourly)
 ORDER BY table_name;
 
 \echo ''
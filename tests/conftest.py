@@ -0,0 +1,14 @@
+"""
+Make the pipeline and API scripts importable the way they import each other
+(flat modules run from their own directory, e.g. `from common import ...`).
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+for folder in ("pipeline", "api"):
+    path = str(SCRIPTS_DIR / folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,88 @@
+"""
+Tests for the as-of rate lookup and rounding of scripts/pipeline/convert_currency.py.
+
+gold.dwh_asof_rates (load_gold_currency.sql) and the DuckDB ASOF port must
+give the same answers: the latest rate on or before the day, usable while
+it is at most max_rate_age days old, amounts rounded half away from zero.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from convert_currency import RATE_SCALE, RateTable, convert_cents, date_key_days
+
+
+def days(*date_keys) -> np.ndarray:
+    return date_key_days(np.array(date_keys, dtype=np.int64))
+
+
+def micros(*rates) -> np.ndarray:
+    return np.array([round(rate * RATE_SCALE) for rate in rates], dtype=np.int64)
+
+
+def rate_table() -> RateTable:
+    """EUR: 2017-03-01, 2017-03-03; USD: 2017-03-02, 2017-03-20 (12-day gap)."""
+    return RateTable(
+        ["EUR", "USD"],
+        np.array([1, 0, 1, 0], dtype=np.int64),
+        days(20170320, 20170303, 20170302, 20170301),
+        micros(0.30, 0.29, 0.31, 0.28),
+    )
+
+
+def asof_rates(table: RateTable, date_keys: tuple, max_age: int = 7) -> dict:
+    """{currency: [rate or None per day]} looked up through RateTable.asof."""
+    positions = table.asof(days(*date_keys), max_age)
+    return {
+        currency: [None if p < 0 else int(table.rates[p]) for p in positions[c]]
+        for c, currency in enumerate(table.currencies)
+    }
+
+
+def test_date_key_days():
+    assert days(19700101, 19700201, 20170301).tolist() == [0, 31, 17226]
+
+
+def test_order_before_the_first_rate_has_no_rate():
+    rates = asof_rates(rate_table(), (20170228, 20170301))
+    # 2017-03-01 is before USD's first rate; the lookup must not fall back
+    # into EUR's key range
+    assert rates["EUR"] == [None, micros(0.28)[0]]
+    assert rates["USD"] == [None, None]
+
+
+def test_exact_rate_date_uses_that_days_rate():
+    rates = asof_rates(rate_table(), (20170302, 20170303, 20170320))
+    # EUR 03-03 is 17 days old on 03-20
+    assert rates["EUR"] == [micros(0.28)[0], micros(0.29)[0], None]
+    assert rates["USD"] == micros(0.31, 0.31, 0.30).tolist()
+
+
+def test_gap_longer_than_max_rate_age():
+    # USD 2017-03-02 is 7 days old on 03-09 (usable) and 8 on 03-10 (not),
+    # until the next rate on 03-20
+    rates = asof_rates(rate_table(), (20170309, 20170310, 20170319, 20170320))
+    assert rates["USD"] == [micros(0.31)[0], None, None, micros(0.30)[0]]
+    rates = asof_rates(rate_table(), (20170310,), max_age=8)
+    assert rates["USD"] == [micros(0.31)[0]]
+
+
+def test_convert_cents_rounds_half_away_from_zero():
+    half = micros(0.5)
+    cents = np.array([1, -1, 3, -3, 0], dtype=np.int64)
+    # 0.5, -0.5, 1.5, -1.5, 0 cents
+    assert convert_cents(cents, np.repeat(half, 5)).tolist() == [1, -1, 2, -2, 0]
+
+
+def test_convert_cents_matches_exact_decimal_rounding():
+    # Same result as ROUND(amount * rate, 2) on NUMERIC, also for amounts
+    # whose cents * rate would overflow int64
+    cents = [-1_234_567, -2_701, 2_701, 99_999_999_999, -99_999_999_999]
+    rate = Decimal("0.185123")
+    expected = [
+        int((Decimal(c) * rate).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        for c in cents
+    ]
+    result = convert_cents(np.array(cents, dtype=np.int64), micros(*[0.185123] * len(cents)))
+    assert result.tolist() == expected
@@ -0,0 +1,85 @@
+"""
+Tests for the hourly -> daily rollup of scripts/api/fetch_weather.py --hourly.
+
+The daily rows must stay compatible with the daily API rows in
+bronze.api_weather_history: local-date grouping, mean/max temperature and
+precipitation sum over the hours present, and the dominant weather code.
+"""
+
+from fetch_weather import DAILY_COLUMNS, HOURLY_COLUMNS, dominant_code, rollup_hourly
+
+LOCATION = {"lat": -23.55, "lon": -46.63, "state": "SP", "city": "Sao Paulo", "type": "capital"}
+
+
+def hourly_payload(hours: dict) -> dict:
+    """{"YYYY-MM-DDTHH:00": (temperature, precipitation, code)} -> API "hourly" object."""
+    times = sorted(hours)
+    return {
+        "time": times,
+        "temperature_2m": [hours[t][0] for t in times],
+        "precipitation": [hours[t][1] for t in times],
+        "weather_code": [hours[t][2] for t in times],
+    }
+
+
+def rollup(hours: dict) -> list:
+    """Rows as {column: value} dicts, per day."""
+    return [
+        (dict(zip(HOURLY_COLUMNS, hourly_row)), dict(zip(DAILY_COLUMNS, daily_row)))
+        for hourly_row, daily_row in rollup_hourly(LOCATION, hourly_payload(hours))
+    ]
+
+
+def test_full_day():
+    hours = {
+        f"2017-03-01T{h:02d}:00": (10.0 + h, 0.5 if h < 4 else 0.0, 61 if h < 12 else 3)
+        for h in range(24)
+    }
+    [(hourly, daily)] = rollup(hours)
+
+    assert hourly["weather_date"] == daily["weather_date"] == "2017-03-01"
+    assert hourly["temperature_2m"].split(",") == [str(10.0 + h) for h in range(24)]
+    assert hourly["weather_code"].split(",")[11:13] == ["61", "3"]
+    assert daily["state_code"] == "SP"
+    assert daily["temperature_2m_mean"] == "21.5"
+    assert daily["temperature_2m_max"] == "33.0"
+    assert daily["precipitation_sum"] == "2.0"
+    # 12 hours each: the tie goes to the more severe code
+    assert daily["weather_code"] == "61"
+    assert daily["dwh_source_file"] == "api_open_meteo_hourly"
+
+
+def test_missing_hours_stay_empty_and_are_left_out_of_the_rollup():
+    hours = {
+        "2017-03-01T00:00": (20.0, 0.0, 1),
+        "2017-03-01T05:00": (None, None, None),      # returned, but null
+        "2017-03-01T06:00": (24.0, 1.25, 2),
+        "2017-03-01T23:00": (22.0, None, 2),
+        # the next local day starts a new row
+        "2017-03-02T00:00": (None, None, None),
+    }
+    (hourly, daily), (next_hourly, next_daily) = rollup(hours)
+
+    slots = hourly["temperature_2m"].split(",")
+    assert len(slots) == 24
+    assert (slots[0], slots[5], slots[6], slots[23]) == ("20.0", "", "24.0", "22.0")
+    assert slots.count("") == 21
+    assert hourly["precipitation"].split(",")[23] == ""
+    assert daily["temperature_2m_mean"] == "22.0"
+    assert daily["temperature_2m_max"] == "24.0"
+    assert daily["precipitation_sum"] == "1.25"
+    assert daily["weather_code"] == "2"
+
+    # A day without any value has no daily values at all
+    assert next_hourly["weather_date"] == "2017-03-02"
+    assert next_hourly["temperature_2m"] == "," * 23
+    assert [next_daily[c] for c in ("temperature_2m_mean", "temperature_2m_max",
+                                     "precipitation_sum", "weather_code")] == [None] * 4
+
+
+def test_dominant_code_counts_first_then_severity():
+    assert dominant_code([1, 1, 1, 95]) == 1
+    assert dominant_code([3, 61, 61, 3]) == 61
+    # Missing hours are not a code, however many there are
+    assert dominant_code([None, None, None, 2, 3]) == 3
+    assert dominant_code([None] * 24) is None
@@ -0,0 +1,198 @@
+"""Tests for scripts/pipeline/sql_script.py (the psql script emulator)."""
+
+import pytest
+
+from sql_script import (
+    MetaCommand,
+    ScriptRunner,
+    Statement,
+    interpolate,
+    normalize_sql,
+    parse_script,
+)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+class RecordingCursor:
+    """Cursor that records statements and answers \\gset queries from `results`."""
+
+    def __init__(self, results: dict):
+        self.results = results
+        self.executed = []
+        self.description = None
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        row = self.results.get(sql)
+        if row is None:
+            self.description, self.rows = None, []
+        else:
+            self.description = [type("Column", (), {"name": name}) for name in row]
+            self.rows = [tuple(row.values())]
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+
+class RecordingConnection:
+    def __init__(self, results: dict = None):
+        self.cursor_ = RecordingCursor(results or {})
+
+    def cursor(self):
+        return self.cursor_
+
+
+def run_script(tmp_path, text: str, variables: dict = None, results: dict = None):
+    """Run a script text; returns (completed, executed SQL, runner)."""
+    script = tmp_path / "script.sql"
+    script.write_text(text, encoding="utf-8")
+    conn = RecordingConnection(results)
+    runner = ScriptRunner(conn, variables, echo=lambda text: None)
+    completed = runner.run(script)
+    return completed, conn.cursor_.executed, runner
+
+
+# =============================================================================
+# parse_script
+# =============================================================================
+
+
+def test_parse_splits_statements_and_meta_commands():
+    items = parse_script("SELECT 1;\n\\echo 'hi there'\nSELECT 2;\n")
+    assert [type(item) for item in items] == [Statement, MetaCommand, Statement]
+    assert items[0].sql == "SELECT 1;"
+    assert items[1].command == "echo"
+    assert items[1].tokens == [("literal", "hi there")]
+    assert (items[2].sql, items[2].line) == ("SELECT 2;", 3)
+
+
+def test_parse_keeps_semicolons_inside_quotes():
+    items = parse_script("SELECT 'a;b', \"c;d\" FROM t;\nSELECT 'it''s;';")
+    assert [item.sql for item in items] == [
+        "SELECT 'a;b', \"c;d\" FROM t;",
+        "SELECT 'it''s;';",
+    ]
+
+
+def test_parse_keeps_dollar_quoted_bodies_whole():
+    text = (
+        "CREATE FUNCTION f() RETURNS INT AS $body$\n"
+        "BEGIN\n    PERFORM 1; -- not a comment here\n    RETURN 1;\nEND;\n$body$ LANGUAGE plpgsql;\n"
+        "DO $$ BEGIN RAISE NOTICE 'x;y'; END $$;\n"
+    )
+    items = parse_script(text)
+    assert len(items) == 2
+    assert items[0].sql.endswith("$body$ LANGUAGE plpgsql;")
+    assert "PERFORM 1; -- not a comment here" in items[0].sql
+    assert items[1].sql == "DO $$ BEGIN RAISE NOTICE 'x;y'; END $$;"
+    assert items[1].line == 7
+
+
+def test_parse_ignores_comments():
+    items = parse_script(
+        "-- header; with a semicolon\n"
+        "/* block; comment\n   \\echo not a meta-command */\n"
+        "SELECT 1; -- trailing;\n"
+    )
+    # Comments stay in the text sent to the server, but split nothing
+    assert len(items) == 1
+    assert normalize_sql(items[0].sql) == "SELECT 1;"
+    assert items[0].line == 4
+
+
+def test_parse_gset_terminates_the_statement():
+    items = parse_script("SELECT 1 AS a\n\\gset merge_\nSELECT 2 AS b\n\\gset\n")
+    assert [(item.sql, item.gset_prefix) for item in items] == [
+        ("SELECT 1 AS a", "merge_"),
+        ("SELECT 2 AS b", ""),
+    ]
+
+
+# =============================================================================
+# interpolate
+# =============================================================================
+
+
+def test_interpolate_variable_forms():
+    variables = {"n": "42", "path": "/data/it's", "tbl": "my table"}
+    sql = "SELECT :n, :'path', :\"tbl\", :{?n}, :{?missing};"
+    assert interpolate(sql, variables) == (
+        "SELECT 42, '/data/it''s', \"my table\", TRUE, FALSE;"
+    )
+
+
+def test_interpolate_leaves_unknown_casts_and_quotes_alone():
+    variables = {"n": "42"}
+    sql = "SELECT :unknown, x::INT, ':n', $$ :n $$, 'a' -- :n\n"
+    assert interpolate(sql, variables) == sql
+
+
+# =============================================================================
+# ScriptRunner branching
+# =============================================================================
+
+
+def test_if_elif_else_picks_one_branch(tmp_path):
+    text = (
+        "\\if :first\nSELECT 'first';\n"
+        "\\elif :second\nSELECT 'second';\n"
+        "\\else\nSELECT 'else';\n"
+        "\\endif\n"
+    )
+    for first, second, expected in (
+        ("true", "true", "SELECT 'first';"),
+        ("false", "on", "SELECT 'second';"),
+        ("off", "0", "SELECT 'else';"),
+    ):
+        _, executed, _ = run_script(tmp_path, text, {"first": first, "second": second})
+        assert executed == [expected]
+
+
+def test_nested_if_inside_inactive_branch_stays_inactive(tmp_path):
+    text = (
+        "\\if :outer\n"
+        "\\if :inner\nSELECT 'inner';\n\\else\nSELECT 'inner else';\n\\endif\n"
+        "\\endif\n"
+        "SELECT 'after';\n"
+    )
+    _, executed, _ = run_script(tmp_path, text, {"outer": "false", "inner": "false"})
+    assert executed == ["SELECT 'after';"]
+
+
+def test_default_with_defined_check(tmp_path):
+    text = "\\if :{?mode}\n\\else\n\\set mode fast\n\\endif\nSELECT :'mode';\n"
+    assert run_script(tmp_path, text)[1] == ["SELECT 'fast';"]
+    assert run_script(tmp_path, text, {"mode": "slow"})[1] == ["SELECT 'slow';"]
+
+
+def test_gset_sets_prefixed_variables_and_drives_if(tmp_path):
+    results = {"SELECT TRUE AS reload_table, 7 AS rows_added": {"reload_table": True, "rows_added": 7}}
+    text = (
+        "SELECT TRUE AS reload_table, 7 AS rows_added\n\\gset merge_\n"
+        "\\if :merge_reload_table\nSELECT :merge_rows_added;\n\\endif\n"
+    )
+    _, executed, runner = run_script(tmp_path, text, results=results)
+    assert runner.variables["merge_reload_table"] == "t"
+    assert executed[-1] == "SELECT 7;"
+
+
+def test_quit_stops_the_script(tmp_path):
+    completed, executed, _ = run_script(tmp_path, "SELECT 1;\n\\quit\nSELECT 2;\n")
+    assert completed is False
+    assert executed == ["SELECT 1;"]
+
+
+def test_endif_without_if_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        run_script(tmp_path, "\\endif\n")
@@ -0,0 +1,190 @@
+"""
+Tests for the exactly-once guarantees of scripts/api/work_queue.py.
+
+They need a PostgreSQL server (DB_HOST / DB_PORT / DB_USER / DB_PASSWORD
+from .env or the environment, like the scripts); a scratch database with
+the Bronze schema is created for the module and dropped afterwards. Without
+a reachable server the tests are skipped.
+"""
+
+import os
+import threading
+
+import psycopg2
+import pytest
+
+import work_queue
+from common import PROJECT_ROOT
+from load_manifest import SpooledCsv
+from sql_script import ScriptRunner
+
+SOURCE = "currency"
+TABLE = "api_currency_rates"
+COLUMNS = ["rate_date", "base_currency", "target_currency", "exchange_rate", "dwh_source_file"]
+TARGETS = {TABLE: COLUMNS}
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+
+@pytest.fixture(scope="module")
+def scratch_db():
+    """Create a database with the Bronze schema; work_queue connects to it."""
+    name = f"dwh_test_work_queue_{os.getpid()}"
+    try:
+        admin = psycopg2.connect(**{**work_queue.DB_CONFIG, "database": "postgres"})
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not reachable: {e}")
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f'CREATE DATABASE "{name}";')
+
+    original = work_queue.DB_CONFIG["database"]
+    work_queue.DB_CONFIG["database"] = name
+    try:
+        conn = work_queue.get_db_connection()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE SCHEMA bronze;")
+        ScriptRunner(conn, echo=lambda text: None).run(
+            PROJECT_ROOT / "scripts" / "bronze" / "create_bronze_tables.sql"
+        )
+        conn.close()
+        yield name
+    finally:
+        work_queue.DB_CONFIG["database"] = original
+        with admin.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE);')
+        admin.close()
+
+
+@pytest.fixture
+def db(scratch_db):
+    """Connection to the scratch database; queue state is reset per test."""
+    conn = work_queue.get_db_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM bronze.dwh_api_run;")
+        cursor.execute(f"TRUNCATE bronze.{TABLE}, {work_queue.queue_table(TABLE)};")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def job_output(currency: str) -> dict:
+    """One job's rows, as run_job() returns them."""
+    out = SpooledCsv()
+    out.writerow(["2017-03-01", "BRL", currency, "0.3", "api_frankfurter"])
+    out.writerow(["2017-03-02", "BRL", currency, "0.31", "api_frankfurter"])
+    return {TABLE: out}
+
+
+def enqueue(count: int) -> int:
+    jobs = [(f"C{i:02d}|2017-01-01", {"currency": f"C{i:02d}"}) for i in range(count)]
+    return work_queue.enqueue(SOURCE, jobs)
+
+
+def fetch_all(conn, sql: str, params=None) -> list:
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
+
+
+# =============================================================================
+# TESTS
+# =============================================================================
+
+
+def test_expired_lease_is_reclaimed_and_the_late_worker_loses(db):
+    enqueue(1)
+    first = work_queue.get_db_connection()
+    second = work_queue.get_db_connection()
+    try:
+        job = work_queue.claim_job(first, "w1", 300)
+        assert job is not None
+        # A live lease is not claimable
+        assert work_queue.claim_job(second, "w2", 300) is None
+
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE bronze.dwh_api_job SET lease_expires_at = "
+                           "CURRENT_TIMESTAMP - INTERVAL '1 second';")
+        db.commit()
+
+        reclaimed = work_queue.claim_job(second, "w2", 300)
+        assert reclaimed is not None and reclaimed[0] == job[0]
+        assert fetch_all(db, "SELECT attempts, lease_owner FROM bronze.dwh_api_job;") == [(2, "w2")]
+
+        # The worker that lost its lease writes nothing
+        assert work_queue.complete_job(first, job[0], "w1", job_output("C00"), TARGETS) is False
+        assert fetch_all(db, f"SELECT COUNT(*) FROM {work_queue.queue_table(TABLE)};") == [(0,)]
+
+        assert work_queue.complete_job(second, job[0], "w2", job_output("C00"), TARGETS) is True
+        assert fetch_all(db, f"SELECT COUNT(*) FROM {work_queue.queue_table(TABLE)};") == [(2,)]
+        assert fetch_all(db, "SELECT status, lease_owner FROM bronze.dwh_api_job;") == [("done", None)]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_concurrent_workers_never_claim_the_same_job(db):
+    enqueue(40)
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        conn = work_queue.get_db_connection()
+        try:
+            while True:
+                job = work_queue.claim_job(conn, worker_id, 300)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job[0])
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(claimed) == 40
+    assert len(set(claimed)) == 40
+
+
+def test_finalize_run_has_a_single_winner(db):
+    run_id = enqueue(3)
+    jobs = [work_queue.claim_job(db, "w1", 300) for _ in range(3)]
+
+    # Not finished yet: nothing is loaded
+    for job in jobs[:2]:
+        assert work_queue.complete_job(db, job[0], "w1", job_output(job[3][:3]), TARGETS)
+    assert work_queue.finalize_run(db, run_id) is False
+    assert work_queue.complete_job(db, jobs[2][0], "w1", job_output(jobs[2][3][:3]), TARGETS)
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def finalize():
+        conn = work_queue.get_db_connection()
+        try:
+            barrier.wait()
+            results.append(work_queue.finalize_run(conn, run_id))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=finalize) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False] * 7 + [True]
+    assert fetch_all(db, "SELECT status FROM bronze.dwh_api_run WHERE run_id = %s;", (run_id,)) == [("finalized",)]
+    assert fetch_all(db, f"SELECT COUNT(*), COUNT(DISTINCT (rate_date, target_currency)) "
+                         f"FROM bronze.{TABLE};") == [(6, 6)]
+    assert fetch_all(db, f"SELECT COUNT(*) FROM {work_queue.queue_table(TABLE)};") == [(0,)]